@@ -99,6 +99,7 @@ def create_app(bypass_auth: bool = False): # Added bypass_auth parameter
                 session['url'] = settings.DEFAULT_URL or 'http://localhost:8080' # Corrected setting name
                 # Provide a basic dummy user structure
                 session['user'] = {'username': 'bypass_user', 'roles': ['admin', 'developer']} # Example roles
+                session['username'] = 'bypass_user'
                 logging.info(f"Auth bypass: Injected dummy session for user 'bypass_user' targeting URL '{session['url']}'")
     # --- End Auth Bypass Hook ---
 
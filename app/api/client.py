@@ -1,17 +1,44 @@
 """
 Base API client for external API calls.
 """
+import hashlib
 import logging
+import os
+import threading
 import time
 import json # Added for cookie persistence
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict, Any, Optional, Tuple, Union, List
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple, Union, List, Iterator, Callable
+from urllib.parse import urlparse
 
+import ijson
 import requests
-from requests.exceptions import RequestException, Timeout
+from requests.exceptions import RequestException, Timeout, ReadTimeout, ConnectionError as RequestsConnectionError
 
+from app.api.resilience import RetryPolicy, default_retry_policy, get_circuit_breaker
 from app.config import settings
-from app.core.exceptions import ApiRequestError, InvalidSession
+from app.core.exceptions import ApiRequestError, InvalidSession, CircuitOpenError
+from app.utils.dataset_store import commit_dataset, dataset_exists, open_dataset_writer, temp_path_for
+
+# Responses that count as a failure of the host for its circuit breaker
+_CIRCUIT_FAILURE_STATUSES = frozenset((500, 502, 504))
+
+# Last-known GET responses kept per client, served while the host's circuit is open
+_LAST_KNOWN_MAX_ENTRIES = 64
+_LAST_KNOWN_MAX_BYTES = 1024 * 1024
+
+# Bytes of a streamed document passed to select_prefix to recognise its format
+_PREFIX_HEADER_BYTES = 1000
+
+@dataclass(frozen=True)
+class StreamedDocument:
+    """Outcome of ApiClient.stream_json_records."""
+    record_count: int
+    sha256: str
+    replaced: bool  # False when the payload matched the existing file
 
 class ApiClient:
     """Base API client for making HTTP requests."""
@@ -21,7 +48,8 @@ class ApiClient:
         base_url: str, 
         timeout: Optional[Tuple[int, int]] = None,
         verify_ssl: Optional[bool] = None,
-        cookies: Optional[Dict[str, str]] = None
+        cookies: Optional[Dict[str, str]] = None,
+        retry_policy: Optional[RetryPolicy] = None
     ):
         """
         Initialize the API client.
@@ -31,9 +59,14 @@ class ApiClient:
             timeout: Request timeout tuple (connect, read)
             verify_ssl: Whether to verify SSL certificates
             cookies: Dictionary of cookies to use for requests
+            retry_policy: Retry policy for idempotent requests (default: from settings)
         """
         self.base_url = base_url.rstrip('/')
         self.timeout = timeout or settings.REQUEST_TIMEOUT
+        self.retry_policy = retry_policy or default_retry_policy()
+        self.circuit_breaker = get_circuit_breaker(urlparse(self.base_url).netloc)
+        self._last_known: "OrderedDict[Tuple[str, str], Tuple[requests.Response, float]]" = OrderedDict()
+        self._last_known_lock = threading.Lock()
         
         # Determine SSL verification setting
         if hasattr(settings, 'CUSTOM_CA_BUNDLE') and settings.CUSTOM_CA_BUNDLE:
@@ -89,6 +122,84 @@ class ApiClient:
         """
         return requests.utils.dict_from_cookiejar(self.session.cookies)
     
+    def _send(self, method: str, url: str, idempotent: Optional[bool] = None, **kwargs) -> requests.Response:
+        """
+        Send a request through the host's circuit breaker, retrying idempotent
+        requests on connection errors and retryable statuses.
+        
+        idempotent overrides the retry policy's choice by method (e.g. for
+        POSTs that only read state).
+        
+        Read timeouts are not retried (the server already had the full
+        timeout), but like connection errors and 500/502/504 responses they
+        count towards opening the circuit.
+        
+        Raises:
+            CircuitOpenError: If the host's circuit is open
+            requests.RequestException: If the last attempt failed to connect or timed out
+        """
+        breaker = self.circuit_breaker
+        retryable = self.retry_policy.is_retryable(method) if idempotent is None else idempotent
+        attempt = 0
+        while True:
+            attempt += 1
+            if not breaker.allow_request():
+                raise CircuitOpenError(details={"url": url, "retry_in": round(breaker.retry_in(), 1)})
+            
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (RequestsConnectionError, Timeout) as e:
+                breaker.record_failure()
+                if isinstance(e, ReadTimeout) or not retryable or not self.retry_policy.should_retry(attempt):
+                    raise
+                delay = self.retry_policy.delay(attempt)
+                reason = type(e).__name__
+            else:
+                if response.status_code in _CIRCUIT_FAILURE_STATUSES:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                retry_after = response.headers.get('Retry-After')
+                if not retryable or not self.retry_policy.should_retry(attempt, response.status_code, retry_after):
+                    return response
+                delay = self.retry_policy.delay(attempt, retry_after)
+                reason = f"status {response.status_code}"
+                response.close()
+            
+            logging.warning(f"{method} {url} attempt {attempt} failed ({reason}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+    def _remember_response(self, url: str, params: Optional[Dict[str, Any]], response: requests.Response) -> None:
+        """Keep a small successful GET response as the last-known data for its URL."""
+        if response.status_code != 200 or len(response.content) > _LAST_KNOWN_MAX_BYTES:
+            return
+        key = (url, repr(sorted((params or {}).items())))
+        with self._last_known_lock:
+            self._last_known[key] = (response, time.time())
+            self._last_known.move_to_end(key)
+            while len(self._last_known) > _LAST_KNOWN_MAX_ENTRIES:
+                self._last_known.popitem(last=False)
+
+    def _last_known_response(self, url: str, params: Optional[Dict[str, Any]]) -> Optional[requests.Response]:
+        """
+        Copy of the last-known response for a URL, marked stale with
+        Warning: 110 and an Age header, or None.
+        """
+        with self._last_known_lock:
+            entry = self._last_known.get((url, repr(sorted((params or {}).items()))))
+        if entry is None:
+            return None
+        original, stored_at = entry
+        response = requests.Response()
+        response.status_code = original.status_code
+        response._content = original.content
+        response.headers = requests.structures.CaseInsensitiveDict(original.headers)
+        response.headers['Warning'] = '110 - "Response is Stale"'
+        response.headers['Age'] = str(int(time.time() - stored_at))
+        response.encoding = original.encoding
+        response.url = original.url
+        return response
+
     def get(
         self, 
         endpoint: str,
@@ -136,22 +247,30 @@ class ApiClient:
         logging.info(f"Making GET request to {url}")
         
         try:
-            response = self.session.get(
-                url,
-                params=params,
-                headers=request_headers,
-                timeout=self.timeout,
-                verify=self.verify_ssl,
-                stream=stream
-            )
+            try:
+                response = self._send(
+                    'GET',
+                    url,
+                    params=params,
+                    headers=request_headers,
+                    timeout=self.timeout,
+                    verify=self.verify_ssl,
+                    stream=stream
+                )
+            except CircuitOpenError:
+                last_known = None if stream else self._last_known_response(url, params)
+                if last_known is None:
+                    raise
+                logging.warning(f"Circuit open for {self.circuit_breaker.host}, serving last-known response for {url}")
+                return last_known
             
             # Check for redirects which might indicate session expiration
             if response.status_code == 302:
                 logging.error("Got redirect response (302), session likely expired")
                 raise InvalidSession()
                 
-            # Check for successful response (allow 2xx range and 503 for specific handling later)
-            if not (200 <= response.status_code < 300 or response.status_code == 503):
+            # Check for successful response (allow 2xx range, 304 for conditional requests and 503 for specific handling later)
+            if not (200 <= response.status_code < 300 or response.status_code in (304, 503)):
                 raise ApiRequestError(
                     message=f"API request failed with status code: {response.status_code}",
                     status_code=response.status_code,
@@ -159,13 +278,15 @@ class ApiClient:
                 )
                 
             # Validate response content type (only if not 503, as 503 might have error JSON)
-            if response.status_code != 503:
+            if response.status_code not in (304, 503):
                 content_type = response.headers.get('content-type', '').lower()
                 if 'text/html' in content_type:
                     logging.error("Got HTML response, session likely expired")
                     raise InvalidSession()
             # Removed duplicated content_type check block here
-                
+            
+            if not stream:
+                self._remember_response(url, params, response)
             return response
             
         except Timeout:
@@ -187,22 +308,22 @@ class ApiClient:
                 duration = (datetime.now() - start_time).total_seconds()
                 logging.info(f"Request to {url} completed in {duration:.2f} seconds")
     
-    def stream_response(self, response: requests.Response, start_time: datetime) -> bytes:
+    def iter_response_chunks(self, response: requests.Response, start_time: datetime, chunk_size: int = 8192) -> Iterator[bytes]:
         """
-        Stream response in chunks and return the complete content.
+        Stream response in chunks, validating the session and logging progress.
         
         Args:
             response: Response object to stream
             start_time: Start time of the request for logging
+            chunk_size: Size of the chunks to read
             
-        Returns:
-            Complete response content as bytes
+        Yields:
+            Non-empty chunks of the response body
             
         Raises:
             ApiRequestError: If streaming fails
             InvalidSession: If session expires during streaming
         """
-        chunks = []
         total_size = 0
         chunk_count = 0
         last_progress_time = datetime.now()
@@ -225,7 +346,7 @@ class ApiClient:
                 raise InvalidSession()
             
             # Stream the response
-            for chunk in response.iter_content(chunk_size=8192):
+            for chunk in response.iter_content(chunk_size=chunk_size):
                 current_time = datetime.now()
                 
                 # Check for timeout between chunks
@@ -238,7 +359,6 @@ class ApiClient:
                 
                 if chunk:
                     last_progress_time = current_time
-                    chunks.append(chunk)
                     total_size += len(chunk)
                     chunk_count += 1
                     
@@ -251,6 +371,8 @@ class ApiClient:
                             f"in {duration:.2f} seconds ({transfer_rate:.2f} MB/s)"
                         )
                         last_log_time = current_time
+                    
+                    yield chunk
             
             # Log final statistics
             total_duration = (datetime.now() - start_time).total_seconds()
@@ -260,8 +382,6 @@ class ApiClient:
                 logging.info(f"Average chunk size: {total_size/chunk_count/1024:.2f} KB")
                 logging.info(f"Average transfer rate: {(total_size/1024/1024)/total_duration:.2f} MB/s")
             
-            return b''.join(chunks)
-            
         except InvalidSession:
             logging.error("Session validation failed during streaming")
             raise
@@ -273,6 +393,128 @@ class ApiClient:
             logging.exception("Full error traceback:")
             raise ApiRequestError(message=f"Unexpected error during streaming: {str(e)}")
     
+    def stream_response(self, response: requests.Response, start_time: datetime) -> bytes:
+        """
+        Stream response in chunks and return the complete content.
+        
+        Args:
+            response: Response object to stream
+            start_time: Start time of the request for logging
+            
+        Returns:
+            Complete response content as bytes
+            
+        Raises:
+            ApiRequestError: If streaming fails
+            InvalidSession: If session expires during streaming
+        """
+        return b''.join(self.iter_response_chunks(response, start_time))
+    
+    def stream_json_records(
+        self,
+        response: requests.Response,
+        start_time: datetime,
+        file_path: Union[str, Path],
+        on_record: Callable[[Any], None],
+        prefix: str = 'item',
+        unchanged_sha256: Optional[str] = None,
+        on_progress: Optional[Callable[[int, int], None]] = None,
+        keep_previous: bool = False,
+        select_prefix: Optional[Callable[[str], str]] = None
+    ) -> StreamedDocument:
+        """
+        Stream a JSON response to disk while parsing it incrementally.
+        
+        Each chunk is written to a temporary file next to file_path and fed to
+        an incremental ijson parser; every record found under `prefix` is passed
+        to on_record as soon as it is complete. The temporary file replaces
+        file_path only once the whole document has been received and parsed,
+        so memory stays bounded by the largest record rather than the payload.
+        Datasets stored compressed (see app.utils.dataset_store) are gzipped
+        as they are written; the hash is taken over the uncompressed payload.
+        If the SHA-256 of the payload equals unchanged_sha256 the existing file
+        is left as is.
+        
+        Args:
+            response: Response object to stream
+            start_time: Start time of the request for logging
+            file_path: Final location of the raw JSON document
+            on_record: Callback invoked with each parsed record
+            prefix: ijson prefix of the records (default: items of a top-level array)
+            unchanged_sha256: Hash of the current file; a payload with this hash is not written
+            on_progress: Optional callback invoked after each chunk with (bytes received, records parsed)
+            keep_previous: Keep the replaced file as the dataset's previous snapshot (see dataset_store)
+            select_prefix: Optional callback that picks the prefix from the first
+                _PREFIX_HEADER_BYTES of the document, for payloads in several formats
+            
+        Returns:
+            StreamedDocument with the record count, payload hash and whether the file was replaced
+            
+        Raises:
+            ApiRequestError: If streaming fails
+            InvalidSession: If session expires during streaming
+            ijson.JSONError: If the document is not valid JSON
+        """
+        file_path = Path(file_path)
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = temp_path_for(file_path)
+        
+        records = ijson.sendable_list()
+        # With select_prefix the parser starts once the document header is buffered
+        parser = None if select_prefix else ijson.items_coro(records, prefix, use_float=True)
+        header = b''
+        record_count = 0
+        total_bytes = 0
+        digest = hashlib.sha256()
+        replaced = False
+        
+        try:
+            with open_dataset_writer(tmp_path, file_path) as f:
+                for chunk in self.iter_response_chunks(response, start_time):
+                    f.write(chunk)
+                    digest.update(chunk)
+                    total_bytes += len(chunk)
+                    if parser is None:
+                        header += chunk
+                        if len(header) < _PREFIX_HEADER_BYTES:
+                            continue
+                        parser = self._select_parser(records, select_prefix, header)
+                        chunk, header = header, b''
+                    parser.send(chunk)
+                    for record in records:
+                        on_record(record)
+                    record_count += len(records)
+                    del records[:]
+                    if on_progress:
+                        on_progress(total_bytes, record_count)
+                if parser is None:
+                    parser = self._select_parser(records, select_prefix, header)
+                    parser.send(header)
+                # Closing the parser raises if the document is incomplete
+                parser.close()
+                for record in records:
+                    on_record(record)
+                record_count += len(records)
+            sha256 = digest.hexdigest()
+            if sha256 != unchanged_sha256 or not dataset_exists(file_path):
+                stored_path = commit_dataset(tmp_path, file_path, keep_previous=keep_previous)
+                replaced = True
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+        
+        if replaced:
+            logging.info(f"Streamed {record_count} records to {stored_path}")
+        else:
+            logging.info(f"Streamed {record_count} records, content unchanged, kept {file_path}")
+        return StreamedDocument(record_count=record_count, sha256=sha256, replaced=replaced)
+
+    @staticmethod
+    def _select_parser(records: List[Any], select_prefix: Callable[[str], str], header: bytes):
+        """Incremental parser for the records under the prefix chosen from the document header."""
+        prefix = select_prefix(header[:_PREFIX_HEADER_BYTES].decode('utf-8', errors='ignore'))
+        return ijson.items_coro(records, prefix, use_float=True)
+    
     def post(
         self, 
         endpoint: str,
@@ -281,7 +523,9 @@ class ApiClient:
         params: Optional[Dict[str, Any]] = None,
         headers: Optional[Dict[str, str]] = None,
         referer: Optional[str] = None, # Added
-        origin: Optional[str] = None   # Added
+        origin: Optional[str] = None,  # Added
+        stream: bool = False,
+        idempotent: bool = False
     ) -> requests.Response:
         """
         Make a POST request to the API.
@@ -292,6 +536,8 @@ class ApiClient:
             json: JSON data to send
             params: URL parameters
             headers: Additional headers
+            stream: Whether to stream the response
+            idempotent: Whether the request only reads state and may be retried
             
         Returns:
             Response object
@@ -319,14 +565,17 @@ class ApiClient:
         logging.info(f"Making POST request to {url}")
         
         try:
-            response = self.session.post(
+            response = self._send(
+                'POST',
                 url,
+                idempotent=idempotent,
                 data=data,
                 json=json,
                 params=params,
                 headers=request_headers,
                 timeout=self.timeout,
-                verify=self.verify_ssl
+                verify=self.verify_ssl,
+                stream=stream
             )
             
             # Check for redirects which might indicate session expiration
@@ -0,0 +1,120 @@
+"""
+Pool of authenticated API clients, reused across requests and background jobs.
+
+Each client owns a requests.Session whose keep-alive connections survive
+between calls, so only the first request of a user session pays for the TLS
+handshake. Clients are keyed by base URL and session cookies; the least
+recently used are closed when the pool is full, and any client unused for
+settings.API_CLIENT_IDLE_SECONDS is closed on the next pool access.
+"""
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple, Type
+
+from requests.adapters import HTTPAdapter
+
+from app.api.client import ApiClient
+from app.config import settings
+
+_PoolKey = Tuple[str, str, str]
+
+_clients: "OrderedDict[_PoolKey, Tuple[ApiClient, float]]" = OrderedDict() # key -> (client, last used), oldest first
+_pool_lock = threading.Lock()
+
+def _cookie_identity(cookies: Optional[Dict[str, str]]) -> str:
+    """Hash of the cookies, so session tokens are not kept as dictionary keys."""
+    digest = hashlib.sha256()
+    for name, value in sorted((cookies or {}).items()):
+        digest.update(f"{name}={value}\0".encode('utf-8'))
+    return digest.hexdigest()
+
+def _pool_key(base_url: str, cookies: Optional[Dict[str, str]], client_class: Type[ApiClient]) -> _PoolKey:
+    # Module-qualified, since classes in different modules share names (e.g. IOCore2ApiClient)
+    return (f"{client_class.__module__}.{client_class.__qualname__}", base_url.rstrip('/'), _cookie_identity(cookies))
+
+def _mount_adapters(client: ApiClient) -> None:
+    """Sizes the connection pool for concurrent use (e.g. the refresh orchestrator)."""
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=settings.HTTP_POOL_MAXSIZE)
+    client.session.mount('https://', adapter)
+    client.session.mount('http://', adapter)
+
+def _close(key: _PoolKey, client: ApiClient, reason: str) -> None:
+    # Requests in flight on another thread finish; their connections are closed on release
+    logging.info(f"Closing pooled API client for {key[1]} ({reason})")
+    try:
+        client.session.close()
+    except Exception as e:
+        logging.warning(f"Error closing pooled API client: {str(e)}")
+
+def _evict_idle(now: float) -> None:
+    cutoff = now - settings.API_CLIENT_IDLE_SECONDS
+    while _clients:
+        key, (client, last_used) = next(iter(_clients.items()))
+        if last_used >= cutoff:
+            break
+        del _clients[key]
+        _close(key, client, 'idle')
+
+def get_pooled_client(
+    base_url: str,
+    cookies: Optional[Dict[str, str]] = None,
+    client_class: Optional[Type[ApiClient]] = None
+) -> ApiClient:
+    """
+    Gets the pooled client for a base URL and set of session cookies, creating it if needed.
+
+    Args:
+        base_url: Base URL for the API
+        cookies: Session cookies for authentication
+        client_class: ApiClient subclass to create (default: IOCore2ApiClient)
+
+    Returns:
+        Authenticated API client. It may be shared with other threads.
+    """
+    if client_class is None:
+        from app.api.iocore2 import IOCore2ApiClient
+        client_class = IOCore2ApiClient
+
+    key = _pool_key(base_url, cookies, client_class)
+    now = time.monotonic()
+    with _pool_lock:
+        _evict_idle(now)
+        entry = _clients.get(key)
+        if entry is not None:
+            _clients[key] = (entry[0], now)
+            _clients.move_to_end(key)
+            return entry[0]
+
+        client = client_class(base_url=base_url, cookies=cookies)
+        _mount_adapters(client)
+        _clients[key] = (client, now)
+        while len(_clients) > settings.API_CLIENT_POOL_SIZE:
+            old_key, (old_client, _) = _clients.popitem(last=False)
+            _close(old_key, old_client, 'pool full')
+        return client
+
+def discard_client(
+    base_url: str,
+    cookies: Optional[Dict[str, str]] = None,
+    client_class: Optional[Type[ApiClient]] = None
+) -> None:
+    """
+    Closes and removes the pooled client for a base URL and cookies (e.g. on logout).
+
+    Args:
+        base_url: Base URL for the API
+        cookies: Session cookies the client was created with
+        client_class: ApiClient subclass the client was created as (default: IOCore2ApiClient)
+    """
+    if client_class is None:
+        from app.api.iocore2 import IOCore2ApiClient
+        client_class = IOCore2ApiClient
+
+    key = _pool_key(base_url, cookies, client_class)
+    with _pool_lock:
+        entry = _clients.pop(key, None)
+    if entry is not None:
+        _close(key, entry[0], 'discarded')
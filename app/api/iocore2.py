@@ -1,20 +1,88 @@
 """
 IOCore2-specific API client implementation.
 """
+import functools
 import json
 import logging
 import time
 from datetime import datetime
-from typing import Dict, Any, Optional, Tuple
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple, Callable
 
+import ijson
 import requests
 from requests.exceptions import HTTPError # Import HTTPError
 from bs4 import BeautifulSoup
 
-from app.api.client import ApiClient
-from app.core.exceptions import ApiRequestError, InvalidSession, DataFormatError
+from app.api.client import ApiClient, StreamedDocument
+from app.core.exceptions import ApiRequestError, CircuitOpenError, InvalidSession, DataFormatError, JobCancelled
 from app.config import settings
 from app.utils.file_operations import write_json_file, write_markdown_file, get_dynamic_data_path, read_json_file # Imported read_json_file
+from app.utils.dataset_manifest import get_dataset_state, record_dataset_state, conditional_headers
+from app.utils.dataset_store import dataset_exists, write_dataset
+from app.utils.file_lock import file_lock
+from app.utils.test_case_index import TestCaseIndex, TestCaseChanges, merge_test_cases, test_case_updated
+
+# Maximum time to wait for a TestExecutionReport export job, and the bounds
+# of the interval between its status checks
+EXPORT_MAX_WAIT_SECONDS = 900
+EXPORT_POLL_MIN_SECONDS = 1.0
+EXPORT_POLL_MAX_SECONDS = 15.0
+
+def _export_progress(status_result: Dict[str, Any]) -> Optional[float]:
+    """Returns the export job's reported progress as a 0-1 fraction, if it reports one."""
+    for key in ('progress', 'percentComplete', 'percentage'):
+        value = status_result.get(key)
+        if isinstance(value, (int, float)) and value >= 0:
+            return value / 100 if value > 1 else float(value)
+    return None
+
+def next_export_poll_interval(
+    interval: float,
+    progress: Optional[float],
+    previous_progress: Optional[float],
+    elapsed: float
+) -> float:
+    """
+    Chooses the wait before the next export status check.
+
+    When the job reports advancing progress, waits about half of the
+    estimated remaining time; otherwise backs off geometrically. The result
+    is kept between EXPORT_POLL_MIN_SECONDS and EXPORT_POLL_MAX_SECONDS.
+    """
+    if progress and previous_progress is not None and progress > previous_progress:
+        remaining = elapsed * (1 - progress) / progress
+        interval = remaining / 2
+    else:
+        interval = interval * 1.5
+    return min(max(interval, EXPORT_POLL_MIN_SECONDS), EXPORT_POLL_MAX_SECONDS)
+
+def _test_results_prefix(header: str) -> str:
+    """ijson prefix of the records of a test results export, from the start of the document."""
+    # New format has 'Tests' at the root, legacy format nests them in 'TestPlans'
+    if '"Tests":' in header and '"TestPlans":' not in header:
+        return 'Tests.item'
+    return 'TestPlans.item'
+
+def _one_sync_at_a_time(file_name: str):
+    """
+    Serializes a dataset download per environment, across threads and worker
+    processes, by holding the dataset's file lock while the method runs.
+
+    Refresh jobs, the sync jobs and the synchronous routes can start the same
+    download at once; the second one waits and then usually finds the data
+    unchanged.
+
+    Args:
+        file_name: Dataset file (e.g. 'IER.json'); the method's first argument must be the environment
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, environment: str, *args, **kwargs):
+            with file_lock(get_dynamic_data_path(file_name, environment=environment)):
+                return method(self, environment, *args, **kwargs)
+        return wrapper
+    return decorator
 
 class IOCore2ApiClient(ApiClient):
     """Client for interacting with the IOCore2 API."""
@@ -109,45 +177,132 @@ class IOCore2ApiClient(ApiClient):
                 details={"url": login_url}
             )
 
-    def get_ier_coverage(self, environment: str) -> Dict[str, Any]:
+    def _stream_coverage_dataset(
+        self,
+        dataset: str,
+        api_url: str,
+        environment: str,
+        json_file_path: Path,
+        markdown_file_path: Path,
+        on_record,
+        start_time: datetime,
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> Tuple[Optional[StreamedDocument], Dict[str, Any], Dict[str, Optional[str]]]:
+        """
+        Downloads a coverage dataset, skipping work the previous refresh already did.
+
+        Sends the HTTP validators recorded for the dataset and streams the body
+        through stream_json_records with the recorded content hash, so an
+        unchanged payload leaves the JSON file untouched. A changed payload
+        moves the replaced file to the dataset's previous snapshot.
+
+        Returns:
+            Tuple of (StreamedDocument, or None if the server answered 304 Not Modified;
+            the previously recorded state; the validators sent by the server)
+        """
+        state = get_dataset_state(dataset, environment)
+        # Only trust the recorded state if the outputs it describes still exist
+        have_outputs = dataset_exists(json_file_path) and markdown_file_path.exists()
+
+        response = self.get(api_url, stream=True, headers=conditional_headers(state) if have_outputs else None)
+        validators = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified')
+        }
+
+        if response.status_code == 304:
+            response.close()
+            logging.info(f"{dataset} coverage not modified on the server")
+            return None, state, validators
+
+        document = self.stream_json_records(
+            response, start_time, json_file_path, on_record,
+            unchanged_sha256=state.get('sha256') if have_outputs else None,
+            on_progress=progress,
+            keep_previous=True # Compared against by the coverage diff
+        )
+        return document, state, validators
+
+    def _unchanged_coverage_result(
+        self,
+        dataset: str,
+        environment: str,
+        document: Optional[StreamedDocument],
+        state: Dict[str, Any],
+        validators: Dict[str, Optional[str]],
+        start_time: datetime
+    ) -> Dict[str, Any]:
+        """Records an unchanged refresh and builds the result returned to the caller."""
+        count = document.record_count if document else state.get('recordCount', 0)
+        record_dataset_state(
+            dataset, environment,
+            sha256=document.sha256 if document else None,
+            changed=False,
+            record_count=count,
+            **validators
+        )
+        logging.info(f"{dataset} coverage unchanged, skipping analysis")
+        return {
+            'success': True,
+            'unchanged': True,
+            'count': count,
+            'duration': (datetime.now() - start_time).total_seconds()
+        }
+
+    @_one_sync_at_a_time("IER.json")
+    def get_ier_coverage(self, environment: str, progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
         """
         Get IER coverage data from IOCore2.
 
+        If the payload is identical to the last one ingested, IER.json and
+        IER.md are left as they are and the result has 'unchanged': True.
+
         Args:
             environment: The environment ('ciav' or 'cwix') to use for saving data.
+            progress: Optional callback invoked with (bytes received, records parsed) while downloading.
 
         Returns:
-            Dictionary with success status and markdown content
+            Dictionary with success status, record count and markdown content
 
         Raises:
             ApiRequestError: If API request fails
             InvalidSession: If session is expired
+            DataFormatError: If the response is not valid JSON
         """
         api_url = "api/coverage/test-case-coverage/Get-Ier-Coverage"
 
         logging.info(f"Getting IER coverage data from {api_url}")
         start_time = datetime.now()
 
-        # Make request with streaming enabled
-        response = self.get(api_url, stream=True)
-
         try:
-            # Stream and process response
-            content = self.stream_response(response, start_time)
-            data = json.loads(content)
+            from app.data_models.ier_analysis import IerHierarchyBuilder, generate_ier_markdown_output, read_tin_data # Corrected import path
 
             # Save to file using dynamic path based on the provided environment
             json_file_path = get_dynamic_data_path("IER.json", environment=environment)
             markdown_file_path = get_dynamic_data_path("IER.md", environment=environment)
 
-            # Save JSON data
-            write_json_file(data, json_file_path)
+            # Stream the JSON to disk while feeding each record to the analysis
+            builder = IerHierarchyBuilder()
+            document, state, validators = self._stream_coverage_dataset(
+                "IER", api_url, environment, json_file_path, markdown_file_path, builder.add, start_time, progress
+            )
 
-            # Process and save markdown
-            from app.data_models.ier_analysis import analyze_ier_data, generate_ier_markdown_output # Corrected import path
-            hierarchy = analyze_ier_data(data)
+            if document is None or not document.replaced:
+                result = self._unchanged_coverage_result("IER", environment, document, state, validators, start_time)
+                result['markdown'] = markdown_file_path.read_text(encoding='utf-8')
+                return result
+
+            # Process and save markdown, mapping TINs to services
+            tin_to_service = read_tin_data(get_dynamic_data_path("TIN2.csv", environment=environment))
+            hierarchy = builder.build(tin_to_service)
             markdown_content = generate_ier_markdown_output(hierarchy)
             write_markdown_file(markdown_content, markdown_file_path)
+            changes = self._coverage_changes("ier", environment)
+
+            record_dataset_state(
+                "IER", environment, sha256=document.sha256, changed=True,
+                record_count=document.record_count, **validators
+            )
 
             # Return success response
             end_time = datetime.now()
@@ -155,58 +310,82 @@ class IOCore2ApiClient(ApiClient):
 
             return {
                 'success': True,
-                'count': len(data) if isinstance(data, list) else 0,
+                'unchanged': False,
+                'count': document.record_count,
                 'duration': total_duration,
-                'data': data
+                'markdown': markdown_content,
+                'changes': changes
             }
 
-        except json.JSONDecodeError as e:
+        except ijson.JSONError as e:
             logging.error(f"Error parsing IER coverage response: {str(e)}")
             raise DataFormatError(
                 message=f"Invalid JSON response: {str(e)}",
                 details={"url": api_url}
             )
 
-    def get_requirement_coverage(self, environment: str) -> Dict[str, Any]:
+    @_one_sync_at_a_time("SREQ.json")
+    def get_requirement_coverage(self, environment: str, progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
         """
         Get SREQ coverage data from IOCore2.
 
+        If the payload is identical to the last one ingested, SREQ.json and
+        SREQ.md are left as they are and the result has 'unchanged': True.
+
         Args:
             environment: The environment ('ciav' or 'cwix') to use for saving data.
+            progress: Optional callback invoked with (bytes received, records parsed) while downloading.
 
         Returns:
-            Dictionary with success status and data
+            Dictionary with success status, record count and number of unmapped SREQ entries
 
         Raises:
             ApiRequestError: If API request fails
             InvalidSession: If session is expired
+            DataFormatError: If the response is not valid JSON
         """
         api_url = "api/coverage/test-case-coverage/Get-Requirement-Coverage"
 
         logging.info(f"Getting SREQ coverage data from {api_url}")
         start_time = datetime.now()
 
-        # Make request with streaming enabled
-        response = self.get(api_url, stream=True)
-
         try:
-            # Stream and process response
-            content = self.stream_response(response, start_time)
-            data = json.loads(content)
+            from app.data_models.sreq_analysis import SreqHierarchyBuilder, generate_markdown # Corrected import path
 
             # Save to file using dynamic path based on the provided environment
             json_file_path = get_dynamic_data_path("SREQ.json", environment=environment)
             markdown_file_path = get_dynamic_data_path("SREQ.md", environment=environment)
 
-            # Save JSON data
-            write_json_file(data, json_file_path)
+            # Stream the JSON to disk, adding the entries without a test case to the hierarchy
+            builder = SreqHierarchyBuilder()
+            null_count = 0
+
+            def collect_null_entry(entry):
+                nonlocal null_count
+                if entry.get('testCaseId') is None:
+                    builder.add(entry)
+                    null_count += 1
+
+            document, state, validators = self._stream_coverage_dataset(
+                "SREQ", api_url, environment, json_file_path, markdown_file_path, collect_null_entry, start_time, progress
+            )
+
+            if document is None or not document.replaced:
+                result = self._unchanged_coverage_result("SREQ", environment, document, state, validators, start_time)
+                # Catches up if the derived outputs are missing or SP5-Functional.json changed
+                result['derived'] = self._derive_sreq_outputs(environment)
+                return result
 
             # Process and save markdown
-            from app.data_models.sreq_analysis import extract_null_testcase_entries, organize_hierarchical_data, generate_markdown # Corrected import path
-            null_entries = extract_null_testcase_entries(data)
-            hierarchy = organize_hierarchical_data(null_entries)
-            markdown_content = generate_markdown(hierarchy)
+            markdown_content = generate_markdown(builder.hierarchy)
             write_markdown_file(markdown_content, markdown_file_path)
+            derived = self._derive_sreq_outputs(environment)
+            changes = self._coverage_changes("sreq", environment)
+
+            record_dataset_state(
+                "SREQ", environment, sha256=document.sha256, changed=True,
+                record_count=document.record_count, **validators
+            )
 
             # Return success response
             end_time = datetime.now()
@@ -214,72 +393,226 @@ class IOCore2ApiClient(ApiClient):
 
             return {
                 'success': True,
-                'count': len(data) if isinstance(data, list) else 0,
+                'unchanged': False,
+                'count': document.record_count,
                 'duration': total_duration,
-                'data': data
+                'unmapped_count': null_count,
+                'derived': derived,
+                'changes': changes
             }
 
-        except json.JSONDecodeError as e:
+        except ijson.JSONError as e:
             logging.error(f"Error parsing SREQ coverage response: {str(e)}")
             raise DataFormatError(
                 message=f"Invalid JSON response: {str(e)}",
                 details={"url": api_url}
             )
 
-    def get_test_cases(self, environment: str) -> Dict[str, Any]:
+    def _derive_sreq_outputs(self, environment: str) -> Dict[str, Any]:
+        """Runs the SREQ derivation stage; its failure does not fail the download."""
+        from app.data_models.sreq_analysis import derive_sreq_outputs
+
+        try:
+            return derive_sreq_outputs(environment)
+        except Exception as e:
+            logging.exception(f"Deriving SREQ outputs failed for {environment}")
+            return {'error': str(e)}
+
+    def _coverage_changes(self, dataset: str, environment: str) -> Optional[Dict[str, int]]:
+        """Computes the coverage diff against the previous download; returns its counts, or None without a previous one."""
+        from app.data_models.coverage_diff import load_coverage_diff
+
+        try:
+            counts = load_coverage_diff(dataset, environment)['counts']
+        except FileNotFoundError:
+            return None
+        except Exception:
+            logging.exception(f"Computing the {dataset} coverage diff failed for {environment}")
+            return None
+        logging.info(f"{dataset.upper()} coverage changes ({environment}): {counts}")
+        return counts
+
+    @_one_sync_at_a_time("test_cases.json")
+    def get_test_cases(
+        self,
+        environment: str,
+        full: bool = False,
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> Dict[str, Any]:
         """
-        Get test case data from IOCore2.
+        Get test case data from IOCore2, syncing test_cases.json incrementally where possible.
+
+        With settings.TEST_CASES_DELTA_PARAM set, only test cases updated since
+        the index's high-water mark are requested and merged into
+        test_cases.json. Otherwise, and whenever the index is missing or its
+        last full sync is older than settings.TEST_CASES_FULL_SYNC_HOURS, the
+        whole catalog is streamed and compared against the index; an unchanged
+        catalog leaves test_cases.json untouched.
 
         Args:
             environment: The environment ('ciav' or 'cwix') to use for saving data.
+            full: Force a full resync
+            progress: Optional callback invoked with (bytes received, test cases parsed) during a full sync
 
         Returns:
-            Dictionary with success status and data
+            Dictionary with success status, count, duration, whether the catalog
+            was unchanged and the added/updated/removed test cases ('changes')
 
         Raises:
             ApiRequestError: If API request fails
             InvalidSession: If session is expired
+            DataFormatError: If the response is not valid JSON
         """
-        api_url = "api/test-cases"
-
-        logging.info(f"Getting test cases data from {api_url}")
         start_time = datetime.now()
+        json_file_path = get_dynamic_data_path("test_cases.json", environment=environment)
+        index = TestCaseIndex.load(environment)
+
+        full = (
+            full
+            or not settings.TEST_CASES_DELTA_PARAM
+            or not dataset_exists(json_file_path)
+            or index.needs_full_sync(settings.TEST_CASES_FULL_SYNC_HOURS)
+        )
+        if not full:
+            try:
+                result = self._sync_test_cases_incrementally(environment, index, json_file_path, start_time)
+                if result is not None:
+                    return result
+            except DataFormatError as e:
+                logging.warning(f"Incremental test case sync failed, falling back to a full resync: {e.message}")
+            index = TestCaseIndex.load(environment)
+        return self._sync_all_test_cases(environment, index, json_file_path, start_time, progress)
+
+    def _sync_all_test_cases(
+        self,
+        environment: str,
+        index: TestCaseIndex,
+        json_file_path: Path,
+        start_time: datetime,
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> Dict[str, Any]:
+        """Streams the whole catalog to test_cases.json, comparing it against the index."""
+        api_url = "api/test-cases"
+        logging.info(f"Full test case sync from {api_url}")
+
+        state = get_dataset_state('TEST_CASES', environment)
+        have_outputs = dataset_exists(json_file_path) and bool(index.entries)
+        response = self.get(api_url, stream=True, headers=conditional_headers(state) if have_outputs else None)
+        validators = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified')
+        }
+
+        if response.status_code == 304:
+            response.close()
+            logging.info("Test case catalog not modified on the server")
+            count = state.get('recordCount', len(index.entries))
+            # Nothing was downloaded; the index is still a faithful full listing
+            index.last_full_sync = datetime.now().isoformat()
+            index.save(environment)
+            record_dataset_state('TEST_CASES', environment, sha256=None, changed=False, record_count=count, **validators)
+            changes = TestCaseChanges(mode='full')
+        else:
+            sync = index.start_sync(full=True)
+            try:
+                document = self.stream_json_records(
+                    response, start_time, json_file_path, sync.add,
+                    unchanged_sha256=state.get('sha256') if have_outputs else None,
+                    on_progress=progress
+                )
+            except ijson.JSONError as e:
+                logging.error(f"Error parsing test cases response: {str(e)}")
+                raise DataFormatError(
+                    message=f"Invalid JSON response: {str(e)}",
+                    details={"url": api_url}
+                )
+            changes = sync.finish()
+            index.save(environment)
+            count = document.record_count
+            record_dataset_state(
+                'TEST_CASES', environment,
+                sha256=document.sha256,
+                changed=document.replaced,
+                record_count=count,
+                **validators
+            )
 
-        # Make request
-        response = self.get(api_url)
+        return {
+            'success': True,
+            'count': count,
+            'duration': (datetime.now() - start_time).total_seconds(),
+            'unchanged': not changes.changed,
+            'changes': changes.to_dict()
+        }
+
+    def _sync_test_cases_incrementally(
+        self,
+        environment: str,
+        index: TestCaseIndex,
+        json_file_path: Path,
+        start_time: datetime
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Requests the test cases updated since the index's high-water mark and
+        merges them into test_cases.json.
 
-        try:
-            # Parse response
-            data = response.json()
+        Returns:
+            The sync result, or None if the server ignored the filter and a
+            full sync is needed instead
 
-            # Save to file using dynamic path based on the provided environment
-            json_file_path = get_dynamic_data_path("test_cases.json", environment=environment)
-            write_json_file(data, json_file_path)
+        Raises:
+            DataFormatError: If the response or test_cases.json cannot be parsed
+        """
+        api_url = "api/test-cases"
+        params = {settings.TEST_CASES_DELTA_PARAM: index.high_water_mark}
+        logging.info(f"Incremental test case sync from {api_url} (updated since {index.high_water_mark})")
 
-            # Return success response
-            end_time = datetime.now()
-            total_duration = (end_time - start_time).total_seconds()
+        response = self.get(api_url, params=params)
+        try:
+            delta = response.json()
+        except ValueError as e:
+            raise DataFormatError(message=f"Invalid JSON response: {str(e)}", details={"url": api_url})
+        if not isinstance(delta, list):
+            raise DataFormatError(message="Expected a list of test cases", details={"url": api_url})
 
-            return {
-                'success': True,
-                'count': len(data) if isinstance(data, list) else 0,
-                'duration': total_duration,
-                'data': data
-            }
+        # A server that does not support the filter sends the whole catalog
+        if any((test_case_updated(item) or '') < index.high_water_mark for item in delta):
+            logging.info(f"{api_url} ignored the {settings.TEST_CASES_DELTA_PARAM} filter, running a full sync")
+            return None
 
-        except ValueError as e:
-            logging.error(f"Error parsing test cases response: {str(e)}")
-            raise DataFormatError(
-                message=f"Invalid JSON response: {str(e)}",
-                details={"url": api_url}
-            )
+        sync = index.start_sync(full=False)
+        changed = [item for item in delta if sync.add(item)]
+        changes = sync.finish()
 
-    def get_test_results(self, environment: str) -> Dict[str, Any]:
+        count = None
+        if changed:
+            try:
+                store = read_json_file(json_file_path)
+            except ValueError as e:
+                raise DataFormatError(message=f"Invalid test_cases.json: {str(e)}", details={"path": str(json_file_path)})
+            if not isinstance(store, list):
+                raise DataFormatError(message="test_cases.json is not a list", details={"path": str(json_file_path)})
+            store = merge_test_cases(store, changed, changes.removed)
+            write_dataset(store, json_file_path)
+            count = len(store)
+        index.save(environment)
+        record_dataset_state('TEST_CASES', environment, sha256=None, changed=changes.changed, record_count=count)
+
+        return {
+            'success': True,
+            'count': count if count is not None else len(index.entries),
+            'duration': (datetime.now() - start_time).total_seconds(),
+            'unchanged': not changes.changed,
+            'changes': changes.to_dict()
+        }
+
+    def get_test_results(self, environment: str, include_related: bool = True) -> Dict[str, Any]:
         """
         Get test results data from IOCore2.
 
         Args:
             environment: The environment ('ciav' or 'cwix') to use for saving data.
+            include_related: Whether to also fetch objectives and participants afterwards.
 
         Returns:
             Dictionary with success status and data
@@ -302,19 +635,21 @@ class IOCore2ApiClient(ApiClient):
 
             # Save to file using dynamic path based on the provided environment
             json_file_path = get_dynamic_data_path("test_results.json", environment=environment)
-            write_json_file(data, json_file_path)
+            write_dataset(data, json_file_path)
 
             # After successfully getting test results, get objectives and participants
-            try:
-                logging.info(f"Attempting to fetch objectives after test results for environment: {environment}")
-                self.get_objectives(environment=environment)
-                
-                # After getting objectives, get participants
-                logging.info(f"Attempting to fetch participants after objectives for environment: {environment}")
-                self.get_participants(environment=environment)
-            except Exception as obj_err:
-                # Log the error but don't fail the overall operation for test results
-                logging.error(f"Failed to get objectives or participants after getting test results: {str(obj_err)}")
+            # (skipped when the caller fetches them itself, e.g. the refresh orchestrator)
+            if include_related:
+                try:
+                    logging.info(f"Attempting to fetch objectives after test results for environment: {environment}")
+                    self.get_objectives(environment=environment)
+                    
+                    # After getting objectives, get participants
+                    logging.info(f"Attempting to fetch participants after objectives for environment: {environment}")
+                    self.get_participants(environment=environment)
+                except Exception as obj_err:
+                    # Log the error but don't fail the overall operation for test results
+                    logging.error(f"Failed to get objectives or participants after getting test results: {str(obj_err)}")
 
             # Return success response for test results
             end_time = datetime.now()
@@ -363,7 +698,7 @@ class IOCore2ApiClient(ApiClient):
 
             # Save to file using dynamic path based on the provided environment
             json_file_path = get_dynamic_data_path("participants.json", environment=environment)
-            write_json_file(data, json_file_path)
+            write_dataset(data, json_file_path)
 
             # Return success response
             end_time = datetime.now()
@@ -422,7 +757,7 @@ class IOCore2ApiClient(ApiClient):
 
             # Save to file using dynamic path based on the provided environment
             json_file_path = get_dynamic_data_path("objectives.json", environment=environment)
-            write_json_file(data, json_file_path)
+            write_dataset(data, json_file_path)
 
             # Return success response
             end_time = datetime.now()
@@ -511,6 +846,10 @@ class IOCore2ApiClient(ApiClient):
                 'data': data
             }
 
+        except CircuitOpenError:
+            # The API is unavailable, not missing the endpoint: keep the saved patterns
+            raise
+
         except ApiRequestError as e:
             # If the patterns endpoint fails, create an empty file to initialize the system
             logging.warning(f"API request error: {str(e)}. Creating empty pattern file.")
@@ -580,7 +919,7 @@ class IOCore2ApiClient(ApiClient):
             # Save to file using dynamic path based on the provided environment
             json_file_path = get_dynamic_data_path("actors.json", environment=environment)
             logging.info(f"Saving actors data to {json_file_path}")
-            write_json_file(data, json_file_path)
+            write_dataset(data, json_file_path)
             logging.info(f"Actors data successfully saved to {json_file_path}")
 
             # Return success response
@@ -597,6 +936,10 @@ class IOCore2ApiClient(ApiClient):
                 'data': data
             }
 
+        except CircuitOpenError:
+            # The API is unavailable, not missing the endpoint: keep the saved actors
+            raise
+
         except ApiRequestError as e:
             # If the actors endpoint fails, create an empty file to initialize the system
             logging.warning(f"API request error: {str(e)}. Creating empty actors file.")
@@ -605,7 +948,7 @@ class IOCore2ApiClient(ApiClient):
             json_file_path = get_dynamic_data_path("actors.json", environment=environment)
             # Create an empty array as the initial actors file
             empty_data = []
-            write_json_file(empty_data, json_file_path)
+            write_dataset(empty_data, json_file_path)
             logging.info(f"Created empty actors file at {json_file_path}")
             return {
                 'success': True,
@@ -649,6 +992,10 @@ class IOCore2ApiClient(ApiClient):
             end_time = datetime.now()
             # Parse response
             data = response.json()
+            if response.headers.get('Warning', '').startswith('110') and isinstance(data, dict):
+                # Last-known data served while the host's circuit breaker is open
+                data['stale'] = True
+                data['stale_age_seconds'] = int(response.headers.get('Age', 0))
 
             # Calculate request time
             #end_time = datetime.now()
@@ -726,218 +1073,234 @@ class IOCore2ApiClient(ApiClient):
                 return p.get("name")
         return None
 
-    def get_test_results_new(self, environment: str) -> Dict[str, Any]:
-        """
-        Get test results data from IOCore2 using the new job-based API with token authentication and polling.
+    # --- TestExecutionReport export (job-based API) ---
 
-        Args:
-            environment: The environment ('ciav' or 'cwix') to use for saving data.
+    _EXPORT_URL = "api/public/feed/Export"
+
+    def start_test_results_export(self) -> str:
+        """
+        Starts a TestExecutionReport export job on IOCore2.
 
         Returns:
-            Dictionary with success status and data
+            The export job ID
 
         Raises:
             ApiRequestError: If API request fails
             InvalidSession: If session is expired
+            DataFormatError: If the response has no job ID
         """
-        export_url = "api/public/feed/Export"
+        start_request_body = {
+            "$type": "Schema",
+            "schema": "TestExecutionReport",
+            "checkOnly": True
+        }
+        logging.info(f"Starting TestExecutionReport export job ({len(self.session.cookies)} session cookies)")
+        start_result = self.post(self._EXPORT_URL, json=start_request_body).json()
+        try:
+            export_job_id = start_result["jobId"]
+        except (KeyError, TypeError):
+            raise DataFormatError(
+                message="Export start response did not contain a job ID",
+                details={"endpoint": self._EXPORT_URL, "response": start_result}
+            )
+        logging.info(f"Export job started with ID: {export_job_id}")
+        return export_job_id
 
-        logging.info("=" * 60)
-        logging.info("STARTING NEW TEST RESULTS API (Job-based)")
-        logging.info("=" * 60)
-        logging.info(f"Base URL: {self.base_url}")
-        logging.info(f"Export endpoint: {export_url}")
-        logging.info(f"Environment: {environment}")
-        start_time = datetime.now()
-        logging.info(f"Start time: {start_time}")
+    def get_test_results_export_status(self, export_job_id: str) -> Dict[str, Any]:
+        """
+        Checks the status of an export job once.
 
-        try:
-            # Step 1: Note - using session-based authentication (existing login cookies)
-            # The new API should ideally use token auth, but for compatibility 
-            # we'll use the existing session authentication
-            logging.info("=== STEP 1: Authentication ===")
-            logging.info("Using session-based authentication for new API")
-            logging.info(f"Session cookies available: {len(self.session.cookies)} cookies")
-
-            # Step 2: Start the export job
-            start_request_body = {
-                "$type": "Schema",
-                "schema": "TestExecutionReport", 
-                "checkOnly": True
-            }
+        Args:
+            export_job_id: ID returned by start_test_results_export
 
-            logging.info("=== STEP 2: Starting export job for TestExecutionReport ===")
-            logging.info(f"Request body: {start_request_body}")
-            logging.info(f"Endpoint: {export_url}")
-            
-            step2_start = datetime.now()
-            start_response = self.post(
-                export_url,
-                json=start_request_body
-            )
-            step2_duration = (datetime.now() - step2_start).total_seconds()
-            
-            logging.info(f"Export job start request completed in {step2_duration:.2f} seconds")
-            logging.info(f"Response status: {start_response.status_code}")
-            
-            start_result = start_response.json()
-            logging.info(f"Start response: {start_result}")
-            
-            job_id = start_result["jobId"]
-            logging.info(f"=== Export job started with ID: {job_id} ===")
-
-            # Step 3: Poll for job completion
-            check_status_body = {
-                "$type": "Job",
-                "jobId": job_id,
-                "checkOnly": True
-            }
+        Returns:
+            Status response (its 'status' is Pending, Processing, Completed, Failed or Cancelled)
+        """
+        check_status_body = {
+            "$type": "Job",
+            "jobId": export_job_id,
+            "checkOnly": True
+        }
+        status_result = self.post(self._EXPORT_URL, json=check_status_body, idempotent=True).json()
+        logging.info(f"Export job {export_job_id} status: {status_result.get('status')}")
+        return status_result
+
+    def wait_for_test_results_export(
+        self,
+        export_job_id: str,
+        on_status: Optional[Callable[[Dict[str, Any]], None]] = None,
+        max_wait: float = EXPORT_MAX_WAIT_SECONDS
+    ) -> Dict[str, Any]:
+        """
+        Polls an export job until it completes, adapting the interval to its progress.
 
-            logging.info("=== STEP 3: Starting job polling ===")
-            logging.info(f"Status check body: {check_status_body}")
-            
-            max_attempts = 60  # Maximum 5 minutes (60 * 5 seconds)
-            attempt = 0
-            polling_start_time = datetime.now()
-            
-            while attempt < max_attempts:
-                attempt_start = datetime.now()
-                elapsed_total = (attempt_start - polling_start_time).total_seconds()
-                
-                logging.info(f"=== Polling attempt {attempt + 1}/{max_attempts} (Total elapsed: {elapsed_total:.1f}s) ===")
-                
-                status_response = self.post(
-                    export_url,
-                    json=check_status_body
+        Args:
+            export_job_id: ID returned by start_test_results_export
+            on_status: Optional callback invoked with each status response
+            max_wait: Maximum time to wait in seconds
+
+        Returns:
+            The final status response
+
+        Raises:
+            ApiRequestError: If the job fails, is cancelled or does not complete in time
+        """
+        polling_start = time.monotonic()
+        interval = EXPORT_POLL_MIN_SECONDS
+        previous_progress = None
+        attempt = 0
+
+        while True:
+            attempt += 1
+            status_result = self.get_test_results_export_status(export_job_id)
+            if on_status:
+                on_status(status_result)
+
+            status = status_result.get("status")
+            elapsed = time.monotonic() - polling_start
+            if status == "Completed":
+                logging.info(f"Export job {export_job_id} completed after {elapsed:.2f}s ({attempt} status checks)")
+                return status_result
+            if status in ("Failed", "Cancelled"):
+                logging.error(f"Export job {export_job_id} ended with status {status}: {status_result}")
+                raise ApiRequestError(
+                    message=f"Job failed with status: {status}",
+                    details={"job_id": export_job_id, "status": status, "response": status_result}
                 )
-                
-                request_duration = (datetime.now() - attempt_start).total_seconds()
-                logging.info(f"Status check request took {request_duration:.2f} seconds")
-
-                status_result = status_response.json()
-                logging.info(f"Status response: {status_result}")
-                
-                status = status_result["status"]
-                logging.info(f"*** Current job status: {status} ***")
-
-                if status == "Completed":
-                    total_polling_time = (datetime.now() - polling_start_time).total_seconds()
-                    logging.info(f"*** JOB COMPLETED! Total polling time: {total_polling_time:.2f} seconds ***")
-                    break
-                elif status in ("Failed", "Cancelled"):
-                    logging.error(f"Job failed with status: {status}")
-                    logging.error(f"Full status response: {status_result}")
-                    raise ApiRequestError(
-                        message=f"Job failed with status: {status}",
-                        details={"job_id": job_id, "status": status, "response": status_result}
-                    )
-                elif status not in ("Processing", "Pending"):
-                    logging.warning(f"Unexpected job status: {status} - continuing anyway")
-                
-                # Wait before checking again
-                logging.info("Waiting 5 seconds before next status check...")
-                time.sleep(5)
-                attempt += 1
-
-            if attempt >= max_attempts:
-                total_polling_time = (datetime.now() - polling_start_time).total_seconds()
-                logging.error(f"Job polling TIMEOUT after {total_polling_time:.2f} seconds ({max_attempts} attempts)")
+            if status not in ("Processing", "Pending"):
+                logging.warning(f"Unexpected job status: {status} - continuing anyway")
+
+            if elapsed + interval > max_wait:
+                logging.error(f"Export job {export_job_id} polling timeout after {elapsed:.2f}s ({attempt} attempts)")
                 raise ApiRequestError(
-                    message=f"Job polling timeout - job did not complete within expected time ({total_polling_time:.2f}s)",
-                    details={"job_id": job_id, "max_attempts": max_attempts, "total_time": total_polling_time}
+                    message=f"Job polling timeout - job did not complete within expected time ({elapsed:.2f}s)",
+                    details={"job_id": export_job_id, "attempts": attempt, "total_time": elapsed}
                 )
 
-            # Step 4: Download the results
-            final_request_body = {
-                "$type": "Download",
-                "jobId": job_id
-            }
+            progress = _export_progress(status_result)
+            interval = next_export_poll_interval(interval, progress, previous_progress, elapsed)
+            previous_progress = progress
+            time.sleep(interval)
+
+    def download_test_results_export(
+        self,
+        export_job_id: str,
+        environment: str,
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> int:
+        """
+        Streams the result of a completed export job to test_results.json.
 
-            logging.info("=== STEP 4: Downloading job results ===")
-            logging.info(f"Download request body: {final_request_body}")
-            
-            download_start = datetime.now()
-            download_response = self.post(
-                export_url,
-                json=final_request_body
+        Args:
+            export_job_id: ID of a completed export job
+            environment: The environment ('ciav' or 'cwix') to use for saving data.
+            progress: Optional callback invoked with (bytes received, test plans parsed)
+
+        Returns:
+            Number of records in the export (tests, or test plans in the legacy format)
+        """
+        final_request_body = {
+            "$type": "Download",
+            "jobId": export_job_id
+        }
+        start_time = datetime.now()
+        json_file_path = get_dynamic_data_path("test_results.json", environment=environment)
+        download_response = self.post(self._EXPORT_URL, json=final_request_body, stream=True)
+        try:
+            document = self.stream_json_records(
+                download_response, start_time, json_file_path,
+                on_record=lambda record: None,
+                select_prefix=_test_results_prefix,
+                on_progress=progress
             )
-            download_duration = (datetime.now() - download_start).total_seconds()
-            
-            logging.info(f"Download request completed in {download_duration:.2f} seconds")
-            logging.info(f"Download response status: {download_response.status_code}")
+        except ijson.JSONError as e:
+            raise DataFormatError(
+                message=f"Invalid JSON response: {str(e)}",
+                details={"endpoint": self._EXPORT_URL, "job_id": export_job_id}
+            )
+        logging.info(f"Saved new test results to {json_file_path} ({document.record_count} records)")
+        return document.record_count
+
+    def get_test_results_new(
+        self,
+        environment: str,
+        include_related: bool = True,
+        export_job_id: Optional[str] = None,
+        on_export_started: Optional[Callable[[str], None]] = None,
+        on_status: Optional[Callable[[Dict[str, Any]], None]] = None,
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Get test results data from IOCore2 using the new job-based API.
 
-            # Parse the final results
-            parse_start = datetime.now()
-            data = download_response.json()
-            parse_duration = (datetime.now() - parse_start).total_seconds()
-            
-            data_size = len(str(data)) if data else 0
-            logging.info(f"JSON parsing completed in {parse_duration:.2f} seconds")
-            logging.info(f"Response data size: {data_size} characters")
-            logging.info("*** Successfully downloaded and parsed job results ***")
+        Starts (or resumes) an export job, polls it with an adaptive interval
+        and streams the result to test_results.json. This can take minutes;
+        routes run it as a background job.
 
-            # Save to file using dynamic path based on the provided environment
-            json_file_path = get_dynamic_data_path("test_results.json", environment=environment)
-            write_json_file(data, json_file_path)
-            logging.info(f"Saved new test results to {json_file_path}")
+        Args:
+            environment: The environment ('ciav' or 'cwix') to use for saving data.
+            include_related: Whether to also fetch objectives and participants afterwards.
+            export_job_id: Optional ID of an export job started earlier, to resume polling it
+            on_export_started: Optional callback invoked with the export job ID once known
+            on_status: Optional callback invoked with each status response
+            progress: Optional callback invoked with (bytes received, test plans parsed) during download
 
-            # After successfully getting test results, get objectives and participants
-            try:
-                logging.info(f"Attempting to fetch objectives after test results for environment: {environment}")
-                self.get_objectives(environment=environment)
-                
-                # After getting objectives, get participants
-                logging.info(f"Attempting to fetch participants after objectives for environment: {environment}")
-                self.get_participants(environment=environment)
-            except Exception as obj_err:
-                # Log the error but don't fail the overall operation for test results
-                logging.error(f"Failed to get objectives or participants after getting test results: {str(obj_err)}")
+        Returns:
+            Dictionary with success status, test plan count, duration and export job ID
 
-            # Return success response for test results
-            end_time = datetime.now()
-            total_duration = (end_time - start_time).total_seconds()
-            data_count = len(data) if isinstance(data, list) else 0
-            
-            logging.info("=" * 60)
-            logging.info("NEW TEST RESULTS API COMPLETED SUCCESSFULLY")
-            logging.info("=" * 60)
-            logging.info(f"Total execution time: {total_duration:.2f} seconds")
-            logging.info(f"Data records count: {data_count}")
-            logging.info(f"Job ID: {job_id}")
-            logging.info(f"File saved to: {json_file_path}")
-            logging.info("=" * 60)
-            
+        Raises:
+            ApiRequestError: If API request fails
+            InvalidSession: If session is expired
+        """
+        logging.info(f"Getting test results via export job API for environment {environment}")
+        start_time = datetime.now()
+
+        try:
+            if export_job_id:
+                logging.info(f"Resuming export job {export_job_id}")
+            else:
+                export_job_id = self.start_test_results_export()
+            if on_export_started:
+                on_export_started(export_job_id)
+
+            self.wait_for_test_results_export(export_job_id, on_status=on_status)
+            count = self.download_test_results_export(export_job_id, environment, progress=progress)
+
+            # After successfully getting test results, get objectives and participants
+            # (skipped when the caller fetches them itself, e.g. the refresh orchestrator)
+            if include_related:
+                try:
+                    logging.info(f"Attempting to fetch objectives after test results for environment: {environment}")
+                    self.get_objectives(environment=environment)
+                    
+                    # After getting objectives, get participants
+                    logging.info(f"Attempting to fetch participants after objectives for environment: {environment}")
+                    self.get_participants(environment=environment)
+                except Exception as obj_err:
+                    # Log the error but don't fail the overall operation for test results
+                    logging.error(f"Failed to get objectives or participants after getting test results: {str(obj_err)}")
+
+            total_duration = (datetime.now() - start_time).total_seconds()
+            logging.info(f"Export-based test results completed in {total_duration:.2f}s (job {export_job_id}, {count} test plans)")
             return {
                 'success': True,
-                'count': data_count,
+                'count': count,
                 'duration': total_duration,
-                'data': data,
-                'job_id': job_id
+                'job_id': export_job_id
             }
-            
+
+        except (InvalidSession, ApiRequestError, DataFormatError, JobCancelled):
+            raise
         except ValueError as e:
-            error_time = datetime.now()
-            elapsed_time = (error_time - start_time).total_seconds()
-            logging.error("=" * 60)
-            logging.error("JSON PARSING ERROR in new test results API")
-            logging.error("=" * 60)
-            logging.error(f"Error after {elapsed_time:.2f} seconds: {str(e)}")
-            logging.error("=" * 60)
+            logging.error(f"Error parsing export response: {str(e)}")
             raise DataFormatError(
                 message=f"Invalid JSON response: {str(e)}",
-                details={"endpoint": export_url, "elapsed_time": elapsed_time}
+                details={"endpoint": self._EXPORT_URL, "job_id": export_job_id}
             )
         except Exception as e:
-            error_time = datetime.now()
-            elapsed_time = (error_time - start_time).total_seconds()
-            logging.error("=" * 60)
-            logging.error("GENERAL ERROR in new test results API")
-            logging.error("=" * 60)
-            logging.error(f"Error after {elapsed_time:.2f} seconds: {str(e)}")
-            logging.error(f"Error type: {type(e).__name__}")
-            logging.exception("Full traceback:")
-            logging.error("=" * 60)
+            elapsed_time = (datetime.now() - start_time).total_seconds()
+            logging.exception(f"Error in export-based test results after {elapsed_time:.2f}s: {str(e)}")
             raise ApiRequestError(
                 message=f"Failed to get test results using new API: {str(e)}",
-                details={"endpoint": export_url, "elapsed_time": elapsed_time, "error_type": type(e).__name__}
+                details={"endpoint": self._EXPORT_URL, "elapsed_time": elapsed_time, "error_type": type(e).__name__}
             )
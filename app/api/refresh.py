@@ -0,0 +1,186 @@
+"""
+Concurrent refresh of the IOCore2 datasets of an environment.
+"""
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.core.exceptions import InvalidSession
+from app.core.jobs import create_job, start_job_thread, update_job
+
+# Dataset name -> IOCore2ApiClient method (all take environment=...)
+REFRESH_DATASETS = {
+    'test_cases': 'get_test_cases',
+    'test_results': 'get_test_results',
+    'objectives': 'get_objectives',
+    'participants': 'get_participants',
+    'patterns': 'get_patterns',
+    'actors': 'get_actors',
+    'ier': 'get_ier_coverage',
+    'sreq': 'get_requirement_coverage',
+}
+
+# Upper bound on concurrent requests to IOCore2
+DEFAULT_MAX_WORKERS = 4
+
+@dataclass
+class DatasetRefresh:
+    """Status and timing of one dataset within a refresh."""
+    dataset: str
+    status: str = 'pending'  # pending, running, completed, unchanged, failed
+    count: Optional[int] = None
+    duration: Optional[float] = None
+    error: Optional[str] = None
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+
+@dataclass
+class RefreshReport:
+    """Outcome of a refresh of several datasets."""
+    refresh_id: str
+    environment: str
+    datasets: Dict[str, DatasetRefresh] = field(default_factory=dict)
+    status: str = 'running'  # running, completed, partial, failed
+    started_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    finished_at: Optional[str] = None
+    duration: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+def _refresh_one(client, environment: str, entry: DatasetRefresh) -> None:
+    """Runs one dataset fetch and records its outcome in entry."""
+    method = getattr(client, REFRESH_DATASETS[entry.dataset])
+    kwargs = {'environment': environment}
+    if entry.dataset == 'test_results':
+        # Objectives and participants run as their own tasks
+        kwargs['include_related'] = False
+
+    start = datetime.now()
+    entry.status = 'running'
+    entry.started_at = start.isoformat()
+    try:
+        result = method(**kwargs) or {}
+        entry.count = result.get('count')
+        entry.status = 'unchanged' if result.get('unchanged') else 'completed'
+    except InvalidSession as e:
+        entry.status = 'failed'
+        entry.error = e.message
+    except Exception as e:
+        logging.exception(f"Refresh of {entry.dataset} failed for environment {environment}")
+        entry.status = 'failed'
+        entry.error = str(e)
+    finally:
+        end = datetime.now()
+        entry.finished_at = end.isoformat()
+        entry.duration = (end - start).total_seconds()
+        logging.info(f"Refresh of {entry.dataset} ({environment}) {entry.status} in {entry.duration:.2f}s")
+
+def refresh_datasets(
+    client,
+    environment: str,
+    datasets: Optional[List[str]] = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    report: Optional[RefreshReport] = None,
+    on_update: Optional[Callable[[RefreshReport], None]] = None
+) -> RefreshReport:
+    """
+    Fetches several IOCore2 datasets concurrently over one authenticated client.
+
+    A failing dataset does not stop the others; the report status is
+    'completed' if all succeeded, 'failed' if all failed and 'partial' otherwise.
+
+    Args:
+        client: Authenticated IOCore2ApiClient
+        environment: Environment ('ciav' or 'cwix') to save the data for
+        datasets: Dataset names from REFRESH_DATASETS (default: all)
+        max_workers: Maximum number of concurrent requests
+        report: Optional report to fill in (one is created if not given)
+        on_update: Optional callback invoked with the report after each dataset finishes
+
+    Returns:
+        RefreshReport
+    """
+    datasets = list(datasets or REFRESH_DATASETS)
+    if report is None:
+        report = RefreshReport(refresh_id=uuid.uuid4().hex, environment=environment)
+    for name in datasets:
+        report.datasets.setdefault(name, DatasetRefresh(dataset=name))
+
+    start = datetime.now()
+    logging.info(f"Refreshing {len(datasets)} datasets for {environment} with up to {max_workers} workers")
+
+    def run(entry: DatasetRefresh) -> None:
+        _refresh_one(client, environment, entry)
+        if on_update:
+            try:
+                on_update(report)
+            except Exception as e:
+                logging.error(f"Failed to publish refresh progress: {str(e)}")
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='refresh') as executor:
+        for name in datasets:
+            executor.submit(run, report.datasets[name])
+
+    failed = [entry for entry in report.datasets.values() if entry.status == 'failed']
+    if not failed:
+        report.status = 'completed'
+    elif len(failed) == len(report.datasets):
+        report.status = 'failed'
+    else:
+        report.status = 'partial'
+    report.finished_at = datetime.now().isoformat()
+    report.duration = (datetime.now() - start).total_seconds()
+    logging.info(f"Refresh {report.refresh_id} for {environment} {report.status} in {report.duration:.2f}s")
+    return report
+
+def _run_refresh(context, url: str, cookies: Dict[str, str], environment: str, datasets: List[str], max_workers: int) -> Dict[str, Any]:
+    """Job target for start_refresh; publishes the report as the job result as datasets finish."""
+    from app.api.client_pool import get_pooled_client
+
+    client = get_pooled_client(url, cookies)
+    report = RefreshReport(refresh_id=context.job_id, environment=environment)
+    report = refresh_datasets(
+        client, environment, datasets, max_workers, report,
+        on_update=lambda current: update_job(context.job_id, result=current.to_dict())
+    )
+    return report.to_dict()
+
+def start_refresh(
+    url: str,
+    cookies: Dict[str, str],
+    environment: str,
+    datasets: Optional[List[str]] = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    owner: Optional[str] = None
+) -> Tuple[Dict[str, Any], bool]:
+    """
+    Starts refresh_datasets as a background job.
+
+    Only one refresh runs per environment; if one is already active it is
+    returned instead of starting another.
+
+    Args:
+        url: Base URL for the IOCore2 API
+        cookies: Session cookies for authentication
+        environment: Environment ('ciav' or 'cwix') to save the data for
+        datasets: Dataset names from REFRESH_DATASETS (default: all)
+        max_workers: Maximum number of concurrent requests
+        owner: User starting the refresh
+
+    Returns:
+        Tuple of (job, created); the job result holds the RefreshReport as it progresses
+    """
+    datasets = list(datasets or REFRESH_DATASETS)
+    job, created = create_job(
+        'refresh_all', environment,
+        dedupe_key=f"refresh_all:{environment}",
+        params={'datasets': datasets, 'max_workers': max_workers},
+        owner=owner
+    )
+    if created:
+        start_job_thread(job['id'], _run_refresh, url, cookies, environment, datasets, max_workers)
+    return job, created
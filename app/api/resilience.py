@@ -0,0 +1,144 @@
+"""
+Retry policy and per-host circuit breakers for outgoing API requests.
+"""
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Dict, FrozenSet, Optional
+
+from app.config import settings
+
+# Circuit states
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """When and how long to wait before retrying a request."""
+    max_attempts: int = 3
+    backoff_base: float = 0.5
+    backoff_max: float = 30.0
+    retry_statuses: FrozenSet[int] = frozenset((429, 502, 504))
+    methods: FrozenSet[str] = frozenset(('GET', 'HEAD', 'OPTIONS'))
+
+    def is_retryable(self, method: str) -> bool:
+        """Whether requests with this method are retried by default."""
+        return method.upper() in self.methods
+
+    def should_retry(self, attempt: int, status_code: Optional[int] = None, retry_after: Optional[str] = None) -> bool:
+        """
+        Whether a failed attempt of a retryable request may be retried.
+
+        Args:
+            attempt: Number of the attempt that failed (1-based)
+            status_code: Response status, or None for connection errors
+            retry_after: Retry-After header of the response, if any
+        """
+        if attempt >= self.max_attempts:
+            return False
+        if status_code is None:
+            return True
+        # 503 is passed through to callers (the health API reports through it) unless the server asks for a retry
+        return status_code in self.retry_statuses or (status_code == 503 and retry_after is not None)
+
+    def delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """
+        Seconds to wait after the given failed attempt: the server's
+        Retry-After if it sent one, otherwise exponential backoff with full jitter.
+        """
+        requested = parse_retry_after(retry_after)
+        if requested is not None:
+            return min(requested, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+
+def default_retry_policy() -> RetryPolicy:
+    """RetryPolicy configured from settings."""
+    return RetryPolicy(
+        max_attempts=max(1, settings.RETRY_MAX_ATTEMPTS),
+        backoff_base=settings.RETRY_BACKOFF_BASE,
+        backoff_max=settings.RETRY_BACKOFF_MAX
+    )
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parses a Retry-After header (delay in seconds or HTTP date) into seconds."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one host.
+
+    After failure_threshold consecutive failures the circuit opens and
+    requests are refused for reset_seconds; then one trial request is let
+    through (half open) and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, host: str, failure_threshold: int, reset_seconds: float):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """Whether a request may be sent now."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = HALF_OPEN
+                logging.info(f"Circuit for {self.host} half open, sending a trial request")
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != CLOSED:
+                logging.info(f"Circuit for {self.host} closed")
+            self.state = CLOSED
+            self.failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    logging.warning(f"Circuit for {self.host} opened after {self.failures} consecutive failures")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def retry_in(self) -> float:
+        """Seconds until an open circuit lets a trial request through."""
+        with self._lock:
+            if self.state != OPEN:
+                return 0.0
+            return max(0.0, self.reset_seconds - (time.monotonic() - self.opened_at))
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+def get_circuit_breaker(host: str) -> CircuitBreaker:
+    """Gets the circuit breaker shared by all clients talking to host."""
+    with _breakers_lock:
+        breaker = _breakers.get(host)
+        if breaker is None:
+            breaker = CircuitBreaker(host, settings.CIRCUIT_FAILURE_THRESHOLD, settings.CIRCUIT_RESET_SECONDS)
+            _breakers[host] = breaker
+        return breaker
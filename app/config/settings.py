@@ -25,6 +25,28 @@ LOG_LEVEL = os.environ.get("IONIC2_LOG_LEVEL", "ERROR")
 
 # API request settings
 REQUEST_TIMEOUT = (400, 400)  # (connect timeout, read timeout)
+API_CLIENT_POOL_SIZE = int(os.environ.get("IONIC2_API_CLIENT_POOL_SIZE", "32")) # Authenticated clients kept for reuse
+API_CLIENT_IDLE_SECONDS = int(os.environ.get("IONIC2_API_CLIENT_IDLE_SECONDS", "900")) # Unused clients are closed after this long
+HTTP_POOL_MAXSIZE = int(os.environ.get("IONIC2_HTTP_POOL_MAXSIZE", "16")) # Keep-alive connections per host and client
+RETRY_MAX_ATTEMPTS = int(os.environ.get("IONIC2_RETRY_MAX_ATTEMPTS", "3")) # Attempts per idempotent request (1 disables retries)
+RETRY_BACKOFF_BASE = float(os.environ.get("IONIC2_RETRY_BACKOFF_BASE", "0.5")) # Seconds; doubled on each attempt, with full jitter
+RETRY_BACKOFF_MAX = float(os.environ.get("IONIC2_RETRY_BACKOFF_MAX", "30")) # Upper bound on one wait, including Retry-After
+CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get("IONIC2_CIRCUIT_FAILURE_THRESHOLD", "5")) # Consecutive failures that open a host's circuit
+CIRCUIT_RESET_SECONDS = int(os.environ.get("IONIC2_CIRCUIT_RESET_SECONDS", "60")) # Open circuits let one trial request through after this long
+
+# Dataset storage: 'gzip' stores downloaded datasets compact and gzip-compressed, 'none' as plain JSON
+DATASET_COMPRESSION = os.environ.get("IONIC2_DATASET_COMPRESSION", "gzip").lower()
+
+# Report generation: records sorted in memory at a time before spilling sorted runs to temporary files
+EXTERNAL_SORT_RUN_SIZE = int(os.environ.get("IONIC2_EXTERNAL_SORT_RUN_SIZE", "50000"))
+
+# Test case sync settings
+TEST_CASES_DELTA_PARAM = os.environ.get("IONIC2_TEST_CASES_DELTA_PARAM") # Query parameter asking api/test-cases for items updated since a time; unset disables incremental requests
+TEST_CASES_FULL_SYNC_HOURS = float(os.environ.get("IONIC2_TEST_CASES_FULL_SYNC_HOURS", "24")) # Incremental syncs fall back to a full resync after this long
+
+# Background job settings
+JOBS_DB = Path(os.environ.get("IONIC2_JOBS_DB", DATA_DIR / "jobs.sqlite3")) # Shared by all workers
+JOB_STALE_SECONDS = int(os.environ.get("IONIC2_JOB_STALE_SECONDS", "600")) # Running jobs without progress for this long are marked failed
 
 # SSL Configuration
 # You can enable SSL verification in several ways:
@@ -8,6 +8,7 @@ from typing import Dict, Any, Optional, Callable
 from flask import session, redirect, url_for, jsonify, request, current_app # Added current_app
 
 from app.api.iocore2 import IOCore2ApiClient
+from app.api.client_pool import get_pooled_client
 
 def login_required(f: Callable) -> Callable:
     """
@@ -89,7 +90,14 @@ def get_api_client() -> Optional[IOCore2ApiClient]:
     if 'cookies' not in session or 'url' not in session:
         return None
         
-    return IOCore2ApiClient(
-        base_url=session['url'],
-        cookies=session['cookies']
-    )
+    # Reuse the session's client so its keep-alive connections are reused
+    return get_pooled_client(session['url'], session['cookies'])
+
+def get_session_user() -> str:
+    """
+    Get the name of the logged-in user, recorded as the owner of the jobs they start.
+    
+    Returns:
+        Username stored at login, or '' for sessions without one
+    """
+    return session.get('username', '')
@@ -35,6 +35,11 @@ class ApiRequestError(IOnic2Error):
     def __init__(self, message="API request failed", status_code=500, **kwargs):
         super().__init__(message, status_code=status_code, **kwargs)
 
+class CircuitOpenError(ApiRequestError):
+    """Raised without contacting the server while its circuit breaker is open."""
+    def __init__(self, message="Remote API is unavailable, try again later", **kwargs):
+        super().__init__(message, status_code=503, **kwargs)
+
 class DataFormatError(IOnic2Error):
     """Raised when there is an error with data formatting or parsing."""
     def __init__(self, message="Data format error", **kwargs):
@@ -51,6 +56,16 @@ class ValidationError(IOnic2Error):
     def __init__(self, message="Validation error", **kwargs):
         super().__init__(message, status_code=400, **kwargs)
 
+class ConflictError(IOnic2Error):
+    """Raised when an update is based on a stale revision of a record."""
+    def __init__(self, message="Resource was modified concurrently", **kwargs):
+        super().__init__(message, status_code=409, **kwargs)
+
+class JobCancelled(IOnic2Error):
+    """Raised inside a background job when cancellation has been requested."""
+    def __init__(self, message="Job was cancelled", **kwargs):
+        super().__init__(message, status_code=409, **kwargs)
+
 def handle_exception(exc: Exception) -> Dict[str, Any]:
     """
     Handle exceptions and convert them to a standard format.
@@ -0,0 +1,444 @@
+"""
+Background job registry persisted in SQLite.
+
+Jobs are stored in settings.JOBS_DB so every worker process sees the same
+state. A job runs in a thread of the worker that started it and reports
+progress through a JobContext; while it runs, a heartbeat thread keeps its
+updated_at current. Jobs whose worker stopped updating them for
+settings.JOB_STALE_SECONDS are marked failed so they can be started again,
+and so are jobs whose worker process on this host is gone (each job records
+the host and pid that created it) without waiting for that timeout. State
+changes out of 'running' are conditional, so a job that was expired or
+cancelled meanwhile keeps that state.
+
+Each job records the user who started it (owner) and the users allowed to
+see it: the owner plus anyone whose request was deduplicated onto it.
+"""
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.core.exceptions import JobCancelled
+
+# Job states
+QUEUED = 'queued'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+ACTIVE_STATES = (QUEUED, RUNNING)
+FINISHED_STATES = (COMPLETED, FAILED, CANCELLED)
+
+# Minimum interval between progress writes from one job
+_PROGRESS_INTERVAL = 1.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    environment TEXT,
+    state TEXT NOT NULL,
+    dedupe_key TEXT,
+    params TEXT,
+    external_id TEXT,
+    progress_bytes INTEGER NOT NULL DEFAULT 0,
+    progress_records INTEGER NOT NULL DEFAULT 0,
+    message TEXT,
+    result TEXT,
+    error TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    owner_pid INTEGER,
+    owner_host TEXT,
+    owner TEXT,
+    created_at TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_dedupe ON jobs (dedupe_key, state);
+CREATE INDEX IF NOT EXISTS idx_jobs_created ON jobs (created_at);
+CREATE TABLE IF NOT EXISTS job_users (
+    job_id TEXT NOT NULL,
+    username TEXT NOT NULL,
+    PRIMARY KEY (job_id, username)
+);
+"""
+
+# Columns added after the first release, created on existing databases
+_MIGRATIONS = (
+    ('owner', "ALTER TABLE jobs ADD COLUMN owner TEXT"),
+    ('owner_host', "ALTER TABLE jobs ADD COLUMN owner_host TEXT"),
+)
+
+# Jobs visible to a user: legacy jobs without owner, or jobs the user started or joined
+_VISIBLE_TO_USER = "(owner IS NULL OR EXISTS (SELECT 1 FROM job_users WHERE job_users.job_id = jobs.id AND job_users.username = ?))"
+
+# Columns returned by the API, in order
+_JOB_FIELDS = (
+    'id', 'kind', 'environment', 'state', 'params', 'external_id', 'progress_bytes',
+    'progress_records', 'message', 'result', 'error', 'cancel_requested', 'owner',
+    'created_at', 'started_at', 'finished_at', 'updated_at'
+)
+
+# Fields update_job may change
+_UPDATABLE_FIELDS = frozenset(('state', 'external_id', 'progress_bytes', 'progress_records', 'message', 'result', 'error', 'started_at', 'finished_at', 'params'))
+
+_schema_lock = threading.Lock()
+_schema_ready_for = None # Database path the schema was created in
+
+# Host of this worker, and the jobs this process created (its pid may be a dead worker's reused one)
+_HOST = socket.gethostname()
+_created_here = set()
+
+def _now() -> str:
+    return datetime.now().isoformat()
+
+def _heartbeat_interval() -> float:
+    """Seconds between heartbeats of a running job, well below the stale timeout."""
+    return max(1.0, min(60.0, settings.JOB_STALE_SECONDS / 4))
+
+@contextmanager
+def _connect():
+    """Opens a connection to the job database, creating the schema on first use."""
+    global _schema_ready_for
+    db_path = settings.JOBS_DB
+    conn = sqlite3.connect(str(db_path), timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    try:
+        if _schema_ready_for != db_path:
+            with _schema_lock:
+                if _schema_ready_for != db_path:
+                    db_path.parent.mkdir(parents=True, exist_ok=True)
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.executescript(_SCHEMA)
+                    columns = {row['name'] for row in conn.execute("PRAGMA table_info(jobs)")}
+                    for column, statement in _MIGRATIONS:
+                        if column not in columns:
+                            conn.execute(statement)
+                    _schema_ready_for = db_path
+        yield conn
+    finally:
+        conn.close()
+
+def _row_to_job(row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
+    if row is None:
+        return None
+    job = {name: row[name] for name in _JOB_FIELDS}
+    for name in ('params', 'result'):
+        if job[name]:
+            job[name] = json.loads(job[name])
+    job['cancel_requested'] = bool(job['cancel_requested'])
+    return job
+
+def _expire_stale_jobs(conn: sqlite3.Connection) -> None:
+    """Marks active jobs that stopped reporting progress, or whose worker process is gone, as failed."""
+    cutoff = (datetime.now() - timedelta(seconds=settings.JOB_STALE_SECONDS)).isoformat()
+    now = _now()
+    cursor = conn.execute(
+        "UPDATE jobs SET state = ?, error = ?, finished_at = ?, updated_at = ? "
+        "WHERE state IN (?, ?) AND updated_at < ?",
+        (FAILED, 'Job stopped reporting progress (worker restarted?)', now, now, QUEUED, RUNNING, cutoff)
+    )
+    if cursor.rowcount:
+        logging.warning(f"Marked {cursor.rowcount} stale background job(s) as failed")
+
+    rows = conn.execute(
+        "SELECT id, owner_pid FROM jobs WHERE state IN (?, ?) AND owner_host = ? AND owner_pid IS NOT NULL",
+        (QUEUED, RUNNING, _HOST)
+    ).fetchall()
+    orphaned = [row['id'] for row in rows if not _owner_running(row['id'], row['owner_pid'])]
+    if orphaned:
+        cursor = conn.execute(
+            f"UPDATE jobs SET state = ?, error = ?, finished_at = ?, updated_at = ? "
+            f"WHERE id IN ({', '.join('?' for _ in orphaned)}) AND state IN (?, ?)",
+            (FAILED, 'Worker process running the job is gone (worker restarted?)', now, now, *orphaned, QUEUED, RUNNING)
+        )
+        logging.warning(f"Marked {cursor.rowcount} background job(s) of stopped workers as failed")
+
+def _owner_running(job_id: str, owner_pid: int) -> bool:
+    """Whether the process on this host that created a job is still running."""
+    if owner_pid == os.getpid():
+        return job_id in _created_here
+    try:
+        os.kill(owner_pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # Exists but belongs to another user
+        return True
+    return True
+
+def create_job(
+    kind: str,
+    environment: Optional[str] = None,
+    dedupe_key: Optional[str] = None,
+    params: Optional[Dict[str, Any]] = None,
+    owner: Optional[str] = None
+) -> Tuple[Dict[str, Any], bool]:
+    """
+    Registers a new job, unless an active job with the same dedupe key exists.
+
+    Args:
+        kind: Job type (e.g. 'sreq_coverage')
+        environment: Environment the job works on
+        dedupe_key: Jobs sharing this key do not run concurrently
+        params: JSON-serializable job parameters
+        owner: User starting the job. If an active duplicate is returned
+            instead, the user is given access to that job.
+
+    Returns:
+        Tuple of (job, created). created is False if an active duplicate was returned.
+    """
+    with _connect() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            _expire_stale_jobs(conn)
+            if dedupe_key:
+                row = conn.execute(
+                    "SELECT * FROM jobs WHERE dedupe_key = ? AND state IN (?, ?) ORDER BY created_at LIMIT 1",
+                    (dedupe_key, QUEUED, RUNNING)
+                ).fetchone()
+                if row is not None:
+                    if owner is not None:
+                        conn.execute("INSERT OR IGNORE INTO job_users (job_id, username) VALUES (?, ?)", (row['id'], owner))
+                    conn.execute("COMMIT")
+                    logging.info(f"Job {row['id']} already active for {dedupe_key}")
+                    return _row_to_job(row), False
+
+            now = _now()
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO jobs (id, kind, environment, state, dedupe_key, params, owner_pid, owner_host, owner, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, environment, QUEUED, dedupe_key,
+                 json.dumps(params) if params is not None else None, os.getpid(), _HOST, owner, now, now)
+            )
+            _created_here.add(job_id)
+            if owner is not None:
+                conn.execute("INSERT INTO job_users (job_id, username) VALUES (?, ?)", (job_id, owner))
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    logging.info(f"Created {kind} job {job_id} ({environment})")
+    return _row_to_job(row), True
+
+def get_job(job_id: str, user: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Gets a job by ID.
+
+    Args:
+        job_id: Job ID
+        user: If given, only return the job if this user started or joined it
+
+    Returns:
+        The job, or None if unknown (or not visible to the user)
+    """
+    query, values = "SELECT * FROM jobs WHERE id = ?", [job_id]
+    if user is not None:
+        query += f" AND {_VISIBLE_TO_USER}"
+        values.append(user)
+    with _connect() as conn:
+        _expire_stale_jobs(conn)
+        return _row_to_job(conn.execute(query, values).fetchone())
+
+def list_jobs(
+    kind: Optional[str] = None,
+    state: Optional[str] = None,
+    environment: Optional[str] = None,
+    limit: int = 50,
+    user: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Lists jobs, newest first.
+
+    Args:
+        kind: Optional job type filter
+        state: Optional state filter
+        environment: Optional environment filter
+        limit: Maximum number of jobs returned
+        user: Optional user; only jobs this user started or joined are listed
+
+    Returns:
+        List of jobs
+    """
+    clauses, values = [], []
+    for column, value in (('kind', kind), ('state', state), ('environment', environment)):
+        if value:
+            clauses.append(f"{column} = ?")
+            values.append(value)
+    if user is not None:
+        clauses.append(_VISIBLE_TO_USER)
+        values.append(user)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    with _connect() as conn:
+        _expire_stale_jobs(conn)
+        rows = conn.execute(f"SELECT * FROM jobs {where} ORDER BY created_at DESC LIMIT ?", (*values, limit)).fetchall()
+    return [_row_to_job(row) for row in rows]
+
+def update_job(job_id: str, **fields) -> None:
+    """
+    Updates job fields (state, external_id, progress_bytes, progress_records,
+    message, result, error, started_at, finished_at, params). Also refreshes
+    updated_at, which keeps the job from being considered stale.
+    """
+    _update_job(job_id, fields)
+
+def _update_job(job_id: str, fields: Dict[str, Any], from_states: Tuple[str, ...] = ()) -> bool:
+    """
+    Writes job fields, optionally only while the job is in one of from_states.
+
+    Returns:
+        True if the job was updated
+    """
+    unknown = set(fields) - _UPDATABLE_FIELDS
+    if unknown:
+        raise ValueError(f"Cannot update job fields: {', '.join(sorted(unknown))}")
+    fields = dict(fields)
+    for name in ('params', 'result'):
+        if name in fields and fields[name] is not None:
+            fields[name] = json.dumps(fields[name])
+    fields['updated_at'] = _now()
+    assignments = ", ".join(f"{name} = ?" for name in fields)
+    query, values = f"UPDATE jobs SET {assignments} WHERE id = ?", [*fields.values(), job_id]
+    if from_states:
+        query += f" AND state IN ({', '.join('?' for _ in from_states)})"
+        values.extend(from_states)
+    with _connect() as conn:
+        return conn.execute(query, values).rowcount > 0
+
+def _heartbeat(job_id: str, stop: threading.Event) -> None:
+    """Refreshes updated_at of a running job until stop is set or the job leaves 'running'."""
+    while not stop.wait(_heartbeat_interval()):
+        try:
+            with _connect() as conn:
+                cursor = conn.execute(
+                    "UPDATE jobs SET updated_at = ? WHERE id = ? AND state = ?", (_now(), job_id, RUNNING)
+                )
+            if not cursor.rowcount:
+                return
+        except sqlite3.Error as e:
+            logging.warning(f"Heartbeat of job {job_id} failed: {str(e)}")
+
+def request_cancel(job_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Asks an active job to stop. Queued jobs are cancelled immediately;
+    running jobs stop at their next progress report.
+
+    Returns:
+        The updated job, or None if unknown
+    """
+    now = _now()
+    with _connect() as conn:
+        conn.execute(
+            "UPDATE jobs SET cancel_requested = 1, updated_at = ? WHERE id = ? AND state IN (?, ?)",
+            (now, job_id, QUEUED, RUNNING)
+        )
+        conn.execute(
+            "UPDATE jobs SET state = ?, finished_at = ?, updated_at = ? WHERE id = ? AND state = ?",
+            (CANCELLED, now, now, job_id, QUEUED)
+        )
+        return _row_to_job(conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+def _cancel_requested(job_id: str) -> bool:
+    with _connect() as conn:
+        row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return bool(row and row['cancel_requested'])
+
+class JobContext:
+    """Handle passed to a running job for progress reporting and cancellation."""
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self._last_write = 0.0
+
+    def progress(
+        self,
+        bytes_done: Optional[int] = None,
+        records: Optional[int] = None,
+        message: Optional[str] = None,
+        force: bool = False
+    ) -> None:
+        """
+        Records progress (throttled) and raises JobCancelled if cancellation
+        was requested.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_write < _PROGRESS_INTERVAL:
+            return
+        self._last_write = now
+
+        fields = {}
+        if bytes_done is not None:
+            fields['progress_bytes'] = bytes_done
+        if records is not None:
+            fields['progress_records'] = records
+        if message is not None:
+            fields['message'] = message
+        update_job(self.job_id, **fields)
+        self.check_cancelled()
+
+    def set_external_id(self, external_id: str) -> None:
+        """Records the ID of the job on the remote system."""
+        update_job(self.job_id, external_id=external_id)
+
+    def check_cancelled(self) -> None:
+        """Raises JobCancelled if cancellation was requested."""
+        if _cancel_requested(self.job_id):
+            raise JobCancelled()
+
+def run_job(job_id: str, target: Callable[..., Any], *args, **kwargs) -> None:
+    """
+    Runs target(context, *args, **kwargs) as the given job, recording its outcome.
+
+    The target's return value (a JSON-serializable dict) becomes the job result.
+    The job is not started if it is no longer queued (e.g. cancelled), and its
+    outcome is only recorded if it is still running (not expired or cancelled
+    in the meantime).
+    """
+    context = JobContext(job_id)
+    if not _update_job(job_id, {'state': RUNNING, 'started_at': _now()}, from_states=(QUEUED,)):
+        logging.info(f"Job {job_id} is no longer queued, not starting it")
+        return
+
+    stop_heartbeat = threading.Event()
+    heartbeat = threading.Thread(target=_heartbeat, args=(job_id, stop_heartbeat), name=f"job-{job_id[:8]}-heartbeat")
+    heartbeat.daemon = True
+    heartbeat.start()
+    try:
+        result = target(context, *args, **kwargs)
+        outcome = {'state': COMPLETED, 'result': result}
+        logging.info(f"Job {job_id} completed")
+    except JobCancelled:
+        outcome = {'state': CANCELLED}
+        logging.info(f"Job {job_id} cancelled")
+    except Exception as e:
+        logging.exception(f"Job {job_id} failed: {str(e)}")
+        outcome = {'state': FAILED, 'error': getattr(e, 'message', None) or str(e)}
+    finally:
+        stop_heartbeat.set()
+
+    if not _update_job(job_id, {**outcome, 'finished_at': _now()}, from_states=(RUNNING,)):
+        logging.warning(f"Job {job_id} finished as {outcome['state']} after it had already been marked finished; keeping that state")
+
+def start_job_thread(job_id: str, target: Callable[..., Any], *args, **kwargs) -> threading.Thread:
+    """Runs a job in a daemon thread of the current worker."""
+    thread = threading.Thread(
+        target=run_job,
+        args=(job_id, target, *args),
+        kwargs=kwargs,
+        name=f"job-{job_id[:8]}"
+    )
+    thread.daemon = True  # Make sure thread doesn't block app shutdown
+    thread.start()
+    return thread
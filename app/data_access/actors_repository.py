@@ -0,0 +1,107 @@
+"""
+Actors repository module.
+Provides per-environment lookup maps built from the downloaded actors.json.
+"""
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+from app.utils.file_operations import get_dynamic_data_path, resolve_environment
+from app.utils.dataset_store import dataset_exists, dataset_signature, open_dataset
+
+# Get the logger instance
+logger = logging.getLogger(__name__)
+
+@dataclass
+class ActorDirectory:
+    """Prebuilt actor lookup maps for a single environment."""
+    environment: str
+    id_to_name: Dict[str, str] = field(default_factory=dict)
+    key_to_name: Dict[str, str] = field(default_factory=dict)
+    name_to_key: Dict[str, str] = field(default_factory=dict)
+    loaded: bool = False  # False when actors.json is missing or unreadable
+
+    def get_name(self, actor_id: str) -> Optional[str]:
+        """Returns the actor name for a key or ID (keys take precedence)."""
+        name = self.key_to_name.get(actor_id)
+        if name is None:
+            name = self.id_to_name.get(actor_id)
+        return name
+
+    def get_key(self, actor_name: str) -> str:
+        """Returns the actor key for a name (case-insensitive), or '' if unknown."""
+        return self.name_to_key.get(normalize_actor_name(actor_name), "")
+
+# Directories keyed by environment ('ciav' / 'cwix'), with the actors.json signature they were built from
+_directories: Dict[str, Tuple[Optional[Tuple[int, int]], ActorDirectory]] = {}
+_directories_lock = threading.Lock() # Prevent duplicate loads for the same environment
+
+def normalize_actor_name(name: str) -> str:
+    """Normalizes an actor name for lookups (strip whitespace, lowercase)."""
+    return (name or "").strip().lower()
+
+def _build_directory(environment: str) -> ActorDirectory:
+    """Loads actors.json for the environment and builds the lookup maps."""
+    start_time = time.time()
+    directory = ActorDirectory(environment=environment)
+    actors_path = get_dynamic_data_path("actors.json", environment=environment)
+
+    if not dataset_exists(actors_path):
+        logger.error(f"actors.json not found at {actors_path}.")
+        return directory
+
+    try:
+        with open_dataset(actors_path) as f:
+            actors_data = json.load(f)
+    except json.JSONDecodeError as e:
+        logger.error(f"Error decoding {actors_path}: {e}")
+        return directory
+    except MemoryError:
+        logger.error(f"MemoryError: {actors_path} is too large to load into memory.")
+        return directory
+    except Exception as e:
+        logger.exception(f"Unexpected error loading {actors_path}: {e}")
+        return directory
+
+    for actor in actors_data or []:
+        if 'id' not in actor:
+            continue
+        # Strip whitespace from names, the API returns some with a leading space
+        name = (actor.get('name') or 'Unknown Actor').strip()
+        key = actor.get('key', actor['id'])
+        directory.id_to_name[actor['id']] = name
+        directory.key_to_name[key] = name
+        directory.name_to_key[normalize_actor_name(name)] = key
+
+    directory.loaded = True
+    load_time = time.time() - start_time
+    logger.info(f"Loaded {len(directory.key_to_name)} actors for '{environment}' in {load_time:.2f} seconds.")
+    return directory
+
+def get_actor_directory(environment: Optional[str] = None) -> ActorDirectory:
+    """
+    Gets the actor directory for an environment.
+
+    The directory is rebuilt whenever actors.json changes on disk (e.g. after a
+    refresh in this or another worker).
+
+    Args:
+        environment: Optional environment ('ciav' or 'cwix'). Defaults to the session environment.
+
+    Returns:
+        ActorDirectory for the environment
+    """
+    environment = resolve_environment(environment)
+    signature = dataset_signature(get_dynamic_data_path("actors.json", environment=environment))
+    cached = _directories.get(environment)
+    if cached is None or cached[0] != signature:
+        with _directories_lock:
+            # Double-check inside lock
+            cached = _directories.get(environment)
+            if cached is None or cached[0] != signature:
+                cached = (signature, _build_directory(environment))
+                _directories[environment] = cached
+    return cached[1]
@@ -1,20 +1,159 @@
+import base64
+import copy
 import json
 import os
 import logging
+import shutil
+import threading
+import uuid
+from contextlib import contextmanager
 from flask import current_app
 
+from app.core.exceptions import ConflictError, ResourceNotFoundError, ValidationError
+from app.utils.dataset_store import temp_path_for
+from app.utils.file_lock import file_lock
+
 # Define the relative path to the JSON file
 # We define it inside the functions to avoid issues with application context
 # during import time.
 _ASCS_JSON_FILE = 'ASC/data/_ascs.json' # Updated filename
 
+# Statuses used by the kanban board columns
+ASC_STATUSES = ('Initial', 'In Progress', 'In Review', 'Validated', 'Deprecated')
+
+# Fields a PATCH may not change
+_IMMUTABLE_FIELDS = ('id', 'guid', 'revision')
+
+def _get_ascs_path():
+    """Get the path to the ASCs JSON file."""
+    return os.path.join(current_app.static_folder, _ASCS_JSON_FILE)
+
+def _file_signature(path):
+    """Returns (mtime_ns, size) for a file, or None if it does not exist."""
+    try:
+        stats = os.stat(path)
+        return (stats.st_mtime_ns, stats.st_size)
+    except FileNotFoundError:
+        return None
+
+class _AscStore:
+    """
+    In-memory copy of _ascs.json indexed by ASC ID.
+
+    The copy is re-read whenever the file changes on disk (e.g. written by
+    another worker). Single-record updates run under the cross-process file
+    lock: the copy is refreshed from disk, the revision is checked against it
+    and the file is written before the lock is released, so two workers
+    cannot both accept an update based on the same revision.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.path = None
+        self.ascs = []
+        self.index = {}
+        self.signature = None
+        self.version = 0  # Bumped on every reload or change, used by derived caches
+
+    def _reload(self):
+        logging.info(f"Loading ASCs into store from: {self.path}")
+        signature = _file_signature(self.path)
+        data = []
+        if signature is not None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                # Keep serving the last good copy; the file is re-read once it changes again
+                logging.error(f"Could not read ASCs from {self.path}, keeping the loaded copy: {e}")
+                self.signature = signature
+                return
+        self.ascs = data if isinstance(data, list) else []
+        self.index = {asc.get('id'): asc for asc in self.ascs if asc.get('id')}
+        self.signature = signature
+        self.version += 1
+
+    def ensure_loaded(self):
+        """Loads or refreshes the store from disk when needed (call with lock held)."""
+        path = _get_ascs_path()
+        if path != self.path or _file_signature(path) != self.signature:
+            self.path = path
+            self._reload()
+
+    def save(self):
+        """
+        Writes the in-memory ASCs to disk atomically (call with lock and file lock held).
+
+        Raises:
+            OSError: If the file cannot be written. The store is reloaded from
+                disk on next access, dropping the unsaved change.
+        """
+        self.version += 1
+        try:
+            _write_ascs_file(self.path, self.ascs)
+        except OSError:
+            self.signature = None
+            raise
+        self.signature = _file_signature(self.path)
+
+    def replace(self, asc_id, asc):
+        """Replaces the stored record of an ASC (call with lock held)."""
+        for pos, stored in enumerate(self.ascs):
+            if stored.get('id') == asc_id:
+                self.ascs[pos] = asc
+                break
+        self.index[asc_id] = asc
+
+    def invalidate(self):
+        """Forces a reload on next access."""
+        with self.lock:
+            self.signature = None
+
+def _write_ascs_file(path, ascs):
+    """
+    Writes the ASC list atomically, keeping the replaced file as .bak
+    (call with the file lock held).
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if os.path.exists(path):
+        shutil.copy2(path, f"{path}.bak")
+    tmp_path = temp_path_for(path)
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(ascs, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+_store = _AscStore()
+
+@contextmanager
+def _locked_store():
+    """Holds the store lock and the ASC file lock, with the store refreshed from disk."""
+    with _store.lock, file_lock(_get_ascs_path()):
+        _store.ensure_loaded()
+        yield _store
+
+def get_asc_store():
+    """
+    Returns the loaded ASC store. Callers must hold store.lock while reading
+    store.ascs / store.index and must not mutate the returned records.
+    """
+    with _store.lock:
+        _store.ensure_loaded()
+    return _store
+
 def get_all_ascs():
     """
     Reads all ASCs data from the JSON file.
     """
     try:
         # Construct the full path using the application's static folder
-        json_file_path = os.path.join(current_app.static_folder, _ASCS_JSON_FILE)
+        json_file_path = _get_ascs_path()
         
         # Log that we're attempting to read the file
         import logging
@@ -57,7 +196,7 @@ def save_ascs(ascs_data):
     """
     try:
         # Construct the full path using the application's static folder
-        json_file_path = os.path.join(current_app.static_folder, _ASCS_JSON_FILE)
+        json_file_path = _get_ascs_path()
         
         # Log detailed info about the save operation
         logging.info(f"Saving {len(ascs_data)} ASCs to file: {json_file_path}")
@@ -66,18 +205,12 @@ def save_ascs(ascs_data):
         # Ensure the directory exists
         os.makedirs(os.path.dirname(json_file_path), exist_ok=True)
         
-        # Backup the existing file first
-        if os.path.exists(json_file_path):
-            backup_path = f"{json_file_path}.bak"
-            logging.info(f"Creating backup of existing ASCs file at: {backup_path}")
-            import shutil
-            shutil.copy2(json_file_path, backup_path)
-        
-        # Write the new data
-        with open(json_file_path, 'w', encoding='utf-8') as f:
-            json.dump(ascs_data, f, indent=2, ensure_ascii=False)
+        with file_lock(json_file_path):
+            # Backs up the existing file and replaces it atomically
+            _write_ascs_file(json_file_path, ascs_data)
         
         logging.info(f"Successfully saved ASCs data to: {json_file_path}")
+        _store.invalidate()
         return True
     except Exception as e:
         logging.exception(f"An unexpected error occurred while saving ASCs: {e}")
@@ -91,7 +224,351 @@ def find_asc_by_id(asc_id):
             return asc
     return None
 
-# Note: Add, Update, Delete logic will be handled in the API route for now,
-# as it involves ID generation and potentially more complex updates than
-# just saving the whole file. The repository provides the basic load/save.
-# If more complex logic is needed repeatedly, it could be moved here later.
+def _check_revision(asc, expected_revision):
+    """Raises ConflictError if the record has moved past the client's revision."""
+    current = asc.get('revision', 0)
+    if expected_revision is not None and int(expected_revision) != current:
+        raise ConflictError(
+            f"ASC '{asc.get('id')}' was modified by someone else (revision {current}, expected {expected_revision})",
+            details={'asc': copy.deepcopy(asc)}
+        )
+
+def update_asc_record(asc_id, apply_change, expected_revision=None):
+    """
+    Changes a single ASC under the store and file locks.
+
+    The change is applied to a copy of the current record, which replaces
+    the stored one (with the next revision) only if apply_change succeeds.
+
+    Args:
+        asc_id (str): ID of the ASC to change
+        apply_change (callable): Called with the record copy; modifies it in
+            place and returns the value to hand back to the caller
+        expected_revision (int, optional): Revision the client last saw
+
+    Returns:
+        Tuple of (copy of the updated ASC, copy of the value returned by apply_change)
+
+    Raises:
+        ResourceNotFoundError: If the ASC does not exist (or apply_change raises it)
+        ConflictError: If expected_revision does not match the stored revision
+    """
+    with _locked_store() as store:
+        asc = store.index.get(asc_id)
+        if asc is None:
+            raise ResourceNotFoundError("ASC", asc_id)
+        _check_revision(asc, expected_revision)
+
+        updated = copy.deepcopy(asc)
+        result = apply_change(updated)
+        updated['id'] = asc_id
+        updated['revision'] = asc.get('revision', 0) + 1
+        store.replace(asc_id, updated)
+        store.save()
+        logging.info(f"Updated ASC {asc_id} -> revision {updated['revision']}")
+        return copy.deepcopy(updated), copy.deepcopy(result)
+
+def patch_asc(asc_id, changes, expected_revision=None):
+    """
+    Applies a partial update to a single ASC.
+
+    Args:
+        asc_id (str): ID of the ASC to update
+        changes (dict): Top-level fields to set on the ASC
+        expected_revision (int, optional): Revision the client last saw
+
+    Returns:
+        dict: Copy of the updated ASC, including its new revision
+
+    Raises:
+        ResourceNotFoundError: If the ASC does not exist
+        ConflictError: If expected_revision does not match the stored revision
+        ValidationError: If the changes try to modify immutable fields
+    """
+    if not isinstance(changes, dict) or not changes:
+        raise ValidationError("No changes provided.")
+    blocked = [field for field in _IMMUTABLE_FIELDS if field in changes]
+    if blocked:
+        raise ValidationError(f"Fields cannot be changed: {', '.join(blocked)}")
+    if 'status' in changes and changes['status'] not in ASC_STATUSES:
+        raise ValidationError(f"Invalid status '{changes['status']}'.")
+
+    return update_asc_record(asc_id, lambda asc: asc.update(copy.deepcopy(changes)), expected_revision)[0]
+
+def replace_asc(asc_id, data, expected_revision=None):
+    """
+    Replaces an ASC with an edited full record (as sent by the ASC form).
+
+    The stored ID and GUID are kept; the revision is the next one.
+
+    Args:
+        asc_id (str): ID of the ASC to replace
+        data (dict): New record
+        expected_revision (int, optional): Revision the client last saw
+
+    Returns:
+        dict: Copy of the stored ASC
+
+    Raises:
+        ResourceNotFoundError: If the ASC does not exist
+        ConflictError: If expected_revision does not match the stored revision
+    """
+    def apply_change(asc):
+        guid = asc.get('guid') or str(uuid.uuid4())
+        asc.clear()
+        asc.update(copy.deepcopy(data))
+        asc['guid'] = guid
+
+    return update_asc_record(asc_id, apply_change, expected_revision)[0]
+
+def _next_asc_id(ascs):
+    last_id_num = 0
+    for asc in ascs:
+        if isinstance(asc.get('id'), str) and asc['id'].startswith('ASC-'):
+            try:
+                last_id_num = max(last_id_num, int(asc['id'].split('-')[1]))
+            except (IndexError, ValueError):
+                pass
+    return f"ASC-{str(last_id_num + 1).zfill(4)}"
+
+def create_asc(asc):
+    """
+    Adds a new ASC with the next free ID (ASC-0001, ASC-0002, ...).
+
+    Args:
+        asc (dict): New record, without ID
+
+    Returns:
+        dict: Copy of the stored ASC, including its ID
+    """
+    with _locked_store() as store:
+        created = copy.deepcopy(asc)
+        created['id'] = _next_asc_id(store.ascs)
+        store.ascs.append(created)
+        store.index[created['id']] = created
+        store.save()
+        logging.info(f"Created ASC {created['id']}")
+        return copy.deepcopy(created)
+
+def delete_asc(asc_id, expected_revision=None):
+    """
+    Deletes an ASC.
+
+    Args:
+        asc_id (str): ID of the ASC to delete
+        expected_revision (int, optional): Revision the client last saw
+
+    Raises:
+        ResourceNotFoundError: If the ASC does not exist
+        ConflictError: If expected_revision does not match the stored revision
+    """
+    with _locked_store() as store:
+        asc = store.index.get(asc_id)
+        if asc is None:
+            raise ResourceNotFoundError("ASC", asc_id)
+        _check_revision(asc, expected_revision)
+        store.ascs = [stored for stored in store.ascs if stored.get('id') != asc_id]
+        del store.index[asc_id]
+        store.save()
+        logging.info(f"Deleted ASC {asc_id}")
+
+def move_asc(asc_id, new_status, expected_revision=None):
+    """
+    Moves an ASC to another kanban status column.
+
+    Args:
+        asc_id (str): ID of the ASC to move
+        new_status (str): Target status
+        expected_revision (int, optional): Revision the client last saw
+
+    Returns:
+        dict: Copy of the updated ASC
+    """
+    return patch_asc(asc_id, {'status': new_status}, expected_revision)
+
+# --- Secondary indexes for list queries ---
+
+# Sort keys accepted by query_ascs (prefix with '-' for descending)
+ASC_SORT_KEYS = ('id', 'status', 'affiliateId', 'serviceId', 'model', 'environment', 'ascScore')
+
+# Nested instance fields dropped when a projection omits them
+_INSTANCE_FIELDS = ('gpInstances',)
+
+class _AscIndex:
+    """Filter and sort indexes over the records of one store version."""
+
+    def __init__(self, ascs, names_key, affiliate_names, service_names):
+        self.names_key = names_key
+        self.records = ascs
+        self.by_field = {field: {} for field in ('status', 'affiliateId', 'serviceId', 'model')}
+        self.search_text = []
+        for pos, asc in enumerate(ascs):
+            for field, buckets in self.by_field.items():
+                value = asc.get(field) or ('Initial' if field == 'status' else '')
+                buckets.setdefault(value, set()).add(pos)
+            self.search_text.append(" ".join(filter(None, [
+                asc.get('id'),
+                affiliate_names.get(asc.get('affiliateId'), ''),
+                service_names.get(asc.get('serviceId'), ''),
+                asc.get('environment'),
+                asc.get('model'),
+            ])).lower())
+        self._sort_values = {}
+
+    def sort_values(self, sort_key):
+        """Per-record (value, id) tuples for a sort key, computed once per key."""
+        values = self._sort_values.get(sort_key)
+        if values is None:
+            values = [(_sort_value(asc, sort_key), asc.get('id') or '') for asc in self.records]
+            self._sort_values[sort_key] = values
+        return values
+
+def _sort_value(asc, sort_key):
+    value = asc.get(sort_key)
+    if sort_key == 'ascScore':
+        try:
+            return float(str(value or '0').rstrip('%'))
+        except ValueError:
+            return 0.0
+    return str(value or '')
+
+_index = None
+_index_version = None
+
+def _names_signature():
+    """Signature of the affiliate/service catalogs used for free-text search."""
+    static_folder = current_app.static_folder
+    return (
+        _file_signature(os.path.join(static_folder, 'ASC', 'data', '_affiliates.json')),
+        _file_signature(os.path.join(static_folder, 'ASC', 'data', '_servicesm.json')),
+    )
+
+def _get_index(store):
+    """Returns the index for the store's current version (call with store.lock held)."""
+    global _index, _index_version
+    names_key = _names_signature()
+    if _index is None or _index_version != store.version or _index.names_key != names_key:
+        from app.data_access.affiliates_repository import get_all_affiliates
+        from app.data_access.services_repository import get_all_services
+        affiliate_names = {a.get('id'): a.get('name', '') for a in get_all_affiliates()}
+        service_names = {s.get('id'): s.get('name', '') for s in get_all_services()}
+        _index = _AscIndex(store.ascs, names_key, affiliate_names, service_names)
+        _index_version = store.version
+        logging.info(f"Built ASC index for {len(store.ascs)} ASCs (store version {store.version})")
+    return _index
+
+def project_asc(asc, fields=None):
+    """
+    Returns a copy of an ASC limited to the requested fields.
+
+    Args:
+        asc (dict): ASC record
+        fields (list, optional): Top-level fields to keep. 'summary' keeps every
+            field except the nested instances and adds instance counts.
+    """
+    if not fields:
+        return copy.deepcopy(asc)
+    if fields == ['summary']:
+        projected = {k: copy.deepcopy(v) for k, v in asc.items() if k not in _INSTANCE_FIELDS}
+        gp_instances = asc.get('gpInstances') or []
+        projected['gpInstanceCount'] = len(gp_instances)
+        projected['spInstanceCount'] = sum(len(gp.get('spInstances') or []) for gp in gp_instances)
+        return projected
+    return {k: copy.deepcopy(asc[k]) for k in fields if k in asc}
+
+def encode_cursor(sort, sort_value, asc_id):
+    """Encodes a keyset pagination cursor for a sort (e.g. '-ascScore')."""
+    raw = json.dumps([sort, sort_value, asc_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def decode_cursor(cursor, sort):
+    """
+    Decodes a cursor produced by encode_cursor for the same sort.
+
+    Raises:
+        ValidationError: If the cursor is malformed or was issued for another sort
+    """
+    try:
+        cursor_sort, sort_value, asc_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except Exception:
+        raise ValidationError(f"Invalid cursor '{cursor}'.")
+    if cursor_sort != sort:
+        raise ValidationError(f"Cursor was issued for sort '{cursor_sort}', not '{sort}'.")
+    # Sort values are compared with the cursor's, so they must have the same type
+    numeric = sort.lstrip('-') == 'ascScore'
+    if numeric:
+        valid_value = isinstance(sort_value, (int, float)) and not isinstance(sort_value, bool)
+    else:
+        valid_value = isinstance(sort_value, str)
+    if not valid_value or not isinstance(asc_id, str):
+        raise ValidationError(f"Invalid cursor '{cursor}'.")
+    return (float(sort_value) if numeric else sort_value, asc_id)
+
+def query_ascs(status=None, affiliate=None, service=None, model=None, text=None,
+               sort='id', cursor=None, limit=None, fields=None):
+    """
+    Filters, sorts and pages ASCs using indexes over the cached store.
+
+    Args:
+        status, affiliate, service, model (list, optional): Allowed values per field
+        text (str, optional): Case-insensitive free-text search (ID, affiliate and
+            service names, environment, model)
+        sort (str): One of ASC_SORT_KEYS, prefixed with '-' for descending order
+        cursor (str, optional): Cursor returned as 'nextCursor' by the previous page
+        limit (int, optional): Page size; all matches are returned if omitted
+        fields (list, optional): Projection passed to project_asc
+
+    Returns:
+        dict: {'items': [...], 'total': <matches>, 'nextCursor': <str or None>}
+    """
+    descending = sort.startswith('-')
+    sort_key = sort.lstrip('-')
+    if sort_key not in ASC_SORT_KEYS:
+        raise ValidationError(f"Invalid sort key '{sort_key}'.")
+    after = decode_cursor(cursor, sort) if cursor else None
+
+    store = get_asc_store()
+    with store.lock:
+        index = _get_index(store)
+
+        candidates = None
+        for field, wanted in (('status', status), ('affiliateId', affiliate),
+                              ('serviceId', service), ('model', model)):
+            if not wanted:
+                continue
+            buckets = index.by_field[field]
+            matches = set().union(*(buckets.get(value, ()) for value in wanted))
+            candidates = matches if candidates is None else candidates & matches
+        if candidates is None:
+            candidates = range(len(index.records))
+        if text:
+            needle = text.strip().lower()
+            candidates = [pos for pos in candidates if needle in index.search_text[pos]]
+
+        sort_values = index.sort_values(sort_key)
+        ordered = sorted(candidates, key=sort_values.__getitem__, reverse=descending)
+        total = len(ordered)
+
+        if after is not None:
+            if descending:
+                ordered = [pos for pos in ordered if tuple(sort_values[pos]) < after]
+            else:
+                ordered = [pos for pos in ordered if tuple(sort_values[pos]) > after]
+
+        page = ordered[:limit] if limit else ordered
+        next_cursor = None
+        if limit and len(ordered) > limit:
+            next_cursor = encode_cursor(sort, *sort_values[page[-1]])
+
+        return {
+            'items': [project_asc(index.records[pos], fields) for pos in page],
+            'total': total,
+            'nextCursor': next_cursor
+        }
+
+def get_asc(asc_id):
+    """Returns a copy of a single ASC from the cached store, or None."""
+    store = get_asc_store()
+    with store.lock:
+        asc = store.index.get(asc_id)
+        return copy.deepcopy(asc) if asc is not None else None
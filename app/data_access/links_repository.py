@@ -1,5 +1,7 @@
 import json
 import os
+import threading
+from collections import deque
 from flask import current_app, jsonify
 
 # Define the relative path to the JSON file
@@ -7,6 +9,85 @@ from flask import current_app, jsonify
 # during import time.
 _LINKS_JSON_FILE = 'ASC/data/_links.json' # Updated filename
 
+class _LinkGraph:
+    """
+    Adjacency index over the links catalog.
+
+    Links connect the GPs on side A with the GPs on side B; the index maps
+    each GP to the links that touch it and to the GPs across those links.
+    """
+
+    def __init__(self, links):
+        self.links = links
+        self.by_id = {}
+        self.gp_links = {}      # GP ID -> {'a': [link IDs], 'b': [link IDs]}
+        self.gp_neighbours = {} # GP ID -> set of GP IDs on the opposite side of a shared link
+        for link in links:
+            link_id = link.get('id')
+            if not link_id:
+                continue
+            self.by_id[link_id] = link
+            side_a = link.get('gps_side_a') or []
+            side_b = link.get('gps_side_b') or []
+            for side, gp_ids in (('a', side_a), ('b', side_b)):
+                for gp_id in dict.fromkeys(gp_ids):
+                    self.gp_links.setdefault(gp_id, {'a': [], 'b': []})[side].append(link_id)
+            for gp_a in side_a:
+                for gp_b in side_b:
+                    if gp_a != gp_b:
+                        self.gp_neighbours.setdefault(gp_a, set()).add(gp_b)
+                        self.gp_neighbours.setdefault(gp_b, set()).add(gp_a)
+
+    def link_ids_for_gp(self, gp_id, side=None):
+        """Link IDs touching a GP, optionally restricted to side 'a' or 'b'."""
+        sides = self.gp_links.get(gp_id)
+        if not sides:
+            return []
+        if side:
+            return list(sides[side])
+        return list(dict.fromkeys(sides['a'] + sides['b']))
+
+# Cached graph and the (mtime_ns, size) of the file it was built from
+_graph = None
+_graph_signature = None
+_graph_lock = threading.Lock()
+
+def _get_links_path():
+    """Get the path to the links JSON file."""
+    return os.path.join(current_app.static_folder, _LINKS_JSON_FILE)
+
+def _links_signature(path):
+    try:
+        stats = os.stat(path)
+        return (stats.st_mtime_ns, stats.st_size)
+    except FileNotFoundError:
+        return None
+
+def get_link_graph():
+    """
+    Gets the adjacency index for the links catalog, rebuilding it when
+    _links.json changes on disk.
+
+    Returns:
+        _LinkGraph
+    """
+    global _graph, _graph_signature
+    signature = _links_signature(_get_links_path())
+    if _graph is not None and signature == _graph_signature:
+        return _graph
+    with _graph_lock:
+        if _graph is None or signature != _graph_signature:
+            _graph = _LinkGraph(get_all_links())
+            _graph_signature = signature
+        return _graph
+
+def invalidate_link_graph():
+    """Drops the cached link graph so it is rebuilt on next use."""
+    global _graph, _graph_signature
+    with _graph_lock:
+        _graph = None
+        _graph_signature = None
+
 def get_all_links():
     """
     Reads all links data from the JSON file.
@@ -48,6 +129,7 @@ def save_links(links_data):
         
         with open(json_file_path, 'w', encoding='utf-8') as f:
             json.dump(links_data, f, indent=2, ensure_ascii=False)
+        invalidate_link_graph()
         return True
     except Exception as e:
         # Log error
@@ -56,11 +138,71 @@ def save_links(links_data):
 
 def find_link_by_id(link_id):
     """Finds a single link by its ID."""
-    links = get_all_links()
-    for link in links:
-        if link.get('id') == link_id:
-            return link
-    return None
+    return get_link_graph().by_id.get(link_id)
+
+def get_links_for_gp(gp_id, side=None):
+    """
+    Gets the links touching a GP.
+
+    Args:
+        gp_id: GP ID
+        side: Optional 'a' or 'b' to only match links with the GP on that side
+
+    Returns:
+        list: Link objects
+    """
+    graph = get_link_graph()
+    return [graph.by_id[link_id] for link_id in graph.link_ids_for_gp(gp_id, side)]
+
+def get_reachable_gps(gp_id, max_hops=1):
+    """
+    Finds the GPs reachable from a GP through links, within max_hops.
+
+    One hop crosses one link from a GP on one side to a GP on the other side.
+
+    Args:
+        gp_id: Starting GP ID
+        max_hops: Maximum number of links to cross
+
+    Returns:
+        dict: GP ID -> number of hops (the starting GP is not included)
+    """
+    graph = get_link_graph()
+    hops = {gp_id: 0}
+    queue = deque([gp_id])
+    while queue:
+        current = queue.popleft()
+        if hops[current] >= max_hops:
+            continue
+        for neighbour in graph.gp_neighbours.get(current, ()):
+            if neighbour not in hops:
+                hops[neighbour] = hops[current] + 1
+                queue.append(neighbour)
+    del hops[gp_id]
+    return hops
+
+def get_links_for_gps(gp_ids):
+    """
+    Gets the links touching any of a set of GPs (e.g. an ASC's GP instances).
+
+    Args:
+        gp_ids: Iterable of GP IDs
+
+    Returns:
+        list: Dicts with the link plus 'matchedSideA'/'matchedSideB', the given
+        GPs found on each side, ordered by link ID
+    """
+    graph = get_link_graph()
+    matches = {}
+    for gp_id in dict.fromkeys(gp_ids):
+        sides = graph.gp_links.get(gp_id)
+        if not sides:
+            continue
+        for side_key, side in (('matchedSideA', 'a'), ('matchedSideB', 'b')):
+            for link_id in sides[side]:
+                entry = matches.setdefault(link_id, {'link': graph.by_id[link_id], 'matchedSideA': [], 'matchedSideB': []})
+                entry[side_key].append(gp_id)
+    return [matches[link_id] for link_id in sorted(matches)]
 
 def add_link(new_link_data):
     """Adds a new link to the list and saves."""
@@ -0,0 +1,299 @@
+"""
+Side-by-side coverage of the ciav and cwix environments.
+
+Each environment is summarized once per version of its SREQ.json, IER.json
+and test_results.json (an artifact): the files are streamed with ijson and
+reduced to one entry per requirement, keyed by SREQ or IER number, with its
+grouping, whether it is covered, and whether one of its test cases is
+planned or executed in a test plan. Test case keys differ between the
+environments, so they are compared through the requirements they cover.
+Rows are filtered as in the coverage statistics (Deprecated/Draft rows and
+SREQ rows covered through a dependency do not count).
+"""
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import ijson
+
+from app.utils.artifact_store import artifact_key, load_artifact
+from app.utils.dataset_store import dataset_exists, open_dataset
+from app.utils.file_operations import get_dynamic_data_path
+
+COMPARED_ENVIRONMENTS = ('ciav', 'cwix')
+
+# Artifact of summarize_environment; renamed when RequirementCoverage changes
+_SUMMARY_ARTIFACT = 'coverage_compare_summary_v2'
+
+# dataset -> groupings: name -> (RequirementCoverage group index, label index)
+COMPARE_GROUPINGS = {
+    'sreq': {'si': (0, 1), 'tin': (2, 3)},
+    'ier': {'pi': (0, 1), 'ier': (2, 3)},
+}
+
+# Overall results of a test that has not been executed
+_NOT_EXECUTED = (None, '', 'NotSet')
+
+@dataclass(slots=True)
+class RequirementCoverage:
+    """Coverage of one requirement in one environment"""
+    name: str
+    # Distinct groupings of the requirement's rows, in row order
+    # SREQ: (siNumber, siName, tinNumber, tinName); IER: (piNumber, piName, ierNumber, ierName)
+    groups: List[Tuple[str, ...]]
+    test_cases: Set[str]
+    planned: bool = False
+    executed: bool = False
+
+@dataclass(slots=True)
+class EnvironmentCoverage:
+    """Requirements of one environment, keyed by SREQ and IER number"""
+    sreq: Dict[str, RequirementCoverage]
+    ier: Dict[str, RequirementCoverage]
+    test_results: bool # Whether planned/executed are known
+
+def _iter_tests(test_results_path) -> Iterator[Dict[str, Any]]:
+    """Streams the tests of test_results.json, in either export format."""
+    with open_dataset(test_results_path, 'r') as f_check:
+        header = f_check.read(1000)
+    # New format has 'Tests' at the root, legacy format nests them in 'TestPlans'
+    use_new_format = '"Tests":' in header and '"TestPlans":' not in header
+    with open_dataset(test_results_path, 'rb') as f:
+        if use_new_format:
+            yield from ijson.items(f, 'Tests.item')
+        else:
+            for test_plan in ijson.items(f, 'TestPlans.item'):
+                yield from test_plan.get('Tests') or []
+
+def _read_test_states(test_results_path) -> Tuple[Set[str], Set[str]]:
+    """Returns the test case keys with a test in a test plan, and those with an executed test."""
+    planned: Set[str] = set()
+    executed: Set[str] = set()
+    for test in _iter_tests(test_results_path):
+        key = (test.get('TestCase') or {}).get('Key')
+        if not key:
+            continue
+        planned.add(key)
+        result = ((test.get('AnalysisResult') or {}).get('OverallResult') or {}).get('Result')
+        if result not in _NOT_EXECUTED:
+            executed.add(key)
+    return planned, executed
+
+def _read_requirements(path, number_field: str, name_field: str, group_fields: Tuple[str, ...], status_field: str) -> Dict[str, RequirementCoverage]:
+    requirements: Dict[str, RequirementCoverage] = {}
+    with open_dataset(path, 'rb') as f:
+        for row in ijson.items(f, 'item'):
+            if row.get(status_field) in ('Deprecated', 'Draft'):
+                continue
+            if row.get('coverageType') in ('tdp', 'idp'):
+                continue
+            number = row.get(number_field)
+            if not number:
+                continue
+            groups = tuple(row.get(field) or '' for field in group_fields)
+            requirement = requirements.get(number)
+            if requirement is None:
+                requirement = requirements[number] = RequirementCoverage(
+                    name=row.get(name_field) or '', groups=[groups], test_cases=set()
+                )
+            elif groups not in requirement.groups:
+                # A requirement can belong to several SIs/TINs (PIs), as in the coverage statistics
+                requirement.groups.append(groups)
+            if row.get('testCaseKey') and row.get('testCaseName') is not None:
+                requirement.test_cases.add(row['testCaseKey'])
+    return requirements
+
+def summarize_environment(sreq_path, ier_path, test_results_path=None) -> EnvironmentCoverage:
+    """
+    Reduces an environment's datasets to one entry per requirement.
+
+    Args:
+        sreq_path: Path to SREQ.json
+        ier_path: Path to IER.json
+        test_results_path: Optional path to test_results.json
+
+    Returns:
+        EnvironmentCoverage
+    """
+    sreq = _read_requirements(sreq_path, 'sreqNumber', 'sreqName', ('siNumber', 'siName', 'tinNumber', 'tinName'), 'status')
+    ier = _read_requirements(ier_path, 'ierNumber', 'ierName', ('piNumber', 'piName', 'ierNumber', 'ierName'), 'testCaseState')
+    if test_results_path is not None:
+        planned, executed = _read_test_states(test_results_path)
+        for requirement in (*sreq.values(), *ier.values()):
+            requirement.planned = not requirement.test_cases.isdisjoint(planned)
+            requirement.executed = not requirement.test_cases.isdisjoint(executed)
+    return EnvironmentCoverage(sreq=sreq, ier=ier, test_results=test_results_path is not None)
+
+def _environment_inputs(environment: str) -> List:
+    inputs = [
+        get_dynamic_data_path("SREQ.json", environment=environment),
+        get_dynamic_data_path("IER.json", environment=environment),
+    ]
+    test_results_path = get_dynamic_data_path("test_results.json", environment=environment)
+    if dataset_exists(test_results_path):
+        inputs.append(test_results_path)
+    return inputs
+
+def load_environment_coverage(environment: str) -> Tuple[EnvironmentCoverage, str]:
+    """
+    Gets the summary of an environment, built once per version of its inputs.
+
+    Returns:
+        Tuple of (EnvironmentCoverage, version key)
+
+    Raises:
+        FileNotFoundError: If SREQ.json or IER.json does not exist
+    """
+    inputs = _environment_inputs(environment)
+    summary = load_artifact(_SUMMARY_ARTIFACT, inputs, lambda: summarize_environment(*inputs), environment=environment)
+    return summary, artifact_key(inputs)
+
+def _group_fields(dataset: str, requirement: RequirementCoverage) -> Dict[str, str]:
+    """Grouping fields of a requirement's first row."""
+    fields = {}
+    for grouping, (key_index, label_index) in COMPARE_GROUPINGS[dataset].items():
+        fields[grouping] = requirement.groups[0][key_index]
+        fields[f'{grouping}_name'] = requirement.groups[0][label_index]
+    return fields
+
+def _group_keys(requirement: RequirementCoverage, key_index: int, label_index: int) -> Dict[str, str]:
+    """The distinct groups of one grouping a requirement belongs to: key -> label."""
+    keys: Dict[str, str] = {}
+    for groups in requirement.groups:
+        keys.setdefault(groups[key_index], groups[label_index])
+    return keys
+
+def _side_stats(requirements: List[Optional[RequirementCoverage]], test_results: bool) -> Dict[str, Any]:
+    present = [requirement for requirement in requirements if requirement is not None]
+    covered = sum(1 for requirement in present if requirement.test_cases)
+    return {
+        'requirements': len(present),
+        'covered': covered,
+        'coverage': round(covered / len(present), 4) if present else 0.0,
+        'planned': sum(1 for requirement in present if requirement.planned) if test_results else None,
+        'executed': sum(1 for requirement in present if requirement.executed) if test_results else None,
+    }
+
+def compare_coverage(left: EnvironmentCoverage, right: EnvironmentCoverage, dataset: str, names: Tuple[str, str] = COMPARED_ENVIRONMENTS) -> Dict[str, Any]:
+    """
+    Compares the coverage of a dataset in two environments.
+
+    Requirements are joined by number. Each grouping lists, per group, the
+    statistics of both sides and how many requirements are covered on one
+    side only; requirements missing on one side count as uncovered there.
+    A requirement in several groups (e.g. TINs) counts in each of them.
+
+    Args:
+        left: Summary of the first environment
+        right: Summary of the second environment
+        dataset: 'sreq' or 'ier'
+        names: Names of the two environments
+
+    Returns:
+        Dictionary with 'totals', one 'by_<grouping>' list per grouping, a
+        'requirements' list with one row per requirement covered differently,
+        and 'covered_only' lists of requirements covered on one side only
+    """
+    left_name, right_name = names
+    left_requirements = getattr(left, dataset)
+    right_requirements = getattr(right, dataset)
+
+    # One pass over the union of requirement numbers
+    pairs = []
+    covered_only = {left_name: [], right_name: []}
+    differences = []
+    for number in sorted(left_requirements.keys() | right_requirements.keys()):
+        left_requirement = left_requirements.get(number)
+        right_requirement = right_requirements.get(number)
+        pairs.append((left_requirement, right_requirement))
+
+        left_covered = bool(left_requirement and left_requirement.test_cases)
+        right_covered = bool(right_requirement and right_requirement.test_cases)
+        reference = left_requirement or right_requirement
+        if left_covered != right_covered:
+            entry = {
+                'number': number,
+                'name': reference.name,
+                **_group_fields(dataset, reference),
+                'in_other': (right_requirement if left_covered else left_requirement) is not None,
+            }
+            covered_only[left_name if left_covered else right_name].append(entry)
+        if left_covered != right_covered or (left_requirement is None) != (right_requirement is None):
+            differences.append({
+                'number': number,
+                'name': reference.name,
+                left_name: len(left_requirement.test_cases) if left_requirement else None,
+                right_name: len(right_requirement.test_cases) if right_requirement else None,
+            })
+
+    def side_by_side(selected: List[Tuple[Optional[RequirementCoverage], Optional[RequirementCoverage]]]) -> Dict[str, Any]:
+        return {
+            left_name: _side_stats([pair[0] for pair in selected], left.test_results),
+            right_name: _side_stats([pair[1] for pair in selected], right.test_results),
+            f'covered_only_{left_name}': sum(1 for l, r in selected if l and l.test_cases and not (r and r.test_cases)),
+            f'covered_only_{right_name}': sum(1 for l, r in selected if r and r.test_cases and not (l and l.test_cases)),
+        }
+
+    result: Dict[str, Any] = {'dataset': dataset, 'totals': side_by_side(pairs)}
+    for grouping, (key_index, label_index) in COMPARE_GROUPINGS[dataset].items():
+        groups: Dict[str, List] = {}
+        labels: Dict[str, str] = {}
+        for left_requirement, right_requirement in pairs:
+            # Each side counts once in every group it belongs to in its environment
+            left_keys = _group_keys(left_requirement, key_index, label_index) if left_requirement else {}
+            right_keys = _group_keys(right_requirement, key_index, label_index) if right_requirement else {}
+            for key, label in {**right_keys, **left_keys}.items():
+                groups.setdefault(key, []).append((
+                    left_requirement if key in left_keys else None,
+                    right_requirement if key in right_keys else None,
+                ))
+                labels.setdefault(key, label)
+        result[f'by_{grouping}'] = [
+            {grouping: key, f'{grouping}_name': labels[key], **side_by_side(selected)}
+            for key, selected in sorted(groups.items())
+        ]
+    result['requirements'] = differences
+    result['covered_only'] = covered_only
+    return result
+
+# Comparisons keyed by dataset: ((left key, right key), result)
+_comparisons: Dict[str, Tuple[Tuple[str, str], Dict[str, Any]]] = {}
+_comparisons_lock = threading.Lock()
+
+def load_coverage_comparison(dataset: str) -> Dict[str, Any]:
+    """
+    Gets the ciav/cwix comparison of a dataset, recomputed only when the
+    inputs of either environment change.
+
+    The returned dictionary is shared between callers; do not modify it.
+
+    Args:
+        dataset: 'sreq' or 'ier'
+
+    Returns:
+        Result of compare_coverage, plus 'versions' with the input key of each environment
+
+    Raises:
+        FileNotFoundError: If SREQ.json or IER.json is missing in either environment
+    """
+    left, left_key = load_environment_coverage(COMPARED_ENVIRONMENTS[0])
+    right, right_key = load_environment_coverage(COMPARED_ENVIRONMENTS[1])
+    key = (left_key, right_key)
+
+    cached = _comparisons.get(dataset)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    with _comparisons_lock:
+        # Double-check inside lock
+        cached = _comparisons.get(dataset)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        result = compare_coverage(left, right, dataset)
+        result['versions'] = dict(zip(COMPARED_ENVIRONMENTS, key))
+        result['test_results'] = {COMPARED_ENVIRONMENTS[0]: left.test_results, COMPARED_ENVIRONMENTS[1]: right.test_results}
+        _comparisons[dataset] = (key, result)
+
+    logging.info(f"Compared {dataset} coverage of {' and '.join(COMPARED_ENVIRONMENTS)}")
+    return result
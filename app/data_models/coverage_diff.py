@@ -0,0 +1,186 @@
+"""
+Differences in coverage between the previous and the current version of
+SREQ.json or IER.json.
+
+Ingestion keeps the replaced version of each coverage dataset as its
+previous snapshot (see dataset_store.previous_dataset_path). The diff is a
+hash join of the two snapshots on (requirement, test case): the previous
+snapshot's pairs are loaded into a dict, the current snapshot is streamed
+against it, and only the differences are collected. Rows are filtered as in
+the coverage statistics (Deprecated/Draft rows and SREQ rows covered through
+a dependency do not count).
+"""
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import ijson
+
+from app.utils.artifact_store import load_artifact
+from app.utils.dataset_store import dataset_sha256, open_dataset, previous_dataset_path
+from app.utils.file_operations import get_dynamic_data_path
+
+# Dataset -> (file name, requirement column, status column)
+DIFF_DATASETS = {
+    'sreq': ('SREQ.json', 'sreqNumber', 'status'),
+    'ier': ('IER.json', 'ierNumber', 'testCaseState'),
+}
+
+# Marks pairs of the previous snapshot that were found in the current one
+_MATCHED = object()
+
+def _iter_rows(path, dataset: str) -> Iterator[Tuple[str, Optional[str], Optional[str]]]:
+    """Yields (requirement, test case key or None, test case version) for the rows that count."""
+    _, unit_column, status_column = DIFF_DATASETS[dataset]
+    with open_dataset(path, 'rb') as f:
+        for row in ijson.items(f, 'item', use_float=True):
+            if row.get(status_column) in ('Deprecated', 'Draft'):
+                continue
+            if dataset == 'sreq' and row.get('coverageType') in ('tdp', 'idp'):
+                continue
+            unit = row.get(unit_column)
+            if not unit:
+                continue
+            key = row.get('testCaseKey') if row.get('testCaseName') is not None else None
+            yield unit, key, row.get('testCaseVersion')
+
+def diff_coverage(previous_path, current_path, dataset: str) -> Dict[str, Any]:
+    """
+    Compares the coverage of two snapshots of a dataset.
+
+    Runs in one pass over each snapshot. Memory holds the previous
+    snapshot's (requirement, test case) pairs and the differences found.
+
+    Args:
+        previous_path: Previous snapshot
+        current_path: Current dataset
+        dataset: 'sreq' or 'ier'
+
+    Returns:
+        Dictionary with the gained and lost (requirement, test case) pairs,
+        test cases whose version changed, requirements that became covered or
+        uncovered, requirements added or removed, and counts of each
+    """
+    # Previous snapshot: pair -> version, and requirement -> number of test cases
+    previous_pairs: Dict[Tuple[str, str], Any] = {}
+    previous_units: Dict[str, int] = {}
+    for unit, key, version in _iter_rows(previous_path, dataset):
+        previous_units.setdefault(unit, 0)
+        if key is not None and (unit, key) not in previous_pairs:
+            previous_pairs[(unit, key)] = version
+            previous_units[unit] += 1
+
+    gained: Dict[Tuple[str, str], Any] = {}
+    version_changed: Dict[str, Dict[str, Any]] = {}
+    current_units: Dict[str, int] = {}
+    for unit, key, version in _iter_rows(current_path, dataset):
+        current_units.setdefault(unit, 0)
+        if key is None:
+            continue
+        pair = (unit, key)
+        previous_version = previous_pairs.get(pair)
+        if previous_version is _MATCHED or pair in gained:
+            continue # Another row (e.g. another actor) of a pair already seen
+        current_units[unit] += 1
+        if pair not in previous_pairs:
+            gained[pair] = version
+            continue
+        previous_pairs[pair] = _MATCHED
+        if previous_version != version:
+            change = version_changed.setdefault(key, {'testCaseKey': key, 'from': previous_version, 'to': version, 'requirements': 0})
+            change['requirements'] += 1
+
+    lost = [pair for pair, version in previous_pairs.items() if version is not _MATCHED]
+    newly_covered = sorted(unit for unit, count in current_units.items() if count and not previous_units.get(unit))
+    newly_uncovered = sorted(unit for unit, count in current_units.items() if not count and previous_units.get(unit))
+    added = sorted(unit for unit in current_units if unit not in previous_units)
+    removed = sorted(unit for unit in previous_units if unit not in current_units)
+
+    unit_name = DIFF_DATASETS[dataset][1]
+    result = {
+        'dataset': dataset,
+        'gained': [{unit_name: unit, 'testCaseKey': key, 'version': version} for (unit, key), version in sorted(gained.items())],
+        'lost': [{unit_name: unit, 'testCaseKey': key} for unit, key in sorted(lost)],
+        'version_changed': sorted(version_changed.values(), key=lambda change: change['testCaseKey']),
+        'newly_covered': newly_covered,
+        'newly_uncovered': newly_uncovered,
+        'added': added,
+        'removed': removed,
+    }
+    result['counts'] = {name: len(values) for name, values in result.items() if isinstance(values, list)}
+    result['counts']['requirements'] = len(current_units)
+    result['counts']['previous_requirements'] = len(previous_units)
+    return result
+
+def load_coverage_diff(dataset: str, environment: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Gets the diff between a dataset's previous snapshot and its current
+    version, computed once per pair of versions.
+
+    Args:
+        dataset: 'sreq' or 'ier'
+        environment: Optional environment. Defaults to the session environment.
+
+    Returns:
+        Result of diff_coverage, plus the hashes of both versions (shared; do not modify)
+
+    Raises:
+        FileNotFoundError: If the dataset or its previous snapshot does not exist
+    """
+    current_path = get_dynamic_data_path(DIFF_DATASETS[dataset][0], environment=environment)
+    previous_path = previous_dataset_path(current_path)
+
+    def build() -> Dict[str, Any]:
+        result = diff_coverage(previous_path, current_path, dataset)
+        result['previous_sha256'] = dataset_sha256(previous_path)
+        result['current_sha256'] = dataset_sha256(current_path)
+        return result
+
+    return load_artifact(f"coverage_diff_{dataset}", [previous_path, current_path], build, environment=environment)
+
+def limit_diff(diff: Dict[str, Any], limit: int) -> Dict[str, Any]:
+    """Copy of a diff with each list cut to limit entries (counts stay complete)."""
+    limited = {name: values[:limit] if isinstance(values, list) else values for name, values in diff.items()}
+    limited['truncated'] = any(len(values) > limit for values in diff.values() if isinstance(values, list))
+    return limited
+
+def render_diff_report(diff: Dict[str, Any], limit: int = 50) -> str:
+    """
+    Renders a compact markdown report of a diff.
+
+    Args:
+        diff: Result of load_coverage_diff
+        limit: Maximum entries listed per section
+
+    Returns:
+        Markdown string
+    """
+    unit_name = DIFF_DATASETS[diff['dataset']][1]
+    counts = diff['counts']
+    lines = [
+        f"# {diff['dataset'].upper()} coverage changes\n",
+        f"Requirements: {counts['previous_requirements']} -> {counts['requirements']} "
+        f"(+{counts['added']} / -{counts['removed']})",
+        f"Test case links: +{counts['gained']} / -{counts['lost']}, "
+        f"{counts['version_changed']} test case version changes",
+        f"Newly covered: {counts['newly_covered']}, newly uncovered: {counts['newly_uncovered']}\n",
+    ]
+
+    def section(title: str, entries: List[Any], render) -> None:
+        if not entries:
+            return
+        lines.append(f"## {title} ({len(entries)})\n")
+        lines.extend(render(entry) for entry in entries[:limit])
+        if len(entries) > limit:
+            lines.append(f"- ... {len(entries) - limit} more")
+        lines.append("")
+
+    section("Became uncovered", diff['newly_uncovered'], lambda unit: f"- {unit}")
+    section("Became covered", diff['newly_covered'], lambda unit: f"- {unit}")
+    section("Lost test cases", diff['lost'], lambda entry: f"- {entry[unit_name]}: {entry['testCaseKey']}")
+    section("Gained test cases", diff['gained'], lambda entry: f"- {entry[unit_name]}: {entry['testCaseKey']}")
+    section(
+        "Test case versions", diff['version_changed'],
+        lambda entry: f"- {entry['testCaseKey']}: {entry['from']} -> {entry['to']} ({entry['requirements']} requirements)"
+    )
+    section("Removed requirements", diff['removed'], lambda unit: f"- {unit}")
+    section("Added requirements", diff['added'], lambda unit: f"- {unit}")
+    return "\n".join(lines)
@@ -0,0 +1,210 @@
+"""
+Vectorized coverage statistics over SREQ.json and IER.json.
+
+The datasets are loaded into pandas frames with categorical columns (cached
+as artifacts, so once per dataset version) and grouped without Python-level
+loops. Coverage follows the tree views: rows of Deprecated or Draft items
+and SREQ rows covered through a dependency (coverageType tdp/idp) are left
+out, IER rows whose TIN the IER tree hides under the asterisk rule (see
+ier_analysis.should_include_tin) are dropped, and a requirement is covered
+if one of its remaining rows names a test case.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.core.exceptions import ValidationError
+from app.utils.artifact_store import artifact_key, load_artifact
+from app.utils.file_operations import get_dynamic_data_path, read_json_file
+
+SREQ_COLUMNS = (
+    'siNumber', 'siName', 'tinNumber', 'tinName', 'epNumber', 'epName',
+    'sreqNumber', 'testCaseKey', 'testCaseName', 'actor', 'status', 'coverageType'
+)
+IER_COLUMNS = ('piNumber', 'piName', 'ierNumber', 'tinName', 'idpTinName', 'testCaseKey', 'testCaseName', 'testCaseState')
+
+# group_by name -> (key column, label column or None), per dataset
+GROUPINGS = {
+    'sreq': {
+        'si': ('siNumber', 'siName'),
+        'tin': ('tinNumber', 'tinName'),
+        'ep': ('epNumber', 'epName'),
+        'function': ('function', None),
+        'actor': ('actor', None),
+    },
+    'ier': {
+        'pi': ('piNumber', 'piName'),
+        'tin': ('tinName', None),
+    },
+}
+# Column identifying one requirement, per dataset
+UNIT_COLUMNS = {'sreq': 'sreqNumber', 'ier': 'ierNumber'}
+
+UNMAPPED_FUNCTION = 'Unmapped'
+
+# Artifact of _build_ier_frame; renamed when the rows it keeps change
+_IER_FRAME_ARTIFACT = 'coverage_frame_ier_v2'
+
+def _to_categories(frame: pd.DataFrame) -> pd.DataFrame:
+    for column in frame.columns:
+        if frame[column].dtype == object:
+            frame[column] = frame[column].astype('category')
+    return frame
+
+def _build_sreq_frame(sreq_path, func_path) -> pd.DataFrame:
+    frame = pd.DataFrame.from_records(read_json_file(sreq_path), columns=list(SREQ_COLUMNS))
+    keep = ~frame['status'].isin(('Deprecated', 'Draft')) & ~frame['coverageType'].isin(('tdp', 'idp'))
+    frame = frame.loc[keep].drop(columns=['status', 'coverageType']).reset_index(drop=True)
+
+    functions = {}
+    if func_path is not None:
+        for item in read_json_file(func_path):
+            if item.get('sreqNumber'):
+                functions[item['sreqNumber']] = item.get('funName', '')
+    frame['function'] = frame['sreqNumber'].map(functions).fillna(UNMAPPED_FUNCTION)
+    frame['actor'] = frame['actor'].fillna('N/A')
+    frame['covered'] = frame['testCaseKey'].notna().to_numpy() & frame['testCaseName'].notna().to_numpy()
+    return _to_categories(frame)
+
+def _tin_included(idp_tin_names: pd.Series) -> np.ndarray:
+    """Vectorized should_include_tin: rows of an IDP that also has an asterisk entry are left out."""
+    names = idp_tin_names.fillna('').astype(str)
+    asterisk = names.str.contains('*', regex=False)
+    # Same extraction as get_idp_number: the first word before ' -> '
+    idp_numbers = names.str.split(' -> ', n=1).str[0].str.strip().str.split(' ', n=1).str[0].str.strip()
+    asterisk_idps = set(idp_numbers[asterisk & (idp_numbers != '')])
+    return (asterisk | (idp_numbers == '') | ~idp_numbers.isin(asterisk_idps)).to_numpy()
+
+def _build_ier_frame(ier_path) -> pd.DataFrame:
+    frame = pd.DataFrame.from_records(read_json_file(ier_path), columns=list(IER_COLUMNS))
+    # Asterisk entries count even on Deprecated or Draft rows, as in the tree
+    keep = _tin_included(frame['idpTinName']) & ~frame['testCaseState'].isin(('Deprecated', 'Draft')).to_numpy()
+    frame = frame.loc[keep].drop(columns=['idpTinName', 'testCaseState']).reset_index(drop=True)
+    frame['covered'] = frame['testCaseKey'].notna().to_numpy() & frame['testCaseName'].notna().to_numpy()
+    return _to_categories(frame)
+
+def load_coverage_frame(dataset: str, environment: Optional[str] = None) -> Tuple[pd.DataFrame, str]:
+    """
+    Gets the columnar frame of a dataset, built once per dataset version.
+
+    Args:
+        dataset: 'sreq' or 'ier'
+        environment: Optional environment. Defaults to the session environment.
+
+    Returns:
+        Tuple of (frame, version key)
+
+    Raises:
+        FileNotFoundError: If the dataset does not exist
+    """
+    if dataset == 'sreq':
+        sreq_path = get_dynamic_data_path("SREQ.json", environment=environment)
+        func_path = get_dynamic_data_path("SP5-Functional.json", environment=environment)
+        inputs = [sreq_path, func_path] if func_path.exists() else [sreq_path]
+        frame = load_artifact(
+            'coverage_frame_sreq', inputs,
+            lambda: _build_sreq_frame(sreq_path, func_path if len(inputs) > 1 else None),
+            environment=environment
+        )
+    else:
+        ier_path = get_dynamic_data_path("IER.json", environment=environment)
+        inputs = [ier_path]
+        frame = load_artifact(_IER_FRAME_ARTIFACT, inputs, lambda: _build_ier_frame(ier_path), environment=environment)
+    return frame, artifact_key(inputs)
+
+def parse_group_by(dataset: str, group_by: Optional[str]) -> List[str]:
+    """
+    Validates a comma-separated group_by parameter.
+
+    Raises:
+        ValidationError: If the dataset or a grouping is unknown
+    """
+    if dataset not in GROUPINGS:
+        raise ValidationError(f"Unknown dataset '{dataset}'", details={'allowed': sorted(GROUPINGS)})
+    names = [name.strip() for name in (group_by or '').split(',') if name.strip()]
+    if not names:
+        names = ['si'] if dataset == 'sreq' else ['pi']
+    unknown = [name for name in names if name not in GROUPINGS[dataset]]
+    if unknown:
+        raise ValidationError(
+            f"Cannot group {dataset} by {', '.join(unknown)}",
+            details={'allowed': sorted(GROUPINGS[dataset])}
+        )
+    return names
+
+def compute_coverage_stats(frame: pd.DataFrame, dataset: str, group_by: List[str]) -> Dict[str, Any]:
+    """
+    Computes coverage per group.
+
+    For each group: number of requirements, covered and uncovered
+    requirements, coverage ratio, distinct test cases, and test-case fan-out
+    (test cases per covered requirement, mean and max).
+
+    Args:
+        frame: Frame from load_coverage_frame
+        dataset: 'sreq' or 'ier'
+        group_by: Grouping names from parse_group_by
+
+    Returns:
+        Dictionary with 'groups' (largest uncovered count first) and 'totals'
+    """
+    unit = UNIT_COLUMNS[dataset]
+    keys = [GROUPINGS[dataset][name][0] for name in group_by]
+    labels = {GROUPINGS[dataset][name][0]: GROUPINGS[dataset][name][1] for name in group_by if GROUPINGS[dataset][name][1]}
+
+    # One row per (group, requirement): covered if any of its rows is, and its test case count
+    per_unit = frame.groupby(keys + [unit], observed=True, sort=False).agg(
+        covered=('covered', 'any'),
+        test_cases=('testCaseKey', 'nunique')
+    )
+    grouped = per_unit.groupby(level=keys, observed=True, sort=True)
+    stats = pd.DataFrame({
+        'requirements': grouped.size(),
+        'covered': grouped['covered'].sum(),
+        'links': grouped['test_cases'].sum(),
+        'max_fan_out': grouped['test_cases'].max(),
+    })
+    stats['distinct_test_cases'] = frame.loc[frame['covered']].groupby(keys, observed=True)['testCaseKey'].nunique()
+    stats = stats.fillna({'distinct_test_cases': 0})
+    stats['uncovered'] = stats['requirements'] - stats['covered']
+    stats['coverage'] = np.round(stats['covered'] / stats['requirements'], 4)
+    stats['mean_fan_out'] = np.round(np.divide(
+        stats['links'], stats['covered'],
+        out=np.zeros(len(stats)), where=stats['covered'].to_numpy() > 0
+    ), 2)
+    stats = stats.reset_index().sort_values(['uncovered'] + keys, ascending=[False] + [True] * len(keys), kind='stable')
+
+    # Labels (e.g. SI names) of each key value
+    for key, label in labels.items():
+        names = frame[[key, label]].dropna().drop_duplicates(key).set_index(key)[label]
+        stats[label] = stats[key].map(names).astype(object)
+
+    groups = []
+    for row in stats.itertuples(index=False):
+        values = row._asdict()
+        group = {name: values[GROUPINGS[dataset][name][0]] for name in group_by}
+        for key, label in labels.items():
+            name = next(name for name in group_by if GROUPINGS[dataset][name][0] == key)
+            group[f"{name}_name"] = values[label] if isinstance(values[label], str) else None
+        group.update({
+            'requirements': int(values['requirements']),
+            'covered': int(values['covered']),
+            'uncovered': int(values['uncovered']),
+            'coverage': float(values['coverage']),
+            'distinct_test_cases': int(values['distinct_test_cases']),
+            'mean_fan_out': float(values['mean_fan_out']),
+            'max_fan_out': int(values['max_fan_out']),
+        })
+        groups.append(group)
+
+    per_requirement = frame.groupby(unit, observed=True)['covered'].any()
+    covered_total = int(per_requirement.sum())
+    totals = {
+        'requirements': int(per_requirement.size),
+        'covered': covered_total,
+        'uncovered': int(per_requirement.size - covered_total),
+        'coverage': round(covered_total / per_requirement.size, 4) if per_requirement.size else 0.0,
+        'distinct_test_cases': int(frame.loc[frame['covered'], 'testCaseKey'].nunique()),
+    }
+    return {'groups': groups, 'totals': totals}
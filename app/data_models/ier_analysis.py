@@ -2,48 +2,116 @@
 Analysis functionality for IER (Interface Exchange Requirements) data.
 """
 import csv
+import hashlib
+import io
 import logging
+import threading
 from collections import defaultdict
+from itertools import groupby
+from operator import itemgetter
 from pathlib import Path
-from typing import Dict, Set, List, Any, Tuple, Optional
+from typing import Dict, Iterable, Iterator, Set, List, Any, Tuple, Optional
 
-from app.utils.file_operations import read_json_file, write_markdown_file
+import ijson
 
-def read_tin_data(tin_csv_file: Path) -> Dict[str, Dict[str, str]]:
+from app.utils.dataset_store import dataset_sha256, open_dataset, read_dataset
+from app.utils.external_sort import external_sort
+from app.utils.file_operations import write_markdown_lines
+
+DEFAULT_SERVICE_INSTRUCTION = "Service Instructions for Informal Messaging"
+IER_REPORT_TITLE = "# IER Coverage Analysis Report\n"
+
+class TinServiceMap(dict):
+    """
+    TIN -> service information, as read from TIN2.csv, with an index from
+    TIN title to service for the IER analysis.
+
+    Instances returned by read_tin_data are cached and shared; do not modify them.
+    """
+
+    def __init__(self, entries: Optional[Dict[str, Dict[str, str]]] = None, sha256: Optional[str] = None):
+        super().__init__(entries or {})
+        self.sha256 = sha256
+        self.title_index = build_title_index(self)
+
+def build_title_index(tin_to_service: Dict[str, Dict[str, str]]) -> Dict[str, str]:
+    """
+    Maps each TIN title to its service. If several TINs share a title the
+    first one in the file wins.
+    """
+    index = {}
+    for tin_data in tin_to_service.values():
+        title = tin_data.get('title')
+        if title is not None and title not in index:
+            index[title] = tin_data.get('service', 'Informal Messaging')
+    return index
+
+# TIN maps keyed by CSV path (one per environment): ((mtime_ns, size), TinServiceMap)
+_tin_maps: Dict[str, Tuple[Tuple[int, int], TinServiceMap]] = {}
+_tin_maps_lock = threading.Lock()
+
+def _parse_tin_csv(tin_csv_file: Path) -> TinServiceMap:
+    with open(tin_csv_file, 'rb') as f:
+        content = f.read()
+    tin_to_service = {}
+    reader = csv.DictReader(io.StringIO(content.decode('utf-8', errors='replace')), delimiter=';')
+    for row in reader:
+        tin = row['TIN']
+        service = row['SI']
+        title = row['Title']
+        tin_type = row['TIN_TYPE']
+
+        tin_to_service[tin] = {
+            'service': service,
+            'title': title,
+            'type': tin_type
+        }
+    return TinServiceMap(tin_to_service, sha256=hashlib.sha256(content).hexdigest())
+
+def read_tin_data(tin_csv_file: Path) -> TinServiceMap:
     """
     Read TIN data from CSV file to map TINs to services.
-    
+
+    The result is cached per file and reused until the file's modification
+    time or size changes.
+
     Args:
         tin_csv_file: Path to the TIN CSV file
-        
+
     Returns:
-        Dictionary with TIN as keys and service information as values
+        TinServiceMap with TIN as keys and service information as values
+        (empty if the file is missing or unreadable)
     """
-    tin_to_service = {}
-    
+    tin_csv_file = Path(tin_csv_file)
     try:
-        with open(tin_csv_file, 'r') as f:
-            reader = csv.DictReader(f, delimiter=';')
-            for row in reader:
-                tin = row['TIN']
-                service = row['SI']
-                title = row['Title']
-                tin_type = row['TIN_TYPE']
-                
-                tin_to_service[tin] = {
-                    'service': service,
-                    'title': title,
-                    'type': tin_type
-                }
-        
-        logging.info(f"Read {len(tin_to_service)} TIN entries from {tin_csv_file}")
-        return tin_to_service
+        stat = tin_csv_file.stat()
     except FileNotFoundError:
         logging.error(f"TIN CSV file not found: {tin_csv_file}")
-        return {}
-    except Exception as e:
-        logging.exception(f"Error reading TIN data: {e}")
-        return {}
+        return TinServiceMap()
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cache_key = str(tin_csv_file.resolve())
+
+    cached = _tin_maps.get(cache_key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    with _tin_maps_lock:
+        # Double-check inside lock
+        cached = _tin_maps.get(cache_key)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        try:
+            tin_to_service = _parse_tin_csv(tin_csv_file)
+        except FileNotFoundError:
+            logging.error(f"TIN CSV file not found: {tin_csv_file}")
+            return TinServiceMap()
+        except Exception as e:
+            logging.exception(f"Error reading TIN data: {e}")
+            return TinServiceMap()
+        _tin_maps[cache_key] = (signature, tin_to_service)
+
+    logging.info(f"Read {len(tin_to_service)} TIN entries from {tin_csv_file}")
+    return tin_to_service
 
 def get_idp_number(idp_tin_name: Optional[str]) -> Optional[str]:
     """
@@ -88,10 +156,101 @@ def should_include_tin(tin_info: Tuple[Optional[str], Optional[str]], asterisk_i
     # If there's an asterisk entry for this IDP number, exclude this entry
     return idp_number not in asterisk_idps
 
+class IerHierarchyBuilder:
+    """
+    Incremental version of analyze_ier_data for streamed IER records.
+
+    Records are added one at a time; only the fields used by the hierarchy
+    are kept. The asterisk rule needs every IDP with an asterisk entry before
+    any TIN can be filtered, so the hierarchy is assembled in build().
+    """
+
+    def __init__(self):
+        self.asterisk_idps: Set[str] = set()
+        self._entries: List[Tuple[Tuple[str, str], Tuple[str, str], Tuple[str, str], Optional[str], Optional[str]]] = []
+
+    def add(self, item: Dict[str, Any]) -> None:
+        """Adds one IER record."""
+        # Collect IDP numbers that have asterisk entries (including skipped statuses)
+        idp_tin_name = item.get('idpTinName', '')
+        if '*' in idp_tin_name:
+            idp_number = get_idp_number(idp_tin_name)
+            if idp_number:
+                self.asterisk_idps.add(idp_number)
+
+        status = item.get('testCaseState', '')
+        if status == 'Deprecated' or status == 'Draft':
+            return
+
+        # Use get() with default values for missing fields
+        self._entries.append((
+            (item.get('piNumber', ''), item.get('piName', '')),
+            (item.get('ierNumber', ''), item.get('ierName', '')),
+            (item.get('tinName', ''), item.get('idpTinName', '')),
+            item.get('testCaseKey', None),
+            item.get('testCaseName', None)
+        ))
+
+    def build(self, tin_to_service: Dict[str, Dict[str, str]] = None) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """
+        Builds the hierarchy from the records added so far.
+
+        Args:
+            tin_to_service: Optional dictionary mapping TIN to service information
+
+        Returns:
+            Dictionary organized by piNumber -> ierNumber -> service -> test_cases
+        """
+        if isinstance(tin_to_service, TinServiceMap):
+            title_index = tin_to_service.title_index
+        else:
+            title_index = build_title_index(tin_to_service or {})
+
+        # Create nested defaultdict for hierarchical storage
+        hierarchy = defaultdict(lambda: defaultdict(dict))
+
+        for pi_key, ier_key, tin_info, test_case_key, test_case_name in self._entries:
+            # Skip this TIN if it shouldn't be included based on asterisk rules
+            if not should_include_tin(tin_info, self.asterisk_idps):
+                continue
+            _add_service_test_case(hierarchy[pi_key][ier_key], title_index, tin_info, test_case_key, test_case_name)
+
+        return hierarchy
+
+def _add_service_test_case(
+    services: Dict[str, Dict[str, Any]],
+    title_index: Dict[str, str],
+    tin_info: Tuple[str, str],
+    test_case_key: Optional[str],
+    test_case_name: Optional[str]
+) -> None:
+    """Adds a record's test case to the service entry of its TIN within one IER."""
+    # Map TIN to service instruction by its title
+    service_instruction = DEFAULT_SERVICE_INSTRUCTION
+    if tin_info[0]:
+        service = title_index.get(tin_info[0])
+        if service is not None:
+            service_instruction = f"Service Instructions for {service}"
+
+    # Initialize service entry if not exists
+    service_entry = services.get(service_instruction)
+    if service_entry is None:
+        service_entry = services[service_instruction] = {
+            "idp_tin_name": tin_info[1] or "",
+            "test_cases": []
+        }
+
+    # Add test case only if both key and name are not None
+    if test_case_key is not None and test_case_name is not None:
+        service_entry["test_cases"].append((test_case_key, test_case_name))
+
 def analyze_ier_data(data: List[Dict[str, Any]], 
                      tin_to_service: Dict[str, Dict[str, str]] = None) -> Dict[str, Dict[str, Dict[str, Any]]]:
     """
     Analyze IER data and organize it hierarchically by PI, IER, and Service instruction.
+
+    Each record is read once; TINs are mapped to services through the
+    title index of tin_to_service instead of a scan of all TINs.
     
     Args:
         data: List of dictionaries containing IER data
@@ -100,61 +259,100 @@ def analyze_ier_data(data: List[Dict[str, Any]],
     Returns:
         Dictionary organized by piNumber -> ierNumber -> service -> test_cases
     """
-    # Create nested defaultdict for hierarchical storage
-    hierarchy = defaultdict(lambda: defaultdict(dict))
-    
-    # First pass: collect all IDP numbers that have asterisk entries
-    asterisk_idps = set()
-    for item in data:
-        idp_tin_name = item.get('idpTinName', '')
-        if '*' in idp_tin_name:
-            idp_number = get_idp_number(idp_tin_name)
-            if idp_number:
-                asterisk_idps.add(idp_number)
-    
-    # Second pass: organize data by PI -> IER -> Service -> Test Cases
+    builder = IerHierarchyBuilder()
     for item in data:
-        # Use get() with default values for missing fields
-        pi_key = (item.get('piNumber', ''), item.get('piName', ''))
-        ier_key = (item.get('ierNumber', ''), item.get('ierName', ''))
-        tin_info = (item.get('tinName', ''), item.get('idpTinName', ''))
-        
-        # Safely get test case information
-        test_case_key = item.get('testCaseKey', None)
-        test_case_name = item.get('testCaseName', None)
-        
-        status = item.get('testCaseState', '')
-        
-        if status == 'Deprecated' or status == 'Draft':
-            continue
-        
-        # Skip this TIN if it shouldn't be included based on asterisk rules
-        if not should_include_tin(tin_info, asterisk_idps):
-            continue
-        
-        # Map TIN to service instruction
-        service_instruction = "Service Instructions for Informal Messaging"
-        if tin_info[0] and tin_to_service:
-            # Find the TIN key that has the title matching tin_info[0]
-            for tin_key, tin_data in tin_to_service.items():
-                if tin_data.get('title') == tin_info[0]:
-                    service_instruction = f"Service Instructions for {tin_data.get('service', 'Informal Messaging')}"
-                    break
-        
-        # Initialize service entry if not exists
-        if service_instruction not in hierarchy[pi_key][ier_key]:
-            hierarchy[pi_key][ier_key][service_instruction] = {
-                "idp_tin_name": tin_info[1] or "",
-                "test_cases": []
-            }
-        
-        # Add test case only if both key and name are not None
-        if test_case_key is not None and test_case_name is not None:
-            test_case = (test_case_key, test_case_name)
-            hierarchy[pi_key][ier_key][service_instruction]["test_cases"].append(test_case)
-    
+        builder.add(item)
+    return builder.build(tin_to_service)
+
+# Hierarchies keyed by IER.json path (one per environment): ((IER sha256, TIN sha256), hierarchy)
+_hierarchies: Dict[str, Tuple[Tuple[str, Optional[str]], Dict[Tuple[str, str], Any]]] = {}
+_hierarchies_lock = threading.Lock()
+
+def load_ier_hierarchy(ier_path: Path, tin_csv_file: Path) -> Dict[Tuple[str, str], Dict[Tuple[str, str], Dict[str, Dict[str, Any]]]]:
+    """
+    Gets the IER hierarchy (as plain dictionaries) for a stored IER.json and
+    TIN2.csv, reusing the last result until the content of either changes.
+
+    The returned dictionary is shared between callers; do not modify it.
+
+    Args:
+        ier_path: Path to IER.json
+        tin_csv_file: Path to TIN2.csv
+
+    Returns:
+        Dictionary organized by (piNumber, piName) -> (ierNumber, ierName) -> service ->
+        {'idp_tin_name', 'test_cases'}
+
+    Raises:
+        FileNotFoundError: If IER.json does not exist
+    """
+    ier_sha256 = dataset_sha256(ier_path)
+    if ier_sha256 is None:
+        raise FileNotFoundError(f"IER file not found: {ier_path}")
+    tin_to_service = read_tin_data(tin_csv_file)
+    key = (ier_sha256, tin_to_service.sha256)
+    cache_key = str(Path(ier_path).resolve())
+
+    cached = _hierarchies.get(cache_key)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    with _hierarchies_lock:
+        # Double-check inside lock
+        cached = _hierarchies.get(cache_key)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        raw_hierarchy = analyze_ier_data(read_dataset(ier_path), tin_to_service)
+        # Plain dictionaries for template rendering
+        hierarchy = {
+            pi_key: {ier_key: dict(services) for ier_key, services in iers.items()}
+            for pi_key, iers in raw_hierarchy.items()
+        }
+        _hierarchies[cache_key] = (key, hierarchy)
+
+    logging.info(f"Built IER hierarchy for {ier_path} ({len(hierarchy)} PIs)")
     return hierarchy
 
+def iter_ier_markdown_lines(iers: Iterable[Tuple[Tuple[str, str], Tuple[str, str], Dict[str, Dict[str, Any]]]]) -> Iterator[str]:
+    """
+    Yields the lines of the IER report, one IER section at a time.
+
+    Args:
+        iers: (PI key, IER key, services) triples, sorted by PI number and IER number
+
+    Returns:
+        Iterator over markdown lines (to be joined with newlines)
+    """
+    yield IER_REPORT_TITLE
+
+    current_pi = None
+    for pi_key, ier_key, services in iers:
+        if pi_key != current_pi:
+            pi_number, pi_name = pi_key
+            yield f"\n## PI: {pi_number} - {pi_name}"
+            current_pi = pi_key
+
+        ier_number, ier_name = ier_key
+        yield f"\n### IER: {ier_number} - {ier_name}"
+
+        # Sort TINs within each IER
+        for tin_name in sorted(services.keys()):
+            tin_data = services[tin_name]
+            idp_tin_name = tin_data.get('idp_tin_name', '')
+            test_cases = tin_data.get('test_cases', [])
+
+            yield f"\n#### TIN: {tin_name}"
+            if idp_tin_name:
+                yield f"IDP TIN: {idp_tin_name}"
+
+            if not test_cases:
+                yield "*No test cases*"
+            else:
+                # Sort test cases for consistent output
+                for test_case in sorted(test_cases, key=lambda x: x[0] if x[0] else ""):
+                    test_case_key, test_case_name = test_case
+                    yield f"- **{test_case_key}**: {test_case_name}"
+
 def generate_ier_markdown_output(hierarchy: Dict[Tuple[str, str], Dict[Tuple[str, str], Dict[str, Any]]]) -> str:
     """
     Generate formatted markdown output from the hierarchical IER data.
@@ -165,37 +363,65 @@ def generate_ier_markdown_output(hierarchy: Dict[Tuple[str, str], Dict[Tuple[str
     Returns:
         Formatted markdown string
     """
-    output = ["# IER Coverage Analysis Report\n"]
-    
-    # Sort PI numbers for consistent output
-    for pi_key in sorted(hierarchy.keys(), key=lambda x: x[0]):
-        pi_number, pi_name = pi_key
-        output.append(f"\n## PI: {pi_number} - {pi_name}")
-        
-        # Sort IER numbers within each PI
-        for ier_key in sorted(hierarchy[pi_key].keys(), key=lambda x: x[0]):
-            ier_number, ier_name = ier_key
-            output.append(f"\n### IER: {ier_number} - {ier_name}")
-            
-            # Sort TINs within each IER
-            for tin_name in sorted(hierarchy[pi_key][ier_key].keys()):
-                tin_data = hierarchy[pi_key][ier_key][tin_name]
-                idp_tin_name = tin_data.get('idp_tin_name', '')
-                test_cases = tin_data.get('test_cases', [])
-                
-                output.append(f"\n#### TIN: {tin_name}")
-                if idp_tin_name:
-                    output.append(f"IDP TIN: {idp_tin_name}")
-                
-                if not test_cases:
-                    output.append("*No test cases*")
-                else:
-                    # Sort test cases for consistent output
-                    for test_case in sorted(test_cases, key=lambda x: x[0] if x[0] else ""):
-                        test_case_key, test_case_name = test_case
-                        output.append(f"- **{test_case_key}**: {test_case_name}")
-    
-    return "\n".join(output)
+    # Sort PI numbers, and IER numbers within each PI, for consistent output
+    iers = (
+        (pi_key, ier_key, hierarchy[pi_key][ier_key])
+        for pi_key in sorted(hierarchy.keys(), key=lambda x: x[0])
+        for ier_key in sorted(hierarchy[pi_key].keys(), key=lambda x: x[0])
+    )
+    return "\n".join(iter_ier_markdown_lines(iers))
+
+def _iter_ier_report_groups(ier_path: Path, tin_to_service: Dict[str, Dict[str, str]]) -> Iterator[Tuple[Tuple[str, str], Tuple[str, str], Dict[str, Dict[str, Any]]]]:
+    asterisk_idps: Set[str] = set()
+
+    def rows() -> Iterator[Tuple[Any, ...]]:
+        with open_dataset(ier_path, 'rb') as f:
+            for item in ijson.items(f, 'item'):
+                # Collect IDP numbers that have asterisk entries (including skipped statuses)
+                idp_tin_name = item.get('idpTinName') or ''
+                if '*' in idp_tin_name:
+                    idp_number = get_idp_number(idp_tin_name)
+                    if idp_number:
+                        asterisk_idps.add(idp_number)
+
+                if item.get('testCaseState') in ('Deprecated', 'Draft'):
+                    continue
+                yield (
+                    item.get('piNumber') or '', item.get('piName') or '',
+                    item.get('ierNumber') or '', item.get('ierName') or '',
+                    item.get('tinName', ''), item.get('idpTinName', ''),
+                    item.get('testCaseKey'), item.get('testCaseName')
+                )
+
+    title_index = tin_to_service.title_index if isinstance(tin_to_service, TinServiceMap) else build_title_index(tin_to_service)
+    ier_key = itemgetter(0, 1, 2, 3)
+    # The sort reads every record first, so asterisk_idps is complete before any TIN is filtered
+    for (pi_number, pi_name, ier_number, ier_name), records in groupby(external_sort(rows(), key=ier_key), key=ier_key):
+        services: Dict[str, Dict[str, Any]] = {}
+        for record in records:
+            tin_info = (record[4], record[5])
+            if should_include_tin(tin_info, asterisk_idps):
+                _add_service_test_case(services, title_index, tin_info, record[6], record[7])
+        if services:
+            yield (pi_number, pi_name), (ier_number, ier_name), services
+
+def iter_ier_report_lines(ier_path: Path, tin_to_service: Optional[Dict[str, Dict[str, str]]] = None) -> Iterator[str]:
+    """
+    Yields the lines of the IER report (the same as generate_ier_markdown_output)
+    for a stored IER.json, without loading the file or the hierarchy.
+
+    The records are streamed with ijson and grouped by PI and IER through an
+    external sort, so only one IER is held at a time. The title is yielded
+    before the input is read.
+
+    Args:
+        ier_path: Path to IER.json
+        tin_to_service: Optional dictionary mapping TIN to service information
+
+    Returns:
+        Iterator over markdown lines (to be joined with newlines)
+    """
+    return iter_ier_markdown_lines(_iter_ier_report_groups(ier_path, tin_to_service or {}))
 
 def analyze_ier_file(input_file: Path, output_file: Optional[Path] = None) -> str:
     """
@@ -211,21 +437,16 @@ def analyze_ier_file(input_file: Path, output_file: Optional[Path] = None) -> st
     logging.info(f"Analyzing IER data from {input_file}")
     
     try:
-        # Read and parse data
-        data = read_json_file(input_file)
-        
-        # Analyze data
-        hierarchy = analyze_ier_data(data)
-        
-        # Generate markdown
-        markdown_content = generate_ier_markdown_output(hierarchy)
-        
+        # Stream the records into the report
+        lines = iter_ier_report_lines(input_file)
+
         # Save to file if output_file specified
         if output_file:
-            write_markdown_file(markdown_content, output_file)
+            write_markdown_lines(lines, output_file)
             logging.info(f"IER analysis written to {output_file}")
-        
-        return markdown_content
+            return Path(output_file).read_text(encoding='utf-8')
+
+        return "\n".join(lines)
         
     except Exception as e:
         logging.exception(f"Error analyzing IER data: {e}")
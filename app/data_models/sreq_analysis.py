@@ -2,34 +2,49 @@
 Analysis functionality for SREQ (System Requirements) data.
 """
 import logging
-from collections import defaultdict
 from dataclasses import dataclass
+from itertools import groupby
+from operator import itemgetter
 from pathlib import Path
-from typing import Dict, List, Set, Any, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Any, Optional, Tuple
 
-from app.utils.file_operations import read_json_file, write_markdown_file, get_dynamic_data_path
+import ijson
 
-@dataclass
+from app.data_models.unmapped_sreqs import UNMAPPED_SREQS_FILE, load_unmapped_sreqs, merge_unmapped_sreqs
+from app.utils.dataset_store import dataset_sha256, open_dataset
+from app.utils.external_sort import external_sort
+from app.utils.file_operations import read_json_file, write_markdown_lines, write_json_file_if_changed, get_dynamic_data_path
+from app.utils.artifact_store import artifact_key, load_artifact
+from app.utils.dataset_manifest import get_dataset_state, record_dataset_state
+
+# Manifest entry recording the SREQ.json / SP5-Functional.json version derive_sreq_outputs last processed
+SREQ_DERIVED_DATASET = "SREQ_DERIVED"
+
+SREQ_REPORT_TITLE = "# SREQ Analysis Report - Null TestCase Entries\n"
+# Entry fields read by the SREQ report, in sort order (SI and TIN first)
+_REPORT_FIELDS = ('siNumber', 'tinNumber', 'tinName', 'epNumber', 'epName', 'sreqNumber', 'sreqName')
+
+@dataclass(slots=True)
 class SREQEntry:
     """Data class to store SREQ-related information"""
     sreq_number: str
     sreq_name: str
 
-@dataclass
+@dataclass(slots=True)
 class EPEntry:
     """Data class to store EP-related information"""
     ep_number: str
     ep_name: str
     sreqs: List[SREQEntry]
 
-@dataclass
+@dataclass(slots=True)
 class TINEntry:
     """Data class to store TIN-related information"""
     tin_number: str
     tin_name: str
     eps: List[EPEntry]
 
-@dataclass
+@dataclass(slots=True)
 class SIEntry:
     """Data class to store SI-related information"""
     si_number: str
@@ -64,141 +79,117 @@ def extract_null_testcase_entries(data: List[Dict[str, Any]], filter_si: Optiona
         logging.exception(f"Error extracting null testcase entries: {e}")
         raise
 
-def organize_hierarchical_data(entries: List[Dict[str, Any]]) -> Dict[str, SIEntry]:
+class SreqHierarchyBuilder:
     """
-    Organizes the entries into a hierarchical structure.
+    Builds the SI -> TIN -> EP -> SREQ hierarchy one entry at a time.
 
-    Args:
-        entries: List of entries with null testCaseId
-
-    Returns:
-        Dictionary with hierarchical organization of data
+    TIN and EP entries are found through dict indexes per level, so adding
+    an entry costs the same however many TINs and EPs an SI already has.
+    Entries can be added while streaming, without keeping them in a list.
     """
-    # Create dictionary for hierarchical storage
-    hierarchy: Dict[str, SIEntry] = {}
 
-    # First pass: Collect all unique EP names for each TIN
-    tin_ep_names: Dict[str, Set[str]] = defaultdict(set)
-    for entry in entries:
-        tin_ep_names[entry.get('tinNumber', '')].add(entry.get('epName', ''))
+    def __init__(self):
+        self.hierarchy: Dict[str, SIEntry] = {}
+        self._tins: Dict[Tuple[str, str], TINEntry] = {}
+        self._eps: Dict[Tuple[str, str, str], EPEntry] = {}
 
-    # Second pass: Build the hierarchy
-    for entry in entries:
+    def add(self, entry: Dict[str, Any]) -> None:
+        """Adds one entry (normally one with a null testCaseId)."""
         si_number = entry.get('siNumber', '')
         tin_number = entry.get('tinNumber', '')
-        tin_name = entry.get('tinName', '')
-        ep_number = entry.get('epNumber', '')
-        ep_name = entry.get('epName', '')
-        sreq_number = entry.get('sreqNumber', '')
-        sreq_name = entry.get('sreqName', '')
 
         # Skip entries with missing key fields
         if not si_number or not tin_number:
-            continue
+            return
 
-        # Initialize SI entry if not exists
-        if si_number not in hierarchy:
-            hierarchy[si_number] = SIEntry(si_number=si_number, tins=[])
-
-        # Find or create TIN entry
-        tin_entry = next((t for t in hierarchy[si_number].tins if t.tin_number == tin_number), None)
+        # Find or create SI and TIN entries
+        tin_key = (si_number, tin_number)
+        tin_entry = self._tins.get(tin_key)
         if tin_entry is None:
-            tin_entry = TINEntry(tin_number=tin_number, tin_name=tin_name, eps=[])
-            hierarchy[si_number].tins.append(tin_entry)
+            si_entry = self.hierarchy.get(si_number)
+            if si_entry is None:
+                si_entry = self.hierarchy[si_number] = SIEntry(si_number=si_number, tins=[])
+            tin_entry = self._tins[tin_key] = TINEntry(tin_number=tin_number, tin_name=entry.get('tinName', ''), eps=[])
+            si_entry.tins.append(tin_entry)
+
+        ep_number = entry.get('epNumber', '')
+        if not ep_number:
+            return
 
         # Find or create EP entry
-        ep_entry = next((ep for ep in tin_entry.eps if ep.ep_number == ep_number), None)
-        if ep_entry is None and ep_number:
-            ep_entry = EPEntry(ep_number=ep_number, ep_name=ep_name, sreqs=[])
+        ep_key = (si_number, tin_number, ep_number)
+        ep_entry = self._eps.get(ep_key)
+        if ep_entry is None:
+            ep_entry = self._eps[ep_key] = EPEntry(ep_number=ep_number, ep_name=entry.get('epName', ''), sreqs=[])
             tin_entry.eps.append(ep_entry)
 
-        # Add SREQ to EP if it exists
-        if ep_entry and sreq_number:
-            sreq_entry = SREQEntry(sreq_number=sreq_number, sreq_name=sreq_name)
-            ep_entry.sreqs.append(sreq_entry)
-
-    return hierarchy
-
-
-def create_service_actor_map(si_groups: Dict):
-           """
-           Creates a service to actor mapping from si_groups data.
-           Updates or creates service_actors.json with the mapping.
-           
-           Args:
-               si_groups: Dictionary output from organize_functional_data containing 
-                         SI, SREQ, and actor information.
-           
-           Returns:
-               Dictionary with SI keys as keys and lists of unique actors as values
-           """
-           import json
-           
-           # Initialize the mapping dictionary
-           service_actor_map = {}
-           
-           # Output file path
-           service_actors_path = get_dynamic_data_path("service_actors.json")
-           
-           # Process si_groups to extract service-actor mappings
-           for si_key, functions_data in si_groups.items():
-               si_name = si_key[1]  # Extract SI name
-               si_number = si_key[0]  # Extract SI number
-               
-               # Create a key for this SI in the mapping
-               if si_key not in service_actor_map:
-                   service_actor_map[si_key] = []
-               
-               # Track all unique actors for this SI
-               actors_for_si = set()
-               
-               # Iterate through functions in this SI
-               for function_name, sreqs_data in functions_data.items():
-                   # Iterate through SREQs in this function
-                   for sreq_number, sreq_info in sreqs_data.items():
-                       # Get test cases from SREQ info
-                       test_cases = sreq_info.get('test_cases', {})
-                       
-                       # Iterate through test cases to extract actors
-                       for test_case_key, test_case_data in test_cases.items():
-                           # test_case_data format is (key, name, [actors], version)
-                           if len(test_case_data) >= 3:
-                               actors_list = test_case_data[2]
-                               # Add each actor to the set of unique actors for this SI
-                               for actor in actors_list:
-                                   if actor != 'N/A':
-                                       actors_for_si.add(actor)
-               
-               # Convert set to list for JSON serialization
-               service_actor_map[si_key] = list(actors_for_si)
-           
-           # Prepare a simplified version for JSON serialization
-           # JSON cannot have tuples as keys, so convert to string format
-           json_compatible_map = {
-               f"{si_key[0]}_{si_key[1]}": actors
-               for si_key, actors in service_actor_map.items()
-           }
-           
-           # Write the updated mapping to the file
-           try:
-               with open(service_actors_path, 'w') as f:
-                   json.dump(json_compatible_map, f, indent=2)
-               logging.info(f"Service-actor mapping saved to {service_actors_path}")
-           except Exception as e:
-               logging.error(f"Error writing service_actors.json: {e}")
-           
-           return service_actor_map
+        # Add SREQ to EP
+        sreq_number = entry.get('sreqNumber', '')
+        if sreq_number:
+            ep_entry.sreqs.append(SREQEntry(sreq_number=sreq_number, sreq_name=entry.get('sreqName', '')))
 
-def organize_functional_data(sreq_data: List[Dict[str, Any]], func_data: List[Dict[str, Any]]) -> Dict[Tuple[str, str], Dict[str, Dict[str, Dict[str, Any]]]]:
+def organize_hierarchical_data(entries: Iterable[Dict[str, Any]]) -> Dict[str, SIEntry]:
     """
-    Organize SREQ data by functional area.
+    Organizes the entries into a hierarchical structure.
+
+    Args:
+        entries: Entries with null testCaseId (any iterable)
+
+    Returns:
+        Dictionary with hierarchical organization of data
+    """
+    builder = SreqHierarchyBuilder()
+    for entry in entries:
+        builder.add(entry)
+    return builder.hierarchy
+
+
+def build_service_actor_map(si_groups: Dict) -> Dict[str, List[str]]:
+    """
+    Maps each SI to the unique actors of its test cases.
+
+    Args:
+        si_groups: Dictionary output from organize_functional_data containing
+                  SI, SREQ, and actor information.
+
+    Returns:
+        Dictionary with "<siNumber>_<siName>" keys and sorted lists of unique actors as values
+    """
+    service_actor_map = {}
+    for si_key, functions_data in si_groups.items():
+        # Track all unique actors for this SI
+        actors_for_si = set()
+        for sreqs_data in functions_data.values():
+            for sreq_info in sreqs_data.values():
+                # test_case_data format is (key, name, [actors], version)
+                for test_case_data in sreq_info.get('test_cases', {}).values():
+                    if len(test_case_data) >= 3:
+                        actors_for_si.update(actor for actor in test_case_data[2] if actor != 'N/A')
+
+        # JSON cannot have tuples as keys, so convert to string format.
+        # Sorted so the file only changes when the mapping does.
+        service_actor_map[f"{si_key[0]}_{si_key[1]}"] = sorted(actors_for_si)
+    return service_actor_map
+
+@dataclass(slots=True)
+class FunctionalAnalysis:
+    """SREQ data organized by function, and the SREQs without a function mapping"""
+    si_groups: Dict[Tuple[str, str], Dict[str, Dict[str, Dict[str, Any]]]]
+    unmapped_sreqs: Dict[str, Dict[str, str]]
+
+def analyze_functional_data(sreq_data: List[Dict[str, Any]], func_data: List[Dict[str, Any]]) -> FunctionalAnalysis:
+    """
+    Organize SREQ data by functional area and collect the SREQs that have no
+    function mapping. Has no side effects; see derive_sreq_outputs for the
+    files derived from the result.
 
     Args:
         sreq_data: List of SREQ data entries
         func_data: List of functional area mapping entries
 
     Returns:
-        Data organized by SI -> Function -> SREQ -> test cases
+        FunctionalAnalysis with data organized by SI -> Function -> SREQ -> test cases
+        and the unmapped SREQs keyed by SREQ number
     """
     # Create mapping of SREQ numbers to their function and SI name
     sreq_mapping = {}
@@ -210,8 +201,8 @@ def organize_functional_data(sreq_data: List[Dict[str, Any]], func_data: List[Di
                 'siName': item.get('siName', '')
             }
 
-    # Track unmapped SREQs
-    unmapped_sreqs = []
+    # Track unmapped SREQs (once per SREQ number)
+    unmapped_sreqs = {}
 
     # Create nested structure
     si_groups = {}
@@ -236,12 +227,12 @@ def organize_functional_data(sreq_data: List[Dict[str, Any]], func_data: List[Di
         # Check if SREQ has a function mapping
         mapping = sreq_mapping.get(sreq_info[0])
         if not mapping:
-            unmapped_sreqs.append({
-                'sreqNumber': sreq_info[0],
-                'sreqName': sreq_info[1],
-                'siNumber': si_key[0],
-                'siName': si_key[1]
-            })
+            if sreq_info[0] not in unmapped_sreqs:
+                unmapped_sreqs[sreq_info[0]] = {
+                    'sreqName': sreq_info[1],
+                    'siNumber': si_key[0],
+                    'siName': si_key[1]
+                }
             continue
 
         function_name = mapping['function']
@@ -273,16 +264,20 @@ def organize_functional_data(sreq_data: List[Dict[str, Any]], func_data: List[Di
                 # Add new test case with actor and version
                 test_cases[test_case_key] = (test_case_key, test_case_name, [actor], test_case_version)
 
-    # Log unmapped SREQs if any
-    if unmapped_sreqs:
-        logging.warning(f"Found {len(unmapped_sreqs)} SREQs without function mappings.")
-        for sreq in unmapped_sreqs:
-            logging.info(f"Unmapped SREQ: {sreq.get('sreqNumber', '')} - {sreq.get('sreqName', '')}")
+    return FunctionalAnalysis(si_groups=si_groups, unmapped_sreqs=unmapped_sreqs)
 
-    create_service_actor_map(si_groups)
+def organize_functional_data(sreq_data: List[Dict[str, Any]], func_data: List[Dict[str, Any]]) -> Dict[Tuple[str, str], Dict[str, Dict[str, Dict[str, Any]]]]:
+    """
+    Organize SREQ data by functional area.
 
+    Args:
+        sreq_data: List of SREQ data entries
+        func_data: List of functional area mapping entries
 
-    return si_groups
+    Returns:
+        Data organized by SI -> Function -> SREQ -> test cases
+    """
+    return analyze_functional_data(sreq_data, func_data).si_groups
 
 def organize_tin_data(sreq_data: List[Dict[str, Any]]) -> Dict[Tuple[str, str], Dict[Tuple[str, str], Dict[str, Dict[str, Dict[str, Any]]]]]:
     """
@@ -342,44 +337,214 @@ def organize_tin_data(sreq_data: List[Dict[str, Any]]) -> Dict[Tuple[str, str],
     
     return si_groups
 
-def generate_markdown(hierarchy: Dict[str, SIEntry]) -> str:
+def load_tin_tree(environment: Optional[str] = None) -> Dict[Tuple[str, str], Dict[Tuple[str, str], Dict[str, Dict[str, Any]]]]:
     """
-    Generates formatted markdown output from the hierarchical data.
+    Gets organize_tin_data of the environment's SREQ.json, computed once per
+    SREQ.json version and persisted for all workers.
 
     Args:
-        hierarchy: Organized hierarchical data
+        environment: Optional environment. Defaults to the session environment.
 
     Returns:
-        Formatted markdown string
+        Data organized by SI -> TIN -> SREQ -> test cases (shared; do not modify)
+
+    Raises:
+        FileNotFoundError: If SREQ.json does not exist
+    """
+    sreq_path = get_dynamic_data_path("SREQ.json", environment=environment)
+    return load_artifact(
+        'sreq_tin_tree', [sreq_path],
+        lambda: organize_tin_data(read_json_file(sreq_path)),
+        environment=environment
+    )
+
+def load_functional_tree(environment: Optional[str] = None) -> Dict[Tuple[str, str], Dict[str, Dict[str, Dict[str, Any]]]]:
     """
-    markdown_lines = ["# SREQ Analysis Report - Null TestCase Entries\n"]
+    Gets organize_functional_data of the environment's SREQ.json and
+    SP5-Functional.json, computed once per version of the two and persisted
+    for all workers.
 
-    # Sort SI numbers
-    for si_number in sorted(hierarchy.keys()):
-        si_entry = hierarchy[si_number]
-        markdown_lines.append(f"## SI Number: {si_number}\n")
+    Args:
+        environment: Optional environment. Defaults to the session environment.
+
+    Returns:
+        Data organized by SI -> Function -> SREQ -> test cases (shared; do not modify)
+
+    Raises:
+        FileNotFoundError: If SREQ.json or SP5-Functional.json does not exist
+    """
+    return load_functional_analysis(environment).si_groups
+
+def load_functional_analysis(environment: Optional[str] = None) -> FunctionalAnalysis:
+    """
+    Gets analyze_functional_data of the environment's SREQ.json and
+    SP5-Functional.json, computed once per version of the two and persisted
+    for all workers.
+
+    Args:
+        environment: Optional environment. Defaults to the session environment.
+
+    Returns:
+        FunctionalAnalysis (shared; do not modify)
+
+    Raises:
+        FileNotFoundError: If SREQ.json or SP5-Functional.json does not exist
+    """
+    sreq_path = get_dynamic_data_path("SREQ.json", environment=environment)
+    func_path = get_dynamic_data_path("SP5-Functional.json", environment=environment)
+    return load_artifact(
+        'sreq_functional_analysis', [sreq_path, func_path],
+        lambda: analyze_functional_data(read_json_file(sreq_path), read_json_file(func_path)),
+        environment=environment
+    )
+
+def derive_sreq_outputs(environment: str, force: bool = False) -> Dict[str, Any]:
+    """
+    Ingestion stage run after SREQ.json is downloaded: builds the tree
+    artifacts, saves service_actors.json and merges the unmapped SREQs into
+    the unmapped_sreqs.json index.
+
+    Runs once per version of SREQ.json and SP5-Functional.json (recorded in
+    the dataset manifest as SREQ_DERIVED); the files are only rewritten when
+    their content changes.
+
+    Args:
+        environment: Environment ('ciav' or 'cwix')
+        force: Run even if this input version was already processed
+
+    Returns:
+        Dictionary with 'unchanged', 'unmapped_count' and which files were written
+    """
+    sreq_path = get_dynamic_data_path("SREQ.json", environment=environment)
+    func_path = get_dynamic_data_path("SP5-Functional.json", environment=environment)
+    service_actors_path = get_dynamic_data_path("service_actors.json", environment=environment)
+    unmapped_path = get_dynamic_data_path(UNMAPPED_SREQS_FILE, environment=environment)
+
+    # Build the TIN tree now so the first page view does not have to
+    load_tin_tree(environment)
+
+    key = artifact_key([sreq_path, func_path])
+    if key is None:
+        logging.warning(f"SP5-Functional.json not found for {environment}, skipping functional outputs")
+        return {'unchanged': False, 'skipped': True}
+    state = get_dataset_state(SREQ_DERIVED_DATASET, environment)
+    if not force and state.get('sha256') == key and service_actors_path.exists() and unmapped_path.exists():
+        return {'unchanged': True, 'unmapped_count': state.get('recordCount')}
+
+    analysis = load_functional_analysis(environment)
+    service_actors_written = write_json_file_if_changed(
+        build_service_actor_map(analysis.si_groups), service_actors_path, indent=2
+    )
+    unmapped_index = merge_unmapped_sreqs(
+        load_unmapped_sreqs(environment), analysis.unmapped_sreqs, dataset_sha256(sreq_path)
+    )
+    unmapped_written = write_json_file_if_changed(unmapped_index, unmapped_path)
+    if analysis.unmapped_sreqs:
+        logging.warning(f"Found {len(analysis.unmapped_sreqs)} SREQs without function mappings in {environment}.")
+
+    record_dataset_state(
+        SREQ_DERIVED_DATASET, environment, sha256=key,
+        changed=service_actors_written or unmapped_written,
+        record_count=len(analysis.unmapped_sreqs)
+    )
+    return {
+        'unchanged': False,
+        'unmapped_count': len(analysis.unmapped_sreqs),
+        'service_actors_written': service_actors_written,
+        'unmapped_written': unmapped_written
+    }
+
+def _tin_markdown_lines(tin: TINEntry) -> Iterator[str]:
+    """Yields the markdown lines of one TIN section."""
+    yield f"### TIN: {tin.tin_number} ({tin.tin_name})\n"
+
+    # Sort EPs
+    for ep in sorted(tin.eps, key=lambda x: x.ep_number):
+        yield f"#### EP {ep.ep_number}: {ep.ep_name}\n"
+
+        # Sort SREQs
+        for sreq in sorted(ep.sreqs, key=lambda x: x.sreq_number):
+            # Truncate long SREQ names to avoid excessive line length
+            sreq_name_display = sreq.sreq_name[:78] + "..." if len(sreq.sreq_name) > 78 else sreq.sreq_name
+            yield f"- **{sreq.sreq_number}**: {sreq_name_display}"
+
+        yield ""  # Add blank line between EPs
+
+    yield ""  # Add blank line between TINs
+
+def iter_markdown_lines(tins: Iterable[Tuple[str, TINEntry]]) -> Iterator[str]:
+    """
+    Yields the lines of the SREQ report, one TIN section at a time.
+
+    Args:
+        tins: (SI number, TIN entry) pairs, sorted by SI number and TIN number
+
+    Returns:
+        Iterator over markdown lines (to be joined with newlines)
+    """
+    yield SREQ_REPORT_TITLE
+
+    current_si = None
+    for si_number, tin in tins:
+        if si_number != current_si:
+            if current_si is not None:
+                yield ""  # Add blank line between SIs
+            yield f"## SI Number: {si_number}\n"
+            current_si = si_number
+        yield from _tin_markdown_lines(tin)
+
+    if current_si is not None:
+        yield ""
 
-        # Sort TINs
-        for tin in sorted(si_entry.tins, key=lambda x: x.tin_number):
-            markdown_lines.append(f"### TIN: {tin.tin_number} ({tin.tin_name})\n")
+def _sorted_tins(hierarchy: Dict[str, SIEntry]) -> Iterator[Tuple[str, TINEntry]]:
+    for si_number in sorted(hierarchy.keys()):
+        for tin in sorted(hierarchy[si_number].tins, key=lambda x: x.tin_number):
+            yield si_number, tin
 
-            # Sort EPs
-            for ep in sorted(tin.eps, key=lambda x: x.ep_number):
-                markdown_lines.append(f"#### EP {ep.ep_number}: {ep.ep_name}\n")
+def generate_markdown(hierarchy: Dict[str, SIEntry]) -> str:
+    """
+    Generates formatted markdown output from the hierarchical data.
 
-                # Sort SREQs
-                for sreq in sorted(ep.sreqs, key=lambda x: x.sreq_number):
-                    # Truncate long SREQ names to avoid excessive line length
-                    sreq_name_display = sreq.sreq_name[:78] + "..." if len(sreq.sreq_name) > 78 else sreq.sreq_name
-                    markdown_lines.append(f"- **{sreq.sreq_number}**: {sreq_name_display}")
+    Args:
+        hierarchy: Organized hierarchical data
 
-                markdown_lines.append("")  # Add blank line between EPs
+    Returns:
+        Formatted markdown string
+    """
+    return "\n".join(iter_markdown_lines(_sorted_tins(hierarchy)))
+
+def _iter_null_testcase_rows(sreq_path: Path) -> Iterator[Tuple[str, ...]]:
+    """Streams the entries with null testCaseId from SREQ.json as tuples of _REPORT_FIELDS."""
+    with open_dataset(sreq_path, 'rb') as f:
+        for entry in ijson.items(f, 'item'):
+            if entry.get('testCaseId') is None and entry.get('siNumber') and entry.get('tinNumber'):
+                yield tuple(entry.get(name) or '' for name in _REPORT_FIELDS)
+
+def _iter_report_tins(sreq_path: Path) -> Iterator[Tuple[str, TINEntry]]:
+    tin_key = itemgetter(0, 1)
+    for (si_number, _), rows in groupby(external_sort(_iter_null_testcase_rows(sreq_path), key=tin_key), key=tin_key):
+        # The sort is stable, so the TIN's entries are added in file order, as in organize_hierarchical_data
+        builder = SreqHierarchyBuilder()
+        for row in rows:
+            builder.add(dict(zip(_REPORT_FIELDS, row)))
+        yield si_number, builder.hierarchy[si_number].tins[0]
+
+def iter_sreq_report_lines(sreq_path: Path) -> Iterator[str]:
+    """
+    Yields the lines of the SREQ report (the same as generate_markdown) for a
+    stored SREQ.json, without loading the file or the hierarchy.
 
-            markdown_lines.append("")  # Add blank line between TINs
+    The entries are streamed with ijson and grouped by (SI, TIN) through an
+    external sort, so only one TIN is held as a hierarchy at a time. The
+    title is yielded before the input is read.
 
-        markdown_lines.append("")  # Add blank line between SIs
+    Args:
+        sreq_path: Path to SREQ.json
 
-    return "\n".join(markdown_lines)
+    Returns:
+        Iterator over markdown lines (to be joined with newlines)
+    """
+    return iter_markdown_lines(_iter_report_tins(sreq_path))
 
 def analyze_sreq_file(
     input_file: Path, 
@@ -400,28 +565,22 @@ def analyze_sreq_file(
     logging.info(f"Analyzing SREQ data from {input_file}")
     
     try:
-        # Read and parse data
-        data = read_json_file(input_file)
-        
-        # Extract entries with null testCaseId
-        null_entries = extract_null_testcase_entries(data)
-        
-        if not null_entries:
-            message = "No entries found with null testCaseId."
-            logging.info(message)
-            return message
-        
-        # Organize the data hierarchically
-        hierarchy = organize_hierarchical_data(null_entries)
-        
-        # Generate markdown output
-        markdown_output = generate_markdown(hierarchy)
-        
+        # Stream the entries with null testCaseId into the report
+        lines = iter_sreq_report_lines(input_file)
+
         # Save to file if output_file specified
         if output_file:
-            write_markdown_file(markdown_output, output_file)
+            write_markdown_lines(lines, output_file)
             logging.info(f"SREQ analysis written to {output_file}")
-        
+            markdown_output = Path(output_file).read_text(encoding='utf-8')
+        else:
+            markdown_output = "\n".join(lines)
+
+        if markdown_output == SREQ_REPORT_TITLE:
+            message = "No entries found with null testCaseId."
+            logging.info(message)
+            return message
+
         return markdown_output
         
     except Exception as e:
@@ -0,0 +1,307 @@
+"""
+Level-by-level views of the SREQ and IER coverage trees.
+
+The tree pages render their first two levels and fetch the nodes below one
+parent at a time. Each precomputed hierarchy (load_tin_tree,
+load_functional_tree, load_ier_hierarchy) is flattened once per version into
+a TreeIndex: the nodes of every level with their counts and coverage, keyed
+by the path of their parent. Level-3 nodes (SREQs, IER services) carry their
+test cases, since those are small and always shown together.
+
+Coverage follows the templates: a TIN, function or IER is the share of its
+SREQs or services with test cases; an SI or PI is the mean of its TINs' or
+IERs' percentages, except in the functional tree where it is the share of
+its distinct SREQs that are covered.
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.core.exceptions import ResourceNotFoundError, ValidationError
+from app.utils.artifact_store import artifact_key, load_artifact
+from app.utils.file_operations import get_dynamic_data_path
+
+# Tree -> names of its three levels
+TREE_LEVELS = {
+    'tin': ('si', 'tin', 'sreq'),
+    'func': ('si', 'function', 'sreq'),
+    'ier': ('pi', 'ier', 'service'),
+}
+
+# Tree -> search field -> levels it matches (4 is test cases, 5 their actors), as in the pages' search boxes
+SEARCH_FIELDS = {
+    'tin': {'sreq': (3,), 'tca': (4,)},
+    'func': {'sreq': (3,), 'tca': (4,), 'actor': (5,), 'function': (2,)},
+    'ier': {'ier': (1, 2), 'tca': (4,)},
+}
+MAX_SEARCH_MATCHES = 500
+
+NodePath = Tuple[str, ...]
+
+@dataclass(slots=True)
+class TreeIndex:
+    """
+    Nodes of a tree keyed by the path of their parent (() for the top level).
+    A path lists the ids of a node and its ancestors: the key (number), or
+    "number -> name" for the TINs, IERs, SIs or PIs that share their number
+    with a sibling.
+    """
+    tree: str
+    children: Dict[NodePath, List[Dict[str, Any]]]
+
+def _percentage(covered: int, total: int) -> float:
+    return round(covered / total * 100, 1) if total else 0.0
+
+def _leaf_node(key: str, name: str, test_cases: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {'key': key, 'name': name, 'counts': {'test_cases': len(test_cases)}, 'test_cases': test_cases}
+
+def _tin_groups(tree: Dict) -> Iterator[Tuple[Tuple[str, str], Iterator]]:
+    for si_key, tins in tree.items():
+        yield si_key, (
+            (tin_key, [
+                _leaf_node(sreq_number, sreq_data['sreq_name'], [
+                    {'key': test_data[0], 'name': test_data[1], 'actors': list(test_data[2] or [])}
+                    for test_data in sreq_data['test_cases'].values()
+                ])
+                for sreq_number, sreq_data in sreqs.items()
+            ])
+            for tin_key, sreqs in tins.items()
+        )
+
+def _func_groups(tree: Dict) -> Iterator[Tuple[Tuple[str, str], Iterator]]:
+    # SREQs, test cases and actors sorted case-insensitively, as the template's dictsort and sort filters did
+    for si_key, functions in tree.items():
+        yield si_key, (
+            ((function_name, function_name), [
+                _leaf_node(sreq_number, sreq_data['sreq_name'], [
+                    {
+                        'key': test_data[0],
+                        'name': test_data[1],
+                        'actors': sorted(test_data[2] or [], key=str.lower),
+                        'version': test_data[3] if len(test_data) > 3 and test_data[3] not in (None, '') else None,
+                    }
+                    for _, test_data in sorted(sreq_data['test_cases'].items(), key=lambda item: item[0].lower())
+                ])
+                for sreq_number, sreq_data in sorted(sreqs.items(), key=lambda item: item[0].lower())
+            ])
+            for function_name, sreqs in functions.items()
+        )
+
+def _ier_groups(hierarchy: Dict) -> Iterator[Tuple[Tuple[str, str], Iterator]]:
+    for pi_key, iers in hierarchy.items():
+        yield pi_key, (
+            (ier_key, [
+                _leaf_node(service, service_data['idp_tin_name'], [
+                    {'key': test[0], 'name': test[1]} for test in service_data['test_cases']
+                ])
+                for service, service_data in services.items()
+            ])
+            for ier_key, services in iers.items()
+        )
+
+def _leaf_counts(leaf_level: str, leaves: List[Dict[str, Any]]) -> Dict[str, int]:
+    return {
+        f'{leaf_level}s': len(leaves),
+        'covered': sum(1 for leaf in leaves if leaf['counts']['test_cases']),
+        'test_cases': len({test_case['key'] for leaf in leaves for test_case in leaf['test_cases']}),
+    }
+
+def _node_ids(keys: List[Tuple[str, str]]) -> List[str]:
+    """Path ids of sibling nodes: the number, or 'number -> name' where siblings share a number."""
+    numbers = [number for number, _ in keys]
+    return [number if numbers.count(number) == 1 else f"{number} -> {name}" for number, name in keys]
+
+def build_tree_index(tree: str, groups: Iterable[Tuple[Tuple[str, str], Iterable]]) -> TreeIndex:
+    """
+    Flattens a hierarchy into per-level node lists.
+
+    Args:
+        tree: 'tin', 'func' or 'ier'
+        groups: ((number, name) of a top-level node, [((number, name) of a child, [level-3 nodes])]) pairs
+
+    Returns:
+        TreeIndex
+    """
+    _, child_level, leaf_level = TREE_LEVELS[tree]
+    children: Dict[NodePath, List[Dict[str, Any]]] = {(): []}
+    groups = list(groups)
+    for ((top_key, top_name), seconds), top_id in zip(groups, _node_ids([group[0] for group in groups])):
+        top_path = (top_id,)
+        second_nodes = []
+        # Test cases of each distinct level-3 node: an SREQ under several TINs or functions counts once for its SI
+        distinct_leaves: Dict[Any, Dict[str, Dict[str, Any]]] = {}
+        seconds = list(seconds)
+        for ((second_key, second_name), leaves), second_id in zip(seconds, _node_ids([second[0] for second in seconds])):
+            second_path = top_path + (second_id,)
+            for leaf in leaves:
+                leaf['path'] = list(second_path + (leaf['key'],))
+                test_cases = distinct_leaves.setdefault(leaf['key'] if tree != 'ier' else (second_id, leaf['key']), {})
+                test_cases.update((test_case['key'], test_case) for test_case in leaf['test_cases'])
+            children[second_path] = leaves
+            counts = _leaf_counts(leaf_level, leaves)
+            second_nodes.append({
+                'key': second_key, 'name': second_name, 'path': list(second_path),
+                'counts': counts, 'coverage': _percentage(counts['covered'], len(leaves)),
+            })
+        children[top_path] = second_nodes
+
+        counts = {f'{child_level}s': len(second_nodes), **_leaf_counts(leaf_level, [
+            {'counts': {'test_cases': len(test_cases)}, 'test_cases': list(test_cases.values())}
+            for test_cases in distinct_leaves.values()
+        ])}
+        if tree == 'func':
+            coverage = _percentage(counts['covered'], counts[f'{leaf_level}s'])
+        else:
+            percentages = [node['coverage'] for node in second_nodes if node['counts'][f'{leaf_level}s']]
+            coverage = round(sum(percentages) / len(percentages), 1) if percentages else 0.0
+        children[()].append({
+            'key': top_key, 'name': top_name, 'path': list(top_path),
+            'counts': counts, 'coverage': coverage,
+        })
+    return TreeIndex(tree=tree, children=children)
+
+def load_tree_index(tree: str, environment: Optional[str] = None) -> Tuple[TreeIndex, str]:
+    """
+    Gets the node index of a tree, built once per version of its hierarchy's inputs.
+
+    Args:
+        tree: 'tin', 'func' or 'ier'
+        environment: Optional environment. Defaults to the session environment.
+
+    Returns:
+        Tuple of (TreeIndex (shared; do not modify), version key)
+
+    Raises:
+        ValidationError: If the tree is unknown
+        FileNotFoundError: If an input of the tree does not exist
+    """
+    if tree not in TREE_LEVELS:
+        raise ValidationError(f"Unknown tree '{tree}'", details={'allowed': sorted(TREE_LEVELS)})
+
+    if tree == 'tin':
+        from app.data_models.sreq_analysis import load_tin_tree
+        inputs = [get_dynamic_data_path("SREQ.json", environment=environment)]
+        build = lambda: build_tree_index(tree, _tin_groups(load_tin_tree(environment)))
+    elif tree == 'func':
+        from app.data_models.sreq_analysis import load_functional_tree
+        inputs = [
+            get_dynamic_data_path("SREQ.json", environment=environment),
+            get_dynamic_data_path("SP5-Functional.json", environment=environment),
+        ]
+        build = lambda: build_tree_index(tree, _func_groups(load_functional_tree(environment)))
+    else:
+        from app.data_models.ier_analysis import load_ier_hierarchy
+        ier_path = get_dynamic_data_path("IER.json", environment=environment)
+        tin_csv_file = get_dynamic_data_path("TIN2.csv", environment=environment)
+        inputs = [ier_path, tin_csv_file] if tin_csv_file.exists() else [ier_path]
+        build = lambda: build_tree_index(tree, _ier_groups(load_ier_hierarchy(ier_path, tin_csv_file)))
+
+    index = load_artifact(f'tree_nodes_{tree}', inputs, build, environment=environment)
+    return index, artifact_key(inputs)
+
+def _with_children(index: TreeIndex, node: Dict[str, Any], depth: int) -> Dict[str, Any]:
+    path = tuple(node['path'])
+    if depth <= 0 or path not in index.children:
+        return node
+    return {**node, 'children': [_with_children(index, child, depth - 1) for child in index.children[path]]}
+
+def get_tree_nodes(index: TreeIndex, path: Iterable[str] = (), depth: int = 1) -> List[Dict[str, Any]]:
+    """
+    Gets the children of a node.
+
+    Args:
+        index: Index from load_tree_index
+        path: Path of the node, as in its 'path' (empty for the top level)
+        depth: Levels returned; nodes of the levels below the first get their own 'children'
+
+    Returns:
+        List of nodes
+
+    Raises:
+        ResourceNotFoundError: If the path does not name a node with children
+    """
+    path = tuple(path)
+    if path not in index.children:
+        raise ResourceNotFoundError('Tree node', ' / '.join(path))
+    return [_with_children(index, node, depth - 1) for node in index.children[path]]
+
+def _node_label(node: Dict[str, Any], level: int, tree: str) -> str:
+    """Text of a node as the page shows it, for matching searches the way the pages did."""
+    if level == 2 and tree == 'func':
+        return f"{node['key']} ({node['coverage']}%)"
+    if level < 3:
+        return f"{node['key']} -> {node['name']} ({node['coverage']}%)"
+    return f"{node['key']} -> {node['name']} ({node['counts']['test_cases']})"
+
+def _test_case_label(test_case: Dict[str, Any], tree: str) -> str:
+    label = f"{test_case['key']} -> {test_case['name']}"
+    if tree == 'tin':
+        # The TIN page matched the whole test case entry, actors included
+        label += ' ' + ' '.join(test_case['actors'])
+    elif test_case.get('version'):
+        label += f" (v{test_case['version']})"
+    return label
+
+def _leaf_matches(leaf: Dict[str, Any], levels: Tuple[int, ...], tree: str, needle: str) -> bool:
+    if 3 in levels and needle in _node_label(leaf, 3, tree).lower():
+        return True
+    if 4 in levels and any(needle in _test_case_label(test_case, tree).lower() for test_case in leaf['test_cases']):
+        return True
+    return 5 in levels and any(needle in actor.lower() for test_case in leaf['test_cases'] for actor in test_case['actors'])
+
+def search_tree(index: TreeIndex, field: str, term: str, limit: int = MAX_SEARCH_MATCHES) -> Dict[str, Any]:
+    """
+    Finds the nodes matching a search box of the tree pages.
+
+    Returns the branches leading to matching nodes, each matching node with
+    everything below it, so that the page can apply its own filtering and
+    highlighting to a tree that holds all it would have shown.
+
+    Args:
+        index: Index from load_tree_index
+        field: Search field of the tree (see SEARCH_FIELDS)
+        term: Case-insensitive text to look for
+        limit: Maximum matching nodes returned
+
+    Returns:
+        Dictionary with the pruned 'nodes', the number of 'matches' and
+        whether the result was 'truncated'
+
+    Raises:
+        ValidationError: If the field is unknown for the tree
+    """
+    fields = SEARCH_FIELDS[index.tree]
+    if field not in fields:
+        raise ValidationError(f"Cannot search the {index.tree} tree by '{field}'", details={'allowed': sorted(fields)})
+    levels = fields[field]
+    needle = term.lower()
+
+    matches = 0
+    truncated = False
+    nodes = []
+    for top in index.children[()]:
+        if matches >= limit:
+            truncated = True
+            break
+        if 1 in levels and needle in _node_label(top, 1, index.tree).lower():
+            nodes.append(_with_children(index, top, 2))
+            matches += 1
+            continue
+        seconds = []
+        for second in index.children[tuple(top['path'])]:
+            if matches >= limit:
+                truncated = True
+                break
+            if 2 in levels and needle in _node_label(second, 2, index.tree).lower():
+                seconds.append(_with_children(index, second, 1))
+                matches += 1
+                continue
+            leaves = [leaf for leaf in index.children[tuple(second['path'])] if _leaf_matches(leaf, levels, index.tree, needle)]
+            if leaves:
+                if matches + len(leaves) > limit:
+                    leaves = leaves[:limit - matches]
+                    truncated = True
+                seconds.append({**second, 'children': leaves})
+                matches += len(leaves)
+        if seconds:
+            nodes.append({**top, 'children': seconds})
+    return {'nodes': nodes, 'matches': matches, 'truncated': truncated}
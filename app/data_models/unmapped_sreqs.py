@@ -0,0 +1,146 @@
+"""
+Index of the SREQs without a function mapping, per environment.
+
+The index is stored as data/<env>/unmapped_sreqs.json, keyed by SREQ
+number. Each entry holds the SREQ name, its SI, and the first and last
+SREQ.json version (content hash and time) it was unmapped in. SREQs that
+get a mapping stay in the index as resolved until they are unmapped again.
+"""
+import logging
+import math
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.core.exceptions import ValidationError
+from app.utils.file_operations import get_dynamic_data_path, read_json_file
+
+UNMAPPED_SREQS_FILE = "unmapped_sreqs.json"
+
+# status query parameter -> entries it selects
+UNMAPPED_STATUSES = ('active', 'resolved', 'all')
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+def merge_unmapped_sreqs(
+    index: Dict[str, Dict[str, Any]],
+    unmapped: Dict[str, Dict[str, str]],
+    sreq_sha256: str
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Merges the unmapped SREQs of one SREQ.json version into the index.
+
+    Entries seen again keep their firstSeen; lastSeen only moves when the
+    SREQ.json version changes, so re-deriving the same version (e.g. after
+    SP5-Functional.json changed) leaves unchanged entries as they are.
+
+    Args:
+        index: Current index (not modified)
+        unmapped: Unmapped SREQs of this version, as in FunctionalAnalysis.unmapped_sreqs
+        sreq_sha256: Content hash of the SREQ.json version
+
+    Returns:
+        New index, sorted by SREQ number
+    """
+    version = {'sha256': sreq_sha256[:16], 'at': datetime.now().isoformat(timespec='seconds')}
+    merged = {}
+    for sreq_number in sorted(set(index) | set(unmapped)):
+        entry = dict(index.get(sreq_number, {}))
+        current = unmapped.get(sreq_number)
+        if current is not None:
+            entry.update(current)
+            if not entry.get('firstSeen'):
+                entry['firstSeen'] = version
+            if (entry.get('lastSeen') or {}).get('sha256') != version['sha256']:
+                entry['lastSeen'] = version
+        entry['active'] = current is not None
+        merged[sreq_number] = entry
+    return merged
+
+def load_unmapped_sreqs(environment: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Reads the unmapped SREQ index.
+
+    Args:
+        environment: Optional environment. Defaults to the session environment.
+
+    Returns:
+        Index keyed by SREQ number (empty if it was never derived)
+    """
+    path = get_dynamic_data_path(UNMAPPED_SREQS_FILE, environment=environment)
+    if not path.exists():
+        return {}
+    index = read_json_file(path)
+    if not isinstance(index, dict):
+        logging.warning(f"Ignoring malformed unmapped SREQ index {path}")
+        return {}
+    return index
+
+def query_unmapped_sreqs(
+    index: Dict[str, Dict[str, Any]],
+    search: Optional[str] = None,
+    si_number: Optional[str] = None,
+    status: str = 'active',
+    page: int = 1,
+    page_size: int = DEFAULT_PAGE_SIZE
+) -> Dict[str, Any]:
+    """
+    Filters and pages the unmapped SREQ index.
+
+    Args:
+        index: Index from load_unmapped_sreqs
+        search: Case-insensitive text matched against SREQ number, SREQ name and SI
+        si_number: Only entries of this SI
+        status: 'active' (unmapped in the current SREQ.json), 'resolved' or 'all'
+        page: 1-based page number
+        page_size: Entries per page (at most MAX_PAGE_SIZE)
+
+    Returns:
+        Dictionary with the page's 'items', 'total' matching entries, paging
+        fields, and 'counts' over the whole index (active, resolved and
+        active per SI)
+
+    Raises:
+        ValidationError: If status or the paging parameters are invalid
+    """
+    if status not in UNMAPPED_STATUSES:
+        raise ValidationError(f"Unknown status '{status}'", details={'allowed': list(UNMAPPED_STATUSES)})
+    if page < 1 or not 1 <= page_size <= MAX_PAGE_SIZE:
+        raise ValidationError(f"page must be at least 1 and page_size between 1 and {MAX_PAGE_SIZE}")
+
+    needle = (search or '').strip().lower()
+    matches: List[Dict[str, Any]] = []
+    by_si: Dict[str, Dict[str, Any]] = {}
+    active_count = 0
+    for sreq_number, entry in index.items():
+        active = entry.get('active', True)
+        if active:
+            active_count += 1
+            si = by_si.setdefault(entry.get('siNumber', ''), {
+                'siNumber': entry.get('siNumber', ''), 'siName': entry.get('siName', ''), 'count': 0
+            })
+            si['count'] += 1
+
+        if status != 'all' and active != (status == 'active'):
+            continue
+        if si_number and entry.get('siNumber') != si_number:
+            continue
+        if needle and not any(
+            needle in (value or '').lower()
+            for value in (sreq_number, entry.get('sreqName'), entry.get('siNumber'), entry.get('siName'))
+        ):
+            continue
+        matches.append({'sreqNumber': sreq_number, **entry})
+
+    start = (page - 1) * page_size
+    return {
+        'items': matches[start:start + page_size],
+        'total': len(matches),
+        'page': page,
+        'page_size': page_size,
+        'pages': math.ceil(len(matches) / page_size),
+        'counts': {
+            'active': active_count,
+            'resolved': len(index) - active_count,
+            'by_si': sorted(by_si.values(), key=lambda si: (-si['count'], si['siNumber'])),
+        },
+    }
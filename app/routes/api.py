@@ -4,7 +4,7 @@ API routes for the IOCore2 Coverage Analysis Tool.
 import logging
 import threading
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
 import os
 from pathlib import Path
 import json
@@ -14,11 +14,14 @@ import ijson # Import ijson
 from flask import Blueprint, jsonify, session, request, current_app, url_for # Added url_for
 from werkzeug.exceptions import BadRequest, NotFound # Added NotFound
 
-from app.core.auth import login_required, get_api_client
+from app.core.auth import login_required, get_api_client, get_session_user
+from app.core.jobs import create_job, get_job, list_jobs, request_cancel, start_job_thread
 from app.core.exceptions import ApiRequestError, InvalidSession, DataFormatError # Import DataFormatError
 from app.config import settings
 from app.utils.file_operations import get_dynamic_data_path # Added import for dynamic paths
+from app.utils.dataset_store import dataset_exists, dataset_signature, open_dataset
 from app.data_access import gps_repository
+from app.data_access.actors_repository import get_actor_directory
 
 # Create blueprint
 api_bp = Blueprint('api', __name__)
@@ -29,56 +32,6 @@ import app.routes.ascs  # Register ASC routes
 from app.data_access.cis_plan_repository import get_all_cis_plan
 
 # --- Actor Mappings ---
-_actor_map = None  # Maps actor key to name
-_actor_id_map = None  # Maps actor ID to name
-_actor_map_load_lock = threading.Lock() # Prevent race conditions on load
-
-def _load_actor_map():
-    """Loads the actor mappings from actors.json."""
-    global _actor_map, _actor_id_map
-    start_time = time.time()
-    logging.info("Attempting to load actors.json into memory...")
-    # Use dynamic path based on session environment
-    # Note: This runs at startup or first request, might not have session context yet.
-    # Consider loading lazily within a request context if session is strictly needed here.
-    # For now, assuming default 'ciav' is acceptable if no session.
-    actors_path = get_dynamic_data_path("actors.json")
-
-    if not actors_path.exists():
-        logging.error(f"actors.json not found at {actors_path}.")
-        _actor_map = {} # Set to empty dict to avoid reload attempts
-        _actor_id_map = {} # Set to empty dict to avoid reload attempts
-        return
-
-    try:
-        with open(actors_path, 'r', encoding='utf-8') as f:
-            actors_data = json.load(f)
-
-        # Create the key-to-name map, strip whitespace from names
-        key_map = {actor.get('key', actor['id']): actor.get('name', 'Unknown Actor').strip() 
-                  for actor in actors_data if 'id' in actor}
-        _actor_map = key_map
-        
-        # Create the id-to-name map, strip whitespace from names
-        id_map = {actor['id']: actor.get('name', 'Unknown Actor').strip() 
-                 for actor in actors_data if 'id' in actor}
-        _actor_id_map = id_map
-
-        load_time = time.time() - start_time
-        logging.info(f"Successfully loaded {len(_actor_map)} actors into maps in {load_time:.2f} seconds.")
-
-    except json.JSONDecodeError as e:
-        logging.error(f"Error decoding actors.json: {e}")
-        _actor_map = {} # Set to empty dict on error
-        _actor_id_map = {} # Set to empty dict on error
-    except MemoryError:
-        logging.error("MemoryError: actors.json is too large to load into memory.")
-        _actor_map = {} # Set to empty dict on error
-        _actor_id_map = {} # Set to empty dict on error
-    except Exception as e:
-        logging.exception(f"Unexpected error loading actors.json: {e}")
-        _actor_map = {} # Set to empty dict on error
-        _actor_id_map = {} # Set to empty dict on error
 
 def get_actor_key_from_name(actor_name):
     """
@@ -90,24 +43,13 @@ def get_actor_key_from_name(actor_name):
     Returns:
         str: The actor key if found, or an empty string if not found
     """
-    global _actor_map, _actor_id_map
-    
-    # Load maps if not already loaded (thread-safe)
-    if _actor_map is None or _actor_id_map is None:
-        with _actor_map_load_lock:
-            # Double-check inside lock
-            if _actor_map is None or _actor_id_map is None:
-                _load_actor_map()
-                # If loading failed, maps will be {}
-                if not _actor_map or not _actor_id_map:
-                    logging.error("Actor maps could not be loaded.")
-                    return ""
-    
-    # Create a reverse mapping of name to key, strip whitespace and convert to lowercase
-    name_to_actor_key = {name.strip().lower(): actor_key for actor_key, name in _actor_map.items()}
-    
+    directory = get_actor_directory()
+    if not directory.loaded:
+        logging.error("Actor maps could not be loaded.")
+        return ""
+
     # Look up the actor key (case-insensitive and strip whitespace)
-    actor_key = name_to_actor_key.get(actor_name.strip().lower(), "")
+    actor_key = directory.get_key(actor_name)
     
     if not actor_key:
         logging.warning(f"Actor with name '{actor_name}' not found.")
@@ -119,32 +61,16 @@ def get_actor_key_from_name(actor_name):
 @api_bp.route('/api/actor/<string:actor_id>')
 @login_required
 def get_actor_name(actor_id):
-    """Get the name of an actor by its ID."""
-    global _actor_map, _actor_id_map
-
-    # Load maps if not already loaded (thread-safe)
-    if _actor_map is None or _actor_id_map is None:
-        with _actor_map_load_lock:
-            # Double-check inside lock
-            if _actor_map is None or _actor_id_map is None:
-                _load_actor_map()
-                # If loading failed, maps will be {}
-                if _actor_map is None or _actor_id_map is None: # Should not happen if _load_actor_map sets them to {} on error
-                     return jsonify({'success': False, 'error': 'Actor maps could not be loaded.'}), 500
-
-    # First try to find the actor by key (if the ID is actually a key)
-    actor_name = _actor_map.get(actor_id)
-    
-    # If not found by key, try to find by ID
-    if actor_name is None:
-        actor_name = _actor_id_map.get(actor_id)
+    """Get the name of an actor by its key or ID."""
+    directory = get_actor_directory()
+
+    # Keys take precedence over IDs
+    actor_name = directory.get_name(actor_id)
 
     if actor_name is None:
-         # Check if the map is empty because loading failed
-         # Use dynamic path based on session environment
-        actors_path_check = get_dynamic_data_path("actors.json")
-        if not _actor_map and actors_path_check.exists():
-             return jsonify({'success': False, 'error': 'Actor map failed to load, cannot lookup ID.'}), 500
+        # Check if the map is empty because loading failed
+        if not directory.loaded and dataset_exists(get_dynamic_data_path("actors.json")):
+            return jsonify({'success': False, 'error': 'Actor map failed to load, cannot lookup ID.'}), 500
         # Otherwise, the ID genuinely wasn't found
         # Use raise NotFound for Flask to handle the 404 response
         raise NotFound(f"Actor with ID '{actor_id}' not found.")
@@ -156,12 +82,12 @@ def get_actor_name(actor_id):
 @login_required
 def get_actor_id(actor_name):
     """Get the ID of an actor by its name."""
-    actor_id = get_actor_key_from_name(actor_name)
+    directory = get_actor_directory()
+    actor_id = directory.get_key(actor_name)
     
     if not actor_id:
         # Check if the map is empty because loading failed
-        actors_path_check = get_dynamic_data_path("actors.json")
-        if not _actor_map and actors_path_check.exists():
+        if not directory.loaded and dataset_exists(get_dynamic_data_path("actors.json")):
             return jsonify({'success': False, 'error': 'Actor map failed to load, cannot lookup name.'}), 500
         # Otherwise, the name genuinely wasn't found
         raise NotFound(f"Actor with name '{actor_name}' not found.")
@@ -185,7 +111,7 @@ def get_data():
         # Use dynamic path based on session environment
         sreq_path = get_dynamic_data_path("SREQ.json")
 
-        if not sreq_path.exists():
+        if not dataset_exists(sreq_path):
             logging.warning(f"SREQ file not found at {sreq_path}")
             return jsonify({
                 'success': False,
@@ -220,7 +146,7 @@ def get_ier_data():
         ier_path = get_dynamic_data_path("IER.json")
         tin_csv_file = get_dynamic_data_path("TIN2.csv")
 
-        if not ier_path.exists():
+        if not dataset_exists(ier_path):
             logging.warning(f"IER file not found at {ier_path}")
             return jsonify({
                 'success': False,
@@ -265,28 +191,14 @@ def get_ier_coverage():
         environment = session.get('environment', 'ciav')
         result = client.get_ier_coverage(environment=environment) # Pass environment
 
-        # Generate markdown content
-        from app.data_models.ier_analysis import analyze_ier_data, generate_ier_markdown_output, read_tin_data # Corrected import path
-        from app.utils.file_operations import read_json_file
-
-        # Define dynamic paths
-        ier_path = get_dynamic_data_path("IER.json", environment=environment) # Pass environment
-        tin_csv_file = get_dynamic_data_path("TIN2.csv", environment=environment) # Pass environment
-
-        # Read TIN data to map TINs to services
-        logging.info(f"Reading TIN data from {tin_csv_file}...")
-        tin_to_service = read_tin_data(tin_csv_file) # Use dynamic path
-
-        # Process IER data using dynamic path
-        logging.info(f"Reading IER data from {ier_path}...")
-        data = read_json_file(ier_path) # Use the correctly defined dynamic path
-        hierarchy = analyze_ier_data(data, tin_to_service)
-        markdown_content = generate_ier_markdown_output(hierarchy)
+        # The client analyzes the records while streaming them to IER.json
+        markdown_content = result.get('markdown', '')
 
         return jsonify({
             'success': True,
             'count': result.get('count', 0),
             'duration': result.get('duration', 0),
+            'unchanged': result.get('unchanged', False),
             'markdown': markdown_content
         })
     except InvalidSession:
@@ -305,10 +217,13 @@ def get_ier_coverage():
 @login_required
 def get_requirement_coverage():
     """
-    Start a background process to fetch SREQ coverage data from IOCore2 API.
+    Start a background job to fetch SREQ coverage data from IOCore2 API.
+
+    Only one SREQ job runs per environment; if one is already active its ID
+    is returned instead of starting a duplicate download.
 
     Returns:
-        JSON response with process start status
+        JSON response with the job ID
     """
     try:
         # Get the necessary data from the session before starting the background thread
@@ -323,22 +238,16 @@ def get_requirement_coverage():
                 'error': "Missing URL or cookies in session"
             })
 
-        # Store request info in the session to indicate processing has started
-        session['sreq_processing'] = True
-        session['sreq_start_time'] = datetime.now().isoformat()
-
-        # Use threading to run the operation in the background
-        thread = threading.Thread(
-            target=process_sreq_coverage_in_background,
-            args=(url, cookies, environment) # Pass environment to background task
-        )
-        thread.daemon = True  # Make sure thread doesn't block app shutdown
-        thread.start()
+        job, created = create_job('sreq_coverage', environment, dedupe_key=f"sreq_coverage:{environment}", owner=get_session_user())
+        if created:
+            start_job_thread(job['id'], process_sreq_coverage_in_background, url, cookies, environment)
 
         return jsonify({
             'success': True,
             'status': 'processing',
-            'message': 'SREQ Coverage processing started in background'
+            'job_id': job['id'],
+            'already_running': not created,
+            'message': 'SREQ Coverage processing started in background' if created else 'SREQ Coverage processing is already running'
         })
     except Exception as e:
         logging.exception("Error starting SREQ background task")
@@ -353,56 +262,59 @@ def check_sreq_status():
     """
     Check the status of background SREQ coverage processing.
 
+    Query parameters:
+        job_id: Optional job to check (defaults to the latest SREQ job of the session environment)
+
     Returns:
         JSON response with process status
     """
-    # Check if SREQ files exist and when they were last modified
-    # Use dynamic path based on session environment
-    sreq_json_path = get_dynamic_data_path("SREQ.json")
-
     try:
-        if not sreq_json_path.exists():
-            logging.warning(f"SREQ file not found at {sreq_json_path} for status check.")
-            return jsonify({
-                'status': 'not_started',
-                'message': 'SREQ coverage has not been generated yet'
-            })
-
-        # Get file modification time
-        mod_time = datetime.fromtimestamp(os.path.getmtime(sreq_json_path))
-
-        # Check if we're currently processing
-        processing = session.get('sreq_processing', False)
-        start_time_str = session.get('sreq_start_time')
-
-        if processing and start_time_str:
-            # We're still processing - check if the file is newer than when we started
-            start_time = datetime.fromisoformat(start_time_str)
-
-            if mod_time > start_time:
-                # Processing completed - clear the flag
-                session.pop('sreq_processing', None)
-                session.pop('sreq_start_time', None)
-
-                return jsonify({
-                    'status': 'completed',
-                    'message': 'SREQ coverage processing completed',
-                    'timestamp': mod_time.isoformat(),
-                    'elapsed_seconds': (datetime.now() - start_time).total_seconds()
-                })
-            else:
-                # Still processing
+        job_id = request.args.get('job_id')
+        if job_id:
+            job = get_job(job_id, user=get_session_user())
+        else:
+            jobs = list_jobs(kind='sreq_coverage', environment=session.get('environment', 'ciav'), limit=1, user=get_session_user())
+            job = jobs[0] if jobs else None
+
+        if job is None:
+            # No job recorded, report whether a previous run produced the data
+            sreq_json_path = get_dynamic_data_path("SREQ.json")
+            signature = dataset_signature(sreq_json_path)
+            if signature is None:
                 return jsonify({
-                    'status': 'processing',
-                    'message': 'SREQ coverage is still processing',
-                    'elapsed_seconds': (datetime.now() - start_time).total_seconds()
+                    'status': 'not_started',
+                    'message': 'SREQ coverage has not been generated yet'
                 })
+            return jsonify({
+                'status': 'completed',
+                'message': 'SREQ coverage is available',
+                'timestamp': datetime.fromtimestamp(signature[0] / 1e9).isoformat()
+            })
 
-        # Not processing, return status of last run
+        elapsed_seconds = (datetime.now() - datetime.fromisoformat(job['created_at'])).total_seconds()
+        if job['state'] in ('queued', 'running'):
+            return jsonify({
+                'status': 'processing',
+                'message': 'SREQ coverage is still processing',
+                'job_id': job['id'],
+                'progress_bytes': job['progress_bytes'],
+                'progress_records': job['progress_records'],
+                'elapsed_seconds': elapsed_seconds
+            })
+        if job['state'] == 'completed':
+            unchanged = bool((job['result'] or {}).get('unchanged'))
+            return jsonify({
+                'status': 'completed',
+                'message': 'SREQ coverage unchanged since the last refresh' if unchanged else 'SREQ coverage processing completed',
+                'unchanged': unchanged,
+                'job_id': job['id'],
+                'timestamp': job['finished_at'],
+                'elapsed_seconds': elapsed_seconds
+            })
         return jsonify({
-            'status': 'completed',
-            'message': 'SREQ coverage is available',
-            'timestamp': mod_time.isoformat()
+            'status': 'error',
+            'message': job['error'] or f"SREQ coverage job {job['state']}",
+            'job_id': job['id']
         })
 
     except Exception as e:
@@ -412,14 +324,364 @@ def check_sreq_status():
             'message': f'Error checking status: {str(e)}'
         })
 
+@api_bp.route('/api/jobs', methods=['GET'])
+@login_required
+def api_list_jobs():
+    """
+    List the session user's background jobs (started or joined), newest first.
+
+    Query parameters:
+        kind, state, environment: Optional filters
+        limit: Maximum number of jobs (default 50, max 500)
+
+    Returns:
+        JSON response with the jobs
+    """
+    limit = min(max(request.args.get('limit', 50, type=int) or 50, 1), 500)
+    jobs = list_jobs(
+        kind=request.args.get('kind'),
+        state=request.args.get('state'),
+        environment=request.args.get('environment'),
+        limit=limit,
+        user=get_session_user()
+    )
+    return jsonify({
+        'success': True,
+        'jobs': jobs
+    })
+
+@api_bp.route('/api/jobs/<job_id>', methods=['GET'])
+@login_required
+def api_get_job(job_id):
+    """
+    Get a background job's state, progress, result or error.
+
+    Only jobs the session user started or joined are visible.
+
+    Returns:
+        JSON response with the job
+    """
+    job = get_job(job_id, user=get_session_user())
+    if job is None:
+        return jsonify({
+            'success': False,
+            'error': f'Job {job_id} not found'
+        }), 404
+    return jsonify({
+        'success': True,
+        'job': job
+    })
+
+@api_bp.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+@login_required
+def api_cancel_job(job_id):
+    """
+    Request cancellation of a background job.
+
+    Only the user who started the job can cancel it; users whose request
+    was deduplicated onto it can only follow it.
+
+    Returns:
+        JSON response with the updated job
+    """
+    user = get_session_user()
+    job = get_job(job_id, user=user)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'error': f'Job {job_id} not found'
+        }), 404
+    if job['owner'] is not None and job['owner'] != user:
+        return jsonify({
+            'success': False,
+            'error': f'Job {job_id} was started by another user'
+        }), 403
+    job = request_cancel(job_id)
+    return jsonify({
+        'success': True,
+        'job': job
+    })
+
+@api_bp.route('/api/coverage/stats', methods=['GET'])
+@login_required
+def api_coverage_stats():
+    """
+    Coverage statistics per group for the session environment.
+
+    Query parameters:
+        dataset: 'sreq' (default) or 'ier'
+        group_by: Comma-separated groupings; si, tin, ep, function or actor for
+                  SREQ (default si), pi or tin for IER (default pi)
+
+    Returns:
+        JSON response with per-group requirement counts, covered/uncovered
+        counts, coverage ratio and test-case fan-out, plus totals
+    """
+    from app.data_models.coverage_stats import compute_coverage_stats, load_coverage_frame, parse_group_by
+    from app.utils.http_cache import build_payload, payload_response
+    from app.core.exceptions import ValidationError
+
+    dataset = request.args.get('dataset', 'sreq').lower()
+    try:
+        group_by = parse_group_by(dataset, request.args.get('group_by'))
+    except ValidationError as e:
+        return jsonify({'success': False, 'error': e.message, 'details': e.details}), 400
+
+    try:
+        frame, version = load_coverage_frame(dataset)
+    except FileNotFoundError:
+        return jsonify({
+            'success': False,
+            'error': f'{dataset.upper()} data not found. Please fetch {dataset.upper()} coverage first.'
+        }), 404
+
+    etag = f"{version}-{dataset}-{'.'.join(group_by)}"
+    if request.if_none_match.contains_weak(etag):
+        # Unchanged dataset, nothing to compute
+        return payload_response(build_payload(None, version=etag))
+    try:
+        stats = compute_coverage_stats(frame, dataset, group_by)
+    except Exception as e:
+        logging.exception("Error computing coverage statistics")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+    return payload_response(build_payload({
+        'success': True,
+        'dataset': dataset,
+        'group_by': group_by,
+        **stats
+    }, version=etag))
+
+@api_bp.route('/api/coverage/diff', methods=['GET'])
+@login_required
+def api_coverage_diff():
+    """
+    Coverage changes between the previous and the current download of a
+    coverage dataset for the session environment.
+
+    Query parameters:
+        dataset: 'sreq' (default) or 'ier'
+        format: 'json' (default) or 'md' for a compact markdown report
+        limit: Maximum entries per list (default 500; counts are always complete)
+
+    Returns:
+        JSON response with gained/lost test cases, version changes, newly
+        covered/uncovered and added/removed requirements, or a markdown report
+    """
+    from flask import Response
+    from app.data_models.coverage_diff import DIFF_DATASETS, limit_diff, load_coverage_diff, render_diff_report
+    from app.utils.http_cache import build_payload, payload_response
+
+    dataset = request.args.get('dataset', 'sreq').lower()
+    if dataset not in DIFF_DATASETS:
+        return jsonify({'success': False, 'error': f"Unknown dataset '{dataset}'"}), 400
+    limit = min(max(request.args.get('limit', 500, type=int) or 500, 1), 100000)
+
+    try:
+        diff = load_coverage_diff(dataset)
+    except FileNotFoundError:
+        return jsonify({
+            'success': False,
+            'error': f'No previous {dataset.upper()} snapshot to compare with. It is kept from the next changed download on.'
+        }), 404
+    except Exception as e:
+        logging.exception("Error computing coverage diff")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+    if request.args.get('format') == 'md':
+        return Response(render_diff_report(diff, limit=min(limit, 500)), mimetype='text/markdown')
+    return payload_response(build_payload(
+        {'success': True, **limit_diff(diff, limit)},
+        version=f"{diff['previous_sha256'][:16]}-{diff['current_sha256'][:16]}-{limit}"
+    ))
+
+@api_bp.route('/api/coverage/compare', methods=['GET'])
+@login_required
+def api_coverage_compare():
+    """
+    Side-by-side coverage of the ciav and cwix environments.
+
+    Query parameters:
+        dataset: 'sreq' (default; grouped by SI and TIN) or 'ier' (grouped by PI and IER)
+        limit: Maximum entries in the requirement lists (default 1000; counts are always complete)
+
+    Returns:
+        JSON response with totals and per-group statistics for both
+        environments, requirements covered differently, and the requirements
+        covered in one environment only
+    """
+    from app.data_models.coverage_compare import COMPARE_GROUPINGS, load_coverage_comparison
+    from app.utils.http_cache import build_payload, payload_response
+
+    dataset = request.args.get('dataset', 'sreq').lower()
+    if dataset not in COMPARE_GROUPINGS:
+        return jsonify({'success': False, 'error': f"Unknown dataset '{dataset}'"}), 400
+    limit = min(max(request.args.get('limit', 1000, type=int) or 1000, 1), 100000)
+
+    try:
+        comparison = load_coverage_comparison(dataset)
+    except FileNotFoundError:
+        return jsonify({
+            'success': False,
+            'error': 'SREQ and IER data are needed for both ciav and cwix. Please fetch the missing coverage first.'
+        }), 404
+    except Exception as e:
+        logging.exception("Error comparing environment coverage")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+    covered_only = comparison['covered_only']
+    versions = comparison['versions']
+    return payload_response(build_payload({
+        'success': True,
+        **comparison,
+        'requirements': comparison['requirements'][:limit],
+        'covered_only': {name: entries[:limit] for name, entries in covered_only.items()},
+        'counts': {
+            'requirements': len(comparison['requirements']),
+            **{f'covered_only_{name}': len(entries) for name, entries in covered_only.items()},
+        },
+    }, version="-".join(versions[name][:16] for name in sorted(versions)) + f"-{dataset}-{limit}"))
+
+def _tree_index_or_error(tree):
+    """Loads the node index of a tree page, or returns the error response."""
+    from app.data_models.tree_nodes import load_tree_index
+    from app.core.exceptions import ValidationError
+
+    try:
+        return load_tree_index(tree)[0], None
+    except ValidationError as e:
+        return None, (jsonify({'success': False, 'error': e.message, 'details': e.details}), 400)
+    except FileNotFoundError:
+        return None, (jsonify({'success': False, 'error': 'Coverage data not found. Please fetch it first.'}), 404)
+    except Exception as e:
+        logging.exception(f"Error loading the {tree} tree")
+        return None, (jsonify({'success': False, 'error': str(e)}), 500)
+
+@api_bp.route('/api/tree/<tree>/nodes', methods=['GET'])
+@login_required
+def api_tree_nodes(tree):
+    """
+    One level of a coverage tree page: the children of a node.
+
+    Path parameters:
+        tree: 'tin' (SI -> TIN -> SREQ), 'func' (SI -> function -> SREQ) or 'ier' (PI -> IER -> service)
+
+    Query parameters:
+        path: Keys of the parent node from the top level down, one parameter per level (none for the top level)
+        depth: Levels to return, nested in 'children' below the first (1-3, default 1)
+
+    Returns:
+        JSON response with the nodes, each with its counts and coverage;
+        SREQ and service nodes include their test cases
+    """
+    from app.data_models.tree_nodes import get_tree_nodes
+    from app.utils.http_cache import build_payload, payload_response
+    from app.core.exceptions import ResourceNotFoundError
+
+    index, error = _tree_index_or_error(tree)
+    if error:
+        return error
+    path = request.args.getlist('path')
+    depth = min(max(request.args.get('depth', 1, type=int) or 1, 1), 3)
+
+    try:
+        nodes = get_tree_nodes(index, path, depth)
+    except ResourceNotFoundError as e:
+        return jsonify({'success': False, 'error': e.message}), 404
+
+    return payload_response(build_payload({'success': True, 'tree': tree, 'path': path, 'nodes': nodes}))
+
+@api_bp.route('/api/tree/<tree>/search', methods=['GET'])
+@login_required
+def api_tree_search(tree):
+    """
+    Searches a coverage tree page.
+
+    Query parameters:
+        field: What to match, as the page's search boxes: 'sreq' or 'tca' (tin);
+            'sreq', 'tca', 'actor' or 'function' (func); 'ier' or 'tca' (ier)
+        q: Case-insensitive text to look for
+
+    Returns:
+        JSON response with the branches leading to the matches (each match
+        with everything below it), the number of matches and whether they
+        were cut at the limit
+    """
+    from app.data_models.tree_nodes import search_tree
+    from app.utils.http_cache import build_payload, payload_response
+    from app.core.exceptions import ValidationError
+
+    term = request.args.get('q', '')
+    if not term.strip():
+        return jsonify({'success': False, 'error': 'q is required'}), 400
+    index, error = _tree_index_or_error(tree)
+    if error:
+        return error
+    field = request.args.get('field', '')
+
+    try:
+        result = search_tree(index, field, term)
+    except ValidationError as e:
+        return jsonify({'success': False, 'error': e.message, 'details': e.details}), 400
+
+    return payload_response(build_payload({'success': True, 'tree': tree, **result}))
+
+@api_bp.route('/api/refresh_all', methods=['POST'])
+@login_required
+def refresh_all():
+    """
+    Start a concurrent refresh of the IOCore2 datasets for the session environment.
+
+    Optional JSON body: {"datasets": [...], "max_workers": n}. Datasets default
+    to all of test_cases, test_results, objectives, participants, patterns,
+    actors, ier and sreq.
+
+    Returns:
+        JSON response with the job ID (202); progress and the per-dataset
+        report are available from /api/jobs/<job_id>
+    """
+    from app.api.refresh import REFRESH_DATASETS, DEFAULT_MAX_WORKERS, start_refresh
+
+    url = session.get('url')
+    cookies = session.get('cookies')
+    environment = session.get('environment', 'ciav')
+    if not url or not cookies:
+        return jsonify({
+            'success': False,
+            'error': 'Not authenticated'
+        }), 401
+
+    body = request.get_json(silent=True) or {}
+    datasets = body.get('datasets') or list(REFRESH_DATASETS)
+    unknown = [name for name in datasets if name not in REFRESH_DATASETS]
+    if unknown:
+        return jsonify({
+            'success': False,
+            'error': f"Unknown datasets: {', '.join(map(str, unknown))}"
+        }), 400
+    try:
+        max_workers = min(max(int(body.get('max_workers', DEFAULT_MAX_WORKERS)), 1), len(REFRESH_DATASETS))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'max_workers must be an integer'}), 400
+
+    job, created = start_refresh(url, cookies, environment, datasets, max_workers, owner=get_session_user())
+    return jsonify({
+        'success': True,
+        'job_id': job['id'],
+        'already_running': not created
+    }), 202
+
 @api_bp.route('/get_test_cases')
 @login_required
 def get_test_cases():
     """
-    Fetch test case data from IOCore2 API.
+    Fetch test case data from IOCore2 API, syncing incrementally where possible.
+
+    Query parameters:
+        full: 'true' to force a full resync of the catalog
 
     Returns:
-        JSON response with results
+        JSON response with results and the added/updated/removed test cases
     """
     try:
         client = get_api_client()
@@ -430,14 +692,17 @@ def get_test_cases():
             })
 
         # Get test cases data
-        # Pass environment explicitly
+        # Pass environment explicitly; ?full=true forces a full resync
         environment = session.get('environment', 'ciav')
-        result = client.get_test_cases(environment=environment) # Pass environment
+        full = request.args.get('full', 'false').lower() in ('1', 'true', 'yes')
+        result = client.get_test_cases(environment=environment, full=full) # Pass environment
 
         return jsonify({
             'success': True,
             'count': result.get('count', 0),
             'duration': result.get('duration', 0),
+            'unchanged': result.get('unchanged', False),
+            'changes': result.get('changes'),
             'message': 'Test cases data fetched and saved successfully'
         })
     except InvalidSession:
@@ -492,43 +757,52 @@ def get_test_results():
             'error': str(e)
         })
 
+# Time allowed to download and process the export once IOCore2 has produced it
+_EXPORT_DOWNLOAD_MARGIN_SECONDS = 600
+
 @api_bp.route('/get_test_results_new')
 @login_required
 def get_test_results_new():
     """
-    Fetch test results data from IOCore2 API using the new job-based API.
+    Start a background job that fetches test results through the IOCore2
+    export job API.
+
+    The export can take minutes, so this returns the job handle immediately;
+    poll /api/jobs/<job_id> for its progress. Only one export runs per
+    environment.
 
     Returns:
-        JSON response with results and redirect to statistics page if successful
+        JSON response with the job ID, how long clients should wait for it
+        and the redirect to the statistics page
     """
+    from app.api.iocore2 import EXPORT_MAX_WAIT_SECONDS
+
     try:
-        client = get_api_client()
-        if not client:
+        url = session.get('url')
+        cookies = session.get('cookies')
+        environment = session.get('environment', 'ciav')
+
+        if not url or not cookies:
             return jsonify({
                 'success': False,
                 'error': 'Not authenticated'
             })
 
-        # Get test results data using new API
-        environment = session.get('environment', 'ciav')
-        result = client.get_test_results_new(environment=environment)
+        job, created = create_job('test_results_export', environment, dedupe_key=f"test_results_export:{environment}", owner=get_session_user())
+        if created:
+            start_job_thread(job['id'], process_test_results_export, url, cookies, environment)
 
-        # Return success response with redirect instruction
         return jsonify({
             'success': True,
-            'count': result.get('count', 0),
-            'duration': result.get('duration', 0),
-            'job_id': result.get('job_id'),
-            'message': 'Test results data fetched and saved successfully using new API',
-            'redirect': '/statistics'  # Instruct frontend to redirect to statistics page
-        })
-    except InvalidSession:
-        return jsonify({
-            'success': False,
-            'error': 'Your session has expired. Please log in again.'
+            'status': 'processing',
+            'job_id': job['id'],
+            'already_running': not created,
+            'message': 'Test results export started in background' if created else 'Test results export is already running',
+            'max_wait_seconds': EXPORT_MAX_WAIT_SECONDS + _EXPORT_DOWNLOAD_MARGIN_SECONDS, # Clients stop polling after this long
+            'redirect': '/statistics'  # Where the frontend goes once the job completes
         })
     except Exception as e:
-        logging.exception("Error getting test results with new API")
+        logging.exception("Error starting test results export job")
         return jsonify({
             'success': False,
             'error': str(e)
@@ -658,7 +932,7 @@ def get_test_case_actors():
         actors_path = get_dynamic_data_path("actors.json")
 
         # Check if file exists
-        if not actors_path.exists():
+        if not dataset_exists(actors_path):
             logging.warning(f"Actors file not found at {actors_path}")
             return jsonify({
                 'success': False,
@@ -666,7 +940,7 @@ def get_test_case_actors():
             })
 
         # Read and return the actor data
-        with open(actors_path, 'r', encoding='utf-8') as f:
+        with open_dataset(actors_path) as f:
             actors_data = json.load(f)
 
         return jsonify({
@@ -783,33 +1057,43 @@ def save_test_case_patterns():
 @login_required
 def get_unmapped_sreqs():
     """
-    Get unmapped SREQs from log file.
+    Get the SREQs without a function mapping for the session environment,
+    from the index derived when SREQ.json is ingested.
+
+    Query parameters:
+        q: Text searched in SREQ number, SREQ name and SI
+        si: Only SREQs of this SI number
+        status: 'active' (default; unmapped in the current SREQ.json), 'resolved' or 'all'
+        page: 1-based page number (default 1)
+        page_size: Entries per page (default 50, at most 500)
 
     Returns:
-        JSON response with log content
+        JSON response with one page of entries (SREQ number and name, SI,
+        first and last SREQ.json version seen unmapped), paging fields and counts
     """
-    try:
-        log_file = settings.LOG_FILE
+    from app.core.exceptions import ValidationError
+    from app.data_models.unmapped_sreqs import DEFAULT_PAGE_SIZE, load_unmapped_sreqs, query_unmapped_sreqs
+    from app.utils.http_cache import build_payload, payload_response
 
-        if not log_file.exists():
-            return jsonify({
-                'success': True,
-                'content': 'No unmapped SREQs log file found.'
-            })
-
-        with open(log_file, 'r') as f:
-            log_content = f.read()
-
-        return jsonify({
-            'success': True,
-            'content': log_content
-        })
+    try:
+        result = query_unmapped_sreqs(
+            load_unmapped_sreqs(),
+            search=request.args.get('q'),
+            si_number=request.args.get('si'),
+            status=request.args.get('status', 'active'),
+            page=request.args.get('page', 1, type=int),
+            page_size=request.args.get('page_size', DEFAULT_PAGE_SIZE, type=int)
+        )
+    except ValidationError as e:
+        return jsonify({'success': False, 'error': e.message, 'details': e.details}), 400
     except Exception as e:
-        logging.exception("Error reading unmapped SREQs log")
+        logging.exception("Error reading the unmapped SREQ index")
         return jsonify({
             'success': False,
             'error': str(e)
-        })
+        }), 500
+
+    return payload_response(build_payload({'success': True, **result}))
 
 # System metrics endpoints
 @api_bp.route('/system_metrics')
@@ -993,28 +1277,23 @@ def get_patterns_data_file():
 @api_bp.route('/api/test_cases_data', methods=['GET'])
 @login_required
 def get_test_cases_data_file():
-    """API endpoint to get the content of the test cases data file."""
+    """
+    API endpoint to get the content of the test cases data file.
+
+    The stored file is streamed as is (gzip-encoded if the client accepts it)
+    instead of being parsed and serialized again.
+    """
+    from app.utils.http_cache import dataset_file_response
+
     try:
         # Use dynamic path
         test_cases_path = get_dynamic_data_path('test_cases.json')
         logging.info(f"Attempting to read test cases data from: {test_cases_path}")
-
-        if not test_cases_path.exists():
-            logging.error(f"Test cases file not found at {test_cases_path}")
-            return jsonify({"error": "Test cases data file not found."}), 404
-
-        with open(test_cases_path, 'r', encoding='utf-8') as f:
-            test_cases_data = json.load(f)
-
-        logging.info(f"Successfully loaded test cases data file.")
-        return jsonify(test_cases_data)
+        return dataset_file_response(test_cases_path)
 
     except FileNotFoundError:
         logging.error(f"Test cases file not found at {test_cases_path}")
         return jsonify({"error": "Test cases data file not found."}), 404
-    except json.JSONDecodeError:
-        logging.exception(f"Error decoding JSON from {test_cases_path}")
-        return jsonify({"error": "Failed to parse test cases data file."}), 500
     except Exception as e:
         logging.exception("Error fetching test cases data file:")
         return jsonify({"error": "An unexpected error occurred while fetching test cases data file."}), 500
@@ -1033,7 +1312,7 @@ def get_test_results_data_file():
         test_results_path = get_dynamic_data_path('test_results.json')
         logging.info(f"Attempting to stream test results data from: {test_results_path}")
 
-        if not test_results_path.exists():
+        if not dataset_exists(test_results_path):
             logging.error(f"Test results file not found at {test_results_path}")
             # Return empty data and filters if file not found
             return jsonify({
@@ -1054,7 +1333,7 @@ def get_test_results_data_file():
         participants = set()
 
         # Try to determine the structure of the JSON file
-        with open(test_results_path, 'r') as f_check:
+        with open_dataset(test_results_path, 'r') as f_check:
             # Just read a small part to check structure
             header = f_check.read(1000)
             # Check if the new format is being used
@@ -1065,7 +1344,7 @@ def get_test_results_data_file():
                 logging.info("Using legacy format with 'TestPlans'")
                 use_new_format = False
         
-        with open(test_results_path, 'rb') as f: # Open in binary mode for ijson
+        with open_dataset(test_results_path, 'rb') as f: # Open in binary mode for ijson
             if use_new_format:
                 # Stream the 'Tests' array directly from root
                 tests_stream = ijson.items(f, 'Tests.item')
@@ -1180,30 +1459,100 @@ def get_test_results_data_file():
         return jsonify({"error": "An unexpected error occurred while processing test results data file."}), 500
 
 
-def process_sreq_coverage_in_background(url, cookies, environment):
+def process_sreq_coverage_in_background(context, url, cookies, environment):
     """
-    Process SREQ coverage data in a background thread.
+    Process SREQ coverage data as a background job.
 
     Args:
+        context: JobContext used to report download progress
         url: Base URL for the IOCore2 API
         cookies: Session cookies for authentication
         environment: The environment ('ciav' or 'cwix') to use for saving data.
+
+    Returns:
+        Job result with record count, unmapped SREQ count and whether the data was unchanged
     """
-    from app.api.iocore2 import IOCore2ApiClient
+    from app.api.client_pool import get_pooled_client
+
+    logging.info(f"Starting background SREQ coverage processing for environment: {environment}")
+
+    # Reuse the pooled API client of this session
+    client = get_pooled_client(url, cookies)
+
+    # Get SREQ coverage data, passing the environment
+    result = client.get_requirement_coverage(
+        environment=environment,
+        progress=lambda bytes_done, records: context.progress(bytes_done, records)
+    )
+
+    logging.info(f"Background SREQ coverage processing completed for environment: {environment}")
+    return {
+        'count': result.get('count', 0),
+        'unmapped_count': result.get('unmapped_count'),
+        'unchanged': result.get('unchanged', False),
+        'duration': result.get('duration', 0)
+    }
+
+
+# Export jobs interrupted more recently than this are resumed instead of restarted
+_EXPORT_RESUME_SECONDS = 3600
+
+def _resumable_export_id(client, environment, current_job_id):
+    """
+    Finds the IOCore2 export job of the previous test results job, if that job
+    was interrupted recently and its export is still usable on the server.
+    """
+    previous = next(
+        (job for job in list_jobs(kind='test_results_export', environment=environment, limit=2)
+         if job['id'] != current_job_id),
+        None
+    )
+    cutoff = (datetime.now() - timedelta(seconds=_EXPORT_RESUME_SECONDS)).isoformat()
+    if not previous or previous['state'] != 'failed' or not previous['external_id'] or previous['created_at'] < cutoff:
+        return None
 
     try:
-        logging.info(f"Starting background SREQ coverage processing for environment: {environment}")
+        status = client.get_test_results_export_status(previous['external_id']).get('status')
+    except (ApiRequestError, ValueError) as e:
+        logging.info(f"Export job {previous['external_id']} cannot be resumed: {str(e)}")
+        return None
+    return None if status in ('Failed', 'Cancelled') else previous['external_id']
 
-        # Create API client
-        client = IOCore2ApiClient(base_url=url, cookies=cookies)
+def process_test_results_export(context, url, cookies, environment):
+    """
+    Run the IOCore2 TestExecutionReport export as a background job.
 
-        # Get SREQ coverage data, passing the environment
-        client.get_requirement_coverage(environment=environment) # Pass environment
+    The export job ID is stored as the job's external_id, so a job interrupted
+    by a restart can resume polling the same export instead of starting over.
 
-        logging.info(f"Background SREQ coverage processing completed for environment: {environment}")
+    Args:
+        context: JobContext used to report progress
+        url: Base URL for the IOCore2 API
+        cookies: Session cookies for authentication
+        environment: The environment ('ciav' or 'cwix') to use for saving data.
 
-    except Exception as e:
-        logging.exception(f"Error in background SREQ processing: {str(e)}")
+    Returns:
+        Job result with test plan count, duration and export job ID
+    """
+    from app.api.client_pool import get_pooled_client
+
+    client = get_pooled_client(url, cookies)
+    resume_id = _resumable_export_id(client, environment, context.job_id)
+
+    result = client.get_test_results_new(
+        environment=environment,
+        export_job_id=resume_id,
+        on_export_started=context.set_external_id,
+        # Each status check doubles as heartbeat and cancellation point
+        on_status=lambda status: context.progress(message=f"Export {status.get('status', 'unknown')}", force=True),
+        progress=lambda bytes_done, records: context.progress(bytes_done, records, message='Downloading')
+    )
+    return {
+        'count': result.get('count', 0),
+        'duration': result.get('duration', 0),
+        'export_job_id': result.get('job_id'),
+        'resumed': resume_id is not None
+    }
 
 
 # CIS Plan tree API endpoint
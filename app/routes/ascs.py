@@ -1,60 +1,198 @@
 from pathlib import Path
+import hashlib
 import json
 import logging
+import threading
 import uuid
 from flask import Blueprint, jsonify, session, request, current_app
 from werkzeug.exceptions import NotFound
 from app.utils.file_operations import get_dynamic_data_path
+from app.utils.http_cache import build_payload, payload_response
 from app.data_access import gps_repository
-from app.data_access.ascs_repository import get_all_ascs, save_ascs
+from app.data_access.ascs_repository import (
+    create_asc, delete_asc as delete_asc_record, get_asc, move_asc, patch_asc, query_ascs, replace_asc,
+    update_asc_record
+)
 from app.data_access.affiliates_repository import get_all_affiliates
 from app.data_access.services_repository import get_all_services
 from app.data_access.sps_repository import get_all_sps
 from app.core.auth import login_required
+from app.core.exceptions import ConflictError, ResourceNotFoundError, ValidationError
 
 # Use the existing api blueprint
 from app.routes.api import api_bp
 
 # --- ASC Form Data ---
+# Catalog files composed into the form data payload, in response order
+_FORM_DATA_CATALOGS = {
+    'affiliates': '_affiliates.json',
+    'services': '_servicesm.json',
+    'sps': '_sps.json',
+    'gps': '_gps.json',
+}
+
+# Composed payloads keyed by field selection; each entry is (version, PrecomposedPayload)
+_form_data_cache = {}
+_form_data_lock = threading.Lock()
+
+def _form_data_version():
+    """Combined version of the catalog files, derived from their (mtime, size) signatures."""
+    data_dir = Path(current_app.static_folder) / 'ASC' / 'data'
+    parts = []
+    for name, filename in _FORM_DATA_CATALOGS.items():
+        try:
+            stats = (data_dir / filename).stat()
+            parts.append(f"{name}:{stats.st_mtime_ns}:{stats.st_size}")
+        except FileNotFoundError:
+            parts.append(f"{name}:missing")
+    return hashlib.sha1("|".join(parts).encode('utf-8')).hexdigest()[:16]
+
+def _compose_form_data(fields):
+    """Loads the requested catalogs. Raises if GPs cannot be loaded."""
+    loaders = {
+        'affiliates': get_all_affiliates,
+        'services': get_all_services,
+        'sps': get_all_sps,
+        'gps': gps_repository.get_all_gps,
+    }
+    return {name: loaders[name]() for name in fields}
+
+def get_form_data_payload(fields):
+    """
+    Gets the serialized, pre-compressed form data payload for a field selection.
+
+    The payload is rebuilt only when one of the catalog files changes.
+
+    Args:
+        fields: Tuple of catalog names to include
+
+    Returns:
+        PrecomposedPayload
+    """
+    version = _form_data_version()
+    cached = _form_data_cache.get(fields)
+    if cached and cached[0] == version:
+        return cached[1]
+
+    with _form_data_lock:
+        cached = _form_data_cache.get(fields)
+        if cached and cached[0] == version:
+            return cached[1]
+        payload = build_payload(_compose_form_data(fields), version=f"{version}-{'.'.join(fields)}")
+        _form_data_cache[fields] = (version, payload)
+        logging.info(f"ASC form data payload rebuilt for {fields} ({len(payload.body)} bytes)")
+        return payload
+
 @api_bp.route('/api/asc_form_data', methods=['GET'])
 @login_required
 def get_asc_form_data():
-    """API endpoint to get data needed for the ASC creation/edit form."""
-    try:
-        #static_asc_data_path = Path(current_app.static_folder) / 'ASC' / 'data'
-        affiliates_data = get_all_affiliates()
-        services_data = get_all_services()
-        sps_data = get_all_sps()
-
-        try:
-            gps_data = gps_repository.get_all_gps()
-        except Exception as e:
-            logging.error(f"Error loading GPs data: {e}")
-            return jsonify({"error": "GPs data could not be loaded."}), 500
-
-        return jsonify({
-            'affiliates': affiliates_data,
-            'services': services_data,
-            'sps': sps_data,
-            'gps': gps_data
-        })
+    """
+    API endpoint to get data needed for the ASC creation/edit form.
+
+    Optional query parameter fields (comma-separated subset of affiliates,
+    services, sps, gps). Responses carry an ETag; clients revalidate with
+    If-None-Match and get a 304 while the catalogs are unchanged.
+    """
+    requested = _list_arg('fields')
+    if requested:
+        unknown = [f for f in requested if f not in _FORM_DATA_CATALOGS]
+        if unknown:
+            return jsonify({"error": f"Unknown fields: {', '.join(unknown)}"}), 400
+    fields = tuple(name for name in _FORM_DATA_CATALOGS if not requested or name in requested)
 
+    try:
+        return payload_response(get_form_data_payload(fields))
     except Exception as e:
         logging.exception("Error fetching ASC form data.")
         return jsonify({"error": "An unexpected error occurred while fetching ASC form data."}), 500
 
 # --- ASC CRUD Endpoints ---
+# Query parameters that switch /api/ascs to the paged response format
+_ASC_QUERY_PARAMS = ('status', 'affiliate', 'service', 'model', 'q', 'sort', 'cursor', 'limit', 'fields')
+
+def _list_arg(name):
+    """Reads a multi-valued query parameter (?x=a&x=b or ?x=a,b)."""
+    values = []
+    for raw in request.args.getlist(name):
+        values.extend(v.strip() for v in raw.split(',') if v.strip())
+    return values or None
+
+def query_ascs_from_request():
+    """
+    Runs an ASC list query from the current request's query string.
+
+    Returns:
+        Flask response: the plain ASC list when no query parameters are given
+        (backward compatible), otherwise {'items', 'total', 'nextCursor'}.
+    """
+    try:
+        limit = request.args.get('limit', type=int)
+        if limit is not None and limit <= 0:
+            raise ValidationError("limit must be a positive integer.")
+        result = query_ascs(
+            status=_list_arg('status'),
+            affiliate=_list_arg('affiliate'),
+            service=_list_arg('service'),
+            model=_list_arg('model'),
+            text=request.args.get('q'),
+            sort=request.args.get('sort', 'id'),
+            cursor=request.args.get('cursor'),
+            limit=limit,
+            fields=_list_arg('fields')
+        )
+    except ValidationError as e:
+        return jsonify({'success': False, 'error': e.message}), 400
+
+    if not any(param in request.args for param in _ASC_QUERY_PARAMS):
+        return jsonify(result['items'])
+    return jsonify(result)
+
 @api_bp.route('/api/ascs', methods=['GET'])
 @login_required
 def get_ascs():
-    """API endpoint to retrieve all ASCs."""
+    """
+    API endpoint to retrieve ASCs.
+
+    Optional query parameters: status, affiliate, service, model (comma-separated
+    or repeated), q (free text), sort (e.g. 'status' or '-ascScore'), limit,
+    cursor, and fields (field list, or 'summary' to omit nested instances).
+    """
     try:
-        ascs_list = get_all_ascs()
-        return jsonify(ascs_list)
+        return query_ascs_from_request()
     except Exception as e:
         logging.exception("Error fetching ASC list:")
         return jsonify({"error": "Failed to load ASC list."}), 500
 
+@api_bp.route('/api/ascs/<asc_id>', methods=['GET'])
+@login_required
+def get_asc_route(asc_id):
+    """API endpoint to retrieve a single ASC."""
+    asc = get_asc(asc_id)
+    if asc is None:
+        return jsonify({"error": f"ASC with ID {asc_id} not found."}), 404
+    return jsonify(asc)
+
+@api_bp.route('/api/ascs/<asc_id>/links', methods=['GET'])
+@login_required
+def get_asc_links(asc_id):
+    """
+    API endpoint returning the links required by an ASC's GP instances.
+
+    Returns:
+        JSON list of {'link', 'matchedSideA', 'matchedSideB'}, where the
+        matched lists hold the ASC's GPs found on each side of the link
+    """
+    asc = get_asc(asc_id)
+    if asc is None:
+        return jsonify({"error": f"ASC with ID {asc_id} not found."}), 404
+    try:
+        from app.data_access.links_repository import get_links_for_gps
+        gp_ids = [instance.get('gpId') for instance in asc.get('gpInstances', []) if instance.get('gpId')]
+        return jsonify(get_links_for_gps(gp_ids))
+    except Exception as e:
+        logging.exception(f"Error fetching links for ASC {asc_id}:")
+        return jsonify({"error": "Failed to load links for ASC."}), 500
+
 @api_bp.route('/api/ascs', methods=['POST'])
 @login_required
 def add_asc():
@@ -67,19 +205,6 @@ def add_asc():
         if not all(field in data for field in required_fields):
             return jsonify({"error": "Missing required fields"}), 400
 
-        # Load existing ASCs via repository
-        ascs_list = get_all_ascs()
-
-        last_id_num = 0
-        for asc in reversed(ascs_list or []):
-            if isinstance(asc.get('id'), str) and asc['id'].startswith('ASC-'):
-                try:
-                    last_id_num = max(last_id_num, int(asc['id'].split('-')[1]))
-                except:
-                    pass
-        new_id_num = last_id_num + 1
-        new_asc_id = f"ASC-{str(new_id_num).zfill(4)}"
-
         # Assign unique GUID to each GP instance
         raw_gps = data.get('gpInstances', []) or []
         gp_instances = []
@@ -90,10 +215,9 @@ def add_asc():
             gp_copy['models'] = [data['model']]
             gp_instances.append(gp_copy)
 
-        # Construct new ASC
-        new_asc = {
+        # Construct new ASC; the repository assigns the next ID under the file lock
+        new_asc = create_asc({
             'guid': str(uuid.uuid4()),
-            'id': new_asc_id,
             'affiliateId': data['affiliateId'],
             'environment': data['environment'],
             'serviceId': data['serviceId'],
@@ -101,12 +225,7 @@ def add_asc():
             'ascScore': '0%',
             'status': 'Initial',
             'gpInstances': gp_instances
-        }
-
-        ascs_list.append(new_asc)
-        if not save_ascs(ascs_list):
-            logging.error("Failed to save ASC data via repository.")
-            return jsonify({"error": "Unable to save ASC."}), 500
+        })
 
         return jsonify({'success': True, 'asc': new_asc}), 201
 
@@ -117,33 +236,20 @@ def add_asc():
 @api_bp.route('/api/ascs', methods=['PUT'])
 @login_required
 def update_asc():
-    """API endpoint to update an existing ASC."""
+    """
+    API endpoint to update an existing ASC with an edited full record.
+
+    The body carries the revision the client loaded (or it is sent as an
+    If-Match header); returns 409 with the current ASC if it changed since.
+    """
     try:
-        data = request.get_json()
+        data = request.get_json() or {}
         asc_id = data.get('id')
         if not asc_id:
             return jsonify({"error": "No ASC ID provided."}), 400
-
-        # Load ASCs via repository
-        ascs_list = get_all_ascs()
-
-        found = False
-        for idx, asc in enumerate(ascs_list):
-            if asc.get('id') == asc_id:
-                data['guid'] = asc.get('guid') or str(uuid.uuid4())
-                ascs_list[idx] = data
-                found = True
-                break
-        if not found:
-            return jsonify({"error": f"ASC with ID {asc_id} not found."}), 404
-
-        # Save updated list via repository
-        if not save_ascs(ascs_list):
-            logging.error("Failed to save updated ASC data.")
-            return jsonify({"error": "Unable to save ASC update."}), 500
-
-        return jsonify({'success': True, 'asc': data})
-
+        return _asc_delta_response(
+            lambda: replace_asc(asc_id, data, _expected_revision(data))
+        )
     except Exception as e:
         logging.exception("Error updating ASC:")
         return jsonify({"error": "An unexpected error occurred while updating the ASC."}), 500
@@ -151,30 +257,96 @@ def update_asc():
 @api_bp.route('/api/ascs', methods=['DELETE'])
 @login_required
 def delete_asc():
-    """API endpoint to delete an ASC by its ID."""
+    """
+    API endpoint to delete an ASC by its ID.
+
+    An optional revision (query parameter or If-Match header) makes the
+    delete fail with 409 if the ASC changed since.
+    """
     try:
         asc_id = request.args.get('id')
         if not asc_id:
             return jsonify({"error": "No ASC ID provided."}), 400
-
-        # Load ASCs via repository
-        ascs_list = get_all_ascs()
-
-        filtered = [asc for asc in ascs_list if asc.get('id') != asc_id]
-        if len(filtered) == len(ascs_list):
-            return jsonify({"error": f"ASC with ID {asc_id} not found."}), 404
-
-        # Save deletions via repository
-        if not save_ascs(filtered):
-            logging.error("Failed to save ASC deletion.")
-            return jsonify({"error": "Unable to delete ASC."}), 500
-
-        return jsonify({'success': True})
-
+        return _asc_delta_response(
+            lambda: delete_asc_record(asc_id, _expected_revision(request.args)),
+            respond=lambda _: jsonify({'success': True})
+        )
     except Exception as e:
         logging.exception("Error deleting ASC:")
         return jsonify({"error": "An unexpected error occurred while deleting the ASC."}), 500
 
+def _expected_revision(data):
+    """Reads the client's revision from the body (or query string) or an If-Match header."""
+    revision = data.get('revision')
+    if revision is None:
+        revision = request.headers.get('If-Match', '').strip('"') or None
+    if revision is None:
+        return None
+    try:
+        return int(revision)
+    except (TypeError, ValueError):
+        raise ValidationError(f"Invalid revision '{revision}'.")
+
+def _asc_delta_response(apply_change, respond=None):
+    """
+    Runs a single-ASC change and maps repository errors to JSON responses.
+
+    Args:
+        apply_change: Callable making the change; returns the updated ASC
+        respond: Optional callable building the success response from the
+            change's result. Defaults to {'success': True, 'asc': <result>}.
+    """
+    try:
+        result = apply_change()
+        if respond is not None:
+            return respond(result)
+        return jsonify({'success': True, 'asc': result})
+    except ConflictError as e:
+        return jsonify({'success': False, 'error': e.message, 'asc': e.details.get('asc')}), 409
+    except ResourceNotFoundError as e:
+        return jsonify({'success': False, 'error': e.message}), 404
+    except ValidationError as e:
+        return jsonify({'success': False, 'error': e.message}), 400
+
+@api_bp.route('/api/ascs/<asc_id>', methods=['PATCH'])
+@login_required
+def patch_asc_route(asc_id):
+    """
+    API endpoint to update selected fields of a single ASC.
+
+    Body: {"revision": <int>, "changes": {...}}. The revision may also be sent
+    as an If-Match header. Returns only the updated ASC, or 409 with the
+    current ASC if it was changed since the client's revision.
+    """
+    try:
+        data = request.get_json() or {}
+        return _asc_delta_response(
+            lambda: patch_asc(asc_id, data.get('changes'), _expected_revision(data))
+        )
+    except Exception:
+        logging.exception(f"Error patching ASC {asc_id}:")
+        return jsonify({"error": "An unexpected error occurred while updating the ASC."}), 500
+
+@api_bp.route('/api/ascs/<asc_id>/move', methods=['POST'])
+@login_required
+def move_asc_route(asc_id):
+    """
+    API endpoint to move an ASC to another kanban column.
+
+    Body: {"status": <new status>, "revision": <int>}. Returns only the updated ASC.
+    """
+    try:
+        data = request.get_json() or {}
+        status = data.get('status')
+        if not status:
+            return jsonify({'success': False, 'error': 'No status provided.'}), 400
+        return _asc_delta_response(
+            lambda: move_asc(asc_id, status, _expected_revision(data))
+        )
+    except Exception:
+        logging.exception(f"Error moving ASC {asc_id}:")
+        return jsonify({"error": "An unexpected error occurred while moving the ASC."}), 500
+
 # Helper to create a GP instance consistently
 def create_gp_instance(gp_id, asc_model):
     # Attempt to get default models from service config
@@ -194,30 +366,43 @@ def create_gp_instance(gp_id, asc_model):
         'guid': str(uuid.uuid4())
     }
 
+def _instance_response(change, status):
+    """Response for a GP/SP instance change: the instance, with the ASC's new revision as ETag."""
+    asc, instance = change
+    body = instance if instance is not None else {'success': True}
+    return jsonify(body), status, {'ETag': f'"{asc.get("revision", 0)}"'}
+
+def _find_gp_instance(asc, gp_guid):
+    for gp in asc.get('gpInstances') or []:
+        if gp.get('guid') == gp_guid:
+            return gp
+    raise ResourceNotFoundError("GP instance", gp_guid)
+
+def _find_sp_instance(gp, sp_guid):
+    for sp in gp.get('spInstances') or []:
+        if sp.get('guid') == sp_guid:
+            return sp
+    raise ResourceNotFoundError("SP instance", sp_guid)
+
 @api_bp.route('/api/ascs/<asc_id>/gpInstances', methods=['POST'])
 @login_required
 def add_gp_instance_to_asc(asc_id):
     """Add a GP instance to an existing ASC."""
     try:
-        body = request.get_json()
+        body = request.get_json() or {}
         gp_id = body.get('gpId')
         if not gp_id:
             return jsonify({"error": "No GP ID provided."}), 400
 
-        ascs_list = get_all_ascs()
-        for asc in ascs_list:
-            if asc.get('id') == asc_id:
-                new_gp = create_gp_instance(gp_id, asc.get('model'))
-                asc['gpInstances'].append(new_gp)
-                break
-        else:
-            return jsonify({"error": f"ASC with ID {asc_id} not found."}), 404
+        def add_gp(asc):
+            new_gp = create_gp_instance(gp_id, asc.get('model'))
+            asc.setdefault('gpInstances', []).append(new_gp)
+            return new_gp
 
-        if not save_ascs(ascs_list):
-            logging.error("Failed to save ASC after adding GP instance.")
-            return jsonify({"error": "Unable to save GP instance."}), 500
-
-        return jsonify(new_gp), 201
+        return _asc_delta_response(
+            lambda: update_asc_record(asc_id, add_gp, _expected_revision(body)),
+            respond=lambda change: _instance_response(change, 201)
+        )
 
     except Exception as e:
         logging.exception("Error adding GP instance to ASC:")
@@ -230,31 +415,23 @@ def add_sp_instance(asc_id, gp_guid):
     try:
         data = request.get_json() or {}
         sp_id = data.get('spId')
-        sp_version = data.get('spVersion', '')
-        sp_score = data.get('spScore', '0%')
         if not sp_id:
             return jsonify({"error": "No SP ID provided."}), 400
-        ascs_list = get_all_ascs()
-        new_sp = None
-        for asc in ascs_list:
-            if asc.get('id') == asc_id:
-                for gp in asc.get('gpInstances', []):
-                    if gp.get('guid') == gp_guid:
-                        new_sp = {
-                            'spId': sp_id,
-                            'spVersion': sp_version,
-                            'spScore': sp_score,
-                            'guid': str(uuid.uuid4())
-                        }
-                        gp.setdefault('spInstances', []).append(new_sp)
-                        break
-                break
-        if not new_sp:
-            return jsonify({"error": "ASC or GP instance not found."}), 404
-        if not save_ascs(ascs_list):
-            logging.error("Failed to save ASC after adding SP." )
-            return jsonify({"error": "Unable to save SP instance."}), 500
-        return jsonify(new_sp), 201
+
+        def add_sp(asc):
+            new_sp = {
+                'spId': sp_id,
+                'spVersion': data.get('spVersion', ''),
+                'spScore': data.get('spScore', '0%'),
+                'guid': str(uuid.uuid4())
+            }
+            _find_gp_instance(asc, gp_guid).setdefault('spInstances', []).append(new_sp)
+            return new_sp
+
+        return _asc_delta_response(
+            lambda: update_asc_record(asc_id, add_sp, _expected_revision(data)),
+            respond=lambda change: _instance_response(change, 201)
+        )
     except Exception:
         logging.exception("Error adding SP instance:")
         return jsonify({"error": "An unexpected error occurred."}), 500
@@ -265,27 +442,18 @@ def update_sp_instance(asc_id, gp_guid, sp_guid):
     """Update an SP instance within a GP in an ASC."""
     try:
         data = request.get_json() or {}
-        ascs_list = get_all_ascs()
-        updated_sp = None
-        for asc in ascs_list:
-            if asc.get('id') == asc_id:
-                for gp in asc.get('gpInstances', []):
-                    if gp.get('guid') == gp_guid:
-                        for idx, sp in enumerate(gp.get('spInstances', [])):
-                            if sp.get('guid') == sp_guid:
-                                sp['spId'] = data.get('spId', sp['spId'])
-                                sp['spVersion'] = data.get('spVersion', sp.get('spVersion', ''))
-                                sp['spScore'] = data.get('spScore', sp.get('spScore', '0%'))
-                                updated_sp = sp
-                                break
-                        break
-                break
-        if not updated_sp:
-            return jsonify({"error": "SP instance not found."}), 404
-        if not save_ascs(ascs_list):
-            logging.error("Failed to save ASC after updating SP.")
-            return jsonify({"error": "Unable to save SP update."}), 500
-        return jsonify(updated_sp), 200
+
+        def update_sp(asc):
+            sp = _find_sp_instance(_find_gp_instance(asc, gp_guid), sp_guid)
+            sp['spId'] = data.get('spId', sp.get('spId'))
+            sp['spVersion'] = data.get('spVersion', sp.get('spVersion', ''))
+            sp['spScore'] = data.get('spScore', sp.get('spScore', '0%'))
+            return sp
+
+        return _asc_delta_response(
+            lambda: update_asc_record(asc_id, update_sp, _expected_revision(data)),
+            respond=lambda change: _instance_response(change, 200)
+        )
     except Exception:
         logging.exception("Error updating SP instance:")
         return jsonify({"error": "An unexpected error occurred."}), 500
@@ -295,25 +463,15 @@ def update_sp_instance(asc_id, gp_guid, sp_guid):
 def delete_sp_instance(asc_id, gp_guid, sp_guid):
     """Delete an SP instance from a GP in an ASC."""
     try:
-        ascs_list = get_all_ascs()
-        deleted = False
-        for asc in ascs_list:
-            if asc.get('id') == asc_id:
-                for gp in asc.get('gpInstances', []):
-                    if gp.get('guid') == gp_guid:
-                        sp_list = gp.get('spInstances', [])
-                        new_list = [sp for sp in sp_list if sp.get('guid') != sp_guid]
-                        if len(new_list) != len(sp_list):
-                            gp['spInstances'] = new_list
-                            deleted = True
-                        break
-                break
-        if not deleted:
-            return jsonify({"error": "SP instance not found."}), 404
-        if not save_ascs(ascs_list):
-            logging.error("Failed to save ASC after deleting SP.")
-            return jsonify({"error": "Unable to delete SP instance."}), 500
-        return jsonify({'success': True}), 200
+        def delete_sp(asc):
+            gp = _find_gp_instance(asc, gp_guid)
+            _find_sp_instance(gp, sp_guid)
+            gp['spInstances'] = [sp for sp in gp['spInstances'] if sp.get('guid') != sp_guid]
+
+        return _asc_delta_response(
+            lambda: update_asc_record(asc_id, delete_sp, _expected_revision(request.args)),
+            respond=lambda change: _instance_response(change, 200)
+        )
     except Exception:
         logging.exception("Error deleting SP instance:")
         return jsonify({"error": "An unexpected error occurred."}), 500
@@ -4,6 +4,7 @@ Authentication routes for the IOCore2 Coverage Analysis Tool.
 import logging
 from flask import Blueprint, request, jsonify, session, redirect, url_for
 
+from app.api.client_pool import discard_client
 from app.core.auth import authenticate_user
 
 # Create blueprint
@@ -65,6 +66,7 @@ def login():
         session['cookies'] = result['cookies']
         session['url'] = api_url # Store the actual URL used
         session['environment'] = environment # Store the selected environment identifier
+        session['username'] = username # Owner of the background jobs started in this session
         logging.info(f"User {username} logged in successfully to {environment} environment using URL: {api_url}")
         
     return jsonify(result)
@@ -80,6 +82,8 @@ def logout():
     if 'cookies' in session:
         username = session.get('username', 'User')
         logging.info(f"{username} logged out")
+        if 'url' in session:
+            discard_client(session['url'], session['cookies'])
         
     # Clear session data
     session.clear()
@@ -9,6 +9,7 @@ from app.core.auth import login_required
 
 from app import settings
 from app.utils.file_operations import get_dynamic_data_path, read_json_file
+from app.utils.dataset_store import dataset_exists
 from app.api.iocore2 import IOCore2ApiClient
 
 # Create a Blueprint for participants routes
@@ -31,7 +32,7 @@ def participants_view():
         participants_path = get_dynamic_data_path("participants.json")
         test_results_path = get_dynamic_data_path("test_results.json")
 
-        if not participants_path.exists():
+        if not dataset_exists(participants_path):
             logging.warning(f"Participants file not found at {participants_path}")
             # Optionally render with an error message or empty list
             return render_template('participants.html', participants=[], error="Participants data file not found.")
@@ -39,7 +40,7 @@ def participants_view():
         participants_data = read_json_file(participants_path)
 
         # Load test results, but don't fail the whole page if it's missing
-        if test_results_path.exists():
+        if dataset_exists(test_results_path):
             try:
                 test_results_data = read_json_file(test_results_path)
             except Exception as e:
@@ -94,7 +95,7 @@ def participants_view():
              logging.warning("Test results data is empty or was not loaded. Test counts will be 0.")
 
         logging.info(f"Compiled list of {len(actual_test_list)} tests for participant matching.") # Log the final length
-        if not actual_test_list and test_results_path.exists(): # Add check if file existed but list is empty
+        if not actual_test_list and dataset_exists(test_results_path): # Add check if file existed but list is empty
              logging.error("Failed to compile actual_test_list from test_results_data, even though the file exists. Check file structure and processing logic.") # Add specific error log
 
         # --- End Pre-processing Test Results ---
@@ -335,7 +336,7 @@ def api_get_participant_name_by_key_from_file():
     try:
         # Get participants directly from the JSON file
         participants_path = get_dynamic_data_path("participants.json")
-        if not participants_path.exists():
+        if not dataset_exists(participants_path):
             return jsonify({'status': 'error', 'message': 'Participants file not found'}), 500
             
         participants = read_json_file(participants_path)
@@ -10,9 +10,10 @@ from flask import Blueprint, render_template, redirect, url_for, request, sessio
 
 # Updated imports
 from app.core.auth import login_required
-from app.utils.file_operations import get_dynamic_data_path, read_json_file # Added import for dynamic paths and read_json_file
+from app.utils.file_operations import get_dynamic_data_path, read_json_file, resolve_environment # Added import for dynamic paths and read_json_file
+from app.utils.dataset_store import dataset_exists
 from app.data_access.affiliates_repository import get_all_affiliates, save_affiliates # Added import
-from app.data_access.links_repository import get_all_links, add_link, update_link, delete_link # Added Links repository import
+from app.data_access.links_repository import get_all_links, add_link, update_link, delete_link, get_links_for_gp, get_reachable_gps # Added Links repository import
 from app.data_access.ascs_repository import get_all_ascs, save_ascs # Added ASCs repository import
 from app.config import settings
 from app.api.iocore2 import IOCore2ApiClient  # Imported client to expose helper methods
@@ -46,9 +47,7 @@ def view_tree():
     Returns:
         Rendered tree view template
     """
-    # Updated imports
-    from app.data_models.sreq_analysis import organize_tin_data
-    from app.utils.file_operations import read_json_file
+    from app.data_models.tree_nodes import get_tree_nodes, load_tree_index
 
     logging.info("Accessing SREQ tree view")
 
@@ -56,14 +55,14 @@ def view_tree():
         # Use dynamic path based on session environment
         sreq_path = get_dynamic_data_path("SREQ.json")
 
-        if not sreq_path.exists():
+        if not dataset_exists(sreq_path):
             logging.warning(f"SREQ file not found at {sreq_path}")
             return render_template("index_tree_tin.html")
         
-        data = read_json_file(sreq_path)
-        organized_data = organize_tin_data(data)
+        # SIs and their TINs only; the SREQs are loaded by the page when a TIN is expanded
+        index, _ = load_tree_index('tin')
         
-        return render_template("index_tree_tin.html", data=organized_data)
+        return render_template("index_tree_tin.html", nodes=get_tree_nodes(index, depth=2))
     except Exception as e:
         logging.exception("Error organizing TIN data:")
         return render_template("index_tree_tin.html")
@@ -77,9 +76,7 @@ def view_tree_func():
     Returns:
         Rendered functional tree view template
     """
-    # Updated imports
-    from app.data_models.sreq_analysis import organize_functional_data
-    from app.utils.file_operations import read_json_file
+    from app.data_models.tree_nodes import get_tree_nodes, load_tree_index
 
     logging.info("Accessing functional tree view")
 
@@ -88,17 +85,14 @@ def view_tree_func():
         sreq_path = get_dynamic_data_path("SREQ.json")
         func_path = get_dynamic_data_path("SP5-Functional.json")
 
-        if not sreq_path.exists() or not func_path.exists():
+        if not dataset_exists(sreq_path) or not func_path.exists():
             logging.warning(f"Required file(s) not found: SREQ at {sreq_path}, Functional at {func_path}")
             return render_template("index_tree_func.html", default_url=settings.DEFAULT_URL)
         
-        sreq_data = read_json_file(sreq_path)
-        func_data = read_json_file(func_path)
+        # SIs and their functions only; the SREQs are loaded by the page when a function is expanded
+        index, _ = load_tree_index('func')
         
-        # Organize the data
-        organized_data = organize_functional_data(sreq_data, func_data)
-        
-        return render_template("index_tree_func.html", data=organized_data, default_url=settings.DEFAULT_URL)
+        return render_template("index_tree_func.html", nodes=get_tree_nodes(index, depth=2), default_url=settings.DEFAULT_URL)
     except Exception as e:
         logging.exception("Error organizing functional data:")
         return render_template("index_tree_func.html", default_url=settings.DEFAULT_URL)
@@ -112,45 +106,73 @@ def view_ier_tree():
     Returns:
         Rendered IER tree view template
     """
-    # Updated imports
-    from app.data_models.ier_analysis import analyze_ier_data, read_tin_data
-    from app.utils.file_operations import read_json_file
+    from app.data_models.tree_nodes import get_tree_nodes, load_tree_index
 
     logging.info("Accessing IER tree view")
 
     try:
         # Use dynamic paths based on session environment
         ier_path = get_dynamic_data_path("IER.json")
-        tin_csv_file = get_dynamic_data_path("TIN2.csv")
 
-        if not ier_path.exists():
+        if not dataset_exists(ier_path):
             logging.warning(f"IER file not found at {ier_path}")
-            return render_template("index_ier_tree.html", data={})
-        
-        # Read TIN data to map TINs to services
-        logging.info(f"Reading TIN data from {tin_csv_file}...")
-        tin_to_service = read_tin_data(tin_csv_file)
+            return render_template("index_ier_tree.html")
         
-        # Organize the data using the TIN to service mapping
-        data = read_json_file(ier_path)
-        raw_organized_data = analyze_ier_data(data, tin_to_service=tin_to_service)
+        # PIs and their IERs only; the services are loaded by the page when an IER is expanded
+        index, _ = load_tree_index('ier')
         
-        # Convert defaultdict to regular dict for template rendering
-        organized_data = {}
-        for pi_key, iers in raw_organized_data.items():
-            organized_data[pi_key] = {}
-            for ier_key, services in iers.items():
-                organized_data[pi_key][ier_key] = {}
-                for service_name, service_data in services.items():
-                    organized_data[pi_key][ier_key][service_name] = {
-                        "idp_tin_name": service_data["idp_tin_name"],
-                        "test_cases": service_data["test_cases"]
-                    }
-        
-        return render_template("index_ier_tree.html", data=organized_data)
+        return render_template("index_ier_tree.html", nodes=get_tree_nodes(index, depth=2))
     except Exception as e:
         logging.exception("Error organizing IER data:")
-        return render_template("index_ier_tree.html", data={})
+        return render_template("index_ier_tree.html")
+
+def _markdown_download(lines, filename: str):
+    """Streams report lines as a markdown attachment while they are generated."""
+    from flask import Response
+    from app.utils.file_operations import iter_markdown_chunks
+
+    response = Response(iter_markdown_chunks(lines), mimetype='text/markdown')
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['X-Accel-Buffering'] = 'no' # Let proxies pass chunks on as they come
+    return response
+
+@views_bp.route('/reports/sreq.md')
+@login_required
+def download_sreq_report():
+    """
+    Download the SREQ report (entries without a test case) generated from
+    the current SREQ.json.
+
+    The report is streamed as it is generated: the download starts at once
+    and memory does not grow with the size of SREQ.json.
+
+    Returns:
+        Markdown attachment, or 404 if SREQ.json does not exist
+    """
+    from app.data_models.sreq_analysis import iter_sreq_report_lines
+
+    sreq_path = get_dynamic_data_path("SREQ.json")
+    if not dataset_exists(sreq_path):
+        return jsonify({'success': False, 'error': 'SREQ data not found'}), 404
+    return _markdown_download(iter_sreq_report_lines(sreq_path), f"SREQ-{resolve_environment(None)}.md")
+
+@views_bp.route('/reports/ier.md')
+@login_required
+def download_ier_report():
+    """
+    Download the IER coverage report generated from the current IER.json,
+    streamed as it is generated.
+
+    Returns:
+        Markdown attachment, or 404 if IER.json does not exist
+    """
+    from app.data_models.ier_analysis import iter_ier_report_lines, read_tin_data
+
+    ier_path = get_dynamic_data_path("IER.json")
+    if not dataset_exists(ier_path):
+        return jsonify({'success': False, 'error': 'IER data not found'}), 404
+    tin_to_service = read_tin_data(get_dynamic_data_path("TIN2.csv"))
+    return _markdown_download(iter_ier_report_lines(ier_path, tin_to_service), f"IER-{resolve_environment(None)}.md")
 
 @views_bp.route('/system_monitor')
 @login_required
@@ -240,7 +262,7 @@ def objectives_view():
         test_results_path = get_dynamic_data_path("test_results.json")
 
         # Load objectives data
-        if not objectives_path.exists():
+        if not dataset_exists(objectives_path):
             logging.warning(f"Objectives file not found at {objectives_path}")
             return render_template('objectives.html', objectives=[], error="Objectives data file not found.")
         objectives_data = read_json_file(objectives_path)
@@ -250,7 +272,7 @@ def objectives_view():
 
 
         # Load test results data and calculate counts
-        if test_results_path.exists():
+        if dataset_exists(test_results_path):
             try:
                 test_results_data = read_json_file(test_results_path)
                 # Check if the new format is being used (with 'Tests' at the top level)
@@ -549,11 +571,11 @@ def update_ascs():
 @login_required
 def api_get_ascs():
     """
-    API endpoint to get all ASCs data.
+    API endpoint to get ASCs data (same query parameters as api.get_ascs).
     """
     try:
-        ascs_data = get_all_ascs() # Use repository function
-        return jsonify(ascs_data)
+        from app.routes.ascs import query_ascs_from_request
+        return query_ascs_from_request()
     except Exception as e:
         logging.exception(f"Error getting ASCs: {str(e)}")
         return jsonify({'error': f'An unexpected error occurred: {str(e)}'}), 500
@@ -658,6 +680,35 @@ def upload_gp_icon():
         logging.exception(f"Error uploading GP icon: {str(e)}")
         return jsonify({'error': f'Error uploading GP icon: {str(e)}'}), 500
 
+@views_bp.route('/api/gps/<gp_id>/reachable', methods=['GET'])
+@login_required
+def api_get_reachable_gps(gp_id):
+    """
+    API endpoint returning the GPs reachable from a GP through links.
+
+    Query parameters:
+        hops: Maximum number of links to cross (1-10, default 1)
+
+    Returns:
+        JSON list of {'id', 'name', 'hops'} ordered by hops then ID
+    """
+    try:
+        hops = request.args.get('hops', 1, type=int)
+        if hops is None or not 1 <= hops <= 10:
+            return jsonify({'error': 'hops must be an integer between 1 and 10'}), 400
+
+        from app.data_access.gps_repository import get_all_gps
+        gp_names = {gp.get('id'): gp.get('name') for gp in get_all_gps()}
+        reachable = get_reachable_gps(gp_id, hops)
+        result = [
+            {'id': reachable_id, 'name': gp_names.get(reachable_id), 'hops': distance}
+            for reachable_id, distance in sorted(reachable.items(), key=lambda item: (item[1], item[0]))
+        ]
+        return jsonify(result)
+    except Exception as e:
+        logging.exception(f"Error finding GPs reachable from {gp_id}: {str(e)}")
+        return jsonify({'error': f'Error finding reachable GPs: {str(e)}'}), 500
+
 @views_bp.route('/api/links', methods=['GET', 'POST', 'PUT', 'DELETE'])
 @login_required
 def manage_links():
@@ -665,7 +716,7 @@ def manage_links():
     API endpoint to manage Links data.
     
     Methods:
-        GET: Return all Links
+        GET: Return all Links, or only those touching a GP (?gp=<id>, optional side=a|b)
         POST: Add a new Link
         PUT: Update an existing Link
         DELETE: Delete a Link
@@ -678,6 +729,12 @@ def manage_links():
     try:
         # GET: Return all Links
         if request.method == 'GET':
+            gp_id = request.args.get('gp')
+            if gp_id:
+                side = request.args.get('side')
+                if side not in (None, 'a', 'b'):
+                    return jsonify({'error': "side must be 'a' or 'b'"}), 400
+                return jsonify(get_links_for_gp(gp_id, side))
             links = get_all_links() # Use repository function
             return jsonify(links)
             
@@ -7,6 +7,9 @@
  * - Updating ASC statuses
  * - Preparing for future backend integration
  */
+// Number of ASC summaries requested per /api/ascs page
+const ASC_PAGE_SIZE = 500;
+
 export class DataManager {
   constructor() {
     this.ascs = [];
@@ -31,7 +34,7 @@ export class DataManager {
     try {
       // Load all required data in parallel (including models)
       const [ascsData, affiliatesData, servicesData, modelsData] = await Promise.all([
-        this.fetchData("/api/ascs"), // Changed to fetch ASCs via API
+        this.fetchAscSummaries(), // Card fields only; full records are loaded when a card is opened
         this.fetchData("/api/affiliates"), // Fetch affiliates via API
         this.fetchData("/api/services"), // Fetch services via API
         this.fetchData("/api/models") // Fetch models via API
@@ -65,6 +68,33 @@ export class DataManager {
     return await response.json();
   }
 
+  /**
+   * Fetch the kanban cards as ASC summaries (no nested GP/SP instances),
+   * following the paged /api/ascs query until the last page
+   * @returns {Promise<Array>} Promise that resolves with all ASC summaries
+   */
+  async fetchAscSummaries() {
+    const ascs = [];
+    let cursor = null;
+    do {
+      const params = new URLSearchParams({ fields: "summary", limit: String(ASC_PAGE_SIZE) });
+      if (cursor) params.set("cursor", cursor);
+      const page = await this.fetchData(`/api/ascs?${params}`);
+      ascs.push(...page.items);
+      cursor = page.nextCursor;
+    } while (cursor);
+    return ascs;
+  }
+
+  /**
+   * Fetch the full record of a single ASC, including its GP/SP instances
+   * @param {string} ascId - ASC ID
+   * @returns {Promise<Object>} Promise that resolves with the ASC
+   */
+  async fetchAsc(ascId) {
+    return this.fetchData(`/api/ascs/${encodeURIComponent(ascId)}`);
+  }
+
   /**
    * Process affiliates data into a lookup object
    * @param {Array} affiliates - Raw affiliates data
@@ -293,76 +323,72 @@ export class DataManager {
         throw new Error(`ASC with ID ${ascId} not found`);
       }
       
-      // Update in memory first
-      this.ascs[ascIndex].status = newStatus;
-      
-      // Save to backend
-      await this.saveAscs();
-      
-      return true;
-    } catch (error) {
-      console.error("Error updating ASC status:", error);
-      return false;
-    }
-  }
-
-  /**
-   * Save all ASCs to the backend
-   * @returns {Promise} Promise that resolves when save is complete
-   */
-  async saveAscs() {
-    try {
-      console.group('Saving ASCs to backend');
-      console.log(`Saving ${this.ascs.length} ASCs to backend`);
-      
-      // Add unique timestamp to verify we're sending fresh data
-      const timestamp = new Date().toISOString();
-      console.log(`Save operation timestamp: ${timestamp}`);
+      const asc = this.ascs[ascIndex];
       
-      // Log first few ASCs being saved
-      if (this.ascs.length > 0) {
-        console.log('First few ASC IDs being saved:', this.ascs.slice(0, 5).map(asc => asc.id));
-      }
-      
-      // For now, using direct fetch to update the JSON file
-      // In future, this could be replaced with an API call
-      const response = await fetch('/update_ascs', {
+      // Send only this card's move; the server checks the revision we last saw
+      const response = await fetch(`/api/ascs/${encodeURIComponent(ascId)}/move`, {
         method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-          'X-Save-Timestamp': timestamp // Add timestamp to headers for tracking
-        },
-        body: JSON.stringify(this.ascs),
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ status: newStatus, revision: asc.revision || 0 })
       });
+      const result = await response.json();
       
-      // Log response details
-      console.log(`Response status: ${response.status}`);
-      const responseText = await response.text();
-      console.log('Response text:', responseText);
-      
-      // Parse response JSON if possible
-      let responseData;
-      try {
-        responseData = JSON.parse(responseText);
-        console.log('Response data:', responseData);
-      } catch (e) {
-        console.warn('Could not parse response as JSON:', e);
+      if (response.status === 409 && result.asc) {
+        // Someone else changed this ASC - keep their version
+        this.ascs[ascIndex] = result.asc;
+        throw new Error(result.error);
       }
-      
       if (!response.ok) {
-        throw new Error(`Failed to save ASCs: ${response.statusText}`);
+        throw new Error(result.error || `Failed to move ASC: ${response.statusText}`);
       }
       
-      console.log('ASCs saved successfully!');
-      console.groupEnd();
+      // Replace the local record with the server's copy (new revision)
+      this.ascs[ascIndex] = result.asc;
+      
       return true;
     } catch (error) {
-      console.error("Error saving ASCs:", error);
-      console.groupEnd();
-      
-      // We no longer want to use the fallback method - it's misleading
-      // Let's fail clearly so the user knows something went wrong
+      console.error("Error updating ASC status:", error);
       return false;
     }
   }
+
+  /**
+   * Save an edited ASC (full record, as produced by the ASC form)
+   * @param {Object} asc - ASC data
+   * @returns {Promise<Object>} Promise that resolves with the saved ASC
+   */
+  async updateAsc(asc) {
+    const response = await fetch('/api/ascs', {
+      method: 'PUT',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify(asc)
+    });
+    const result = await response.json();
+    if (response.status === 409) {
+      // Someone else changed this ASC since it was opened
+      throw new Error(`${result.error}. Reopen the ASC to see the current version.`);
+    }
+    if (!response.ok) {
+      throw new Error(result.error || `Failed to save ASC: ${response.statusText}`);
+    }
+    return result.asc;
+  }
+
+  /**
+   * Delete an ASC
+   * @param {string} ascId - ASC ID
+   * @param {number} [revision] - Revision the user saw; the delete fails if the ASC changed since
+   * @returns {Promise} Promise that resolves when the ASC is deleted
+   */
+  async deleteAsc(ascId, revision) {
+    let url = `/api/ascs?id=${encodeURIComponent(ascId)}`;
+    if (revision !== undefined && revision !== null) {
+      url += `&revision=${encodeURIComponent(revision)}`;
+    }
+    const response = await fetch(url, { method: 'DELETE' });
+    const result = await response.json();
+    if (!response.ok) {
+      throw new Error(result.error || `Failed to delete ASC: ${response.statusText}`);
+    }
+  }
 }
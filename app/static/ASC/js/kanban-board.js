@@ -653,6 +653,16 @@ export class KanbanBoard {
     
     console.log('STARTING ASC edit dialog preparation for ASC-' + asc.id);
     
+    // Cards hold ASC summaries; the form needs the full record with its GP instances
+    try {
+      asc = await this.dataManager.fetchAsc(asc.id);
+    } catch (error) {
+      console.error('Error loading ASC for editing:', error);
+      this.showLoading(false);
+      this.uiService.showNotification(`Failed to load ASC ${asc.id}: ${error.message}`, 'error');
+      return;
+    }
+    
     // Create a new enhanced ASC object with all preloaded data
     // This avoids any asynchronous loading issues in the form
     const enhancedAsc = {
@@ -825,23 +835,8 @@ export class KanbanBoard {
           saveButton.innerHTML = '<span class="spinner-border spinner-border-sm" role="status" aria-hidden="true"></span> Saving...';
         }
         
-        // Find the ASC in the data manager's array and update it
-        // This approach mirrors what happens in the drag-and-drop functionality
-        const ascIndex = kanbanBoard.dataManager.ascs.findIndex(a => a.id.toString() === formData.id.toString());
-        if (ascIndex === -1) {
-          throw new Error(`ASC with ID ${formData.id} not found in data manager`);
-        }
-        
-        // Update the ASC in memory
-        console.log(`Updating ASC at index ${ascIndex}`);
-        kanbanBoard.dataManager.ascs[ascIndex] = formData;
-        
-        // Save all ASCs using the same method as drag-and-drop
-        const success = await kanbanBoard.dataManager.saveAscs();
-        
-        if (!success) {
-          throw new Error('Failed to save ASCs');
-        }
+        // Save only this ASC; the board holds summaries, not full records
+        await kanbanBoard.dataManager.updateAsc(formData);
         
         // Close dialog
         ascDialog.close();
@@ -898,23 +893,8 @@ export class KanbanBoard {
         // Convert to string if needed
         const ascId = id.toString();
         
-        // Remove the ASC from the data manager's array
-        // This approach mirrors what would happen in updateAscStatus
-        const ascIndex = kanbanBoard.dataManager.ascs.findIndex(a => a.id.toString() === ascId);
-        if (ascIndex === -1) {
-          throw new Error(`ASC with ID ${ascId} not found in data manager`);
-        }
-        
-        // Remove the ASC from the array
-        console.log(`Removing ASC at index ${ascIndex}`);
-        kanbanBoard.dataManager.ascs.splice(ascIndex, 1);
-        
-        // Save all ASCs using the same method as drag-and-drop
-        const success = await kanbanBoard.dataManager.saveAscs();
-        
-        if (!success) {
-          throw new Error('Failed to save ASCs after deletion');
-        }
+        // Delete only this ASC on the server
+        await kanbanBoard.dataManager.deleteAsc(ascId, enhancedAsc.revision || 0);
         
         // Close dialog
         ascDialog.close();
@@ -864,6 +864,7 @@ export class AscForm {
                 return;
             }
             this.data.gpInstances.push(newGp);
+            this.trackRevision(response);
             this.renderGpInstances();
             this.updateAscScoreDisplay();
             this.addGpSelect.value = '';
@@ -874,6 +875,18 @@ export class AscForm {
         }
     }
 
+    /**
+     * Keeps the revision of the edited ASC in step with GP/SP changes saved
+     * on the server, so the final save is not rejected as a conflict.
+     * @param {Response} response - Response of a GP/SP instance request (ETag holds the new revision)
+     */
+    trackRevision(response) {
+        const revision = parseInt((response.headers.get('ETag') || '').replace(/"/g, ''), 10);
+        if (!Number.isNaN(revision)) {
+            this.data.revision = revision;
+        }
+    }
+
     handleEditGpInstance(index) {
         console.log("Edit GP Instance at index:", index, this.data.gpInstances[index]);
         const gpInstanceToEdit = this.data.gpInstances[index];
@@ -916,6 +929,7 @@ export class AscForm {
         const gpSpForm = new GpSpEditForm({
             ascId: this.data.id,
             gpInstance: gpInstanceToEdit,
+            onRevision: (revision) => { this.data.revision = revision; },
             allSps: this.allSps,
             allGps: this.allGps, // Pass GP data for name lookup within GpSpEditForm if needed
             onSave: (updatedGpInstanceData) => {
@@ -1238,6 +1252,9 @@ export class AscForm {
         const formData = {
             // Keep the ID if in edit mode (otherwise it would create a new ASC)
             id: this.isEditMode && this.data?.id ? this.data.id : undefined,
+
+            // Revision the edit is based on; the server rejects the save if the ASC changed since
+            revision: this.isEditMode ? (this.data?.revision || 0) : undefined,
             
             // Affiliate, Environment, and Service ID values
             affiliateId: this.affiliateSelect.value,
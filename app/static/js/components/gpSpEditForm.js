@@ -13,6 +13,7 @@ export class GpSpEditForm {
      * @param {Function} config.onSave - Callback function to save the updated gpInstance data. receives the updated gpInstance as argument.
      * @param {Function} [config.onCancel] - Optional callback for cancellation.
      * @param {string} config.ascId - Parent ASC ID for backend calls.
+     * @param {Function} [config.onRevision] - Optional callback receiving the parent ASC's new revision after each SP change.
      */
     constructor(config = {}) {
         // Add check for allGps
@@ -25,6 +26,7 @@ export class GpSpEditForm {
         this.onSaveCallback = config.onSave;
         this.onCancel = config.onCancel; // Currently unused, handled by DialogManager
         this.ascId = config.ascId; // Parent ASC ID for backend calls
+        this.onRevision = config.onRevision;
 
         this.element = null;
         this.spListContainer = null;
@@ -320,6 +322,7 @@ export class GpSpEditForm {
                 });
                 result = await resp.json();
                 if (!resp.ok) throw new Error(result.error || resp.statusText);
+                this.reportRevision(resp);
                 this.gpInstance.spInstances[this.editingSpIndex] = result;
                 UiService.showNotification(`SP ${spId} updated.`, 'success');
             } else {
@@ -329,6 +332,7 @@ export class GpSpEditForm {
                 });
                 result = await resp.json();
                 if (!resp.ok) throw new Error(result.error || resp.statusText);
+                this.reportRevision(resp);
                 this.gpInstance.spInstances.push(result);
                 UiService.showNotification(`SP ${spId} added.`, 'success');
             }
@@ -343,6 +347,17 @@ export class GpSpEditForm {
         this.resetSpForm();
     }
 
+    /**
+     * Passes the parent ASC's new revision (ETag of an SP request) to onRevision.
+     * @param {Response} response - Response of an SP instance request
+     */
+    reportRevision(response) {
+        const revision = parseInt((response.headers.get('ETag') || '').replace(/"/g, ''), 10);
+        if (!Number.isNaN(revision) && typeof this.onRevision === 'function') {
+            this.onRevision(revision);
+        }
+    }
+
     async handleRemoveSpInstance(index) {
         if (!this.gpInstance.spInstances || index < 0 || index >= this.gpInstance.spInstances.length) return;
 
@@ -356,6 +371,7 @@ export class GpSpEditForm {
             const resp = await fetch(`/api/ascs/${this.ascId}/gpInstances/${this.gpInstance.guid}/spInstances/${spGuid}`, { method: 'DELETE' });
             const res = await resp.json();
             if (!resp.ok || !res.success) throw new Error(res.error || 'Delete failed');
+            this.reportRevision(resp);
             // Remove from data
             this.gpInstance.spInstances.splice(index, 1);
             // Remove DOM row
@@ -0,0 +1,194 @@
+// Lazy loading for the coverage tree pages (TIN, functional and IER trees).
+// The pages render their first two levels; the nodes below a TIN, function or
+// IER are fetched from /api/tree/<tree>/nodes when it is first expanded.
+// Searches and "Expand All" fetch the part of the tree they need and
+// re-render it with the same markup.
+const LazyTree = (function() {
+    let root = null;
+    let tree = null;
+    let page = null;
+    let initialHtml = '';
+    // Levels fully present in the DOM (the pages render two)
+    let loadedDepth = 2;
+    // True while the tree shows search results instead of the whole tree
+    let searching = false;
+    // Incremented by every operation replacing the tree, so stale responses are dropped
+    let generation = 0;
+
+    function escapeHtml(value) {
+        return String(value ?? '').replace(/[&<>"']/g, c => (
+            {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c]
+        ));
+    }
+
+    function coverageColor(coverage) {
+        if (coverage <= 25) return 'var(--danger-color)';
+        if (coverage <= 50) return 'var(--warning-color)';
+        if (coverage <= 75) return 'var(--accent-color)';
+        return 'var(--success-color)';
+    }
+
+    function pathAttribute(node) {
+        return `data-path="${escapeHtml(JSON.stringify(node.path))}"`;
+    }
+
+    // SI, PI, TIN, function or IER, as rendered by components/tree_nodes.html
+    function groupNode(node, level) {
+        const percentage = Number(node.coverage).toFixed(1);
+        const classes = `level-${level} tree-toggle` + (level > 1 || !node.children ? ' collapsed' : '');
+        const lazy = node.children ? '' : ' data-lazy="true"';
+        return `<li class="${classes}" ${pathAttribute(node)}${lazy}>` +
+            `<div class="tree-item tooltip" data-tooltip="Coverage: ${percentage}%">` +
+            `${escapeHtml(page.label(node, level))} (${percentage}%)` +
+            `<span class="percentage-circle" style="background-color: ${coverageColor(node.coverage)}"></span></div>` +
+            (node.children ? `<ul class="nested">${renderNodes(node.children, level + 1)}</ul>` : '') +
+            '</li>';
+    }
+
+    // SREQ or IER service with its test cases (testCasesHtml: the page's level-4 items)
+    function leafNode(node, testCasesHtml) {
+        const count = node.counts.test_cases;
+        return `<li class="level-3 tree-toggle collapsed${count === 0 ? ' no-children' : ''}" ${pathAttribute(node)}>` +
+            `<div class="tree-item tooltip" data-tooltip="Test Cases: ${count}">` +
+            `${escapeHtml(node.key)} -> ${escapeHtml(node.name)} (${count})</div>` +
+            (count > 0 ? `<ul class="nested">${testCasesHtml}</ul>` : '') +
+            '</li>';
+    }
+
+    function renderNodes(nodes, level) {
+        return nodes.map(node => level < 3 ? groupNode(node, level) : page.renderLeaf(node)).join('');
+    }
+
+    function markLeaves(container) {
+        container.querySelectorAll('.tree-toggle').forEach(li => {
+            if (!li.querySelector(':scope > .nested') && !li.dataset.lazy) {
+                li.classList.add('leaf');
+            }
+        });
+    }
+
+    function levelOf(li) {
+        const match = li.className.match(/\blevel-(\d)\b/);
+        return match ? Number(match[1]) : 0;
+    }
+
+    async function fetchJson(url) {
+        const response = await fetch(url, {credentials: 'same-origin'});
+        const data = await response.json();
+        if (!response.ok || !data.success) {
+            throw new Error(data.error || response.statusText);
+        }
+        return data;
+    }
+
+    async function loadChildren(li) {
+        const params = new URLSearchParams();
+        JSON.parse(li.dataset.path).forEach(id => params.append('path', id));
+        li.dataset.lazy = 'loading';
+        try {
+            const data = await fetchJson(`/api/tree/${tree}/nodes?${params}`);
+            li.insertAdjacentHTML('beforeend', `<ul class="nested">${renderNodes(data.nodes, levelOf(li) + 1)}</ul>`);
+            delete li.dataset.lazy;
+            markLeaves(li);
+            return true;
+        } catch (error) {
+            console.error('Error loading tree nodes:', error);
+            li.dataset.lazy = 'true';
+            return false;
+        }
+    }
+
+    function onClick(event) {
+        const li = event.target.closest('.tree-toggle');
+        if (!li || !root.contains(li)) {
+            return;
+        }
+        event.stopPropagation();
+        if (li.dataset.lazy === 'loading') {
+            return;
+        }
+        if (li.dataset.lazy === 'true' && li.classList.contains('collapsed')) {
+            loadChildren(li).then(loaded => {
+                if (loaded) li.classList.remove('collapsed');
+            });
+            return;
+        }
+        li.classList.toggle('collapsed');
+    }
+
+    function replaceTree(html) {
+        root.innerHTML = html;
+        markLeaves(root);
+    }
+
+    // Loads the whole tree down to depth levels (3 includes the test cases), keeping expanded nodes expanded
+    async function ensureDepth(depth) {
+        if (searching || loadedDepth >= depth) {
+            return;
+        }
+        const current = ++generation;
+        try {
+            const data = await fetchJson(`/api/tree/${tree}/nodes?depth=${depth}`);
+            if (current !== generation) return;
+            const expanded = new Set(
+                Array.from(root.querySelectorAll('[data-path]:not(.collapsed)')).map(li => li.dataset.path)
+            );
+            replaceTree(renderNodes(data.nodes, 1));
+            root.querySelectorAll('[data-path]').forEach(li => {
+                li.classList.toggle('collapsed', !expanded.has(li.dataset.path));
+            });
+            loadedDepth = depth;
+        } catch (error) {
+            console.error('Error loading tree:', error);
+        }
+    }
+
+    // Shows the branches matching a search box, then lets the page filter and highlight them
+    async function search(term, field, performSearch) {
+        const current = ++generation;
+        if (term.trim() === '') {
+            searching = false;
+            loadedDepth = 2;
+            replaceTree(initialHtml);
+            performSearch(term, field);
+            return;
+        }
+        try {
+            const params = new URLSearchParams({field: field, q: term});
+            const data = await fetchJson(`/api/tree/${tree}/search?${params}`);
+            if (current !== generation) return;
+            searching = true;
+            replaceTree(renderNodes(data.nodes, 1) + (data.truncated
+                ? `<li class="search-truncated" style="color: var(--text-secondary); padding: 0.5rem 1rem;">` +
+                  `Showing the first ${data.matches} matches. Refine the search to see the rest.</li>`
+                : ''));
+            performSearch(term, field);
+        } catch (error) {
+            console.error('Error searching tree:', error);
+        }
+    }
+
+    function debounce(func, wait) {
+        let timeout;
+        return function(...args) {
+            clearTimeout(timeout);
+            timeout = setTimeout(() => func(...args), wait);
+        };
+    }
+
+    // options: label(node, level) gives the text of an SI/PI (level 1) or
+    // TIN/function/IER (level 2); renderLeaf(node) renders a level-3 node, usually with leafNode
+    function init(rootId, options) {
+        root = document.getElementById(rootId);
+        if (!root) {
+            return;
+        }
+        tree = root.dataset.tree;
+        page = options;
+        initialHtml = root.innerHTML;
+        markLeaves(root);
+        root.addEventListener('click', onClick);
+    }
+
+    return {init, ensureDepth, search, leafNode, escapeHtml, debounce};
+})();
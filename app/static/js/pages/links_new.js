@@ -15,6 +15,8 @@ document.addEventListener('DOMContentLoaded', function() {
   
   // Store all GPs data (for resolving GP IDs to names)
   let allGPs = [];
+  // GP lookup by ID (avoids scanning allGPs for every link cell)
+  let gpById = new Map();
   // Make the GPs available globally for other components
   window.allGPs = [];
   // Store GP filter selection
@@ -29,6 +31,7 @@ document.addEventListener('DOMContentLoaded', function() {
       }
       const data = await response.json();
       allGPs = [...data];
+      gpById = new Map(allGPs.map(gp => [gp.id, gp]));
       window.allGPs = [...data]; // Store globally
       
       // Initialize GP dropdown after loading data
@@ -123,7 +126,7 @@ document.addEventListener('DOMContentLoaded', function() {
       if (gpId === '') {
         gpFilterHeader.textContent = 'All Generic Products';
       } else {
-        const gp = allGPs.find(g => g.id === gpId);
+        const gp = gpById.get(gpId);
         gpFilterHeader.textContent = gp ? gp.name : gpId;
       }
     }
@@ -134,15 +137,16 @@ document.addEventListener('DOMContentLoaded', function() {
       gpDropdownMenu.classList.remove('show');
     }
     
-    // Refresh the table with filter applied
+    // Reload the table; the server answers the GP filter from its link index
     if (linksTable) {
-      linksTable.filterAndRender();
+      linksTable.dataUrl = gpId ? `/api/links?gp=${encodeURIComponent(gpId)}` : '/api/links';
+      linksTable.fetchData();
     }
   }
   
   // Convert GP IDs to names for display
   function getGPNameById(gpId) {
-    const gp = allGPs.find(g => g.id === gpId);
+    const gp = gpById.get(gpId);
     return gp ? gp.name : gpId;
   }
   
@@ -197,15 +201,7 @@ document.addEventListener('DOMContentLoaded', function() {
       
       // Custom filter function
       filterFunction: (item, searchTerm) => {
-      // Apply GP filter first if selected
-      if (selectedGP && (
-          !(Array.isArray(item.gps_side_a) && item.gps_side_a.includes(selectedGP)) && 
-          !(Array.isArray(item.gps_side_b) && item.gps_side_b.includes(selectedGP))
-      )) {
-        return false;
-      }
-      
-      // Then apply search term filter
+      // The GP filter is applied server-side (dataUrl), only the search term is checked here
       if (!searchTerm) return true;
       
       searchTerm = searchTerm.toLowerCase();
@@ -221,14 +217,14 @@ document.addEventListener('DOMContentLoaded', function() {
       
       if (Array.isArray(item.gps_side_a)) {
         gpMatchA = item.gps_side_a.some(gpId => {
-          const gp = allGPs.find(g => g.id === gpId);
+          const gp = gpById.get(gpId);
           return gp && gp.name.toLowerCase().includes(searchTerm);
         });
       }
       
       if (Array.isArray(item.gps_side_b)) {
         gpMatchB = item.gps_side_b.some(gpId => {
-          const gp = allGPs.find(g => g.id === gpId);
+          const gp = gpById.get(gpId);
           return gp && gp.name.toLowerCase().includes(searchTerm);
         });
       }
@@ -2,6 +2,11 @@
 import { UiService } from './uiService.js';
 import { AuthService } from './authService.js';
 
+// Fallback for the test results export deadline if the server does not send max_wait_seconds
+const DEFAULT_EXPORT_MAX_WAIT_SECONDS = 1500;
+// Consecutive network/server errors tolerated while polling a job
+const MAX_JOB_POLL_ERRORS = 5;
+
 export class ApiService {
   
   /**
@@ -46,7 +51,7 @@ export class ApiService {
         UiService.removeTimerOverlay();
         
         if (data.success) {
-          UiService.showSuccessMessage('IER Coverage');
+          UiService.showSuccessMessage('IER Coverage', data.unchanged);
           window.location.href = '/view_ier_tree';
         } else {
           alert('Failed to fetch report: ' + (data.error || 'Unknown error'));
@@ -126,24 +131,27 @@ export class ApiService {
         try {
           // Every 5 seconds, check status
           if (seconds % 5 === 0) {
-            const statusResponse = await fetch('/check_sreq_status');
+            const statusResponse = await fetch(`/check_sreq_status?job_id=${encodeURIComponent(data.job_id)}`);
             const statusData = await statusResponse.json();
             
             // Update the status message based on current state
             if (statusData.status === 'completed') {
               // Processing is done!
               clearInterval(checkInterval);
-              statusElement.textContent = 'Processing complete! Redirecting...';
+              statusElement.textContent = statusData.unchanged
+                ? 'No changes since the last refresh. Redirecting...'
+                : 'Processing complete! Redirecting...';
               
               // Success! Remove timer overlay and redirect
               setTimeout(() => {
                 UiService.removeTimerOverlay();
-                UiService.showSuccessMessage('SREQ Coverage');
+                UiService.showSuccessMessage('SREQ Coverage', statusData.unchanged);
                 window.location.href = '/view_tree_func';
               }, 1000);
             } else if (statusData.status === 'processing') {
               // Still processing
-              statusElement.textContent = `Processing in background... (${Math.round(statusData.elapsed_seconds)}s elapsed server-side)`;
+              const receivedMb = (statusData.progress_bytes || 0) / (1024 * 1024);
+              statusElement.textContent = `Processing in background... (${Math.round(statusData.elapsed_seconds)}s elapsed server-side, ${receivedMb.toFixed(1)} MB received)`;
             } else if (statusData.status === 'error') {
               // Error occurred
               clearInterval(checkInterval);
@@ -367,39 +375,17 @@ export class ApiService {
         timerElement.textContent = timeText;
       }, 1000);
       
-      // Make the request
+      // Start the export job; the server returns its handle immediately
       const response = await fetch('/get_test_results_new');
       
-      // Stop timer
-      clearInterval(updateInterval);
-      
       // Get text and try to parse
       const text = await response.text();
       let data;
       
       try {
         data = JSON.parse(text);
-        
-        // Remove timer overlay
-        UiService.removeTimerOverlay();
-        
-        if (data.success) {
-          const countText = typeof data.count === 'number' ? 
-            `${data.count} items` : '';
-          const jobText = data.job_id ? ` (Job ID: ${data.job_id})` : '';
-          
-          UiService.showSuccessMessage(`Test Results data fetched using NEW API (${countText})${jobText}`);
-          
-          // If there's a redirect instruction, navigate to the statistics page
-          if (data.redirect) {
-            setTimeout(() => {
-              window.location.href = data.redirect;
-            }, 1500); // Small delay to show the success message
-          }
-        } else {
-          alert('Failed to fetch test results with new API: ' + (data.error || 'Unknown error'));
-        }
       } catch (parseError) {
+        clearInterval(updateInterval);
         // Clean up the timer overlay
         UiService.removeTimerOverlay();
         
@@ -416,6 +402,102 @@ export class ApiService {
         
         // Some other parsing error
         alert('Error parsing response: ' + parseError.message);
+        return;
+      }
+      
+      if (!data.success) {
+        clearInterval(updateInterval);
+        UiService.removeTimerOverlay();
+        alert('Failed to fetch test results with new API: ' + (data.error || 'Unknown error'));
+        return;
+      }
+      
+      // Poll the job until it finishes. Stop early if the job is gone or the
+      // session expired, after repeated network/server errors, or once the
+      // server's maximum export wait has passed.
+      const deadline = Date.now() + (data.max_wait_seconds || DEFAULT_EXPORT_MAX_WAIT_SECONDS) * 1000;
+      let job = null;
+      let pollFailure = null;
+      let consecutiveErrors = 0;
+      while (!job || !['completed', 'failed', 'cancelled'].includes(job.state)) {
+        if (Date.now() > deadline) {
+          pollFailure = 'Timed out waiting for the test results export to finish';
+          break;
+        }
+        await new Promise(resolve => setTimeout(resolve, 3000));
+
+        let jobResponse, jobText;
+        try {
+          jobResponse = await fetch(`/api/jobs/${encodeURIComponent(data.job_id)}`);
+          jobText = await jobResponse.text();
+        } catch (networkError) {
+          console.error('Error checking export job status:', networkError);
+          jobResponse = null;
+        }
+        if (!jobResponse || jobResponse.status >= 500) {
+          // Transient network or server error, retry a few times
+          if (++consecutiveErrors >= MAX_JOB_POLL_ERRORS) {
+            pollFailure = 'Lost contact with the server while waiting for the export';
+            break;
+          }
+          continue;
+        }
+
+        if (AuthService.checkSessionExpiredInHtml(jobText)) {
+          clearInterval(updateInterval);
+          UiService.removeTimerOverlay();
+          return;
+        }
+        let jobData;
+        try {
+          jobData = JSON.parse(jobText);
+        } catch (parseError) {
+          pollFailure = 'Unexpected response while checking the export job status';
+          break;
+        }
+        if (!jobResponse.ok || !jobData.success || !jobData.job) {
+          pollFailure = jobData.error || `Export job status unavailable (HTTP ${jobResponse.status})`;
+          break;
+        }
+
+        consecutiveErrors = 0;
+        job = jobData.job;
+        if (job.message) {
+          const receivedMb = (job.progress_bytes || 0) / (1024 * 1024);
+          timerElement.title = job.progress_bytes
+            ? `${job.message} (${receivedMb.toFixed(1)} MB received)`
+            : job.message;
+        }
+      }
+      
+      // Stop timer
+      clearInterval(updateInterval);
+      
+      // Remove timer overlay
+      UiService.removeTimerOverlay();
+      
+      if (pollFailure) {
+        alert('Failed to fetch test results with new API: ' + pollFailure);
+        return;
+      }
+      if (job.state === 'completed') {
+        const result = job.result || {};
+        const countText = typeof result.count === 'number' ? 
+          `${result.count} items` : '';
+        const jobText = result.export_job_id ? ` (Job ID: ${result.export_job_id})` : '';
+        
+        UiService.showSuccessMessage(`Test Results data fetched using NEW API (${countText})${jobText}`);
+        
+        // If there's a redirect instruction, navigate to the statistics page
+        if (data.redirect) {
+          setTimeout(() => {
+            window.location.href = data.redirect;
+          }, 1500); // Small delay to show the success message
+        }
+      } else if (job.state === 'cancelled') {
+        alert('Test results export was cancelled');
+      } else {
+        alert('Failed to fetch test results with new API: ' + (job.error || 'Unknown error'));
       }
     } catch (error) {
       // Clean up timer overlay in case of error
@@ -68,14 +68,17 @@ export class UiService {
   /**
    * Displays a success message that auto-hides after a few seconds
    * @param {string} title - The title/content of the success message
+   * @param {boolean} unchanged - Whether the refresh found no changes upstream
    */
-  static showSuccessMessage(title) {
+  static showSuccessMessage(title, unchanged = false) {
     const messagesContainer = document.getElementById('successMessages');
     if (!messagesContainer) return;
     
     const message = document.createElement('div');
     message.className = 'success-message';
-    message.textContent = `${title} report generated successfully!`;
+    message.textContent = unchanged
+      ? `${title} is unchanged since the last refresh.`
+      : `${title} report generated successfully!`;
     messagesContainer.appendChild(message);
 
     // Remove the message after 3 seconds
@@ -24,14 +24,30 @@ function toggleTheme() {
     );
 }
 
-// Tree toggling
+// SREQ with its test cases (linked to the test case page) and their actors
+function renderSreqNode(node) {
+    const defaultUrl = LazyTree.escapeHtml(document.getElementById('sreqRoot').dataset.defaultUrl);
+    const testCases = node.test_cases.map(testCase => {
+        const key = LazyTree.escapeHtml(testCase.key);
+        const name = LazyTree.escapeHtml(testCase.name);
+        const version = LazyTree.escapeHtml(testCase.version);
+        const link = testCase.version
+            ? `<a href="${defaultUrl}/testcases/${key}/${version}" target="_blank">${key}</a> -> ${name} (v${version})`
+            : `<a href="${defaultUrl}/testcases/${key}" target="_blank">${key}</a> -> ${name}`;
+        const actors = testCase.actors.map(actor =>
+            `<li class="level-5"><div class="tree-item"><i class="fas fa-user-circle" style="color: var(--accent-color);"></i> ` +
+            `<span style="color: var(--accent-color);">${LazyTree.escapeHtml(actor)}</span></div></li>`
+        ).join('');
+        return `<li class="level-4 tree-toggle collapsed"><div class="tree-item">${link}</div><ul class="nested">${actors}</ul></li>`;
+    }).join('');
+    return LazyTree.leafNode(node, testCases);
+}
+
+// Tree toggling (functions load their SREQs when first expanded)
 document.addEventListener('DOMContentLoaded', function() {
-    const toggles = document.querySelectorAll('.tree-toggle');
-    toggles.forEach(function(toggle) {
-        toggle.addEventListener('click', function(e) {
-            e.stopPropagation();
-            toggle.classList.toggle('collapsed');
-        });
+    LazyTree.init('sreqRoot', {
+        label: (node, level) => level === 2 ? node.key : `${node.key} -> ${node.name}`,
+        renderLeaf: renderSreqNode
     });
 
     // Check for preferred color scheme
@@ -58,23 +74,27 @@ document.addEventListener('DOMContentLoaded', function() {
     const functionSearchInput = document.getElementById('functionSearchInput');
 
     searchInput.addEventListener('input', debounce(function(e) {
-        performSearch(e.target.value.toLowerCase(), 'sreq');
+        LazyTree.search(e.target.value.toLowerCase(), 'sreq', performSearch);
     }, 300));
 
     tcaSearchInput.addEventListener('input', debounce(function(e) {
-        performSearch(e.target.value.toLowerCase(), 'tca');
+        LazyTree.search(e.target.value.toLowerCase(), 'tca', performSearch);
     }, 300));
 
     actorSearchInput.addEventListener('input', debounce(function(e) {
-        performSearch(e.target.value.toLowerCase(), 'actor');
+        LazyTree.search(e.target.value.toLowerCase(), 'actor', performSearch);
     }, 300));
 
     functionSearchInput.addEventListener('input', debounce(function(e) {
-        performSearch(e.target.value.toLowerCase(), 'function');
+        LazyTree.search(e.target.value.toLowerCase(), 'function', performSearch);
     }, 300));
 });
 
-function toggleLevel(level, expand) {
+async function toggleLevel(level, expand) {
+    if (expand) {
+        // Expanding a level shows the one below it (SREQs hold their test cases)
+        await LazyTree.ensureDepth(Math.min(level + 1, 3));
+    }
     const elements = document.querySelectorAll(`.level-${level}`);
     elements.forEach(element => {
         if (expand) {
@@ -218,14 +238,6 @@ function performSearch(searchTerm, searchType) {
                         matchedItems.add(actorLi.querySelector('.tree-item'));
                     });
                     
-                    // Ensure the parent li still has the click event and is expanded
-                    if (!li._hasClickListener) {
-                        li.addEventListener('click', function(e) {
-                            e.stopPropagation();
-                            this.classList.toggle('collapsed');
-                        });
-                        li._hasClickListener = true;
-                    }
                     li.classList.remove('collapsed'); // Ensure the actors are visible
                 }
                 
@@ -399,10 +411,12 @@ function hideLoading() {
 
 // Function to toggle uncovered SREQs visibility
 let uncoveredSreqsVisible = false;
-function toggleUncoveredSreqs(button) {
+async function toggleUncoveredSreqs(button) {
     uncoveredSreqsVisible = !uncoveredSreqsVisible;
     
     if (uncoveredSreqsVisible) {
+        // SREQs are loaded per function; load them all first
+        await LazyTree.ensureDepth(3);
         // Show only uncovered SREQs
         document.querySelectorAll('.level-3:not(.no-children)').forEach(item => {
             item.style.display = 'none';
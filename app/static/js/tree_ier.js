@@ -6,18 +6,28 @@ function toggleHeader() {
     toggle.classList.toggle('collapsed');
 }
 
-// Tree toggling
+// Tree toggling (IERs load their services when first expanded)
 function setupTreeToggles() {
-    const toggles = document.querySelectorAll('.tree-toggle');
-    toggles.forEach(function(toggle) {
-        toggle.addEventListener('click', function(e) {
-            e.stopPropagation();
-            toggle.classList.toggle('collapsed');
-        });
+    LazyTree.init('ierRoot', {
+        label: node => `${node.key} -> ${node.name}`,
+        renderLeaf: renderServiceNode
     });
 }
 
-function toggleLevel(level, expand) {
+// Service with its test cases
+function renderServiceNode(node) {
+    const testCases = node.test_cases.map(testCase =>
+        `<li class="level-4 leaf"><div class="tree-item">` +
+        `${LazyTree.escapeHtml(testCase.key)} -> ${LazyTree.escapeHtml(testCase.name)}</div></li>`
+    ).join('');
+    return LazyTree.leafNode(node, testCases);
+}
+
+async function toggleLevel(level, expand) {
+    if (expand) {
+        // Expanding a level shows the one below it
+        await LazyTree.ensureDepth(Math.min(level + 1, 3));
+    }
     const elements = document.querySelectorAll(`.level-${level}`);
     elements.forEach(element => {
         if (expand) {
@@ -170,15 +180,15 @@ document.addEventListener('DOMContentLoaded', function() {
     const tcaSearchInput = document.getElementById('tcaSearchInput');
 
     if (ierSearchInput) {
-        ierSearchInput.addEventListener('input', function(e) {
-            performSearch(e.target.value.toLowerCase(), 'ier');
-        });
+        ierSearchInput.addEventListener('input', LazyTree.debounce(function(e) {
+            LazyTree.search(e.target.value.toLowerCase(), 'ier', performSearch);
+        }, 300));
     }
 
     if (tcaSearchInput) {
-        tcaSearchInput.addEventListener('input', function(e) {
-            performSearch(e.target.value.toLowerCase(), 'tca');
-        });
+        tcaSearchInput.addEventListener('input', LazyTree.debounce(function(e) {
+            LazyTree.search(e.target.value.toLowerCase(), 'tca', performSearch);
+        }, 300));
     }
 
     // Initialize tree view
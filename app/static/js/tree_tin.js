@@ -97,7 +97,11 @@ function performSearch(searchTerm, searchType) {
     });
 }
 
-function toggleLevel(level, expand) {
+async function toggleLevel(level, expand) {
+    if (expand) {
+        // Expanding a level shows the one below it (SREQs hold their test cases)
+        await LazyTree.ensureDepth(Math.min(level + 1, 3));
+    }
     const elements = document.querySelectorAll(`.level-${level}`);
     elements.forEach(element => {
         if (expand) {
@@ -119,22 +123,26 @@ function expandInitialLevels() {
     });
 }
 
+// SREQ with its test cases and their actors
+function renderSreqNode(node) {
+    const testCases = node.test_cases.map(testCase => {
+        const actors = testCase.actors.map(actor =>
+            `<li class="level-5 leaf"><div class="tree-item"><i class="fas fa-user-circle"></i> ` +
+            `<span style="color: var(--accent-color);">${LazyTree.escapeHtml(actor)}</span></div></li>`
+        ).join('');
+        return `<li class="level-4 tree-toggle collapsed"><div class="tree-item">` +
+            `${LazyTree.escapeHtml(testCase.key)} -> ${LazyTree.escapeHtml(testCase.name)}</div>` +
+            (actors ? `<ul class="nested">${actors}</ul>` : '') + '</li>';
+    }).join('');
+    return LazyTree.leafNode(node, testCases);
+}
+
 // Initialize on load
 document.addEventListener('DOMContentLoaded', function() {
-    // Set up tree toggle functionality
-    const toggles = document.querySelectorAll('.tree-toggle');
-    toggles.forEach(function(toggle) {
-        const nestedUl = toggle.querySelector('.nested');
-
-        if (!nestedUl) {
-            toggle.classList.add('leaf');
-            return;
-        }
-
-        toggle.addEventListener('click', function(e) {
-            e.stopPropagation();
-            toggle.classList.toggle('collapsed');
-        });
+    // Set up tree toggle functionality (TINs load their SREQs when first expanded)
+    LazyTree.init('sreqRoot', {
+        label: node => `${node.key} -> ${node.name}`,
+        renderLeaf: renderSreqNode
     });
 
     // Set up search input event listeners
@@ -142,15 +150,15 @@ document.addEventListener('DOMContentLoaded', function() {
     const tcaSearchInput = document.getElementById('tcaSearchInput');
 
     if (searchInput) {
-        searchInput.addEventListener('input', function(e) {
-            performSearch(e.target.value.toLowerCase(), 'sreq');
-        });
+        searchInput.addEventListener('input', LazyTree.debounce(function(e) {
+            LazyTree.search(e.target.value.toLowerCase(), 'sreq', performSearch);
+        }, 300));
     }
 
     if (tcaSearchInput) {
-        tcaSearchInput.addEventListener('input', function(e) {
-            performSearch(e.target.value.toLowerCase(), 'tca');
-        });
+        tcaSearchInput.addEventListener('input', LazyTree.debounce(function(e) {
+            LazyTree.search(e.target.value.toLowerCase(), 'tca', performSearch);
+        }, 300));
     }
 
     // Initialize tree view
@@ -0,0 +1,135 @@
+"""
+Derived data (e.g. the SREQ tree hierarchies) persisted next to the datasets
+it is computed from.
+
+An artifact is stored as data/<env>/_artifacts/<name>.<key>.pickle, where key
+is a hash of the content of its inputs. Every worker loads the pickle once
+and then serves it from memory until an input changes; the first worker to
+see a new input version builds the artifact and writes it for the others.
+"""
+import hashlib
+import logging
+import os
+import pickle
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from app.utils.dataset_store import dataset_sha256, temp_path_for
+from app.utils.file_operations import get_dynamic_data_path, resolve_environment
+
+ARTIFACT_DIR = "_artifacts"
+# Bump when the structure of a pickled artifact changes, to ignore old files
+ARTIFACT_FORMAT = 1
+
+PathLike = Union[str, Path]
+
+# In-memory artifacts keyed by (environment, name): (key, value)
+_loaded: Dict[Tuple[str, str], Tuple[str, Any]] = {}
+_locks: Dict[Tuple[str, str], threading.Lock] = {}
+_locks_lock = threading.Lock()
+
+_MISSING = object()
+
+def _lock_for(cache_key: Tuple[str, str]) -> threading.Lock:
+    with _locks_lock:
+        return _locks.setdefault(cache_key, threading.Lock())
+
+def artifact_key(inputs: List[PathLike]) -> Optional[str]:
+    """
+    Hash identifying the content of an artifact's inputs, or None if an input is missing.
+    """
+    digest = hashlib.sha256(f"format={ARTIFACT_FORMAT}".encode('utf-8'))
+    for path in inputs:
+        sha256 = dataset_sha256(path)
+        if sha256 is None:
+            return None
+        digest.update(sha256.encode('ascii'))
+    return digest.hexdigest()[:32]
+
+def _artifact_path(name: str, environment: str, key: str) -> Path:
+    return get_dynamic_data_path(ARTIFACT_DIR, environment=environment) / f"{name}.{key}.pickle"
+
+def _write_artifact(path: Path, value: Any) -> None:
+    """Writes an artifact atomically and removes older versions of it."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = temp_path_for(path)
+    try:
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    name = path.name.split('.', 1)[0]
+    for stale in path.parent.glob(f"{name}.*.pickle"):
+        if stale != path:
+            try:
+                stale.unlink()
+            except OSError:
+                pass
+
+def load_artifact(
+    name: str,
+    inputs: List[PathLike],
+    build: Callable[[], Any],
+    environment: Optional[str] = None
+) -> Any:
+    """
+    Gets an artifact derived from the given input files, building and
+    persisting it only if no worker has done so for the current input content.
+
+    The returned value is shared between callers; do not modify it.
+
+    Args:
+        name: Artifact name (e.g. 'sreq_tin_tree')
+        inputs: Files the artifact is computed from
+        build: Callable computing the artifact from the inputs
+        environment: Optional environment. Defaults to the session environment.
+
+    Returns:
+        The artifact
+
+    Raises:
+        FileNotFoundError: If an input does not exist
+    """
+    environment = resolve_environment(environment)
+    key = artifact_key(inputs)
+    if key is None:
+        raise FileNotFoundError(f"Input of artifact {name} not found: {', '.join(str(p) for p in inputs)}")
+
+    cache_key = (environment, name)
+    cached = _loaded.get(cache_key)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    with _lock_for(cache_key):
+        # Double-check inside lock
+        cached = _loaded.get(cache_key)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        start = time.perf_counter()
+        path = _artifact_path(name, environment, key)
+        value = _MISSING
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+            logging.info(f"Loaded artifact {path} in {(time.perf_counter() - start) * 1000:.0f} ms")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logging.warning(f"Could not load artifact {path}, rebuilding it: {e}")
+
+        if value is _MISSING:
+            value = build()
+            try:
+                _write_artifact(path, value)
+            except Exception as e:
+                logging.error(f"Could not persist artifact {path}: {e}")
+            logging.info(f"Built artifact {name} ({environment}) in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+        _loaded[cache_key] = (key, value)
+    return value
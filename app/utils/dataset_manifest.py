@@ -0,0 +1,120 @@
+"""
+Per-environment record of ingested datasets (content hash and HTTP validators),
+used to detect unchanged downloads.
+"""
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from app.utils.dataset_store import temp_path_for
+from app.utils.file_lock import file_lock
+from app.utils.file_operations import get_dynamic_data_path, resolve_environment
+
+_MANIFEST_FILE = "_datasets.json"
+
+def _read_manifest(environment: str) -> Dict[str, Dict[str, Any]]:
+    manifest_path = get_dynamic_data_path(_MANIFEST_FILE, environment=environment)
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        return manifest if isinstance(manifest, dict) else {}
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logging.warning(f"Could not read dataset manifest {manifest_path}: {e}")
+        return {}
+
+def get_dataset_state(dataset: str, environment: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Gets the recorded state of a dataset.
+
+    Args:
+        dataset: Dataset name (e.g. 'SREQ', 'IER')
+        environment: Optional environment. Defaults to the session environment.
+
+    Returns:
+        Dictionary with sha256, etag, lastModified, recordCount, updatedAt,
+        checkedAt and unchanged, or an empty dictionary if never recorded
+    """
+    environment = resolve_environment(environment)
+    return dict(_read_manifest(environment).get(dataset, {}))
+
+def record_dataset_state(
+    dataset: str,
+    environment: str,
+    sha256: Optional[str],
+    changed: bool,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+    record_count: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Records the outcome of a dataset refresh.
+
+    Call this only after all outputs derived from the dataset have been
+    written, so an interrupted refresh is redone next time.
+
+    Args:
+        dataset: Dataset name
+        environment: Environment the dataset belongs to
+        sha256: Content hash of the payload (kept from the previous state if None)
+        changed: Whether the payload differed from the previous one
+        etag: ETag sent by the server, if any
+        last_modified: Last-Modified sent by the server, if any
+        record_count: Number of records in the payload, if known
+
+    Returns:
+        The recorded state
+    """
+    environment = resolve_environment(environment)
+    now = datetime.now().isoformat()
+    manifest_path = get_dynamic_data_path(_MANIFEST_FILE, environment=environment)
+    # The manifest is shared by all workers and refresh threads; the file lock
+    # keeps concurrent updates of different datasets from dropping each other
+    with file_lock(manifest_path):
+        manifest = _read_manifest(environment)
+        state = manifest.get(dataset, {})
+        if sha256:
+            state['sha256'] = sha256
+        if etag or last_modified:
+            state['etag'] = etag
+            state['lastModified'] = last_modified
+        if record_count is not None:
+            state['recordCount'] = record_count
+        if changed or 'updatedAt' not in state:
+            state['updatedAt'] = now
+        state['checkedAt'] = now
+        state['unchanged'] = not changed
+        manifest[dataset] = state
+
+        manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = temp_path_for(manifest_path)
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=4)
+            os.replace(tmp_path, manifest_path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+    logging.info(f"Dataset {dataset} ({environment}) recorded as {'changed' if changed else 'unchanged'}")
+    return dict(state)
+
+def conditional_headers(state: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Builds If-None-Match / If-Modified-Since headers from a recorded state.
+
+    Args:
+        state: State returned by get_dataset_state
+
+    Returns:
+        Dictionary of request headers (empty if the server sent no validators)
+    """
+    headers = {}
+    if state.get('etag'):
+        headers['If-None-Match'] = state['etag']
+    if state.get('lastModified'):
+        headers['If-Modified-Since'] = state['lastModified']
+    return headers
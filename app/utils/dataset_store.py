@@ -0,0 +1,264 @@
+"""
+Compressed on-disk storage for downloaded IOCore2 datasets.
+
+The datasets in COMPRESSED_DATASETS are written as compact JSON, gzip
+compressed, next to their plain name (SREQ.json -> SREQ.json.gz). Callers
+keep using the plain path from get_dynamic_data_path: readers go through
+resolve_dataset_path/open_dataset, which pick whichever variant was written
+last, so plain files from earlier versions (or copied in by hand) keep
+working until the next download replaces them.
+
+Existing files can be converted with:
+    python -m app.utils.dataset_store data/ciav data/cwix data/bck
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sys
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Dict, IO, Optional, Tuple, Union
+
+from app.config import settings
+
+COMPRESSED_DATASETS = frozenset((
+    'SREQ.json', 'IER.json', 'test_results.json', 'test_cases.json',
+    'participants.json', 'objectives.json', 'actors.json'
+))
+GZIP_SUFFIX = '.gz'
+PREVIOUS_MARKER = '.previous'
+_COMPRESS_LEVEL = 6
+
+PathLike = Union[str, Path]
+
+# Content hashes keyed by resolved path: (signature, sha256)
+_digests: Dict[str, Tuple[Tuple[int, int], str]] = {}
+_digests_lock = threading.Lock()
+
+def gzip_path(path: PathLike) -> Path:
+    """The compressed variant of a dataset path."""
+    path = Path(path)
+    return path.with_name(path.name + GZIP_SUFFIX)
+
+def temp_path_for(path: PathLike) -> Path:
+    """
+    A unique temporary file next to path, to write it and then os.replace it
+    into place. Unique per call, so concurrent writers of the same file (in one
+    process or several) never share a temporary file.
+    """
+    path = Path(path)
+    return path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+
+def previous_dataset_path(path: PathLike) -> Path:
+    """Plain path of the snapshot kept of a dataset's previous version (SREQ.json -> SREQ.previous.json)."""
+    path = Path(path)
+    return path.with_name(f"{path.stem}{PREVIOUS_MARKER}{path.suffix}")
+
+def should_compress(path: PathLike) -> bool:
+    """Whether the dataset (or previous snapshot) at path is stored compressed."""
+    name = Path(path).name.replace(PREVIOUS_MARKER, '', 1)
+    return settings.DATASET_COMPRESSION == 'gzip' and name in COMPRESSED_DATASETS
+
+def resolve_dataset_path(path: PathLike) -> Path:
+    """
+    The file currently holding a dataset: the plain or the compressed
+    variant, whichever was written last. Returns the plain path if neither exists.
+    """
+    path = Path(path)
+    compressed = gzip_path(path)
+    try:
+        compressed_mtime = compressed.stat().st_mtime_ns
+    except OSError:
+        return path
+    try:
+        plain_mtime = path.stat().st_mtime_ns
+    except OSError:
+        return compressed
+    return path if plain_mtime > compressed_mtime else compressed
+
+def is_compressed(path: PathLike) -> bool:
+    return str(path).endswith(GZIP_SUFFIX)
+
+def dataset_exists(path: PathLike) -> bool:
+    """Whether a dataset exists in either variant."""
+    return resolve_dataset_path(path).exists()
+
+def dataset_signature(path: PathLike) -> Optional[Tuple[int, int]]:
+    """(mtime_ns, size) of the file holding a dataset, or None if missing."""
+    try:
+        stat = resolve_dataset_path(path).stat()
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+def dataset_sha256(path: PathLike) -> Optional[str]:
+    """
+    SHA-256 of a dataset's uncompressed content, or None if it does not exist.
+
+    The hash is cached per file and only recomputed when the file's
+    modification time or size changes.
+    """
+    resolved = resolve_dataset_path(path)
+    try:
+        stat = resolved.stat()
+    except OSError:
+        return None
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cache_key = str(resolved.resolve())
+    cached = _digests.get(cache_key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    digest = hashlib.sha256()
+    with open_dataset(resolved, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    with _digests_lock:
+        _digests[cache_key] = (signature, digest.hexdigest())
+    return digest.hexdigest()
+
+def open_dataset(path: PathLike, mode: str = 'rb') -> IO:
+    """
+    Opens a dataset for reading, decompressing it on the fly if stored compressed.
+
+    Args:
+        path: Plain dataset path (e.g. from get_dynamic_data_path)
+        mode: 'rb' for bytes (e.g. for ijson) or 'r' for text
+
+    Raises:
+        FileNotFoundError: If the dataset does not exist
+    """
+    resolved = resolve_dataset_path(path)
+    text = 'b' not in mode
+    if is_compressed(resolved):
+        return gzip.open(resolved, 'rt' if text else 'rb', encoding='utf-8' if text else None)
+    return open(resolved, 'r' if text else 'rb', encoding='utf-8' if text else None)
+
+def read_dataset(path: PathLike) -> Any:
+    """
+    Reads and parses a dataset.
+
+    Raises:
+        FileNotFoundError: If the dataset does not exist
+        json.JSONDecodeError: If the JSON is invalid
+    """
+    with open_dataset(path, 'rb') as f:
+        return json.load(f)
+
+def open_dataset_writer(tmp_path: PathLike, final_path: PathLike) -> IO:
+    """Opens a temporary file for streaming a dataset to, compressed if final_path is stored compressed."""
+    if should_compress(final_path):
+        return gzip.open(tmp_path, 'wb', compresslevel=_COMPRESS_LEVEL)
+    return open(tmp_path, 'wb')
+
+def _keep_previous(final_path: Path) -> None:
+    """
+    Snapshots the current version of a dataset to its previous snapshot path.
+
+    The live file is hard-linked (copied where links are not supported) to a
+    temporary name that then replaces the snapshot, so the dataset itself stays
+    in place until commit_dataset replaces it.
+    """
+    current = resolve_dataset_path(final_path)
+    if not current.exists():
+        return
+    previous = previous_dataset_path(final_path)
+    target, stale = (gzip_path(previous), previous) if is_compressed(current) else (previous, gzip_path(previous))
+    tmp_path = temp_path_for(target)
+    try:
+        os.link(current, tmp_path)
+    except OSError:
+        shutil.copy2(current, tmp_path)
+    os.replace(tmp_path, target)
+    try:
+        stale.unlink()
+    except FileNotFoundError:
+        pass
+
+def commit_dataset(tmp_path: PathLike, final_path: PathLike, keep_previous: bool = False) -> Path:
+    """
+    Moves a file written with open_dataset_writer into place and removes the
+    other variant of the dataset.
+
+    Args:
+        tmp_path: File written with open_dataset_writer
+        final_path: Plain dataset path
+        keep_previous: Keep the replaced version as the dataset's previous snapshot
+
+    Returns:
+        The path the dataset was stored at
+    """
+    final_path = Path(final_path)
+    if keep_previous:
+        _keep_previous(final_path)
+    target, stale = (gzip_path(final_path), final_path) if should_compress(final_path) else (final_path, gzip_path(final_path))
+    os.replace(tmp_path, target)
+    try:
+        stale.unlink()
+    except FileNotFoundError:
+        pass
+    return target
+
+def write_dataset(data: Any, path: PathLike) -> bool:
+    """
+    Writes a dataset atomically: compact and compressed for COMPRESSED_DATASETS,
+    indented plain JSON otherwise.
+
+    Args:
+        data: Data to write
+        path: Plain dataset path
+
+    Returns:
+        True if successful, False otherwise
+    """
+    path = Path(path)
+    tmp_path = temp_path_for(path)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open_dataset_writer(tmp_path, path) as f:
+            if should_compress(path):
+                f.write(json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8'))
+            else:
+                f.write(json.dumps(data, indent=4).encode('utf-8'))
+        target = commit_dataset(tmp_path, path)
+        logging.info(f"Successfully wrote data to {target}")
+        return True
+    except (IOError, OSError) as e:
+        logging.error(f"Error writing to file {path}: {e}")
+        try:
+            Path(tmp_path).unlink()
+        except OSError:
+            pass
+        return False
+
+def compress_existing(directory: PathLike) -> int:
+    """
+    Converts the plain COMPRESSED_DATASETS files in a directory to compressed storage.
+
+    Returns:
+        Number of files converted
+    """
+    converted = 0
+    for name in sorted(COMPRESSED_DATASETS):
+        path = Path(directory) / name
+        if not path.exists() or resolve_dataset_path(path) != path:
+            continue
+        with open(path, 'rb') as f:
+            data = json.load(f)
+        before = path.stat().st_size
+        if write_dataset(data, path):
+            after = gzip_path(path).stat().st_size
+            logging.info(f"{path}: {before / 1024:.0f} KB -> {after / 1024:.0f} KB")
+            converted += 1
+    return converted
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    if settings.DATASET_COMPRESSION != 'gzip':
+        sys.exit("IONIC2_DATASET_COMPRESSION is not 'gzip', nothing to do")
+    total = sum(compress_existing(directory) for directory in sys.argv[1:])
+    logging.info(f"Compressed {total} dataset file(s)")
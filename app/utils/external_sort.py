@@ -0,0 +1,81 @@
+"""
+Sorting of record streams that may not fit in memory.
+
+Records are collected in runs of at most EXTERNAL_SORT_RUN_SIZE. A stream
+that fits in one run is sorted in memory; otherwise each run is sorted and
+spilled to an anonymous temporary file, and the runs are merged lazily, so
+memory stays bounded by one run plus one batch per spilled run. Records must
+be picklable (tuples of strings are the intended case).
+"""
+import heapq
+import logging
+import pickle
+import tempfile
+from typing import IO, Any, Callable, Iterable, Iterator, List, Optional
+
+from app.config import settings
+
+# Records pickled together when a run is spilled
+_SPILL_BATCH = 1000
+
+def _spill(run: List[Any]) -> IO[bytes]:
+    """Writes a sorted run to a temporary file (removed when closed)."""
+    spill_file = tempfile.TemporaryFile(prefix='ionic-sort-')
+    for start in range(0, len(run), _SPILL_BATCH):
+        pickle.dump(run[start:start + _SPILL_BATCH], spill_file, protocol=pickle.HIGHEST_PROTOCOL)
+    spill_file.seek(0)
+    return spill_file
+
+def _read_spill(spill_file: IO[bytes]) -> Iterator[Any]:
+    try:
+        while True:
+            try:
+                batch = pickle.load(spill_file)
+            except EOFError:
+                return
+            yield from batch
+    finally:
+        spill_file.close()
+
+def external_sort(
+    records: Iterable[Any],
+    key: Optional[Callable[[Any], Any]] = None,
+    run_size: Optional[int] = None
+) -> Iterator[Any]:
+    """
+    Sorts records, spilling sorted runs to temporary files when there are
+    more than run_size of them.
+
+    The sort is stable, like sorted(). All records are consumed before the
+    first one is yielded.
+
+    Args:
+        records: Records to sort (any iterable, consumed once)
+        key: Optional key function, as for sorted()
+        run_size: Records sorted in memory at a time. Defaults to settings.EXTERNAL_SORT_RUN_SIZE.
+
+    Returns:
+        Iterator over the sorted records
+    """
+    run_size = run_size or settings.EXTERNAL_SORT_RUN_SIZE
+    spilled: List[IO[bytes]] = []
+    run: List[Any] = []
+    try:
+        for record in records:
+            run.append(record)
+            if len(run) >= run_size:
+                run.sort(key=key)
+                spilled.append(_spill(run))
+                run = []
+        run.sort(key=key)
+    except BaseException:
+        for spill_file in spilled:
+            spill_file.close()
+        raise
+
+    if not spilled:
+        return iter(run)
+
+    logging.debug(f"External sort merging {len(spilled) + 1} runs of up to {run_size} records")
+    # heapq.merge keeps records of earlier runs first on equal keys, so the merge stays stable
+    return heapq.merge(*(_read_spill(spill_file) for spill_file in spilled), iter(run), key=key)
@@ -0,0 +1,57 @@
+"""
+Cross-process locks for data files that several workers read, modify and
+write back (gunicorn runs one Python process per worker, so threading
+locks alone do not serialize them).
+"""
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Union
+
+try:
+    import fcntl
+except ImportError: # Windows development setups
+    fcntl = None
+    import msvcrt
+
+def lock_path_for(path: Union[str, Path]) -> Path:
+    """Returns the path of the lock file guarding a data file ('<file>.lock')."""
+    path = Path(path)
+    return path.with_name(f"{path.name}.lock")
+
+@contextmanager
+def file_lock(path: Union[str, Path]) -> Iterator[None]:
+    """
+    Holds an exclusive advisory lock on a data file for the duration of the block.
+
+    The lock is taken on a separate '<file>.lock' file, so the data file itself
+    can still be replaced atomically while the lock is held. Every caller gets
+    its own file descriptor, so the lock also serializes threads of one process.
+
+    Args:
+        path: Path of the data file to lock (it does not need to exist)
+    """
+    lock_file = lock_path_for(path)
+    lock_file.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        else:
+            while True:
+                try:
+                    msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.05)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    finally:
+        os.close(fd)
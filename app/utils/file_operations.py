@@ -3,13 +3,15 @@ Utility functions for file operations.
 """
 import json
 import logging
+import os
 from pathlib import Path
-from typing import Any, Dict, Union, Optional # Added Optional
+from typing import Any, Dict, Iterable, Iterator, Union, Optional # Added Optional
 from flask import session # Added for session access
 
 def read_json_file(file_path: Union[str, Path]) -> Any:
     """
-    Reads and parses a JSON file.
+    Reads and parses a JSON file. Datasets stored compressed (see
+    app.utils.dataset_store) are found under their plain path.
 
     Args:
         file_path: Path to the JSON file
@@ -24,8 +26,10 @@ def read_json_file(file_path: Union[str, Path]) -> Any:
     if isinstance(file_path, str):
         file_path = Path(file_path)
         
+    from app.utils.dataset_store import open_dataset
+
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
+        with open_dataset(file_path, 'rb') as file:
             return json.load(file)
     except FileNotFoundError:
         logging.error(f"Error: File '{file_path}' not found.")
@@ -60,23 +64,56 @@ def write_json_file(data: Any, file_path: Union[str, Path]) -> bool:
         logging.error(f"Error writing to file {file_path}: {e}")
         return False
 
-def get_dynamic_data_path(filename: str, environment: Optional[str] = None) -> Path:
+def write_json_file_if_changed(data: Any, file_path: Union[str, Path], indent: int = 4) -> bool:
     """
-    Constructs the path to a data file within the 'data/ciav' or 'data/cwix'
-    directory. Uses the provided environment if given, otherwise falls back
-    to the current session environment, defaulting to 'ciav'.
+    Writes data to a JSON file only if the serialized content differs from
+    the file's current content. The file is replaced atomically.
 
     Args:
-        filename: The name of the data file (e.g., "IER.json").
+        data: Data to write
+        file_path: Path to the output file
+        indent: JSON indentation
+
+    Returns:
+        True if the file was written, False if it already held this content
+
+    Raises:
+        OSError: If the file cannot be written
+    """
+    file_path = Path(file_path)
+    content = json.dumps(data, indent=indent, ensure_ascii=False).encode('utf-8')
+    try:
+        if file_path.read_bytes() == content:
+            return False
+    except FileNotFoundError:
+        pass
+
+    from app.utils.dataset_store import temp_path_for
+
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = temp_path_for(file_path)
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    logging.info(f"Successfully wrote data to {file_path}")
+    return True
+
+def resolve_environment(environment: Optional[str] = None) -> str:
+    """
+    Resolves the data environment ('ciav' or 'cwix'). Uses the provided
+    environment if given, otherwise falls back to the current session
+    environment, defaulting to 'ciav'.
 
     Args:
-        filename: The name of the data file (e.g., "IER.json").
         environment: Optional environment string ('ciav' or 'cwix').
 
     Returns:
-        A Path object representing the full path to the file.
+        A valid environment identifier.
     """
-    # Determine the environment subfolder
     if environment is None:
         # Try to get from session if not explicitly provided
         environment = session.get('environment', 'ciav') # Default to 'ciav' if not set
@@ -86,6 +123,23 @@ def get_dynamic_data_path(filename: str, environment: Optional[str] = None) -> P
     elif environment not in ['ciav', 'cwix']:
         logging.warning(f"Invalid environment '{environment}' provided, defaulting to 'ciav'.")
         environment = 'ciav'
+    return environment
+
+def get_dynamic_data_path(filename: str, environment: Optional[str] = None) -> Path:
+    """
+    Constructs the path to a data file within the 'data/ciav' or 'data/cwix'
+    directory. Uses the provided environment if given, otherwise falls back
+    to the current session environment, defaulting to 'ciav'.
+
+    Args:
+        filename: The name of the data file (e.g., "IER.json").
+        environment: Optional environment string ('ciav' or 'cwix').
+
+    Returns:
+        A Path object representing the full path to the file.
+    """
+    # Determine the environment subfolder
+    environment = resolve_environment(environment)
 
     # Construct the path relative to the project root
     # Assumes the application runs from the IONIC2 directory where 'data' resides
@@ -119,3 +173,66 @@ def write_markdown_file(content: str, file_path: Union[str, Path]) -> bool:
     except (IOError, OSError) as e:
         logging.error(f"Error writing to file {file_path}: {e}")
         return False
+
+# Characters of markdown gathered before a chunk is written or sent
+MARKDOWN_CHUNK_SIZE = 64 * 1024
+
+def iter_markdown_chunks(lines: Iterable[str], chunk_size: int = MARKDOWN_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Joins lines with newlines, as "\n".join(lines) would, yielding the text
+    in chunks of about chunk_size characters as the lines are produced. The
+    first line is yielded on its own, so a streamed response starts at once.
+
+    Args:
+        lines: Markdown lines (any iterable, consumed once)
+        chunk_size: Approximate size of each chunk
+
+    Returns:
+        Iterator over text chunks
+    """
+    parts = []
+    size = 0
+    separator = ""
+    for line in lines:
+        parts.append(separator)
+        parts.append(line)
+        size += len(line) + len(separator)
+        if size >= chunk_size or not separator:
+            yield "".join(parts)
+            parts = []
+            size = 0
+        separator = "\n"
+    if parts:
+        yield "".join(parts)
+
+def write_markdown_lines(lines: Iterable[str], file_path: Union[str, Path]) -> bool:
+    """
+    Writes markdown lines to a file as they are produced, replacing the file
+    only once all of them are written.
+
+    Args:
+        lines: Markdown lines (any iterable, consumed once)
+        file_path: Path to the output file
+
+    Returns:
+        True if successful, False otherwise
+    """
+    from app.utils.dataset_store import temp_path_for
+
+    file_path = Path(file_path)
+    tmp_path = temp_path_for(file_path)
+    try:
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            for chunk in iter_markdown_chunks(lines):
+                file.write(chunk)
+        os.replace(tmp_path, file_path)
+        logging.info(f"Successfully wrote markdown to {file_path}")
+        return True
+    except (IOError, OSError) as e:
+        logging.error(f"Error writing to file {file_path}: {e}")
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+        return False
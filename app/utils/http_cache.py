@@ -0,0 +1,125 @@
+"""
+Helpers for serving precomposed JSON payloads and stored datasets with ETags
+and pre-compressed bodies.
+"""
+import gzip
+import hashlib
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, IO, Iterator, Optional, Union
+
+from flask import Response, request
+
+from app.utils.dataset_store import is_compressed, resolve_dataset_path
+
+# Bodies smaller than this are not worth compressing
+_MIN_COMPRESS_SIZE = 1024
+# Read size when streaming dataset files
+_FILE_CHUNK_SIZE = 64 * 1024
+
+@dataclass(frozen=True)
+class PrecomposedPayload:
+    """A serialized JSON document ready to be sent, with its ETag and gzip variant."""
+    etag: str
+    body: bytes
+    gzip_body: Optional[bytes] = None
+
+def build_payload(data: Any, version: Optional[str] = None) -> PrecomposedPayload:
+    """
+    Serializes data once and pre-compresses it.
+
+    Args:
+        data: JSON-serializable data
+        version: Version string used as the ETag. If None, a hash of the body is used.
+
+    Returns:
+        PrecomposedPayload
+    """
+    body = json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    etag = version or hashlib.sha1(body).hexdigest()
+    gzip_body = gzip.compress(body, compresslevel=6) if len(body) >= _MIN_COMPRESS_SIZE else None
+    return PrecomposedPayload(etag=etag, body=body, gzip_body=gzip_body)
+
+def client_accepts_gzip() -> bool:
+    """True if the current request accepts a gzip-encoded response."""
+    return 'gzip' in request.accept_encodings
+
+def payload_response(payload: PrecomposedPayload, mimetype: str = 'application/json') -> Response:
+    """
+    Builds the response for a precomposed payload.
+
+    Answers 304 when the client's If-None-Match matches, sends the gzip body
+    to clients that accept it, and asks clients to revalidate on every use
+    (Cache-Control: no-cache).
+
+    Args:
+        payload: The payload to send
+        mimetype: Response mimetype
+
+    Returns:
+        Flask Response
+    """
+    # Weak ETag: the identity and gzip bodies are the same representation
+    if request.if_none_match.contains_weak(payload.etag):
+        response = Response(status=304)
+    elif payload.gzip_body is not None and client_accepts_gzip():
+        response = Response(payload.gzip_body, mimetype=mimetype)
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = Response(payload.body, mimetype=mimetype)
+
+    response.set_etag(payload.etag, weak=True)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.vary.add('Accept-Encoding')
+    return response
+
+def _iter_file(f: IO) -> Iterator[bytes]:
+    try:
+        while True:
+            chunk = f.read(_FILE_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        f.close()
+
+def dataset_file_response(path: Union[str, Path], mimetype: str = 'application/json') -> Response:
+    """
+    Streams a stored dataset (see app.utils.dataset_store) as the response body.
+
+    A dataset stored compressed is sent as is, with Content-Encoding: gzip, to
+    clients that accept gzip and decompressed on the fly for the others. The
+    ETag is derived from the file's modification time and size, so unchanged
+    datasets are answered with 304.
+
+    Args:
+        path: Plain dataset path (e.g. from get_dynamic_data_path)
+        mimetype: Response mimetype
+
+    Returns:
+        Flask Response
+
+    Raises:
+        FileNotFoundError: If the dataset does not exist
+    """
+    resolved = resolve_dataset_path(path)
+    stat = resolved.stat()
+    etag = f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    elif not is_compressed(resolved):
+        response = Response(_iter_file(open(resolved, 'rb')), mimetype=mimetype)
+        response.content_length = stat.st_size
+    elif client_accepts_gzip():
+        response = Response(_iter_file(open(resolved, 'rb')), mimetype=mimetype)
+        response.headers['Content-Encoding'] = 'gzip'
+        response.content_length = stat.st_size
+    else:
+        response = Response(_iter_file(gzip.open(resolved, 'rb')), mimetype=mimetype)
+
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.vary.add('Accept-Encoding')
+    return response
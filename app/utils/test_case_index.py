@@ -0,0 +1,253 @@
+"""
+Per-environment index of the IOCore2 test-case catalog, used to sync it incrementally.
+
+The index (data/<env>/_test_cases_index.json) maps every test case key to
+its newest version, a fingerprint of that version's content and its update
+time, and keeps the high-water mark of the update times seen so far.
+Comparing a download against it yields the test cases added, updated (new
+version or changed content) and removed since the previous sync; versions
+older than the indexed one are ignored.
+"""
+import hashlib
+import json
+import logging
+import itertools
+import os
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.utils.dataset_store import temp_path_for
+from app.utils.file_operations import get_dynamic_data_path
+
+INDEX_FILE = "_test_cases_index.json"
+_INDEX_FORMAT = 2 # 2: entries keyed by test case key instead of '<key>@<version>'
+
+# Fields that may carry a test case's last update time, most specific first
+_UPDATED_FIELDS = ('updated', 'updatedOn', 'modifiedOn', 'lastModified')
+
+# Keys listed per change type in sync reports
+_MAX_REPORTED_IDS = 100
+
+def test_case_key(test_case: Dict[str, Any]) -> str:
+    """Key of a test case, shared by all its versions."""
+    return str(test_case.get('key', ''))
+
+def test_case_version(test_case: Dict[str, Any]) -> Any:
+    """Version number of a test case, or None."""
+    version = test_case.get('version')
+    if isinstance(version, dict):
+        version = version.get('number')
+    return version
+
+def _version_order(version: Any) -> Tuple[int, float, str]:
+    """Sort key for version numbers: numeric versions compare as numbers, others as text."""
+    if version is None:
+        return (0, 0.0, '')
+    try:
+        return (1, float(version), '')
+    except (TypeError, ValueError):
+        return (2, 0.0, str(version))
+
+def test_case_updated(test_case: Dict[str, Any]) -> Optional[str]:
+    """Last update time of a test case (ISO 8601 string), if it has one."""
+    version = test_case.get('version') if isinstance(test_case.get('version'), dict) else {}
+    for source in (test_case, version):
+        for name in _UPDATED_FIELDS:
+            if source.get(name):
+                return str(source[name])
+    return version.get('createdOn') or test_case.get('createdOn')
+
+def _is_deleted(test_case: Dict[str, Any]) -> bool:
+    return bool(test_case.get('deleted') or test_case.get('isDeleted'))
+
+def _fingerprint(test_case: Dict[str, Any]) -> str:
+    canonical = json.dumps(test_case, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+@dataclass
+class TestCaseChanges:
+    """Keys of the test cases added, updated and removed by one sync."""
+    mode: str  # 'full' or 'incremental'
+    added: List[str] = field(default_factory=list)
+    updated: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.updated or self.removed)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Counts plus the first keys of each change type."""
+        report = {'mode': self.mode}
+        for name, ids in asdict(self).items():
+            if name == 'mode':
+                continue
+            report[f"{name}Count"] = len(ids)
+            report[name] = ids[:_MAX_REPORTED_IDS]
+        return report
+
+class TestCaseIndex:
+    """Fingerprints and update times of the test cases in test_cases.json."""
+
+    def __init__(
+        self,
+        entries: Optional[Dict[str, Dict[str, Any]]] = None,
+        high_water_mark: Optional[str] = None,
+        last_full_sync: Optional[str] = None,
+        last_sync: Optional[Dict[str, Any]] = None
+    ):
+        self.entries = entries or {}
+        self.high_water_mark = high_water_mark
+        self.last_full_sync = last_full_sync
+        self.last_sync = last_sync
+
+    @classmethod
+    def load(cls, environment: str) -> 'TestCaseIndex':
+        """Loads the index of an environment, or an empty index if there is none."""
+        index_path = get_dynamic_data_path(INDEX_FILE, environment=environment)
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return cls()
+        except (OSError, ValueError) as e:
+            logging.warning(f"Could not read test case index {index_path}, a full sync will rebuild it: {e}")
+            return cls()
+        if not isinstance(data, dict) or data.get('format') != _INDEX_FORMAT:
+            return cls()
+        return cls(data.get('entries'), data.get('highWaterMark'), data.get('lastFullSync'), data.get('lastSync'))
+
+    def save(self, environment: str) -> None:
+        """Writes the index atomically."""
+        index_path = get_dynamic_data_path(INDEX_FILE, environment=environment)
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = temp_path_for(index_path)
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'format': _INDEX_FORMAT,
+                    'highWaterMark': self.high_water_mark,
+                    'lastFullSync': self.last_full_sync,
+                    'lastSync': self.last_sync,
+                    'entries': self.entries
+                }, f, separators=(',', ':'))
+            os.replace(tmp_path, index_path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+    def needs_full_sync(self, max_age_hours: float) -> bool:
+        """True if the index is empty or its last full sync is older than max_age_hours."""
+        if not self.entries or not self.high_water_mark or not self.last_full_sync:
+            return True
+        return datetime.fromisoformat(self.last_full_sync) < datetime.now() - timedelta(hours=max_age_hours)
+
+    def start_sync(self, full: bool) -> 'TestCaseSync':
+        """Starts comparing downloaded test cases against the index."""
+        return TestCaseSync(self, full)
+
+class TestCaseSync:
+    """
+    Compares downloaded test cases against an index and updates it.
+
+    In a full sync every test case is downloaded, so indexed keys that were
+    not seen are removals. An incremental sync only sees changed test cases;
+    removals are the ones flagged as deleted. A version older than the one
+    already indexed (or seen earlier in the same download) is ignored.
+    """
+
+    def __init__(self, index: TestCaseIndex, full: bool):
+        self.index = index
+        self.full = full
+        self.changes = TestCaseChanges(mode='full' if full else 'incremental')
+        self._entries = {} if full else dict(index.entries)
+        self._seen: Set[str] = set()
+        self._reported: Set[str] = set()
+        self._high_water_mark = index.high_water_mark
+
+    def add(self, test_case: Dict[str, Any]) -> bool:
+        """
+        Records one downloaded test case.
+
+        Returns:
+            True if it is new, a newer version, changed or deleted since the last sync
+        """
+        key = test_case_key(test_case)
+        version = test_case_version(test_case)
+        updated = test_case_updated(test_case)
+        if updated and (self._high_water_mark is None or updated > self._high_water_mark):
+            self._high_water_mark = updated
+
+        current = self._entries.get(key)
+        if current is not None and _version_order(version) < _version_order(current.get('version')):
+            return False # Superseded version
+
+        previous = self.index.entries.get(key)
+        if _is_deleted(test_case):
+            if key in self._entries:
+                del self._entries[key]
+                self.changes.removed.append(key)
+                return True
+            return False
+
+        fingerprint = _fingerprint(test_case)
+        self._seen.add(key)
+        self._entries[key] = {'version': version, 'hash': fingerprint, 'updated': updated}
+        if previous is not None and previous['hash'] == fingerprint:
+            return False
+        if key not in self._reported:
+            self._reported.add(key)
+            (self.changes.added if previous is None else self.changes.updated).append(key)
+        return True
+
+    def finish(self) -> TestCaseChanges:
+        """Applies the sync to the index (save it separately) and returns the changes."""
+        if self.full:
+            self.changes.removed.extend(sorted(set(self.index.entries) - self._seen))
+            self.index.last_full_sync = datetime.now().isoformat()
+        self.index.entries = self._entries
+        self.index.high_water_mark = self._high_water_mark
+        summary = self.changes.to_dict()
+        summary['syncedAt'] = datetime.now().isoformat()
+        self.index.last_sync = summary
+        logging.info(
+            f"Test case {self.changes.mode} sync: {len(self.changes.added)} added, "
+            f"{len(self.changes.updated)} updated, {len(self.changes.removed)} removed"
+        )
+        return self.changes
+
+def merge_test_cases(
+    store: List[Dict[str, Any]],
+    changed: Iterable[Dict[str, Any]],
+    removed: Iterable[str] = ()
+) -> List[Dict[str, Any]]:
+    """
+    Merges changed test cases into the stored catalog, one entry per key.
+
+    A changed test case replaces the stored entry of its key unless that entry
+    is a newer version; keys in removed are dropped. Superseded versions
+    already in the store are dropped as well.
+
+    Args:
+        store: Test cases from test_cases.json
+        changed: Test cases reported as changed by TestCaseSync.add
+        removed: Keys of removed test cases
+
+    Returns:
+        The merged catalog, in store order with new keys appended
+    """
+    removed = set(removed)
+    positions: Dict[str, int] = {}
+    merged: List[Dict[str, Any]] = []
+    for item in itertools.chain(store, changed):
+        key = test_case_key(item)
+        if key in removed:
+            continue
+        position = positions.get(key)
+        if position is None:
+            positions[key] = len(merged)
+            merged.append(item)
+        elif _version_order(test_case_version(item)) >= _version_order(test_case_version(merged[position])):
+            merged[position] = item
+    return merged
@@ -73,8 +73,13 @@ def get_api_client() -> Optional[IOCore2ApiClient]:
     """
     if 'cookies' not in session or 'url' not in session:
         return None
-        
-    return IOCore2ApiClient(
-        base_url=session['url'],
-        cookies=session['cookies']
-    ) 
\ No newline at end of file
+
+    try:
+        from app.api.client_pool import get_pooled_client
+    except ImportError:
+        # Standalone monitor app without the pool
+        return IOCore2ApiClient(
+            base_url=session['url'],
+            cookies=session['cookies']
+        )
+    return get_pooled_client(session['url'], session['cookies'], client_class=IOCore2ApiClient) 
\ No newline at end of file
@@ -0,0 +1,344 @@
+"""
+Tests for ascs_repository: single-ASC updates (revisions, moves and
+conflicts between worker processes sharing the same _ascs.json) and
+paged list queries.
+"""
+import sys
+import os
+import json
+import multiprocessing
+
+import pytest
+from flask import Flask
+
+# Add the app directory to the path so we can import the module
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.exceptions import ConflictError, ResourceNotFoundError, ValidationError
+from app.data_access import ascs_repository
+from app.data_access.ascs_repository import (
+    create_asc, delete_asc, get_asc, get_asc_store, move_asc, patch_asc, query_ascs, replace_asc, save_ascs,
+    update_asc_record
+)
+
+def _make_app(static_folder):
+    app = Flask(__name__, static_folder=str(static_folder))
+    app.secret_key = 'test_secret_key'
+    return app
+
+def _write_ascs(static_folder, ascs):
+    path = static_folder / 'ASC' / 'data' / '_ascs.json'
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(ascs), encoding='utf-8')
+    return path
+
+def _sample_ascs():
+    return [
+        {'id': 'ASC-0001', 'guid': 'g1', 'status': 'Initial', 'model': 'M1', 'revision': 1},
+        {'id': 'ASC-0002', 'guid': 'g2', 'status': 'In Progress', 'model': 'M2'},
+    ]
+
+@pytest.fixture
+def app(tmp_path):
+    _write_ascs(tmp_path, _sample_ascs())
+    app = _make_app(tmp_path)
+    with app.app_context():
+        yield app
+    ascs_repository._store = ascs_repository._AscStore()
+    ascs_repository._index = None
+
+def test_patch_bumps_revision_and_writes_file(app, tmp_path):
+    """A patch with the current revision is applied and written through to disk."""
+    updated = patch_asc('ASC-0001', {'model': 'M9'}, expected_revision=1)
+    assert updated['model'] == 'M9'
+    assert updated['revision'] == 2
+
+    with open(tmp_path / 'ASC' / 'data' / '_ascs.json', encoding='utf-8') as f:
+        on_disk = {asc['id']: asc for asc in json.load(f)}
+    assert on_disk['ASC-0001']['model'] == 'M9'
+    assert on_disk['ASC-0001']['revision'] == 2
+
+def test_patch_with_stale_revision_conflicts(app):
+    """A patch based on an old revision raises ConflictError with the current record."""
+    patch_asc('ASC-0001', {'model': 'M9'}, expected_revision=1)
+    with pytest.raises(ConflictError) as excinfo:
+        patch_asc('ASC-0001', {'model': 'M5'}, expected_revision=1)
+    assert excinfo.value.status_code == 409
+    assert excinfo.value.details['asc']['model'] == 'M9'
+    assert get_asc('ASC-0001')['model'] == 'M9'
+
+def test_patch_validation(app):
+    """Immutable fields, unknown statuses and unknown IDs are rejected."""
+    with pytest.raises(ValidationError):
+        patch_asc('ASC-0001', {'revision': 5})
+    with pytest.raises(ValidationError):
+        patch_asc('ASC-0001', {'status': 'Nope'})
+    with pytest.raises(ValidationError):
+        patch_asc('ASC-0001', {})
+    with pytest.raises(ResourceNotFoundError):
+        patch_asc('ASC-9999', {'model': 'M1'})
+
+def test_move_without_revision_field(app):
+    """Records without a revision start at 0; moving them sets revision 1."""
+    moved = move_asc('ASC-0002', 'In Review', expected_revision=0)
+    assert moved['status'] == 'In Review'
+    assert moved['revision'] == 1
+    with pytest.raises(ConflictError):
+        move_asc('ASC-0002', 'Validated', expected_revision=0)
+
+def test_store_reloads_after_external_write(app, tmp_path):
+    """A file written by another process is picked up on the next access."""
+    store = get_asc_store()
+    version = store.version
+    ascs = _sample_ascs()
+    ascs[0]['revision'] = 7
+    path = _write_ascs(tmp_path, ascs)
+    os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(path).st_mtime_ns + 1_000_000))
+
+    assert get_asc('ASC-0001')['revision'] == 7
+    assert get_asc_store().version > version
+
+def _many_ascs(count=25):
+    statuses = ('Initial', 'In Progress', 'In Review')
+    return [
+        {
+            'id': f"ASC-{n:04d}", 'guid': f"g{n}", 'status': statuses[n % 3],
+            'affiliateId': 'AFF-1' if n % 2 else 'AFF-2', 'model': 'M1',
+            'ascScore': f"{n % 5 * 10}%",
+            'gpInstances': [{'gpId': 'GP-1', 'spInstances': [{'spId': 'SP-1'}, {'spId': 'SP-2'}]}],
+        }
+        for n in range(1, count + 1)
+    ]
+
+def _page_through(limit, **query):
+    items, cursor, totals = [], None, set()
+    while True:
+        page = query_ascs(limit=limit, cursor=cursor, **query)
+        assert len(page['items']) <= limit
+        items.extend(page['items'])
+        totals.add(page['total'])
+        cursor = page['nextCursor']
+        if cursor is None:
+            return items, totals
+
+def test_query_pages_cover_all_matches_once(app, tmp_path):
+    """Following nextCursor returns every ASC exactly once, in sort order."""
+    _write_ascs(tmp_path, _many_ascs())
+    items, totals = _page_through(limit=4)
+    assert [asc['id'] for asc in items] == [f"ASC-{n:04d}" for n in range(1, 26)]
+    assert totals == {25}
+
+def test_query_pages_with_duplicate_sort_values(app, tmp_path):
+    """Descending pages on a non-unique key neither skip nor repeat records (ties broken by ID)."""
+    _write_ascs(tmp_path, _many_ascs())
+    items, _ = _page_through(limit=3, sort='-ascScore')
+    ids = [asc['id'] for asc in items]
+    assert sorted(ids) == [f"ASC-{n:04d}" for n in range(1, 26)]
+    scores = [float(asc['ascScore'].rstrip('%')) for asc in items]
+    assert scores == sorted(scores, reverse=True)
+
+def test_query_filters_and_summary_projection(app, tmp_path):
+    """Field filters combine, and 'summary' replaces nested instances by counts."""
+    _write_ascs(tmp_path, _many_ascs())
+    items, totals = _page_through(limit=2, status=['Initial'], affiliate=['AFF-1'], fields=['summary'])
+    assert totals == {len(items)}
+    assert items and all(asc['status'] == 'Initial' and asc['affiliateId'] == 'AFF-1' for asc in items)
+    assert all('gpInstances' not in asc for asc in items)
+    assert items[0]['gpInstanceCount'] == 1
+    assert items[0]['spInstanceCount'] == 2
+
+def test_query_rejects_bad_sort_and_cursor(app):
+    """Unknown sort keys and malformed cursors raise ValidationError."""
+    with pytest.raises(ValidationError):
+        query_ascs(sort='guid')
+    with pytest.raises(ValidationError):
+        query_ascs(cursor='not-a-cursor')
+
+def _patch_worker(static_folder, ready, go, results, name):
+    """Worker process: loads the store, waits for the signal, then patches ASC-0001 at revision 1."""
+    from app.routes.ascs import _asc_delta_response
+
+    app = _make_app(static_folder)
+    with app.test_request_context():
+        get_asc_store()
+        ready.set()
+        go.wait(10)
+        response = _asc_delta_response(lambda: patch_asc('ASC-0001', {'model': name}, expected_revision=1))
+        status = response[1] if isinstance(response, tuple) else response.status_code
+        results.put((name, status))
+
+def _run_workers(tmp_path, simultaneous):
+    _write_ascs(tmp_path, _sample_ascs())
+    ctx = multiprocessing.get_context('fork')
+    results = ctx.Queue()
+    workers = []
+    for name in ('A', 'B'):
+        ready, go = ctx.Event(), ctx.Event()
+        process = ctx.Process(target=_patch_worker, args=(tmp_path, ready, go, results, name))
+        process.start()
+        workers.append((name, process, ready, go))
+
+    for _, _, ready, _ in workers:
+        assert ready.wait(10)
+    statuses = {}
+    if simultaneous:
+        for _, _, _, go in workers:
+            go.set()
+        for _ in workers:
+            name, status = results.get(timeout=10)
+            statuses[name] = status
+    else:
+        for name, _, _, go in workers:
+            go.set()
+            got, status = results.get(timeout=10)
+            statuses[got] = status
+    for _, process, _, _ in workers:
+        process.join(10)
+
+    with open(tmp_path / 'ASC' / 'data' / '_ascs.json', encoding='utf-8') as f:
+        on_disk = {asc['id']: asc for asc in json.load(f)}
+    return statuses, on_disk['ASC-0001']
+
+@pytest.mark.skipif(sys.platform == 'win32', reason="needs the fork start method")
+def test_second_worker_gets_conflict(tmp_path):
+    """A worker patching right after another worker's patch at the same revision gets 409."""
+    statuses, asc = _run_workers(tmp_path, simultaneous=False)
+    assert statuses == {'A': 200, 'B': 409}
+    assert asc['model'] == 'A'
+    assert asc['revision'] == 2
+
+@pytest.mark.skipif(sys.platform == 'win32', reason="needs the fork start method")
+def test_concurrent_workers_accept_one_patch(tmp_path):
+    """Two workers patching the same revision at once: exactly one wins, the other gets 409."""
+    statuses, asc = _run_workers(tmp_path, simultaneous=True)
+    assert sorted(statuses.values()) == [200, 409]
+    winner = next(name for name, status in statuses.items() if status == 200)
+    assert asc['model'] == winner
+    assert asc['revision'] == 2
+
+def test_replace_checks_revision_and_keeps_identity(app):
+    """A full-record edit based on an old revision conflicts; a current one keeps ID and GUID."""
+    patch_asc('ASC-0001', {'model': 'M9'}, expected_revision=1)
+    with pytest.raises(ConflictError):
+        replace_asc('ASC-0001', {'id': 'ASC-0001', 'model': 'Stale', 'revision': 1}, expected_revision=1)
+
+    saved = replace_asc('ASC-0001', {'id': 'ASC-0001', 'guid': 'other', 'model': 'M10', 'status': 'Initial'}, expected_revision=2)
+    assert saved['model'] == 'M10'
+    assert saved['guid'] == 'g1'
+    assert saved['revision'] == 3
+    assert get_asc('ASC-0001') == saved
+
+def test_create_and_delete(app, tmp_path):
+    """New ASCs get the next ID; deletes check the revision and are written through."""
+    created = create_asc({'guid': 'g3', 'status': 'Initial', 'model': 'M3'})
+    assert created['id'] == 'ASC-0003'
+    with pytest.raises(ConflictError):
+        delete_asc('ASC-0001', expected_revision=0)
+    delete_asc('ASC-0001', expected_revision=1)
+    with pytest.raises(ResourceNotFoundError):
+        delete_asc('ASC-0001')
+
+    with open(tmp_path / 'ASC' / 'data' / '_ascs.json', encoding='utf-8') as f:
+        assert [asc['id'] for asc in json.load(f)] == ['ASC-0002', 'ASC-0003']
+
+def test_failed_change_leaves_record_untouched(app):
+    """A change that raises part-way does not alter the stored record or its revision."""
+    def change(asc):
+        asc['model'] = 'Half-done'
+        raise ResourceNotFoundError("GP instance", 'missing')
+
+    with pytest.raises(ResourceNotFoundError):
+        update_asc_record('ASC-0001', change)
+    assert get_asc('ASC-0001')['model'] == 'M1'
+    assert get_asc('ASC-0001')['revision'] == 1
+
+def test_unreadable_file_keeps_last_good_copy(app, tmp_path):
+    """A truncated _ascs.json (e.g. written in place by an old worker) does not empty the store."""
+    assert get_asc('ASC-0001') is not None
+    path = tmp_path / 'ASC' / 'data' / '_ascs.json'
+    path.write_text('[{"id": "ASC-0001", "gu', encoding='utf-8')
+    assert get_asc('ASC-0001')['model'] == 'M1'
+
+    _write_ascs(tmp_path, [{'id': 'ASC-0005', 'status': 'Initial'}])
+    assert get_asc('ASC-0005') is not None
+
+def test_save_ascs_replaces_file_atomically(app, tmp_path):
+    """The bulk save writes through a temporary file and keeps a backup."""
+    assert save_ascs([{'id': 'ASC-0009', 'status': 'Initial'}])
+    data_dir = tmp_path / 'ASC' / 'data'
+    assert [p.name for p in data_dir.iterdir() if p.name.endswith('.tmp')] == []
+    assert json.loads((data_dir / '_ascs.json.bak').read_text(encoding='utf-8'))[0]['id'] == 'ASC-0001'
+    assert get_asc('ASC-0009') is not None
+
+@pytest.fixture
+def client(tmp_path):
+    from app import create_app
+    _write_ascs(tmp_path, [
+        {**asc, 'gpInstances': [{'gpId': 'GP-1', 'guid': 'gp1', 'spInstances': [{'spId': 'SP-1', 'guid': 'sp1'}]}]}
+        for asc in _sample_ascs()
+    ])
+    flask_app = create_app()
+    flask_app.config['TESTING'] = True
+    flask_app.static_folder = str(tmp_path)
+    client = flask_app.test_client()
+    with client.session_transaction() as sess:
+        sess['cookies'] = {}
+        sess['url'] = 'http://localhost'
+        sess['environment'] = 'ciav'
+        sess['username'] = 'alice'
+    yield client
+    ascs_repository._store = ascs_repository._AscStore()
+    ascs_repository._index = None
+
+def test_put_after_concurrent_patch_conflicts(client):
+    """An edit dialog saving an ASC patched by someone else since it was opened gets 409."""
+    opened = client.get('/api/ascs/ASC-0001').get_json()
+    assert client.patch('/api/ascs/ASC-0001', json={'revision': 1, 'changes': {'model': 'M9'}}).status_code == 200
+
+    response = client.put('/api/ascs', json={**opened, 'model': 'Edited'})
+    assert response.status_code == 409
+    assert response.get_json()['asc']['model'] == 'M9'
+
+    current = client.get('/api/ascs/ASC-0001').get_json()
+    response = client.put('/api/ascs', json={**current, 'model': 'Edited'})
+    assert response.status_code == 200
+    assert response.get_json()['asc']['revision'] == 3
+
+def test_instance_routes_bump_revision(client):
+    """GP/SP instance changes apply to the current record and report the new revision as ETag."""
+    response = client.post('/api/ascs/ASC-0001/gpInstances', json={'gpId': 'GP-2'})
+    assert response.status_code == 201
+    assert response.headers['ETag'] == '"2"'
+
+    response = client.put('/api/ascs/ASC-0001/gpInstances/gp1/spInstances/sp1', json={'spVersion': '2.0'})
+    assert response.status_code == 200
+    assert response.get_json()['spVersion'] == '2.0'
+    assert response.headers['ETag'] == '"3"'
+
+    assert client.delete('/api/ascs/ASC-0001/gpInstances/gp1/spInstances/missing').status_code == 404
+    assert client.delete('/api/ascs/ASC-0001/gpInstances/gp1/spInstances/sp1').status_code == 200
+    asc = client.get('/api/ascs/ASC-0001').get_json()
+    assert asc['revision'] == 4
+    assert [gp['gpId'] for gp in asc['gpInstances']] == ['GP-1', 'GP-2']
+    assert asc['gpInstances'][0]['spInstances'] == []
+
+def test_delete_route_checks_revision(client):
+    """DELETE with a stale revision is refused; without one it deletes."""
+    assert client.delete('/api/ascs?id=ASC-0001&revision=0').status_code == 409
+    assert client.delete('/api/ascs?id=ASC-0001').status_code == 200
+    assert client.get('/api/ascs/ASC-0001').status_code == 404
+
+def test_cursor_from_another_sort_is_rejected(app, tmp_path):
+    """A cursor issued for one sort cannot be used with another (400, not a type error)."""
+    _write_ascs(tmp_path, _many_ascs())
+    cursor = query_ascs(limit=3, sort='-ascScore')['nextCursor']
+    with pytest.raises(ValidationError):
+        query_ascs(limit=3, sort='id', cursor=cursor)
+
+    id_cursor = query_ascs(limit=3, sort='status')['nextCursor']
+    with pytest.raises(ValidationError):
+        query_ascs(limit=3, sort='-status', cursor=id_cursor)
+
+    forged = ascs_repository.encode_cursor('-ascScore', 'high', 'ASC-0001')
+    with pytest.raises(ValidationError):
+        query_ascs(limit=3, sort='-ascScore', cursor=forged)
@@ -0,0 +1,84 @@
+"""
+Tests for datasets written and downloaded by several threads at once:
+unique temporary files (app/utils/dataset_store.py) and one download per
+dataset and environment at a time (app/api/iocore2.py).
+"""
+import sys
+import os
+import threading
+import time
+
+import pytest
+
+# Add the app directory to the path so we can import the module
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.api.iocore2 import _one_sync_at_a_time
+from app.utils.dataset_store import read_dataset, temp_path_for, write_dataset
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    # Data paths are relative to the working directory (data/<env>/...)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+def test_temp_paths_are_unique_and_hidden(tmp_path):
+    """Every call names a different hidden temporary file next to the target."""
+    target = tmp_path / 'SREQ.json'
+    paths = {temp_path_for(target) for _ in range(100)}
+    assert len(paths) == 100
+    assert all(path.parent == tmp_path and path.name.startswith('.SREQ.json.') for path in paths)
+
+def test_threads_writing_one_dataset_do_not_interleave(tmp_path):
+    """Threads replacing the same dataset leave one complete version and no temporary files."""
+    path = tmp_path / 'SREQ.json'
+    versions = [[{'sreqNumber': f"S-{writer}-{n}"} for n in range(2000)] for writer in range(6)]
+    start = threading.Barrier(len(versions))
+
+    def write(rows):
+        start.wait(5)
+        for _ in range(5):
+            assert write_dataset(rows, path)
+
+    threads = [threading.Thread(target=write, args=(rows,)) for rows in versions]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+
+    assert read_dataset(path) in versions
+    assert list(tmp_path.glob('.*.tmp')) == []
+
+class _FakeClient:
+    def __init__(self):
+        self.active = {}
+        self.max_active = {}
+        self.lock = threading.Lock()
+
+    @_one_sync_at_a_time('IER.json')
+    def get_ier_coverage(self, environment, progress=None):
+        with self.lock:
+            self.active[environment] = self.active.get(environment, 0) + 1
+            self.max_active[environment] = max(self.max_active.get(environment, 0), self.active[environment])
+        time.sleep(0.05)
+        with self.lock:
+            self.active[environment] -= 1
+        return {'environment': environment}
+
+def _run_concurrently(calls):
+    threads = [threading.Thread(target=call) for call in calls]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+def test_downloads_of_one_dataset_are_serialized_per_environment():
+    """Overlapping downloads of a dataset run one at a time in each environment."""
+    client = _FakeClient()
+    _run_concurrently(
+        [lambda: client.get_ier_coverage(environment='ciav') for _ in range(4)]
+        + [lambda: client.get_ier_coverage('cwix') for _ in range(2)]
+    )
+
+    assert client.max_active == {'ciav': 1, 'cwix': 1}
+    assert client.get_ier_coverage('ciav') == {'environment': 'ciav'}
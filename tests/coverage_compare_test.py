@@ -0,0 +1,78 @@
+"""
+Tests for the ciav/cwix coverage comparison (app/data_models/coverage_compare.py).
+"""
+import sys
+import os
+
+# Add the app directory to the path so we can import the module
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.data_models.coverage_compare import compare_coverage, summarize_environment
+from app.utils.dataset_store import write_dataset
+
+def _sreq(number, si, tin, key=None, status='Active'):
+    return {
+        'sreqNumber': number, 'sreqName': f"Requirement {number}", 'status': status,
+        'siNumber': si, 'siName': f"Service {si}", 'tinNumber': tin, 'tinName': f"TIN {tin}",
+        'testCaseKey': key, 'testCaseName': f"Test {key}" if key else None,
+    }
+
+def _environment(tmp_path, name, sreq_rows, ier_rows=()):
+    directory = tmp_path / name
+    write_dataset(list(sreq_rows), directory / 'SREQ.json')
+    write_dataset(list(ier_rows), directory / 'IER.json')
+    return summarize_environment(directory / 'SREQ.json', directory / 'IER.json')
+
+def _by(comparison, grouping):
+    return {group[grouping]: group for group in comparison[f'by_{grouping}']}
+
+def test_requirement_counts_in_every_group(tmp_path):
+    """A requirement in several TINs (and SIs) is counted once in each of them, not only its first row's."""
+    rows = [
+        _sreq('S-1', 'SI-1', 'T-1', 'TC-1'), _sreq('S-1', 'SI-1', 'T-2', 'TC-1'),
+        _sreq('S-1', 'SI-2', 'T-3', 'TC-1'), _sreq('S-1', 'SI-1', 'T-1', 'TC-2'),
+        _sreq('S-2', 'SI-1', 'T-2'),
+    ]
+    left = _environment(tmp_path, 'ciav', rows)
+    right = _environment(tmp_path, 'cwix', rows)
+    summary = left.sreq['S-1']
+    assert len(summary.groups) == 3
+    assert summary.test_cases == {'TC-1', 'TC-2'}
+
+    comparison = compare_coverage(left, right, 'sreq')
+    by_tin = _by(comparison, 'tin')
+    assert sorted(by_tin) == ['T-1', 'T-2', 'T-3']
+    assert by_tin['T-2']['ciav']['requirements'] == 2
+    assert by_tin['T-2']['ciav']['covered'] == 1
+    assert by_tin['T-3']['tin_name'] == 'TIN T-3'
+    by_si = _by(comparison, 'si')
+    assert by_si['SI-1']['ciav']['requirements'] == 2
+    assert by_si['SI-2']['cwix']['requirements'] == 1
+    assert comparison['totals']['ciav']['requirements'] == 2
+
+def test_groups_follow_each_environment(tmp_path):
+    """A requirement in different TINs per environment counts on each side only in its own TINs."""
+    left = _environment(tmp_path, 'ciav', [_sreq('S-1', 'SI-1', 'T-1', 'TC-1')])
+    right = _environment(tmp_path, 'cwix', [_sreq('S-1', 'SI-1', 'T-2', 'TC-9')])
+    by_tin = _by(compare_coverage(left, right, 'sreq'), 'tin')
+
+    assert by_tin['T-1']['ciav']['requirements'] == 1
+    assert by_tin['T-1']['cwix']['requirements'] == 0
+    assert by_tin['T-1']['covered_only_ciav'] == 1
+    assert by_tin['T-2']['cwix']['covered'] == 1
+    assert by_tin['T-2']['covered_only_cwix'] == 1
+
+def test_covered_only_lists_and_missing_requirements(tmp_path):
+    """Requirements covered on one side only are listed, with whether the other side has them."""
+    left = _environment(tmp_path, 'ciav', [
+        _sreq('S-1', 'SI-1', 'T-1', 'TC-1'), _sreq('S-2', 'SI-1', 'T-1', 'TC-2'),
+        _sreq('S-3', 'SI-1', 'T-1', 'TC-3', status='Deprecated'),
+    ])
+    right = _environment(tmp_path, 'cwix', [_sreq('S-1', 'SI-1', 'T-1')])
+    comparison = compare_coverage(left, right, 'sreq')
+
+    assert [(entry['number'], entry['in_other'], entry['tin']) for entry in comparison['covered_only']['ciav']] == [
+        ('S-1', True, 'T-1'), ('S-2', False, 'T-1')
+    ]
+    assert comparison['covered_only']['cwix'] == []
+    assert [row['number'] for row in comparison['requirements']] == ['S-1', 'S-2']
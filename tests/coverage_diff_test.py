@@ -0,0 +1,122 @@
+"""
+Tests for the coverage diff between a dataset's previous snapshot and its
+current version (app/data_models/coverage_diff.py), and for keeping that
+snapshot when a dataset is replaced (app/utils/dataset_store.py).
+"""
+import sys
+import os
+import json
+
+import pytest
+
+# Add the app directory to the path so we can import the module
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.config import settings
+from app.data_models.coverage_diff import diff_coverage
+from app.utils import dataset_store
+from app.utils.dataset_store import (
+    commit_dataset, gzip_path, is_compressed, open_dataset_writer, previous_dataset_path,
+    read_dataset, resolve_dataset_path, write_dataset
+)
+
+def _sreq(number, key=None, version=1, status='Active', coverage_type=None):
+    return {
+        'sreqNumber': number, 'status': status, 'coverageType': coverage_type,
+        'testCaseKey': key, 'testCaseName': f"Test {key}" if key else None, 'testCaseVersion': version,
+    }
+
+def _diff(tmp_path, previous_rows, current_rows, dataset='sreq'):
+    previous_path, current_path = tmp_path / 'SREQ.previous.json', tmp_path / 'SREQ.json'
+    write_dataset(previous_rows, previous_path)
+    write_dataset(current_rows, current_path)
+    return diff_coverage(previous_path, current_path, dataset)
+
+def test_diff_gained_lost_and_version_changes(tmp_path):
+    """Pairs present in only one snapshot are gained or lost; same pair with a new version is a version change."""
+    previous = [_sreq('S-1', 'TC-1'), _sreq('S-1', 'TC-2'), _sreq('S-2', 'TC-1')]
+    current = [_sreq('S-1', 'TC-1', version=2), _sreq('S-2', 'TC-1', version=2), _sreq('S-2', 'TC-3')]
+    diff = _diff(tmp_path, previous, current)
+
+    assert diff['gained'] == [{'sreqNumber': 'S-2', 'testCaseKey': 'TC-3', 'version': 1}]
+    assert diff['lost'] == [{'sreqNumber': 'S-1', 'testCaseKey': 'TC-2'}]
+    assert diff['version_changed'] == [{'testCaseKey': 'TC-1', 'from': 1, 'to': 2, 'requirements': 2}]
+    assert diff['newly_covered'] == [] and diff['newly_uncovered'] == []
+
+def test_diff_coverage_state_and_requirement_changes(tmp_path):
+    """Requirements gaining their first or losing their last test case, and added/removed requirements."""
+    previous = [_sreq('S-1', 'TC-1'), _sreq('S-2'), _sreq('S-3', 'TC-1')]
+    current = [_sreq('S-1'), _sreq('S-2', 'TC-2'), _sreq('S-4')]
+    diff = _diff(tmp_path, previous, current)
+
+    assert diff['newly_covered'] == ['S-2']
+    assert diff['newly_uncovered'] == ['S-1']
+    assert diff['added'] == ['S-4']
+    assert diff['removed'] == ['S-3']
+    assert diff['counts']['requirements'] == 3
+    assert diff['counts']['previous_requirements'] == 3
+
+def test_diff_ignores_filtered_and_duplicate_rows(tmp_path):
+    """Deprecated/Draft rows, dependency coverage and repeated rows of the same pair are not differences."""
+    previous = [_sreq('S-1', 'TC-1')]
+    current = [
+        _sreq('S-1', 'TC-1'), _sreq('S-1', 'TC-1'),
+        _sreq('S-1', 'TC-9', status='Deprecated'), _sreq('S-1', 'TC-8', coverage_type='tdp'),
+        _sreq('S-5', 'TC-7', status='Draft'),
+    ]
+    diff = _diff(tmp_path, previous, current)
+
+    assert all(count == 0 for name, count in diff['counts'].items() if 'requirements' not in name)
+    assert diff['counts']['requirements'] == 1
+
+def _commit(tmp_path, data, name='SREQ.json'):
+    final_path = tmp_path / name
+    tmp_file = tmp_path / f".{name}.tmp"
+    with open_dataset_writer(tmp_file, final_path) as f:
+        f.write(json.dumps(data).encode('utf-8'))
+    return commit_dataset(tmp_file, final_path, keep_previous=True)
+
+@pytest.mark.parametrize('compression', ['gzip', 'none'])
+def test_commit_keeps_previous_snapshot(tmp_path, monkeypatch, compression):
+    """Replacing a dataset keeps the replaced version as its previous snapshot, in the same storage."""
+    monkeypatch.setattr(settings, 'DATASET_COMPRESSION', compression)
+    _commit(tmp_path, [1])
+    _commit(tmp_path, [2])
+    _commit(tmp_path, [3])
+
+    final_path = tmp_path / 'SREQ.json'
+    assert read_dataset(final_path) == [3]
+    previous = resolve_dataset_path(previous_dataset_path(final_path))
+    assert read_dataset(previous) == [2]
+    assert is_compressed(previous) == (compression == 'gzip')
+    assert not list(tmp_path.glob('.*.tmp'))
+
+def test_live_dataset_stays_in_place_while_snapshotting(tmp_path, monkeypatch):
+    """The live file is never moved away: it is still readable after the snapshot and before the replace."""
+    _commit(tmp_path, [1])
+    final_path = tmp_path / 'SREQ.json'
+    seen = []
+    replace = os.replace
+
+    def checking_replace(src, dst):
+        seen.append(read_dataset(final_path))
+        replace(src, dst)
+
+    monkeypatch.setattr(dataset_store.os, 'replace', checking_replace)
+    _commit(tmp_path, [2])
+
+    assert seen == [[1], [1]]
+    assert read_dataset(final_path) == [2]
+    assert read_dataset(previous_dataset_path(final_path)) == [1]
+
+def test_previous_snapshot_without_hard_links(tmp_path, monkeypatch):
+    """Where hard links are not supported the live file is copied to the snapshot."""
+    def no_link(src, dst):
+        raise OSError("links not supported")
+
+    monkeypatch.setattr(dataset_store.os, 'link', no_link)
+    _commit(tmp_path, [1])
+    _commit(tmp_path, [2])
+    assert read_dataset(tmp_path / 'SREQ.json') == [2]
+    assert read_dataset(previous_dataset_path(tmp_path / 'SREQ.json')) == [1]
+    assert gzip_path(previous_dataset_path(tmp_path / 'SREQ.json')).exists()
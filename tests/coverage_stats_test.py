@@ -0,0 +1,46 @@
+"""
+Tests for the coverage statistics frames (app/data_models/coverage_stats.py).
+"""
+import sys
+import os
+
+# Add the app directory to the path so we can import the module
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.data_models.coverage_stats import _build_ier_frame
+from app.data_models.ier_analysis import IerHierarchyBuilder
+from app.utils.dataset_store import write_dataset
+
+def _ier(ier, tin, idp_tin_name, key=None, state='Active'):
+    return {
+        'piNumber': 'PI-1', 'piName': 'Process', 'ierNumber': ier, 'ierName': f"IER {ier}",
+        'tinName': tin, 'idpTinName': idp_tin_name, 'testCaseKey': key,
+        'testCaseName': f"Test {key}" if key else None, 'testCaseState': state,
+    }
+
+def test_ier_frame_drops_tins_hidden_by_asterisk_rule(tmp_path):
+    """The IER frame keeps the same TIN rows as the IER tree."""
+    rows = [
+        _ier('IER-1', 'TIN A', 'IDP-1 -> TIN A', 'TC-1'),
+        _ier('IER-1', 'TIN *', 'IDP-1 * -> All TINs', 'TC-2'),
+        _ier('IER-2', 'TIN B', 'IDP-2 -> TIN B', 'TC-3'),
+        _ier('IER-2', 'TIN C', 'IDP-3 -> TIN C', 'TC-4'),
+        # Asterisk entries hide TINs even when their own row is skipped
+        _ier('IER-3', 'TIN *', 'IDP-3 * -> All TINs', state='Draft'),
+        _ier('IER-3', 'TIN D', None, 'TC-5'),
+        _ier('IER-3', 'TIN E', 'IDP-2 -> TIN E', state='Deprecated'),
+    ]
+    path = tmp_path / 'IER.json'
+    write_dataset(rows, path)
+    frame = _build_ier_frame(path)
+
+    builder = IerHierarchyBuilder()
+    for row in rows:
+        builder.add({**row, 'idpTinName': row['idpTinName'] or ''})
+    tree_keys = sorted(
+        key for iers in builder.build().values() for services in iers.values()
+        for service in services.values() for key, _ in service['test_cases']
+    )
+    assert sorted(frame['testCaseKey'].dropna()) == tree_keys == ['TC-2', 'TC-3', 'TC-5']
+    assert list(frame['tinName']) == ['TIN *', 'TIN B', 'TIN D']
+    assert 'idpTinName' not in frame.columns
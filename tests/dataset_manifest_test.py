@@ -0,0 +1,59 @@
+"""
+Tests for the per-environment dataset manifest (data/<env>/_datasets.json).
+"""
+import sys
+import os
+import multiprocessing
+
+import pytest
+
+# Add the app directory to the path so we can import the module
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.utils.dataset_manifest import get_dataset_state, record_dataset_state
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    # Data paths are relative to the working directory (data/<env>/...)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+def test_record_and_read_state():
+    """Recorded hashes and validators are returned by get_dataset_state."""
+    record_dataset_state('SREQ', 'ciav', sha256='abc', changed=True, etag='"e1"', record_count=3)
+    state = get_dataset_state('SREQ', 'ciav')
+    assert state['sha256'] == 'abc'
+    assert state['etag'] == '"e1"'
+    assert state['recordCount'] == 3
+    assert state['unchanged'] is False
+    assert get_dataset_state('SREQ', 'cwix') == {}
+
+def test_unchanged_refresh_keeps_update_time():
+    """An unchanged refresh keeps updatedAt and the previous hash."""
+    first = record_dataset_state('IER', 'ciav', sha256='abc', changed=True)
+    second = record_dataset_state('IER', 'ciav', sha256=None, changed=False)
+    assert second['sha256'] == 'abc'
+    assert second['updatedAt'] == first['updatedAt']
+    assert second['unchanged'] is True
+
+def _record_many(dataset, count, start):
+    start.wait(10)
+    for n in range(count):
+        record_dataset_state(dataset, 'ciav', sha256=f"{dataset}-{n}", changed=True)
+
+@pytest.mark.skipif(sys.platform == 'win32', reason="needs the fork start method")
+def test_concurrent_writers_keep_every_dataset():
+    """Processes updating different datasets at the same time do not drop each other's entries."""
+    ctx = multiprocessing.get_context('fork')
+    start = ctx.Event()
+    datasets = ['SREQ', 'IER', 'SREQ_DERIVED', 'TEST_CASES']
+    processes = [ctx.Process(target=_record_many, args=(name, 25, start)) for name in datasets]
+    for process in processes:
+        process.start()
+    start.set()
+    for process in processes:
+        process.join(30)
+        assert process.exitcode == 0
+
+    for name in datasets:
+        assert get_dataset_state(name, 'ciav')['sha256'] == f"{name}-24"
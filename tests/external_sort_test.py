@@ -0,0 +1,68 @@
+"""
+Tests for the external merge sort (app/utils/external_sort.py).
+"""
+import sys
+import os
+import random
+import tempfile
+
+import pytest
+
+# Add the app directory to the path so we can import the module
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.utils import external_sort as external_sort_module
+from app.utils.external_sort import external_sort
+
+@pytest.fixture
+def spills(monkeypatch):
+    """Counts the runs spilled to temporary files."""
+    opened = []
+    temporary_file = tempfile.TemporaryFile
+
+    def counting_temporary_file(*args, **kwargs):
+        spill_file = temporary_file(*args, **kwargs)
+        opened.append(spill_file)
+        return spill_file
+
+    monkeypatch.setattr(external_sort_module.tempfile, 'TemporaryFile', counting_temporary_file)
+    return opened
+
+def _records(count, keys, seed=7):
+    """(key, sequence number) records with many equal keys, in random key order."""
+    rng = random.Random(seed)
+    return [(rng.choice(keys), n) for n in range(count)]
+
+def test_in_memory_sort_matches_sorted(spills):
+    """A stream that fits in one run is sorted without spilling."""
+    records = _records(50, ['b', 'a', 'c'])
+    assert list(external_sort(records, key=lambda r: r[0], run_size=100)) == sorted(records, key=lambda r: r[0])
+    assert spills == []
+
+@pytest.mark.parametrize('run_size', [1, 3, 16, 999])
+def test_spilled_runs_merge_stably(spills, run_size):
+    """With spilled runs, records with equal keys keep their input order, as with sorted()."""
+    records = _records(1000, ['x', 'y', 'z', 'w'])
+    result = list(external_sort(records, key=lambda r: r[0], run_size=run_size))
+
+    assert result == sorted(records, key=lambda r: r[0])
+    assert len(spills) == 1000 // run_size
+    assert all(spill_file.closed for spill_file in spills)
+
+def test_spilled_runs_across_pickle_batches(spills, monkeypatch):
+    """Runs larger than one pickle batch are read back completely and in order."""
+    monkeypatch.setattr(external_sort_module, '_SPILL_BATCH', 7)
+    records = _records(500, list('abcde'))
+    assert list(external_sort(iter(records), key=lambda r: r[0], run_size=60)) == sorted(records, key=lambda r: r[0])
+    assert len(spills) == 8
+
+def test_spill_files_closed_when_input_fails(spills):
+    """An error while reading the input closes the runs spilled so far."""
+    def failing():
+        yield from _records(25, ['a', 'b'])
+        raise RuntimeError("source failed")
+
+    with pytest.raises(RuntimeError):
+        external_sort(failing(), key=lambda r: r[0], run_size=10)
+    assert len(spills) == 2
+    assert all(spill_file.closed for spill_file in spills)
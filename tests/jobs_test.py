@@ -0,0 +1,214 @@
+"""
+Tests for the SQLite background job registry (app/core/jobs.py) and the
+/api/jobs routes.
+"""
+import sys
+import os
+import sqlite3
+import subprocess
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+# Add the app directory to the path so we can import the module
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.config import settings
+from app.core import jobs
+from app.core.jobs import create_job, get_job, list_jobs, request_cancel, run_job
+
+@pytest.fixture(autouse=True)
+def jobs_db(tmp_path, monkeypatch):
+    db_path = tmp_path / 'jobs.sqlite3'
+    monkeypatch.setattr(settings, 'JOBS_DB', db_path)
+    monkeypatch.setattr(jobs, '_schema_ready_for', None)
+    return db_path
+
+def _set_job(db_path, job_id, **fields):
+    """Writes job columns directly, bypassing the registry."""
+    conn = sqlite3.connect(str(db_path), isolation_level=None)
+    try:
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+    finally:
+        conn.close()
+
+def test_create_job_dedupes_active_jobs():
+    """A second job with the same dedupe key returns the active one."""
+    job, created = create_job('refresh_all', 'ciav', dedupe_key='refresh_all:ciav', owner='alice')
+    duplicate, duplicate_created = create_job('refresh_all', 'ciav', dedupe_key='refresh_all:ciav', owner='bob')
+    other, other_created = create_job('refresh_all', 'cwix', dedupe_key='refresh_all:cwix', owner='bob')
+
+    assert created and not duplicate_created and other_created
+    assert duplicate['id'] == job['id']
+    assert duplicate['owner'] == 'alice'
+    assert other['id'] != job['id']
+
+def test_finished_jobs_do_not_dedupe():
+    """Once a job finished, the same dedupe key starts a new job."""
+    job, _ = create_job('sreq_coverage', 'ciav', dedupe_key='sreq:ciav')
+    run_job(job['id'], lambda context: {'count': 1})
+    assert get_job(job['id'])['state'] == 'completed'
+    assert get_job(job['id'])['result'] == {'count': 1}
+
+    second, created = create_job('sreq_coverage', 'ciav', dedupe_key='sreq:ciav')
+    assert created and second['id'] != job['id']
+
+def test_jobs_are_visible_to_owner_and_joined_users():
+    """Jobs are listed for their owner and for users deduplicated onto them."""
+    job, _ = create_job('refresh_all', 'ciav', dedupe_key='refresh_all:ciav', owner='alice')
+    create_job('refresh_all', 'ciav', dedupe_key='refresh_all:ciav', owner='bob')
+
+    assert get_job(job['id'], user='alice')['id'] == job['id']
+    assert get_job(job['id'], user='bob')['id'] == job['id']
+    assert get_job(job['id'], user='carol') is None
+    assert [j['id'] for j in list_jobs(user='carol')] == []
+    assert [j['id'] for j in list_jobs(user='bob')] == [job['id']]
+    assert [j['id'] for j in list_jobs()] == [job['id']]
+
+def test_stale_jobs_expire(monkeypatch, jobs_db):
+    """Active jobs not updated for JOB_STALE_SECONDS are failed, freeing the dedupe key."""
+    monkeypatch.setattr(settings, 'JOB_STALE_SECONDS', 60)
+    job, _ = create_job('refresh_all', 'ciav', dedupe_key='refresh_all:ciav')
+    _set_job(jobs_db, job['id'], state='running', updated_at=(datetime.now() - timedelta(seconds=120)).isoformat())
+
+    expired = get_job(job['id'])
+    assert expired['state'] == 'failed'
+    assert 'stopped reporting' in expired['error']
+    _, created = create_job('refresh_all', 'ciav', dedupe_key='refresh_all:ciav')
+    assert created
+
+def test_heartbeat_keeps_long_running_job_alive(monkeypatch):
+    """A job running longer than the stale timeout without progress reports is not expired."""
+    monkeypatch.setattr(settings, 'JOB_STALE_SECONDS', 2)
+    job, _ = create_job('refresh_all', 'ciav')
+    states = []
+
+    def target(context):
+        for _ in range(7):
+            time.sleep(0.5)
+            states.append(get_job(job['id'])['state'])
+        return {}
+
+    run_job(job['id'], target)
+    assert set(states) == {'running'}
+    assert get_job(job['id'])['state'] == 'completed'
+
+def test_outcome_does_not_overwrite_expired_job(jobs_db):
+    """A job failed as stale while still running keeps its failed state when it completes."""
+    job, _ = create_job('refresh_all', 'ciav')
+
+    def target(context):
+        _set_job(jobs_db, job['id'], state='failed', error='Job stopped reporting progress')
+        return {'count': 3}
+
+    run_job(job['id'], target)
+    finished = get_job(job['id'])
+    assert finished['state'] == 'failed'
+    assert finished['result'] is None
+
+def test_cancel_queued_job_is_not_started():
+    """Cancelling a queued job finishes it immediately and run_job does not call the target."""
+    job, _ = create_job('test_results_export', 'ciav')
+    cancelled = request_cancel(job['id'])
+    assert cancelled['state'] == 'cancelled'
+
+    calls = []
+    run_job(job['id'], lambda context: calls.append(1))
+    assert calls == []
+    assert get_job(job['id'])['state'] == 'cancelled'
+
+def test_cancel_running_job_stops_at_next_progress():
+    """A running job raises JobCancelled at its next progress report and ends cancelled."""
+    job, _ = create_job('test_results_export', 'ciav')
+    started, reported = threading.Event(), []
+
+    def target(context):
+        started.set()
+        for n in range(100):
+            time.sleep(0.05)
+            context.progress(records=n, force=True)
+            reported.append(n)
+        return {}
+
+    thread = threading.Thread(target=run_job, args=(job['id'], target))
+    thread.start()
+    assert started.wait(5)
+    assert request_cancel(job['id'])['cancel_requested']
+    thread.join(10)
+
+    assert get_job(job['id'])['state'] == 'cancelled'
+    assert len(reported) < 100
+    assert request_cancel('unknown') is None
+
+@pytest.fixture
+def client():
+    from app import create_app
+    app = create_app()
+    app.config['TESTING'] = True
+    return app.test_client()
+
+def _login(client, username):
+    with client.session_transaction() as sess:
+        sess['cookies'] = {}
+        sess['url'] = 'http://localhost'
+        sess['environment'] = 'ciav'
+        sess['username'] = username
+
+def test_job_routes_authorize_on_owner(client):
+    """Other users cannot see a job; joined users can see it but only the owner can cancel it."""
+    job, _ = create_job('refresh_all', 'ciav', dedupe_key='refresh_all:ciav', owner='alice')
+    create_job('refresh_all', 'ciav', dedupe_key='refresh_all:ciav', owner='bob')
+
+    _login(client, 'carol')
+    assert client.get(f"/api/jobs/{job['id']}").status_code == 404
+    assert client.post(f"/api/jobs/{job['id']}/cancel").status_code == 404
+    assert client.get('/api/jobs').get_json()['jobs'] == []
+
+    _login(client, 'bob')
+    assert client.get(f"/api/jobs/{job['id']}").status_code == 200
+    assert client.post(f"/api/jobs/{job['id']}/cancel").status_code == 403
+
+    _login(client, 'alice')
+    response = client.post(f"/api/jobs/{job['id']}/cancel")
+    assert response.status_code == 200
+    assert response.get_json()['job']['state'] == 'cancelled'
+
+def test_owner_column_added_to_existing_database(jobs_db):
+    """Databases created before jobs had owners get the column on first use."""
+    conn = sqlite3.connect(str(jobs_db))
+    conn.executescript(
+        "CREATE TABLE jobs (id TEXT PRIMARY KEY, kind TEXT NOT NULL, environment TEXT, state TEXT NOT NULL, "
+        "dedupe_key TEXT, params TEXT, external_id TEXT, progress_bytes INTEGER NOT NULL DEFAULT 0, "
+        "progress_records INTEGER NOT NULL DEFAULT 0, message TEXT, result TEXT, error TEXT, "
+        "cancel_requested INTEGER NOT NULL DEFAULT 0, owner_pid INTEGER, created_at TEXT NOT NULL, "
+        "started_at TEXT, finished_at TEXT, updated_at TEXT NOT NULL);"
+        "INSERT INTO jobs (id, kind, state, created_at, updated_at) VALUES ('old', 'sreq_coverage', 'completed', '2024-01-01', '2024-01-01');"
+    )
+    conn.close()
+
+    assert get_job('old', user='alice')['owner'] is None
+    job, _ = create_job('sreq_coverage', 'ciav', owner='alice')
+    assert get_job(job['id'])['owner'] == 'alice'
+
+def test_jobs_of_stopped_workers_fail_without_waiting(jobs_db):
+    """Active jobs created by a process on this host that is gone fail at lookup; other hosts' jobs wait for the timeout."""
+    worker = subprocess.Popen([sys.executable, '-c', 'pass'])
+    worker.wait()
+    dead, _ = create_job('refresh_all', 'ciav', dedupe_key='refresh_all:ciav')
+    _set_job(jobs_db, dead['id'], state='running', owner_pid=worker.pid)
+    reused, _ = create_job('sreq_coverage', 'ciav')
+    jobs._created_here.discard(reused['id']) # Created by an earlier process with this pid
+    remote, _ = create_job('refresh_all', 'cwix')
+    _set_job(jobs_db, remote['id'], owner_pid=worker.pid, owner_host='other-host')
+    running, _ = create_job('test_results_export', 'ciav')
+
+    assert get_job(dead['id'])['state'] == 'failed'
+    assert 'gone' in get_job(dead['id'])['error']
+    assert get_job(reused['id'])['state'] == 'failed'
+    assert get_job(remote['id'])['state'] == 'queued'
+    assert get_job(running['id'])['state'] == 'queued'
+    _, created = create_job('refresh_all', 'ciav', dedupe_key='refresh_all:ciav')
+    assert created
@@ -0,0 +1,218 @@
+"""
+Tests for the retry policy and circuit breakers of outgoing API requests
+(app/api/resilience.py) and their use in ApiClient._send.
+"""
+import sys
+import os
+import json
+import threading
+import uuid
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import requests
+
+# Add the app directory to the path so we can import the module
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.api import client as client_module
+from app.api import resilience
+from app.api.client import ApiClient
+from app.api.iocore2 import IOCore2ApiClient
+from app.api.resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, RetryPolicy, parse_retry_after
+from app.core.exceptions import ApiRequestError, CircuitOpenError
+from app.utils.dataset_store import read_dataset
+
+def test_retry_policy_retries_idempotent_methods_only():
+    """GET/HEAD/OPTIONS are retried by default, POST is not."""
+    policy = RetryPolicy()
+    assert policy.is_retryable('get')
+    assert policy.is_retryable('HEAD')
+    assert not policy.is_retryable('POST')
+
+def test_should_retry_statuses_and_attempts():
+    """Connection errors and 429/502/504 are retried until max_attempts; 503 only with Retry-After."""
+    policy = RetryPolicy(max_attempts=3)
+    assert policy.should_retry(1)
+    assert policy.should_retry(2, 502)
+    assert not policy.should_retry(3, 502)
+    assert policy.should_retry(1, 429)
+    assert not policy.should_retry(1, 500)
+    assert not policy.should_retry(1, 404)
+    assert not policy.should_retry(1, 503)
+    assert policy.should_retry(1, 503, retry_after='2')
+
+def test_delay_uses_retry_after_capped_by_backoff_max():
+    """A Retry-After header sets the delay, capped at backoff_max."""
+    policy = RetryPolicy(backoff_max=10.0)
+    assert policy.delay(1, retry_after='4') == 4.0
+    assert policy.delay(1, retry_after='120') == 10.0
+
+def test_delay_backoff_has_full_jitter_within_bounds():
+    """Without Retry-After the delay is uniform in [0, min(backoff_max, base * 2^(attempt-1))]."""
+    policy = RetryPolicy(backoff_base=0.5, backoff_max=3.0)
+    for attempt, bound in ((1, 0.5), (2, 1.0), (3, 2.0), (6, 3.0)):
+        delays = [policy.delay(attempt) for _ in range(200)]
+        assert all(0 <= delay <= bound for delay in delays)
+
+def test_parse_retry_after():
+    """Retry-After accepts seconds or an HTTP date; invalid values are ignored."""
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('7') == 7.0
+    assert parse_retry_after('soon') is None
+    in_a_minute = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=60), usegmt=True)
+    assert 55 <= parse_retry_after(in_a_minute) <= 60
+    assert parse_retry_after(format_datetime(datetime(2000, 1, 1, tzinfo=timezone.utc), usegmt=True)) == 0.0
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(resilience.time, 'monotonic', clock)
+    return clock
+
+def test_circuit_opens_after_consecutive_failures(clock):
+    """The circuit opens at the failure threshold; a success in between resets the count."""
+    breaker = CircuitBreaker('host', failure_threshold=3, reset_seconds=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED and breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow_request()
+    clock.now += 10
+    assert breaker.retry_in() == pytest.approx(20)
+
+def test_half_open_trial_closes_or_reopens(clock):
+    """After reset_seconds one trial request is allowed; its outcome closes or re-opens the circuit."""
+    breaker = CircuitBreaker('host', failure_threshold=1, reset_seconds=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow_request()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.retry_in() == pytest.approx(30)
+
+    clock.now += 30
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow_request()
+
+class _FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def close(self):
+        pass
+
+def _client(outcomes, monkeypatch, max_attempts=3):
+    """ApiClient on a fresh host whose session returns (or raises) the given outcomes in order."""
+    monkeypatch.setattr(client_module.time, 'sleep', lambda seconds: None)
+    client = ApiClient(f"http://{uuid.uuid4().hex}.test", retry_policy=RetryPolicy(max_attempts=max_attempts))
+    calls = []
+
+    def request(method, url, **kwargs):
+        calls.append(method)
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return _FakeResponse(outcome)
+
+    client.session.request = request
+    return client, calls
+
+def test_send_retries_get_until_success(monkeypatch):
+    """A GET answered by 502 and a connection error is retried and returns the final response."""
+    client, calls = _client([502, requests.ConnectionError(), 200], monkeypatch)
+    response = client._send('GET', client.base_url)
+    assert response.status_code == 200
+    assert calls == ['GET', 'GET', 'GET']
+
+def test_send_does_not_retry_post_or_read_timeouts(monkeypatch):
+    """POSTs return the first response; read timeouts are raised without retrying."""
+    client, calls = _client([502], monkeypatch)
+    assert client._send('POST', client.base_url).status_code == 502
+    assert calls == ['POST']
+
+    client, calls = _client([requests.ReadTimeout()], monkeypatch)
+    with pytest.raises(requests.ReadTimeout):
+        client._send('GET', client.base_url)
+    assert calls == ['GET']
+
+def test_send_refuses_requests_while_circuit_open(monkeypatch):
+    """Failures open the host's circuit; further requests fail fast with CircuitOpenError."""
+    monkeypatch.setattr(resilience.settings, 'CIRCUIT_FAILURE_THRESHOLD', 2)
+    client, calls = _client([500, 500, 200], monkeypatch)
+    assert client._send('GET', client.base_url).status_code == 500
+    assert client._send('GET', client.base_url).status_code == 500
+    with pytest.raises(CircuitOpenError) as excinfo:
+        client._send('GET', client.base_url)
+    assert excinfo.value.status_code == 503
+    assert calls == ['GET', 'GET']
+
+@pytest.mark.parametrize('method, file_name', [('get_patterns', 'pattern.json'), ('get_actors', 'actors.json')])
+def test_open_circuit_keeps_saved_patterns_and_actors(tmp_path, monkeypatch, method, file_name):
+    """An open circuit is raised and leaves the saved file alone; other API errors still write an empty one."""
+    monkeypatch.chdir(tmp_path)
+    saved = tmp_path / 'data' / 'ciav' / file_name
+    saved.parent.mkdir(parents=True)
+    saved.write_text(json.dumps([{'id': 1}]))
+    client = IOCore2ApiClient(f"http://{uuid.uuid4().hex}.test")
+
+    def unavailable(*args, **kwargs):
+        raise CircuitOpenError()
+
+    monkeypatch.setattr(client, 'get', unavailable)
+    with pytest.raises(CircuitOpenError):
+        getattr(client, method)('ciav')
+    assert read_dataset(saved) == [{'id': 1}]
+
+    def not_found(*args, **kwargs):
+        raise ApiRequestError(status_code=404)
+
+    monkeypatch.setattr(client, 'get', not_found)
+    assert getattr(client, method)('ciav')['count'] == 0
+    assert read_dataset(saved) == []
+
+def test_last_known_responses_survive_concurrent_use(monkeypatch):
+    """Threads remembering and reading last-known responses keep the cache bounded and consistent."""
+    monkeypatch.setattr(client_module, '_LAST_KNOWN_MAX_ENTRIES', 8)
+    client = ApiClient(f"http://{uuid.uuid4().hex}.test")
+    errors = []
+
+    def use(worker):
+        try:
+            for n in range(500):
+                response = requests.Response()
+                response.status_code = 200
+                response._content = b'[]'
+                url = f"{client.base_url}/{(worker + n) % 20}"
+                client._remember_response(url, None, response)
+                client._last_known_response(url, None)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=use, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+
+    assert errors == []
+    assert len(client._last_known) == 8
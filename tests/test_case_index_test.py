@@ -0,0 +1,115 @@
+"""
+Tests for the incremental test-case sync index (app/utils/test_case_index.py).
+"""
+import sys
+import os
+import json
+
+import pytest
+
+# Add the app directory to the path so we can import the module
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Imported as a module: pytest would try to collect the Test* classes
+from app.utils import test_case_index as tci
+
+def _test_case(key, version, title='Title', updated='2025-01-01T00:00:00', **extra):
+    return {'key': key, 'title': title, 'version': {'number': version, 'updatedOn': updated}, **extra}
+
+def _indexed(*test_cases):
+    """Index built by a full sync of the given test cases."""
+    index = tci.TestCaseIndex()
+    sync = index.start_sync(full=True)
+    for test_case in test_cases:
+        sync.add(test_case)
+    sync.finish()
+    return index
+
+def test_newer_version_replaces_index_entry():
+    """A new version of an indexed test case is an update of its key, not an addition."""
+    index = _indexed(_test_case('TC-1', 1), _test_case('TC-2', 1))
+    sync = index.start_sync(full=False)
+    assert sync.add(_test_case('TC-1', 2, updated='2025-02-01T00:00:00'))
+    changes = sync.finish()
+
+    assert changes.added == []
+    assert changes.updated == ['TC-1']
+    assert set(index.entries) == {'TC-1', 'TC-2'}
+    assert index.entries['TC-1']['version'] == 2
+    assert index.high_water_mark == '2025-02-01T00:00:00'
+
+def test_older_and_unchanged_versions_are_ignored():
+    """An older version than the indexed one, or identical content, is not a change."""
+    index = _indexed(_test_case('TC-1', 3))
+    sync = index.start_sync(full=False)
+    assert not sync.add(_test_case('TC-1', 2, title='Old title'))
+    assert not sync.add(_test_case('TC-1', 3))
+    changes = sync.finish()
+
+    assert not changes.changed
+    assert index.entries['TC-1']['version'] == 3
+
+def test_full_listing_with_several_versions_keeps_newest_once():
+    """Several versions of a key in one download give one entry, at the newest version."""
+    index = tci.TestCaseIndex()
+    sync = index.start_sync(full=True)
+    for version in (1, 3, 2):
+        sync.add(_test_case('TC-1', version, title=f"v{version}"))
+    changes = sync.finish()
+
+    assert changes.added == ['TC-1']
+    assert list(index.entries) == ['TC-1']
+    assert index.entries['TC-1']['version'] == 3
+
+def test_full_sync_removes_unseen_and_incremental_removes_deleted():
+    """Keys missing from a full listing, or flagged deleted, are removed."""
+    index = _indexed(_test_case('TC-1', 1), _test_case('TC-2', 1), _test_case('TC-3', 1))
+    sync = index.start_sync(full=True)
+    sync.add(_test_case('TC-1', 1))
+    sync.add(_test_case('TC-2', 1))
+    assert sync.finish().removed == ['TC-3']
+
+    sync = index.start_sync(full=False)
+    assert sync.add(_test_case('TC-2', 2, deleted=True))
+    assert sync.finish().removed == ['TC-2']
+    assert list(index.entries) == ['TC-1']
+
+def test_merge_replaces_versions_and_drops_removed():
+    """The merged catalog keeps one entry per key at its newest version, in store order."""
+    store = [_test_case('TC-1', 1), _test_case('TC-2', 1), _test_case('TC-3', 1)]
+    changed = [_test_case('TC-1', 2), _test_case('TC-4', 1), _test_case('TC-3', 2, deleted=True)]
+    merged = tci.merge_test_cases(store, changed, removed=['TC-3'])
+
+    assert [(item['key'], item['version']['number']) for item in merged] == [
+        ('TC-1', 2), ('TC-2', 1), ('TC-4', 1)
+    ]
+
+def test_merge_drops_superseded_versions_already_stored():
+    """Duplicate versions left in test_cases.json by earlier syncs are collapsed to the newest."""
+    store = [_test_case('TC-1', 1), _test_case('TC-1', 2), _test_case('TC-2', 1)]
+    merged = tci.merge_test_cases(store, [_test_case('TC-2', 1, title='Edited')])
+
+    assert [(item['key'], item['version']['number']) for item in merged] == [('TC-1', 2), ('TC-2', 1)]
+    assert merged[1]['title'] == 'Edited'
+
+def test_version_order_is_numeric():
+    """Version 10 is newer than version 9."""
+    index = _indexed(_test_case('TC-1', 9))
+    sync = index.start_sync(full=False)
+    assert sync.add(_test_case('TC-1', 10))
+    assert sync.finish().updated == ['TC-1']
+
+def test_index_round_trip_and_old_format(tmp_path, monkeypatch):
+    """The index survives save/load; an index in the old key@version format is rebuilt."""
+    monkeypatch.chdir(tmp_path)
+    index = _indexed(_test_case('TC-1', 2))
+    index.save('ciav')
+    loaded = tci.TestCaseIndex.load('ciav')
+    assert loaded.entries == index.entries
+    assert not loaded.needs_full_sync(max_age_hours=24)
+
+    index_path = tmp_path / 'data' / 'ciav' / tci.INDEX_FILE
+    index_path.write_text(json.dumps({'format': 1, 'entries': {'TC-1@2': {'hash': 'x'}}}), encoding='utf-8')
+    old = tci.TestCaseIndex.load('ciav')
+    assert old.entries == {}
+    assert old.needs_full_sync(max_age_hours=24)
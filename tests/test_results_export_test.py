@@ -0,0 +1,44 @@
+"""
+Tests for downloading a TestExecutionReport export (app/api/iocore2.py).
+"""
+import sys
+import os
+import json
+
+import pytest
+
+# Add the app directory to the path so we can import the module
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.api.iocore2 import IOCore2ApiClient
+from app.utils.dataset_store import read_dataset
+
+class _FakeResponse:
+    status_code = 200
+
+    def close(self):
+        pass
+
+def _download(tmp_path, monkeypatch, document, chunk_size=64):
+    monkeypatch.chdir(tmp_path)
+    client = IOCore2ApiClient('http://iocore2.test')
+    payload = json.dumps(document).encode()
+    monkeypatch.setattr(client, 'post', lambda *args, **kwargs: _FakeResponse())
+    monkeypatch.setattr(
+        client, 'iter_response_chunks',
+        lambda response, start_time: (payload[i:i + chunk_size] for i in range(0, len(payload), chunk_size))
+    )
+    count = client.download_test_results_export('job-1', 'ciav')
+    assert read_dataset(tmp_path / 'data' / 'ciav' / 'test_results.json') == document
+    return count
+
+@pytest.mark.parametrize('chunk_size', [7, 64, 100000])
+def test_export_counts_tests_of_new_format(tmp_path, monkeypatch, chunk_size):
+    """Exports with Tests at the root count their tests, whatever the chunking."""
+    document = {'Tests': [{'Key': f"T-{n}", 'Name': 'x' * 50} for n in range(40)]}
+    assert _download(tmp_path, monkeypatch, document, chunk_size) == 40
+
+def test_export_counts_test_plans_of_legacy_format(tmp_path, monkeypatch):
+    """Legacy exports count their test plans."""
+    document = {'TestPlans': [{'Key': f"P-{n}", 'Tests': [{'Key': 'T-1'}]} for n in range(3)]}
+    assert _download(tmp_path, monkeypatch, document) == 3
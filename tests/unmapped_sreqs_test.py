@@ -0,0 +1,80 @@
+"""
+Tests for the unmapped SREQ index (app/data_models/unmapped_sreqs.py).
+"""
+import sys
+import os
+
+import pytest
+
+# Add the app directory to the path so we can import the module
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.exceptions import ValidationError
+from app.data_models.unmapped_sreqs import merge_unmapped_sreqs, query_unmapped_sreqs
+
+def _index(count=23):
+    """Index of count SREQs over three SIs; every fourth one is resolved."""
+    return {
+        f"SREQ-{n:03d}": {
+            'sreqName': f"Requirement {n}", 'siNumber': f"SI-{n % 3}", 'siName': f"Service {n % 3}",
+            'active': n % 4 != 0,
+        }
+        for n in range(1, count + 1)
+    }
+
+def _all_pages(index, page_size, **filters):
+    first = query_unmapped_sreqs(index, page=1, page_size=page_size, **filters)
+    items = list(first['items'])
+    for page in range(2, first['pages'] + 1):
+        result = query_unmapped_sreqs(index, page=page, page_size=page_size, **filters)
+        assert result['total'] == first['total']
+        items.extend(result['items'])
+    return first, items
+
+def test_pages_cover_every_match_once():
+    """Walking all pages returns each matching entry exactly once, in index order."""
+    index = _index()
+    first, items = _all_pages(index, page_size=5, status='all')
+
+    assert first['total'] == 23
+    assert first['pages'] == 5
+    assert [item['sreqNumber'] for item in items] == list(index)
+    assert len(query_unmapped_sreqs(index, page=5, page_size=5, status='all')['items']) == 3
+
+def test_page_past_the_end_is_empty():
+    """A page after the last one has no items but keeps the totals."""
+    result = query_unmapped_sreqs(_index(), page=9, page_size=5)
+    assert result['items'] == []
+    assert result['total'] == 18
+    assert result['pages'] == 4
+
+def test_filters_apply_before_paging_and_counts_cover_whole_index():
+    """Status, SI and search filters select the paged entries; counts ignore the filters."""
+    index = _index()
+    first, items = _all_pages(index, page_size=2, status='active', si_number='SI-1', search='requirement 1')
+
+    expected = [n for n, entry in index.items() if entry['active'] and entry['siNumber'] == 'SI-1' and 'Requirement 1' in entry['sreqName']]
+    assert [item['sreqNumber'] for item in items] == expected
+    assert first['total'] == len(expected)
+    assert first['counts']['active'] == 18
+    assert first['counts']['resolved'] == 5
+    assert sum(si['count'] for si in first['counts']['by_si']) == 18
+
+    resolved = query_unmapped_sreqs(index, status='resolved', page_size=500)
+    assert [item['sreqNumber'] for item in resolved['items']] == ['SREQ-004', 'SREQ-008', 'SREQ-012', 'SREQ-016', 'SREQ-020']
+
+def test_invalid_status_and_paging_are_rejected():
+    """Unknown statuses, page 0 and page sizes outside 1..MAX_PAGE_SIZE raise ValidationError."""
+    for kwargs in ({'status': 'open'}, {'page': 0}, {'page_size': 0}, {'page_size': 501}):
+        with pytest.raises(ValidationError):
+            query_unmapped_sreqs(_index(), **kwargs)
+
+def test_merge_keeps_first_seen_and_marks_resolved():
+    """Re-merged entries keep firstSeen; SREQs no longer unmapped stay in the index as resolved."""
+    first = merge_unmapped_sreqs({}, {'S-1': {'sreqName': 'One'}, 'S-2': {'sreqName': 'Two'}}, 'a' * 64)
+    second = merge_unmapped_sreqs(first, {'S-1': {'sreqName': 'One'}}, 'b' * 64)
+
+    assert second['S-1']['firstSeen'] == first['S-1']['firstSeen']
+    assert second['S-1']['lastSeen']['sha256'] == 'b' * 16
+    assert second['S-2']['active'] is False
+    assert second['S-2']['lastSeen'] == first['S-2']['lastSeen']
@@ -0,0 +1,204 @@
+"""
+Benchmarks the IOCore2 ingest path against the offline simulator.
+
+Each IOCore2ApiClient method runs in a fresh process, in a temporary working
+directory (the client writes to ./data/<env>), so its peak RSS is its own.
+Reports wall time, peak RSS and throughput per method and scale.
+
+Usage:
+    python tools/benchmark_ingest.py --scale 1 10 --latency-ms 20
+    python tools/benchmark_ingest.py --methods get_requirement_coverage --scale 100 --json results.json
+
+--warm first runs every method once, untimed, and then measures a second
+run over its data, which exercises the unchanged-payload path.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from iocore2_simulator import SimulatorConfig, start_simulator # noqa: E402
+
+ENVIRONMENT = 'ciav'
+
+# Method -> keyword arguments; each returns a result dict with 'count' where applicable
+BENCHMARK_METHODS = {
+    'login': None,
+    'get_requirement_coverage': {},
+    'get_ier_coverage': {},
+    'get_test_results_new': {'include_related': False},
+    'get_test_results': {'include_related': False},
+    'get_test_cases': {},
+    'get_participants': {},
+    'get_objectives': {},
+}
+
+# Inputs the analyses read next to the downloaded data
+_SUPPORT_FILES = ('TIN2.csv',)
+
+def _peak_rss_mb() -> Optional[float]:
+    # VmHWM is reset by exec; ru_maxrss is not, so it would include the parent's peak
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError: # Windows
+        try:
+            import psutil
+            info = psutil.Process().memory_info()
+            return getattr(info, 'peak_wset', info.rss) / 1024 / 1024
+        except ImportError:
+            return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+def _run_method(base_url: str, method: str, workdir: str, queue) -> None:
+    """Child process: times one call of method in workdir (logging in first, untimed)."""
+    os.chdir(workdir)
+    logging.basicConfig(level=logging.ERROR)
+    try:
+        from app.api.iocore2 import IOCore2ApiClient
+
+        client = IOCore2ApiClient(base_url=base_url)
+        if method != 'login':
+            client.login('benchmark', 'benchmark')
+        baseline_mb = _peak_rss_mb()
+
+        start = time.perf_counter()
+        if method == 'login':
+            outcome = client.login('benchmark', 'benchmark')
+        else:
+            outcome = getattr(client, method)(environment=ENVIRONMENT, **BENCHMARK_METHODS[method])
+        wall = time.perf_counter() - start
+
+        queue.put({
+            'wall_seconds': wall,
+            'count': outcome.get('count') if isinstance(outcome, dict) else None,
+            'unchanged': outcome.get('unchanged') if isinstance(outcome, dict) else None,
+            'baseline_rss_mb': baseline_mb,
+            'peak_rss_mb': _peak_rss_mb(),
+        })
+    except Exception as e:
+        queue.put({'error': f"{type(e).__name__}: {getattr(e, 'message', None) or e}"})
+
+def _run_child(context, base_url: str, method: str, workdir: str, queue) -> Dict[str, Any]:
+    process = context.Process(target=_run_method, args=(base_url, method, workdir, queue))
+    process.start()
+    outcome = queue.get()
+    process.join()
+    return outcome
+
+def run_benchmark(
+    config: SimulatorConfig,
+    methods: List[str],
+    warm: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    Runs the given methods against a simulator started with config.
+
+    Returns:
+        One result per method with wall time, peak RSS, bytes received and throughput
+    """
+    server, _ = start_simulator(config)
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    context = multiprocessing.get_context('spawn')
+    results = []
+    try:
+        for method in methods:
+            workdir = tempfile.mkdtemp(prefix='ionic-bench-')
+            data_dir = Path(workdir) / 'data' / ENVIRONMENT
+            data_dir.mkdir(parents=True)
+            for name in _SUPPORT_FILES:
+                if (Path(config.fixtures_dir) / name).exists():
+                    shutil.copy(Path(config.fixtures_dir) / name, data_dir / name)
+
+            queue = context.Queue()
+            if warm:
+                _run_child(context, base_url, method, workdir, queue)
+            before = server.state.stats()
+            outcome = _run_child(context, base_url, method, workdir, queue)
+            after = server.state.stats()
+            shutil.rmtree(workdir, ignore_errors=True)
+
+            received_mb = (after['bytes_sent'] - before['bytes_sent']) / 1024 / 1024
+            outcome.update({
+                'method': method,
+                'scale': config.scale,
+                'requests': after['requests'] - before['requests'],
+                'errors_injected': after['errors_injected'] - before['errors_injected'],
+                'received_mb': received_mb,
+            })
+            wall = outcome.get('wall_seconds')
+            if wall:
+                outcome['mb_per_second'] = received_mb / wall
+                if outcome.get('count'):
+                    outcome['records_per_second'] = outcome['count'] / wall
+            results.append(outcome)
+    finally:
+        server.shutdown()
+    return results
+
+def _format_table(results: List[Dict[str, Any]]) -> str:
+    def fmt(value, spec):
+        width = int(spec.split('.')[0].rstrip('df'))
+        return format(value, spec) if isinstance(value, (int, float)) else '-'.rjust(width)
+
+    lines = [f"{'method':<26} {'scale':>5} {'wall s':>8} {'records':>9} {'rec/s':>10} {'MB':>8} {'MB/s':>7} {'peak RSS MB':>11}  note"]
+    for r in results:
+        note = r.get('error') or ('unchanged' if r.get('unchanged') else '')
+        if r.get('errors_injected'):
+            note = f"{note} {r['errors_injected']} injected errors".strip()
+        lines.append(
+            f"{r['method']:<26} {r['scale']:>5} {fmt(r.get('wall_seconds'), '8.2f')} {fmt(r.get('count'), '9d')} "
+            f"{fmt(r.get('records_per_second'), '10.0f')} {fmt(r.get('received_mb'), '8.1f')} "
+            f"{fmt(r.get('mb_per_second'), '7.1f')} {fmt(r.get('peak_rss_mb'), '11.1f')}  {note}"
+        )
+    return '\n'.join(lines)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark IOCore2ApiClient ingest methods against the offline simulator")
+    parser.add_argument('--methods', nargs='+', choices=list(BENCHMARK_METHODS), default=list(BENCHMARK_METHODS))
+    parser.add_argument('--scale', nargs='+', type=int, default=[1], help='Dataset scale factors to run')
+    parser.add_argument('--fixtures', type=Path, default=SimulatorConfig.fixtures_dir)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--bandwidth-kbps', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--export-seconds', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--warm', action='store_true', help='Measure a second run over the first run\'s data')
+    parser.add_argument('--json', type=Path, help='Also write the results to this file')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(message)s')
+
+    results = []
+    for scale in args.scale:
+        config = SimulatorConfig(
+            fixtures_dir=args.fixtures, scale=scale, latency_ms=args.latency_ms,
+            bandwidth_kbps=args.bandwidth_kbps, error_rate=args.error_rate,
+            export_seconds=args.export_seconds, seed=args.seed
+        )
+        results.extend(run_benchmark(config, args.methods, warm=args.warm))
+
+    print(_format_table(results))
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+    return 1 if any('error' in r for r in results) else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
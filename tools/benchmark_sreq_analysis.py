@@ -0,0 +1,136 @@
+"""
+Benchmarks the SREQ hierarchy builder (organize_hierarchical_data) and
+generate_markdown on synthetic SREQ sets.
+
+The synthetic set at scale N holds N copies of every row of a real SREQ.json
+(3,837 rows for ciav). Each copy gets its own TIN, EP and SREQ numbers, so
+the number of TINs and EPs per SI grows with the scale, which is the case
+that used to degrade quadratically. Rows are generated while the builder
+consumes them, and every scale runs in a fresh process so its peak RSS is
+its own.
+
+Usage:
+    python tools/benchmark_sreq_analysis.py
+    python tools/benchmark_sreq_analysis.py --scale 1 10 100 --json results.json
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from benchmark_ingest import _peak_rss_mb # noqa: E402
+
+DEFAULT_SOURCE = Path(__file__).resolve().parent.parent / 'data' / 'ciav' / 'SREQ.json'
+
+# Fields read by organize_hierarchical_data
+_FIELDS = ('siNumber', 'tinNumber', 'tinName', 'epNumber', 'epName', 'sreqNumber', 'sreqName')
+# Fields made unique per copy
+_NUMBERED_FIELDS = ('tinNumber', 'epNumber', 'sreqNumber')
+
+def synthetic_entries(base: List[Dict[str, Any]], scale: int) -> Iterator[Dict[str, Any]]:
+    """Yields scale copies of the base rows, numbering the TIN, EP and SREQ of each copy."""
+    for copy in range(scale):
+        for row in base:
+            entry = {name: row.get(name, '') for name in _FIELDS}
+            if copy:
+                for name in _NUMBERED_FIELDS:
+                    if entry[name]:
+                        entry[name] = f"{entry[name]}~{copy}"
+            yield entry
+
+def _run_scale(source: str, scale: int, queue) -> None:
+    """Child process: builds the hierarchy and markdown for one scale."""
+    logging.basicConfig(level=logging.ERROR)
+    try:
+        from app.data_models.sreq_analysis import organize_hierarchical_data, generate_markdown
+        from app.utils.dataset_store import read_dataset
+
+        base = read_dataset(source)
+        baseline_mb = _peak_rss_mb()
+
+        # Time generating the rows alone so it can be subtracted
+        start = time.perf_counter()
+        rows = sum(1 for _ in synthetic_entries(base, scale))
+        generate_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        hierarchy = organize_hierarchical_data(synthetic_entries(base, scale))
+        build_seconds = time.perf_counter() - start - generate_seconds
+
+        start = time.perf_counter()
+        markdown = generate_markdown(hierarchy)
+        markdown_seconds = time.perf_counter() - start
+
+        queue.put({
+            'rows': rows,
+            'sis': len(hierarchy),
+            'tins': sum(len(si.tins) for si in hierarchy.values()),
+            'build_seconds': build_seconds,
+            'markdown_seconds': markdown_seconds,
+            'markdown_mb': len(markdown) / 1024 / 1024,
+            'baseline_rss_mb': baseline_mb,
+            'peak_rss_mb': _peak_rss_mb(),
+        })
+    except Exception as e:
+        queue.put({'error': f"{type(e).__name__}: {e}"})
+
+def run_benchmark(source: Path, scales: List[int]) -> List[Dict[str, Any]]:
+    """
+    Runs the builder on synthetic sets of the given scales.
+
+    Returns:
+        One result per scale with row count, timings, microseconds per row and peak RSS
+    """
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for scale in scales:
+        queue = context.Queue()
+        process = context.Process(target=_run_scale, args=(str(source), scale, queue))
+        process.start()
+        outcome = queue.get()
+        process.join()
+        outcome['scale'] = scale
+        if outcome.get('rows'):
+            outcome['build_us_per_row'] = outcome['build_seconds'] / outcome['rows'] * 1e6
+            outcome['markdown_us_per_row'] = outcome['markdown_seconds'] / outcome['rows'] * 1e6
+        results.append(outcome)
+    return results
+
+def _format_table(results: List[Dict[str, Any]]) -> str:
+    def fmt(value, spec):
+        width = int(spec.split('.')[0].rstrip('df'))
+        return format(value, spec) if isinstance(value, (int, float)) else '-'.rjust(width)
+
+    lines = [f"{'scale':>6} {'rows':>10} {'TINs':>8} {'build s':>9} {'us/row':>7} {'markdown s':>10} {'us/row':>7} {'peak RSS MB':>11}  note"]
+    for r in results:
+        lines.append(
+            f"{r['scale']:>6} {fmt(r.get('rows'), '10d')} {fmt(r.get('tins'), '8d')} "
+            f"{fmt(r.get('build_seconds'), '9.3f')} {fmt(r.get('build_us_per_row'), '7.2f')} "
+            f"{fmt(r.get('markdown_seconds'), '10.3f')} {fmt(r.get('markdown_us_per_row'), '7.2f')} "
+            f"{fmt(r.get('peak_rss_mb'), '11.1f')}  {r.get('error', '')}"
+        )
+    return '\n'.join(lines)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the SREQ hierarchy builder on synthetic SREQ sets")
+    parser.add_argument('--source', type=Path, default=DEFAULT_SOURCE, help='SREQ.json the synthetic rows are copied from')
+    parser.add_argument('--scale', nargs='+', type=int, default=[10, 100, 1000], help='Multiples of the source rows to run')
+    parser.add_argument('--json', type=Path, help='Also write the results to this file')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(message)s')
+
+    results = run_benchmark(args.source, args.scale)
+    print(_format_table(results))
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+    return 1 if any('error' in r for r in results) else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,327 @@
+"""
+Offline stand-in for an IOCore2 server, for exercising the ingest path locally.
+
+Serves the login form and the API endpoints used by IOCore2ApiClient from
+the data files of an environment (data/ciav by default), with every list
+replicated `scale` times. Latency, bandwidth and error injection are
+configurable, and GET payloads carry ETags so conditional requests get 304.
+
+Usage:
+    python tools/iocore2_simulator.py --port 8765 --scale 10 --latency-ms 50 --bandwidth-kbps 20000
+
+Then log in to http://127.0.0.1:8765 with any username and password.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import random
+import secrets
+import sys
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+_SESSION_COOKIE = '.AspNetCore.Cookies'
+_CHUNK_SIZE = 64 * 1024
+
+# Fields made unique in replicated records, so scaled datasets do not collapse on their keys
+_IDENTITY_FIELDS = ('sreqNumber', 'ierNumber', 'testCaseKey', 'key', 'id', 'Id')
+
+_LOGIN_PAGE = """<!DOCTYPE html>
+<html><body>
+<form method="post" action="/IdentityManagement/Account/Login">
+<input name="__RequestVerificationToken" type="hidden" value="{token}" />
+<input name="username" /><input name="password" type="password" />
+</form>
+</body></html>"""
+
+_HOME_PAGE = """<!DOCTYPE html>
+<html><body><form action="/Account/LogOff" method="post"></form></body></html>"""
+
+@dataclass
+class SimulatorConfig:
+    """How the simulator sizes and delivers its payloads."""
+    fixtures_dir: Path = BASE_DIR / 'data' / 'ciav'
+    scale: int = 1
+    latency_ms: float = 0.0 # Added before every response
+    bandwidth_kbps: float = 0.0 # Response body throughput limit (0 = unlimited)
+    error_rate: float = 0.0 # Fraction of API requests answered with error_status
+    error_status: int = 502
+    export_seconds: float = 3.0 # Time an export job stays Pending/Processing
+    seed: Optional[int] = None
+
+def _scale_records(records: list, scale: int) -> list:
+    if scale <= 1:
+        return records
+    scaled = list(records)
+    for copy in range(1, scale):
+        for record in records:
+            if isinstance(record, dict):
+                record = dict(record)
+                for name in _IDENTITY_FIELDS:
+                    if isinstance(record.get(name), str):
+                        record[name] = f"{record[name]}~{copy}"
+            scaled.append(record)
+    return scaled
+
+def _load_fixture(fixtures_dir: Path, name: str, default: Any) -> Any:
+    path = fixtures_dir / name
+    compressed = fixtures_dir / f"{name}.gz" # Stored by app.utils.dataset_store
+    if compressed.exists() and (not path.exists() or compressed.stat().st_mtime_ns >= path.stat().st_mtime_ns):
+        with gzip.open(compressed, 'rb') as f:
+            return json.load(f)
+    if not path.exists():
+        logging.warning(f"Fixture {path} not found, serving an empty dataset")
+        return default
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def _synthetic_test_cases(sreq_records: list) -> list:
+    """Test case catalog derived from the test cases referenced by the SREQ coverage."""
+    catalog = {}
+    for record in sreq_records:
+        key = record.get('testCaseKey')
+        if key and key not in catalog:
+            catalog[key] = {
+                'key': key,
+                'name': record.get('testCaseName') or key,
+                'state': 'ReadyForEvent',
+                'version': {'number': str(record.get('testCaseVersion') or 1), 'createdOn': '2025-01-01T00:00:00'}
+            }
+    return list(catalog.values())
+
+def build_payloads(config: SimulatorConfig) -> Dict[str, Tuple[bytes, str]]:
+    """
+    Serializes the datasets once, scaled by config.scale.
+
+    Returns:
+        Dictionary of API path -> (body, ETag)
+    """
+    fixtures_dir = Path(config.fixtures_dir)
+    sreq = _load_fixture(fixtures_dir, 'SREQ.json', [])
+    test_results = _load_fixture(fixtures_dir, 'test_results.json', {'TestPlans': []})
+    if isinstance(test_results, dict):
+        test_results = dict(test_results)
+        test_results['TestPlans'] = _scale_records(test_results.get('TestPlans', []), config.scale)
+
+    datasets = {
+        '/api/coverage/test-case-coverage/Get-Requirement-Coverage': _scale_records(sreq, config.scale),
+        '/api/coverage/test-case-coverage/Get-Ier-Coverage': _scale_records(_load_fixture(fixtures_dir, 'IER.json', []), config.scale),
+        '/api/participants': _scale_records(_load_fixture(fixtures_dir, 'participants.json', []), config.scale),
+        '/api/objectives': _scale_records(_load_fixture(fixtures_dir, 'objectives.json', []), config.scale),
+        '/api/test-cases': _scale_records(_synthetic_test_cases(sreq), config.scale),
+        '/api/public/test-results': test_results,
+        '/api/system/health': {'status': 'Healthy', 'simulated': True},
+    }
+    payloads = {}
+    for path, data in datasets.items():
+        body = json.dumps(data).encode('utf-8')
+        payloads[path] = (body, f'"{hashlib.sha1(body).hexdigest()}"')
+    return payloads
+
+class SimulatorState:
+    """Payloads, sessions, export jobs and counters shared by the request handlers."""
+
+    def __init__(self, config: SimulatorConfig):
+        self.config = config
+        self.payloads = build_payloads(config)
+        self.sessions = set()
+        self.exports: Dict[str, float] = {} # export job ID -> start time
+        self.bytes_sent = 0
+        self.requests = 0
+        self.errors_injected = 0
+        self.lock = threading.Lock()
+        self.random = random.Random(config.seed)
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {'bytes_sent': self.bytes_sent, 'requests': self.requests, 'errors_injected': self.errors_injected}
+
+class SimulatorHandler(BaseHTTPRequestHandler):
+    """Request handler; the server's `state` attribute holds the SimulatorState."""
+    protocol_version = 'HTTP/1.1'
+
+    @property
+    def state(self) -> SimulatorState:
+        return self.server.state
+
+    def log_message(self, format, *args):
+        logging.debug(f"{self.address_string()} {format % args}")
+
+    def _send(self, status: int, body: bytes = b'', content_type: str = 'application/json', headers: Optional[Dict[str, str]] = None) -> None:
+        config = self.state.config
+        if config.latency_ms:
+            time.sleep(config.latency_ms / 1000)
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+
+        # Throttle the body to the configured bandwidth
+        delay_per_chunk = (_CHUNK_SIZE * 8 / 1000 / config.bandwidth_kbps) if config.bandwidth_kbps else 0
+        for offset in range(0, len(body), _CHUNK_SIZE):
+            self.wfile.write(body[offset:offset + _CHUNK_SIZE])
+            if delay_per_chunk:
+                time.sleep(delay_per_chunk)
+        with self.state.lock:
+            self.state.bytes_sent += len(body)
+
+    def _send_json(self, data: Any, status: int = 200) -> None:
+        self._send(status, json.dumps(data).encode('utf-8'))
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def _authenticated(self) -> bool:
+        cookies = self.headers.get('Cookie', '')
+        for part in cookies.split(';'):
+            name, _, value = part.strip().partition('=')
+            if name == _SESSION_COOKIE and value in self.state.sessions:
+                return True
+        return False
+
+    def _begin_api_request(self) -> bool:
+        """Counts the request and applies authentication and error injection. False if already answered."""
+        config = self.state.config
+        with self.state.lock:
+            self.state.requests += 1
+            inject = config.error_rate and self.state.random.random() < config.error_rate
+            if inject:
+                self.state.errors_injected += 1
+        if not self._authenticated():
+            self._send(302, headers={'Location': '/IdentityManagement/Account/Login'}, content_type='text/html')
+            return False
+        if inject:
+            self._send_json({'error': 'Injected failure'}, status=config.error_status)
+            return False
+        return True
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == '/IdentityManagement/Account/Login':
+            self._send(200, _LOGIN_PAGE.format(token=secrets.token_hex(16)).encode('utf-8'), content_type='text/html')
+            return
+        if path not in self.state.payloads:
+            self._send_json({'error': f'Unknown endpoint {path}'}, status=404)
+            return
+        if not self._begin_api_request():
+            return
+
+        body, etag = self.state.payloads[path]
+        if self.headers.get('If-None-Match') == etag:
+            self._send(304, headers={'ETag': etag})
+        else:
+            self._send(200, body, headers={'ETag': etag})
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        body = self._read_body()
+        if path == '/IdentityManagement/Account/Login':
+            token = secrets.token_hex(16)
+            with self.state.lock:
+                self.state.sessions.add(token)
+            self._send(200, _HOME_PAGE.encode('utf-8'), content_type='text/html',
+                       headers={'Set-Cookie': f'{_SESSION_COOKIE}={token}; Path=/; HttpOnly'})
+            return
+        if path != '/api/public/feed/Export':
+            self._send_json({'error': f'Unknown endpoint {path}'}, status=404)
+            return
+        if not self._begin_api_request():
+            return
+
+        try:
+            request = json.loads(body or b'{}')
+        except ValueError:
+            self._send_json({'error': 'Invalid JSON'}, status=400)
+            return
+        request_type = request.get('$type')
+        if request_type == 'Schema':
+            job_id = uuid.uuid4().hex
+            with self.state.lock:
+                self.state.exports[job_id] = time.monotonic()
+            self._send_json({'jobId': job_id})
+            return
+
+        started = self.state.exports.get(request.get('jobId'))
+        if started is None:
+            self._send_json({'status': 'Failed', 'error': 'Unknown job'})
+            return
+        elapsed = time.monotonic() - started
+        export_seconds = self.state.config.export_seconds
+        if request_type == 'Job':
+            if elapsed >= export_seconds:
+                self._send_json({'status': 'Completed', 'progress': 100})
+            else:
+                self._send_json({
+                    'status': 'Pending' if elapsed < export_seconds / 4 else 'Processing',
+                    'progress': round(100 * elapsed / export_seconds)
+                })
+        elif request_type == 'Download':
+            self._send(200, self.state.payloads['/api/public/test-results'][0])
+        else:
+            self._send_json({'error': f'Unknown request type {request_type}'}, status=400)
+
+def start_simulator(config: SimulatorConfig, host: str = '127.0.0.1', port: int = 0) -> Tuple[ThreadingHTTPServer, threading.Thread]:
+    """
+    Starts the simulator in a daemon thread.
+
+    Args:
+        config: Simulator configuration
+        host: Interface to listen on
+        port: Port to listen on (0 picks a free one; see server.server_port)
+
+    Returns:
+        Tuple of (server, thread). Call server.shutdown() to stop it.
+    """
+    server = ThreadingHTTPServer((host, port), SimulatorHandler)
+    server.daemon_threads = True
+    server.state = SimulatorState(config)
+    thread = threading.Thread(target=server.serve_forever, name='iocore2-simulator', daemon=True)
+    thread.start()
+    sizes = ', '.join(f"{path.rsplit('/', 1)[-1]}={len(body) / 1024 / 1024:.1f}MB" for path, (body, _) in server.state.payloads.items())
+    logging.info(f"IOCore2 simulator on http://{host}:{server.server_port} (scale {config.scale}: {sizes})")
+    return server, thread
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--fixtures', type=Path, default=SimulatorConfig.fixtures_dir, help='Directory with SREQ.json, IER.json, ...')
+    parser.add_argument('--scale', type=int, default=1, help='Replicate every dataset this many times')
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--bandwidth-kbps', type=float, default=0.0, help='0 = unlimited')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of API requests that fail')
+    parser.add_argument('--error-status', type=int, default=502)
+    parser.add_argument('--export-seconds', type=float, default=3.0)
+    parser.add_argument('--seed', type=int)
+    return parser.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+    config = SimulatorConfig(
+        fixtures_dir=args.fixtures, scale=args.scale, latency_ms=args.latency_ms,
+        bandwidth_kbps=args.bandwidth_kbps, error_rate=args.error_rate,
+        error_status=args.error_status, export_seconds=args.export_seconds, seed=args.seed
+    )
+    server, thread = start_simulator(config, args.host, args.port)
+    try:
+        thread.join()
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())